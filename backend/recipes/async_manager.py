@@ -0,0 +1,273 @@
+# backend/recipes/async_manager.py - Async Manager.io client for the ASGI views
+#
+# AsyncManagerService is ManagerApiService with coroutine versions of the reads and
+# writes the proxy views need (views_async.py). Requests go through one pooled
+# httpx.AsyncClient per event loop, so under uvicorn a single process can keep
+# hundreds of Manager.io calls open without holding a thread for each. The async
+# client obeys the same limits as the sync one. It waits on the adaptive rate
+# limiter with aslot(), respects the circuit breaker, retries and records stats
+# like ManagerApiService._request, and coalesces identical concurrent GETs within
+# the event loop.
+
+import asyncio
+import copy
+import logging
+import time
+import weakref
+from urllib.parse import urlencode
+import httpx
+from django.conf import settings
+from django.core.cache import cache
+from .manager_api import (
+    CUSTOMER_LIST_KEY, CUSTOMER_PAGE_SIZE, ManagerApiService, ManagerRecordNotFound, ManagerRequestRejected,
+    RETRY_STATUSES, rejection_status
+)
+from .metrics import registry, track_manager_call
+
+logger = logging.getLogger(__name__)
+
+# One client (connection pool) and one set of in-flight reads per event loop
+_clients = weakref.WeakKeyDictionary()
+_flights = weakref.WeakKeyDictionary()
+
+
+def get_http_client():
+    """Pooled httpx.AsyncClient for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=getattr(settings, 'MANAGER_ASYNC_MAX_CONNECTIONS', 100),
+                max_keepalive_connections=getattr(settings, 'MANAGER_ASYNC_MAX_KEEPALIVE', 20),
+            ),
+            timeout=getattr(settings, 'MANAGER_API_TIMEOUT', 30),
+        )
+    return client
+
+
+class _Flight:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+async def _coalesce(key, fetch):
+    """Await fetch() once for every coroutine asking for ``key`` at the same time"""
+    flights = _flights.setdefault(asyncio.get_running_loop(), {})
+    flight = flights.get(key)
+    if flight is not None:
+        registry.inc('ccf_manager_coalesced_total', {'scope': 'process'})
+        flight.waiters += 1
+        # shield(): a cancelled waiter must not cancel the fetch for the others
+        return copy.deepcopy(await asyncio.shield(flight.task))
+
+    flight = flights[key] = _Flight(asyncio.ensure_future(fetch()))
+    flight.task.add_done_callback(lambda task: flights.pop(key, None))
+    result = await asyncio.shield(flight.task)
+    # Waiters are woken after us; give them an unmodified result
+    return copy.deepcopy(result) if flight.waiters else result
+
+
+class AsyncManagerService(ManagerApiService):
+    """ManagerApiService plus ``a``-prefixed coroutine methods"""
+
+    async def asend(self, method, endpoint, params=None, data=None, label=None):
+        """Send a request with the sync client's limits and retries and return the httpx.Response"""
+        url = f"{self.api_url}/{endpoint}"
+        label = label or endpoint
+        method = method.lower()
+        max_attempts = 1 + (self.max_retries if method == 'get' else 0)
+
+        if not self.api_key:
+            raise Exception("Manager.io API key is not configured in settings.py")
+
+        client = get_http_client()
+        attempt = 0
+        throttled = 0
+        while True:
+            # Raises CircuitOpenError while Manager.io is marked unavailable
+            self.circuit_breaker.before_call()
+            start = time.perf_counter()
+            try:
+                async with self.rate_limiter.aslot():
+                    with track_manager_call():
+                        start = time.perf_counter()
+                        response = await client.request(
+                            method.upper(), url, headers=self.headers, params=params,
+                            json=data if method in ('post', 'put') else None
+                        )
+            except httpx.TransportError as e:
+                elapsed = time.perf_counter() - start
+                self.rate_limiter.record(None, elapsed)
+                self.circuit_breaker.record_failure(type(e).__name__)
+                self.client_stats.record_response(label, method.upper(), 'error', elapsed)
+                if attempt + 1 >= max_attempts:
+                    raise Exception(f"Manager.io API request failed: {str(e) or type(e).__name__}")
+                self.client_stats.record_retry(label, method.upper(), type(e).__name__)
+                await asyncio.sleep(self._retry_delay(attempt))
+                attempt += 1
+                continue
+
+            elapsed = time.perf_counter() - start
+            self.rate_limiter.record(response.status_code, elapsed, response.headers.get('Retry-After'))
+            if response.status_code >= 500:
+                self.circuit_breaker.record_failure(f"HTTP {response.status_code}")
+            else:
+                self.circuit_breaker.record_success(elapsed)
+            self.client_stats.record_response(
+                label, method.upper(), response.status_code, elapsed, len(response.content)
+            )
+
+            if response.status_code == 429 and throttled < self.max_throttle_retries:
+                self.client_stats.record_retry(label, method.upper(), 429)
+                if not response.headers.get('Retry-After'):
+                    # Nothing for the limiter to wait out, and it may still hold burst tokens
+                    await asyncio.sleep(self._retry_delay(throttled))
+                throttled += 1
+                logger.info("Manager.io throttled %s %s, retry %d", method.upper(), endpoint, throttled)
+                continue
+            if response.status_code in RETRY_STATUSES and attempt + 1 < max_attempts:
+                self.client_stats.record_retry(label, method.upper(), response.status_code)
+                delay = self._retry_delay(attempt, response)
+                logger.warning(
+                    "Manager.io returned %s for %s %s, retrying in %.1fs", response.status_code,
+                    method.upper(), endpoint, delay
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            return response
+
+    async def _arequest(self, method, endpoint, params=None, data=None, label=None):
+        response = await self.asend(method, endpoint, params=params, data=data, label=label)
+
+        if response.status_code == 401:
+            logger.error("401 Unauthorized - Check your Manager.io API key")
+            raise Exception("Manager.io API authentication failed. Please check your API key in settings.py")
+        if response.status_code == 404:
+            raise ManagerRecordNotFound(f"Manager.io has no {endpoint}")
+        if rejection_status(response.status_code):
+            raise ManagerRequestRejected(
+                response.status_code,
+                f"Manager.io rejected {method.upper()} {endpoint}: {response.status_code} {response.text[:300]}"
+            )
+        if response.status_code >= 400:
+            logger.error(f"Response content: {response.text[:500]}")
+            raise Exception(f"Manager.io API request failed: {response.status_code} for {self.api_url}/{endpoint}")
+
+        if response.content:
+            return response.json()
+        return None
+
+    async def amake_request(self, method, endpoint, params=None, data=None, label=None):
+        """_make_request() for coroutines: decoded JSON, identical concurrent GETs share one fetch"""
+        if method.lower() == 'get' and self.coalesce_reads:
+            key = f"GET {self.api_url}/{endpoint}?{urlencode(sorted((params or {}).items()))}"
+            return await _coalesce(key, lambda: self._arequest(method, endpoint, params, data, label))
+        return await self._arequest(method, endpoint, params=params, data=data, label=label)
+
+    async def atest_connection(self):
+        try:
+            response = await self.amake_request('GET', 'inventory-items', params={'pageSize': 1, 'skip': 0})
+            if response:
+                return {'success': True, 'message': 'Connection successful', 'api_url': self.api_url}
+            return {'success': False, 'message': 'Empty response from API'}
+        except Exception as e:
+            logger.error(f"Manager.io API connection failed: {str(e)}")
+            return {'success': False, 'message': str(e), 'api_url': self.api_url}
+
+    async def afetch_all_inventory_items(self):
+        """_fetch_all_inventory_items() for coroutines"""
+        if not self.coalesce_reads:
+            return await self._apaginate_inventory_items()
+        return await _coalesce(f"inventory-items:all {self.api_url}", self._apaginate_inventory_items)
+
+    async def _apaginate_inventory_items(self):
+        all_items = []
+        page_size = 100
+        skip = 0
+        for iteration in range(50):
+            response = await self.amake_request('GET', 'inventory-items', params={'pageSize': page_size, 'skip': skip})
+            if not response:
+                break
+            page_items = self._inventory_page_items(response)
+            self.client_stats.record_page('inventory-items', len(page_items))
+            if not page_items:
+                break
+            all_items.extend(page_items)
+            if len(page_items) < page_size:
+                break
+            skip += page_size
+
+        logger.info("Fetched %d inventory items from Manager.io in %d pages", len(all_items), iteration + 1)
+        return all_items
+
+    async def _apaginate_customers(self, first_response, page_size=CUSTOMER_PAGE_SIZE, max_iterations=200):
+        """_paginate_customers() for coroutines; the remaining pages are requested together"""
+        first_page, total_records = self._customer_page(first_response)
+        self.client_stats.record_page('customers', len(first_page))
+        all_customers = list(first_page)
+        if not first_page:
+            return all_customers
+
+        skips = self._remaining_customer_skips(first_page, total_records, page_size, max_iterations)
+        if skips is not None:
+            responses = await asyncio.gather(*[
+                self.amake_request('GET', 'customers', params={'pageSize': page_size, 'skip': skip}) for skip in skips
+            ])
+            for response in responses:
+                page_customers, _ = self._customer_page(response)
+                self.client_stats.record_page('customers', len(page_customers))
+                all_customers.extend(page_customers)
+            return all_customers
+
+        skip = 0
+        page_customers = first_page
+        for _ in range(1, max_iterations):
+            if len(page_customers) < page_size:
+                break
+            skip += page_size
+            response = await self.amake_request('GET', 'customers', params={'pageSize': page_size, 'skip': skip})
+            page_customers, _ = self._customer_page(response)
+            self.client_stats.record_page('customers', len(page_customers))
+            if not page_customers:
+                break
+            all_customers.extend(page_customers)
+        return all_customers
+
+    async def _arefresh_customer_list(self):
+        entry = await cache.aget(CUSTOMER_LIST_KEY)
+        if self._customer_list_fresh(entry):
+            return entry
+        first_response = await self.amake_request(
+            'GET', 'customers', params={'pageSize': CUSTOMER_PAGE_SIZE, 'skip': 0}
+        )
+        entry = self._revalidate_customer_list(entry, first_response)
+        if entry is None:
+            customers = await self._apaginate_customers(first_response)
+            entry = self._new_customer_list(customers, first_response)
+        await cache.aset(CUSTOMER_LIST_KEY, entry, getattr(settings, 'MANAGER_CUSTOMER_CACHE_MAX_AGE', 600))
+        return entry
+
+    async def aget_customers(self):
+        """get_customers() for coroutines, sharing its cache"""
+        try:
+            entry = await cache.aget(CUSTOMER_LIST_KEY)
+            if not self._customer_list_fresh(entry):
+                if self.coalesce_reads:
+                    entry = await _coalesce(f"customers:list {self.api_url}", self._arefresh_customer_list)
+                else:
+                    entry = await self._arefresh_customer_list()
+            return self._customer_list_result(entry)
+        except Exception as e:
+            logger.error(f"Error fetching customers: {str(e)}")
+            return {'success': False, 'error': str(e), 'customers': []}
+
+    async def asearch_customers(self, term):
+        try:
+            response = await self.amake_request('GET', 'customers', params={'filter': term, 'pageSize': 100})
+            return self._customer_search_result(response, term)
+        except Exception as e:
+            logger.error(f"Error searching customers: {str(e)}")
+            return {'success': False, 'error': str(e), 'customers': []}
@@ -0,0 +1,100 @@
+# backend/recipes/auth_backends.py - Authentication backend and permission caches
+#
+# The React app calls /api/auth/user/ and /api/auth/permissions/ on every route
+# change. Users are loaded together with their profile and kept in the cache for a
+# short time, and each role's allowed pages are kept in process memory, so both
+# endpoints normally answer without touching the database. The cached copy of a
+# user carries no password hash: the field is left deferred, and the session hashes
+# derived from it are stored alongside so session verification needs no query.
+
+import copy
+import threading
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_CACHE_KEY = 'auth:user:{user_id}'
+
+
+class ProfileModelBackend(ModelBackend):
+    """ModelBackend that loads users together with their UserProfile"""
+
+    def get_user(self, user_id):
+        key = USER_CACHE_KEY.format(user_id=user_id)
+        cached = cache.get(key)
+        if cached is None:
+            UserModel = get_user_model()
+            try:
+                user = UserModel._default_manager.select_related('profile').get(pk=user_id)
+            except UserModel.DoesNotExist:
+                return None
+            cache.set(key, _cacheable_user(user), timeout=getattr(settings, 'AUTH_USER_CACHE_TTL', 60))
+        else:
+            user = _restore_user(cached)
+        return user if self.user_can_authenticate(user) else None
+
+
+def _cacheable_user(user):
+    """(copy of ``user`` without its password hash, session auth hashes) for the shared cache"""
+    session_hashes = [user.get_session_auth_hash(), *user.get_session_auth_fallback_hash()]
+    stripped = copy.copy(user)
+    # Deferred: reloaded from the database if anything reads it, and left out of save()
+    stripped.__dict__.pop('password', None)
+    return stripped, session_hashes
+
+
+def _restore_user(cached):
+    user, session_hashes = cached
+    user.get_session_auth_hash = lambda: session_hashes[0]
+    user.get_session_auth_fallback_hash = lambda: iter(session_hashes[1:])
+    return user
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(USER_CACHE_KEY.format(user_id=user_id))
+
+
+class RolePagesCache:
+    """In-process cache of role -> allowed page codes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pages = None
+        self._loaded_at = None
+
+    def _is_stale(self):
+        if self._pages is None:
+            return True
+        ttl = getattr(settings, 'PAGE_PERMISSION_CACHE_TTL', 300)
+        return ttl is not None and (time.monotonic() - self._loaded_at) > ttl
+
+    def _load(self):
+        from .models import PagePermission
+
+        pages = {}
+        for role, page in PagePermission.objects.filter(can_access=True).values_list('role', 'page'):
+            pages.setdefault(role, []).append(page)
+        return pages
+
+    def get(self, role):
+        # Check and reload together so a concurrent invalidate() can't leave us without a dict
+        with self._lock:
+            if self._is_stale():
+                self._pages = self._load()
+                self._loaded_at = time.monotonic()
+            pages = self._pages
+        return list(pages.get(role, []))
+
+    def invalidate(self):
+        with self._lock:
+            self._pages = None
+
+
+role_pages_cache = RolePagesCache()
+
+
+def get_allowed_pages(role):
+    """Return the page codes the given role can access"""
+    return role_pages_cache.get(role)
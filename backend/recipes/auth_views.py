@@ -5,6 +5,7 @@ from django.views.decorators.http import require_http_methods
 import json
 # Add these imports
 from .models import UserProfile, PagePermission
+from .auth_backends import get_allowed_pages
 
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -59,16 +60,18 @@ def logout_view(request):
 @require_http_methods(["GET"])
 def user_view(request):
     if request.user.is_authenticated:
+        # Profile is loaded with the user by ProfileModelBackend
+        profile = request.user.profile
         return JsonResponse({
             'success': True,
             'user': {
                 'id': request.user.id,
                 'username': request.user.username,
                 'email': request.user.email,
-                'role': request.user.profile.role,
-                'is_admin': request.user.profile.is_admin,
-                'is_customer': request.user.profile.is_customer,
-                'is_manager': request.user.profile.is_manager,
+                'role': profile.role,
+                'is_admin': profile.is_admin,
+                'is_customer': profile.is_customer,
+                'is_manager': profile.is_manager,
             }
         })
     else:
@@ -81,15 +84,12 @@ def user_view(request):
 @require_http_methods(["GET"])
 def user_permissions_view(request):
     if request.user.is_authenticated:
-        # Get user's permissions
-        permissions = PagePermission.objects.filter(
-            role=request.user.profile.role,
-            can_access=True
-        ).values_list('page', flat=True)
+        # Get user's permissions from the in-process role cache
+        permissions = get_allowed_pages(request.user.profile.role)
         
         return JsonResponse({
             'success': True,
-            'permissions': list(permissions)
+            'permissions': permissions
         })
     else:
         return JsonResponse({
@@ -0,0 +1,267 @@
+# backend/recipes/benchmarks.py - Endpoint benchmark suite
+#
+# Times the hot endpoints in-process with the Django test client against whatever
+# database is configured (normally one filled by generate_synthetic_data) and
+# returns a JSON-serialisable report. Reports from two releases can be compared
+# with compare_reports() / `run_benchmarks --compare old.json`. With fake_manager
+# options the suite also times a full sync over HTTP against a local fake Manager.io.
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import nullcontext
+from decimal import Decimal
+from pathlib import Path
+import django
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .fake_manager import running_fake_manager
+from .manager_api import ManagerApiService
+from .metrics import RequestStats
+from .models import (
+    ManagerInventoryItem, InventoryPriceHistory, Recipe, RecipeIngredient, Customer, Order, OrderItem,
+    ProductionOrder
+)
+from .synthetic_data import SYNTHETIC_PREFIX
+
+REPORT_VERSION = 1
+
+
+class PayloadManagerApiService(ManagerApiService):
+    """ManagerApiService whose inventory fetch returns prepared Manager.io payloads.
+
+    Lets the sync benchmark measure the local processing path without network time.
+    """
+
+    def __init__(self, payload):
+        super().__init__()
+        self.payload = payload
+
+    def _fetch_all_inventory_items(self):
+        return self.payload
+
+
+def build_inventory_payload(round_number):
+    """Manager.io-shaped inventory payload for every local item, with every tenth price changed"""
+    payload = []
+    rows = ManagerInventoryItem.objects.order_by('id').values_list(
+        'id', 'manager_item_id', 'code', 'name', 'unit', 'unit_cost', 'sales_price', 'quantity_available',
+        'division_name'
+    )
+    for item_id, manager_id, code, name, unit, cost, sales_price, quantity, division in rows:
+        if (item_id + round_number) % 10 == 0:
+            cost = (cost * Decimal('1.03')).quantize(Decimal('0.01'))
+        payload.append({
+            'key': manager_id,
+            'itemCode': code,
+            'itemName': name,
+            'unitName': unit,
+            'division': division,
+            'qtyOnHand': str(quantity),
+            'averageCost': {'value': str(cost)},
+            'salePrice': {'value': str(sales_price)},
+        })
+    return payload
+
+
+class BenchmarkCase:
+    """One timed operation; ``setup`` runs untimed before every iteration"""
+
+    def __init__(self, name, run, setup=None, description=''):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.description = description
+
+
+def _get(client, path):
+    return lambda state: client.get(path)
+
+
+def _post(client, path, body):
+    return lambda state: client.post(path, body, format='json')
+
+
+def default_cases(client):
+    """Benchmark cases for the endpoints that matter at production scale"""
+    today = timezone.localdate()
+
+    pending_lines = OrderItem.objects.filter(
+        order__order_date=today, order__status='pending', type='finished_good'
+    ).values_list('code', 'name').distinct()[:25]
+    fg_item_keys = [f"{code}-{name}" for code, name in pending_lines]
+
+    production_items = [
+        {
+            'recipe_id': recipe_id,
+            'item_name': name,
+            'production_quantity': 50,
+            'production_category_code': 'Production-001',
+            'assigned_to': 'Benchmark',
+        }
+        for recipe_id, name in Recipe.objects.order_by('id').values_list('id', 'name')[:25]
+    ]
+
+    def sync_setup(state):
+        state['round'] = state.get('round', 0) + 1
+        state['service'] = PayloadManagerApiService(build_inventory_payload(state['round']))
+
+    return [
+        BenchmarkCase('inventory_list', _get(client, '/api/inventory/'), description='GET /api/inventory/'),
+        BenchmarkCase('inventory_search', _get(client, '/api/inventory/?search=flour'),
+                      description='GET /api/inventory/?search=flour'),
+        BenchmarkCase('recipe_list', _get(client, '/api/recipes/'), description='GET /api/recipes/'),
+        BenchmarkCase('dashboard_cold', _get(client, '/api/dashboard/?refresh=1'),
+                      description='GET /api/dashboard/ rebuilding the snapshot'),
+        BenchmarkCase('dashboard_cached', _get(client, '/api/dashboard/'),
+                      description='GET /api/dashboard/ from the cached snapshot'),
+        BenchmarkCase('cost_volatility_report', _get(client, '/api/recipes/cost_volatility_report/?days=90'),
+                      description='GET /api/recipes/cost_volatility_report/?days=90'),
+        BenchmarkCase('price_history_summary', _get(client, '/api/price-history/summary/?days=90'),
+                      description='GET /api/price-history/summary/?days=90'),
+        BenchmarkCase('analyze_fg_items_for_production',
+                      _post(client, '/api/production/analyze-fg-items/', {
+                          'fg_item_keys': fg_item_keys, 'date': today.isoformat()
+                      }),
+                      description=f'POST /api/production/analyze-fg-items/ with {len(fg_item_keys)} items'),
+        BenchmarkCase('get_materials_required',
+                      _post(client, '/api/materials/required/', {'production_items': production_items}),
+                      description=f'POST /api/materials/required/ with {len(production_items)} recipes'),
+        BenchmarkCase('inventory_sync', lambda state: state['service'].sync_inventory_items(), setup=sync_setup,
+                      description='ManagerApiService.sync_inventory_items over every local item, 10% repriced'),
+    ]
+
+
+def _percentile(values, percentile):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_case(case, iterations=5, warmup=1):
+    """Run one case and return its timing and query statistics"""
+    state = {}
+    timings = []
+    query_counts = []
+    status = None
+
+    for i in range(warmup + iterations):
+        if case.setup:
+            case.setup(state)
+        # Counted through execute_wrapper: the test client resets connection.queries per request
+        stats = RequestStats()
+        with connection.execute_wrapper(stats):
+            start = time.perf_counter()
+            result = case.run(state)
+            elapsed = time.perf_counter() - start
+        status = getattr(result, 'status_code', None) or (result.get('status') if isinstance(result, dict) else None)
+        if i >= warmup:
+            timings.append(elapsed * 1000)
+            query_counts.append(stats.db_queries)
+
+    return {
+        'description': case.description,
+        'iterations': iterations,
+        'status': status,
+        'median_ms': round(statistics.median(timings), 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'p95_ms': round(_percentile(timings, 95), 3),
+        'min_ms': round(min(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'queries': max(query_counts),
+    }
+
+
+def dataset_summary():
+    return {
+        'inventory_items': ManagerInventoryItem.objects.count(),
+        'price_history': InventoryPriceHistory.objects.count(),
+        'recipes': Recipe.objects.count(),
+        'recipe_ingredients': RecipeIngredient.objects.count(),
+        'customers': Customer.objects.count(),
+        'orders': Order.objects.count(),
+        'order_items': OrderItem.objects.count(),
+        'production_orders': ProductionOrder.objects.count(),
+        'synthetic': ManagerInventoryItem.objects.filter(manager_item_id__startswith=SYNTHETIC_PREFIX).exists(),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=Path(settings.BASE_DIR),
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def fake_manager_cases():
+    """Cases that talk HTTP to the fake Manager.io configured in MANAGER_API_URL"""
+    return [
+        BenchmarkCase('inventory_sync_http', lambda state: ManagerApiService().sync_inventory_items(),
+                      description='ManagerApiService.sync_inventory_items against the fake Manager.io'),
+        BenchmarkCase('customer_sync_http', lambda state: ManagerApiService().sync_customers(),
+                      description='ManagerApiService.sync_customers against the fake Manager.io'),
+    ]
+
+
+def run_benchmarks(iterations=5, warmup=1, only=None, log=None, fake_manager=None):
+    """Run the suite and return the report dict.
+
+    ``fake_manager`` is a dict of FakeManagerConfig options; when given, the HTTP
+    sync cases run against a fake Manager.io started for the duration of the run.
+    """
+    client = APIClient(HTTP_HOST='localhost')
+    results = {}
+    with running_fake_manager(**fake_manager) if fake_manager is not None else nullcontext():
+        cases = default_cases(client) + (fake_manager_cases() if fake_manager is not None else [])
+        for case in cases:
+            if only and case.name not in only:
+                continue
+            if log:
+                log(f"Running {case.name}...")
+            results[case.name] = run_case(case, iterations=iterations, warmup=warmup)
+            if log:
+                result = results[case.name]
+                log(f"  median {result['median_ms']:.1f}ms, p95 {result['p95_ms']:.1f}ms, {result['queries']} queries")
+
+    return {
+        'version': REPORT_VERSION,
+        'generated_at': timezone.now().isoformat(),
+        'git_revision': _git_revision(),
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'platform': platform.platform(),
+        },
+        'dataset': dataset_summary(),
+        'settings': {'iterations': iterations, 'warmup': warmup, 'fake_manager': fake_manager},
+        'results': results,
+    }
+
+
+def compare_reports(baseline, current):
+    """Return per-case deltas between two reports (positive = slower / more queries)"""
+    comparison = {}
+    for name, result in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before:
+            continue
+        comparison[name] = {
+            'median_ms': [before['median_ms'], result['median_ms']],
+            'median_change_pct': round(
+                (result['median_ms'] - before['median_ms']) / before['median_ms'] * 100, 1
+            ) if before['median_ms'] else None,
+            'queries': [before['queries'], result['queries']],
+        }
+    return comparison
+
+
+def write_report(report, path):
+    Path(path).write_text(json.dumps(report, indent=2, sort_keys=True, default=str) + '\n')
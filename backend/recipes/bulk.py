@@ -0,0 +1,176 @@
+# backend/recipes/bulk.py - Bulk insert/upsert helpers with a PostgreSQL fast path
+#
+# The sync and other bulk paths write through bulk_insert() / bulk_upsert():
+#
+#   PostgreSQL  with POSTGRES_BULK_COPY, batches of BULK_COPY_THRESHOLD rows or more
+#               are streamed with COPY; upserts COPY into a temporary staging table
+#               and merge it with one INSERT ... SELECT ... ON CONFLICT DO UPDATE.
+#               Smaller batches use multi-row INSERT ... ON CONFLICT through
+#               bulk_create(). This path has not been run against a real server
+#               yet, so without the setting PostgreSQL uses the portable backend.
+#   Others      bulk_create(update_conflicts=True), which is INSERT ... ON CONFLICT
+#               on SQLite and PostgreSQL, or bulk_create + bulk_update where the
+#               backend has no conflict target support.
+#
+# Like bulk_create(), none of these send model signals.
+
+import csv
+import io
+from django.conf import settings
+from django.db import connections, transaction
+
+COPY_NULL = '\\N'
+
+
+class PortableBulkBackend:
+    """Bulk writes through the ORM; works on every database Django supports"""
+
+    def __init__(self, using):
+        self.using = using
+        self.connection = connections[using]
+
+    def insert(self, model, objs, batch_size=500):
+        """Insert new rows; returns the number of rows written"""
+        return len(model.objects.using(self.using).bulk_create(objs, batch_size=batch_size))
+
+    def upsert(self, model, objs, unique_fields, update_fields, batch_size=500):
+        """Insert rows, updating ``update_fields`` where ``unique_fields`` already exist.
+
+        ``objs`` must not contain two rows with the same unique key.
+        """
+        if not objs:
+            return 0
+        manager = model.objects.using(self.using)
+        if self.connection.features.supports_update_conflicts_with_target:
+            manager.bulk_create(
+                objs, batch_size=batch_size, update_conflicts=True,
+                unique_fields=unique_fields, update_fields=update_fields
+            )
+            return len(objs)
+
+        # Split into inserts and updates by looking the unique keys up first
+        def key(obj):
+            return tuple(getattr(obj, model._meta.get_field(name).attname) for name in unique_fields)
+
+        existing = {}
+        values = [model._meta.get_field(name).attname for name in unique_fields]
+        for row in manager.filter(**{f"{values[0]}__in": {key(obj)[0] for obj in objs}}).values('pk', *values):
+            existing[tuple(row[name] for name in values)] = row['pk']
+
+        to_create, to_update = [], []
+        for obj in objs:
+            pk = existing.get(key(obj))
+            if pk is None:
+                to_create.append(obj)
+            else:
+                obj.pk = pk
+                to_update.append(obj)
+        with transaction.atomic(using=self.using):
+            manager.bulk_create(to_create, batch_size=batch_size)
+            manager.bulk_update(to_update, update_fields, batch_size=batch_size)
+        return len(objs)
+
+
+class PostgresBulkBackend(PortableBulkBackend):
+    """COPY and INSERT ... ON CONFLICT for large batches on PostgreSQL"""
+
+    def __init__(self, using):
+        super().__init__(using)
+        self.copy_threshold = getattr(settings, 'BULK_COPY_THRESHOLD', 1000)
+
+    def _columns(self, model, include_pk=False):
+        return [
+            field for field in model._meta.concrete_fields
+            if include_pk or not field.primary_key
+        ]
+
+    def _rows(self, fields, objs):
+        for obj in objs:
+            yield [field.get_db_prep_save(field.pre_save(obj, True), self.connection) for field in fields]
+
+    def _copy(self, cursor, table, columns, rows):
+        qn = self.connection.ops.quote_name
+        sql = f"COPY {qn(table)} ({', '.join(qn(column) for column in columns)}) FROM STDIN"
+        raw = cursor.cursor
+        if hasattr(raw, 'copy'):
+            # psycopg 3
+            with raw.copy(sql) as copy:
+                for row in rows:
+                    copy.write_row(row)
+            return
+
+        # psycopg2
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([COPY_NULL if value is None else value for value in row])
+        buffer.seek(0)
+        raw.copy_expert(f"{sql} WITH (FORMAT csv, NULL '{COPY_NULL}')", buffer)
+
+    def insert(self, model, objs, batch_size=500):
+        if len(objs) < self.copy_threshold:
+            return super().insert(model, objs, batch_size=batch_size)
+
+        fields = self._columns(model)
+        with transaction.atomic(using=self.using), self.connection.cursor() as cursor:
+            self._copy(cursor, model._meta.db_table, [field.column for field in fields], self._rows(fields, objs))
+        return len(objs)
+
+    def upsert(self, model, objs, unique_fields, update_fields, batch_size=500):
+        if len(objs) < self.copy_threshold:
+            return super().upsert(model, objs, unique_fields, update_fields, batch_size=batch_size)
+
+        qn = self.connection.ops.quote_name
+        table = model._meta.db_table
+        stage = f"{table}_bulk_stage"
+        fields = self._columns(model)
+        columns = ', '.join(qn(field.column) for field in fields)
+        conflict = ', '.join(qn(model._meta.get_field(name).column) for name in unique_fields)
+        assignments = ', '.join(
+            f"{qn(model._meta.get_field(name).column)} = EXCLUDED.{qn(model._meta.get_field(name).column)}"
+            for name in update_fields
+        )
+
+        with transaction.atomic(using=self.using), self.connection.cursor() as cursor:
+            # ON COMMIT DROP only fires at the outermost commit, so clear any earlier stage
+            cursor.execute(f"DROP TABLE IF EXISTS {qn(stage)}")
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {qn(stage)} ON COMMIT DROP AS "
+                f"SELECT {columns} FROM {qn(table)} WITH NO DATA"
+            )
+            self._copy(cursor, stage, [field.column for field in fields], self._rows(fields, objs))
+            cursor.execute(
+                f"INSERT INTO {qn(table)} ({columns}) SELECT {columns} FROM {qn(stage)} "
+                f"ON CONFLICT ({conflict}) DO UPDATE SET {assignments}"
+            )
+            written = cursor.rowcount
+        return written
+
+
+_BACKENDS = {
+    'postgresql': PostgresBulkBackend,
+}
+
+
+def get_bulk_backend(using='default'):
+    """Return the bulk backend for a database alias"""
+    backend_class = _BACKENDS.get(connections[using].vendor, PortableBulkBackend)
+    if backend_class is PostgresBulkBackend and not getattr(settings, 'POSTGRES_BULK_COPY', False):
+        backend_class = PortableBulkBackend
+    return backend_class(using)
+
+
+def bulk_insert(model, objs, batch_size=500, using='default'):
+    """Insert ``objs`` as new rows; pks are not set on the objects"""
+    objs = list(objs)
+    if not objs:
+        return 0
+    return get_bulk_backend(using).insert(model, objs, batch_size=batch_size)
+
+
+def bulk_upsert(model, objs, unique_fields, update_fields, batch_size=500, using='default'):
+    """Insert or update ``objs`` keyed on ``unique_fields``; pks are not set on new objects"""
+    objs = list(objs)
+    if not objs:
+        return 0
+    return get_bulk_backend(using).upsert(model, objs, unique_fields, update_fields, batch_size=batch_size)
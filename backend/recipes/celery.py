@@ -1,14 +1,41 @@
 # Using django-celery-beat for scheduled tasks
 
 # backend/recipes/celery.py
+#
+# Not loaded by config/ and celery is not in requirements.txt, so nothing here runs
+# unless a deployment wires Celery up itself. The supported way to run these jobs
+# is the management commands and cron entries in backend/README.md.
+import os
 from celery import Celery
 from celery.schedules import crontab
 
 app = Celery('recipes')
 
+# Manager.io webhooks keep records fresh only once MANAGER_WEBHOOK_SECRET is set (every
+# delivery is rejected without it); the full syncs are then a nightly reconciliation
+# and otherwise stay hourly. Read from the environment, as config/settings.py does.
+WEBHOOKS_CONFIGURED = bool(os.environ.get('MANAGER_WEBHOOK_SECRET'))
+
 app.conf.beat_schedule = {
-    'sync-inventory-every-hour': {
+    'sync-inventory': {
         'task': 'recipes.tasks.sync_inventory_task',
-        'schedule': crontab(minute=0),  # Run every hour at minute 0
+        'schedule': crontab(hour=1, minute=0) if WEBHOOKS_CONFIGURED else crontab(minute=0),
+    },
+    'sync-customers': {
+        'task': 'recipes.tasks.sync_customers_task',
+        # Offset from the inventory sync
+        'schedule': crontab(hour=1, minute=30) if WEBHOOKS_CONFIGURED else crontab(minute=30),
+    },
+    'price-history-retention-daily': {
+        'task': 'recipes.tasks.price_history_retention_task',
+        'schedule': crontab(hour=2, minute=15),  # Nightly, after the day's syncs
+    },
+    'prune-webhook-events-daily': {
+        'task': 'recipes.tasks.prune_webhook_events_task',
+        'schedule': crontab(hour=2, minute=45),
+    },
+    'prune-sales-order-outbox-daily': {
+        'task': 'recipes.tasks.prune_sales_order_outbox_task',
+        'schedule': crontab(hour=2, minute=50),
     },
 }
\ No newline at end of file
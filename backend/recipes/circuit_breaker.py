@@ -0,0 +1,218 @@
+# backend/recipes/circuit_breaker.py - Circuit breaker and stale-data fallback for Manager.io
+#
+# ManagerApiService calls get_manager_circuit_breaker().before_call() ahead of every
+# request and reports the outcome back. Connection errors, timeouts, 5xx responses
+# and responses slower than MANAGER_CIRCUIT_SLOW_CALL_SECONDS count as failures.
+# After MANAGER_CIRCUIT_FAILURE_THRESHOLD consecutive failures the breaker opens and
+# requests fail at once with CircuitOpenError instead of waiting on the timeout.
+# Once MANAGER_CIRCUIT_RESET_TIMEOUT has passed, the next call starts a background
+# probe (half-open) and still fails fast. A successful probe closes the breaker; a
+# failed one keeps it open for another interval. State is per process.
+#
+# Views that read from Manager.io wrap the call in fetch_with_fallback(), which
+# remembers each good payload in the default cache and serves the last one, marked
+# stale, while Manager.io is unavailable.
+
+import logging
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+LAST_GOOD_KEY = 'manager:last_good:{name}'
+
+
+class CircuitOpenError(Exception):
+    """Manager.io is marked unavailable; the request was not sent"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a background half-open probe"""
+
+    def __init__(self, name, probe, failure_threshold=5, reset_timeout=30, slow_call_seconds=10):
+        self.name = name
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+
+        self._lock = threading.Lock()
+        self.status = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.last_failure = None
+        self.last_probe_at = None
+
+    def _transition(self, status):
+        # Caller holds the lock
+        if status == self.status:
+            return
+        logger.warning("Manager.io circuit %s -> %s", self.status, status)
+        registry.inc('ccf_manager_circuit_transitions_total', {'to': status})
+        self.status = status
+        self.opened_at = time.monotonic() if status == OPEN else self.opened_at
+        if status == CLOSED:
+            self.failures = 0
+            self.opened_at = None
+
+    def before_call(self):
+        """Raise CircuitOpenError unless requests may be sent"""
+        start_probe = False
+        with self._lock:
+            if self.status == CLOSED:
+                return
+            if self.status == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._transition(HALF_OPEN)
+                start_probe = True
+        if start_probe:
+            threading.Thread(target=self._run_probe, name=f"{self.name}-probe", daemon=True).start()
+        raise CircuitOpenError(f"Manager.io unavailable (circuit {self.status}): {self.last_failure}")
+
+    def _run_probe(self):
+        self.last_probe_at = timezone.now()
+        try:
+            healthy = self.probe()
+        except Exception as e:
+            healthy = False
+            self.last_failure = f"Probe failed: {str(e)}"
+        with self._lock:
+            if healthy:
+                self._transition(CLOSED)
+            else:
+                # Stay open for another reset_timeout
+                self.status = OPEN
+                self.opened_at = time.monotonic()
+
+    def record_success(self, seconds=0.0):
+        if seconds > self.slow_call_seconds:
+            self.record_failure(f"Slow response ({seconds:.1f}s)")
+            return
+        with self._lock:
+            self.failures = 0
+            if self.status != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self, reason):
+        with self._lock:
+            self.failures += 1
+            self.last_failure = str(reason)[:300]
+            if self.status == CLOSED and self.failures >= self.failure_threshold:
+                self._transition(OPEN)
+
+    def reset(self):
+        with self._lock:
+            self._transition(CLOSED)
+
+    def state(self):
+        with self._lock:
+            retry_in = None
+            if self.status == OPEN:
+                retry_in = round(max(self.reset_timeout - (time.monotonic() - self.opened_at), 0), 1)
+            return {
+                'state': self.status,
+                'consecutive_failures': self.failures,
+                'failure_threshold': self.failure_threshold,
+                'last_failure': self.last_failure,
+                'probe_in_seconds': retry_in,
+                'last_probe_at': self.last_probe_at.isoformat() if self.last_probe_at else None,
+            }
+
+
+def _probe_manager():
+    """Cheapest read that proves Manager.io answers: one inventory item.
+
+    Not sent through ManagerApiService.send(), which fails fast while the circuit is
+    open, but it still takes a rate limiter slot and is counted in the client metrics.
+    """
+    from .manager_api import ManagerApiService
+
+    service = ManagerApiService()
+    start = time.perf_counter()
+    try:
+        with service.rate_limiter.slot():
+            start = time.perf_counter()
+            response = service._send('get', f"{service.api_url}/inventory-items", params={'pageSize': 1, 'skip': 0})
+    except Exception:
+        elapsed = time.perf_counter() - start
+        service.rate_limiter.record(None, elapsed)
+        service.client_stats.record_response('inventory-items', 'GET', 'error', elapsed)
+        raise
+    elapsed = time.perf_counter() - start
+    service.rate_limiter.record(response.status_code, elapsed, response.headers.get('Retry-After'))
+    service.client_stats.record_response(
+        'inventory-items', 'GET', response.status_code, elapsed, len(response.content)
+    )
+    return response.status_code < 500
+
+
+_breaker = None
+_breaker_lock = threading.Lock()
+
+
+def get_manager_circuit_breaker():
+    """Process-wide breaker shared by every ManagerApiService instance"""
+    global _breaker
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(
+                    'manager-io',
+                    probe=_probe_manager,
+                    failure_threshold=getattr(settings, 'MANAGER_CIRCUIT_FAILURE_THRESHOLD', 5),
+                    reset_timeout=getattr(settings, 'MANAGER_CIRCUIT_RESET_TIMEOUT', 30),
+                    slow_call_seconds=getattr(settings, 'MANAGER_CIRCUIT_SLOW_CALL_SECONDS', 10),
+                )
+    return _breaker
+
+
+def fetch_with_fallback(name, fetch):
+    """Call ``fetch()`` and remember its payload under ``name``.
+
+    Returns (payload, cached_at): cached_at is None for fresh data, or the ISO time
+    the stale payload was fetched when Manager.io failed and a previous one exists.
+    Re-raises the error when there is nothing to fall back to.
+    """
+    key = LAST_GOOD_KEY.format(name=name)
+    try:
+        payload = fetch()
+    except Exception as e:
+        cached = cache.get(key)
+        if cached is None:
+            raise
+        logger.warning(f"Serving stale {name} from {cached['cached_at']}: {str(e)}")
+        registry.inc('ccf_manager_stale_responses_total', {'payload': name.split(':', 1)[0]})
+        return cached['payload'], cached['cached_at']
+
+    cache.set(
+        key, {'payload': payload, 'cached_at': timezone.now().isoformat()},
+        getattr(settings, 'MANAGER_STALE_CACHE_TTL', 86400)
+    )
+    return payload, None
+
+
+async def afetch_with_fallback(name, fetch):
+    """fetch_with_fallback() for coroutine functions"""
+    key = LAST_GOOD_KEY.format(name=name)
+    try:
+        payload = await fetch()
+    except Exception as e:
+        cached = await cache.aget(key)
+        if cached is None:
+            raise
+        logger.warning(f"Serving stale {name} from {cached['cached_at']}: {str(e)}")
+        registry.inc('ccf_manager_stale_responses_total', {'payload': name.split(':', 1)[0]})
+        return cached['payload'], cached['cached_at']
+
+    await cache.aset(
+        key, {'payload': payload, 'cached_at': timezone.now().isoformat()},
+        getattr(settings, 'MANAGER_STALE_CACHE_TTL', 86400)
+    )
+    return payload, None
@@ -0,0 +1,169 @@
+# backend/recipes/customer_search.py - In-process customer search index
+
+import bisect
+import logging
+import threading
+import time
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CustomerSearchIndex:
+    """In-memory prefix/substring index over local Customer names and codes"""
+
+    # Rank buckets, lower is better
+    RANK_EXACT_NAME = 0
+    RANK_EXACT_CODE = 1
+    RANK_NAME_PREFIX = 2
+    RANK_CODE_PREFIX = 3
+    RANK_WORD_PREFIX = 4
+    RANK_SUBSTRING = 5
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = []
+        self._prefix_keys = []
+        self._prefix_refs = []
+        self._built_at = None
+
+    @property
+    def is_built(self):
+        return self._built_at is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def invalidate(self):
+        """Drop the index so the next search rebuilds it from the database"""
+        with self._lock:
+            self._built_at = None
+
+    def _is_stale(self):
+        if self._built_at is None:
+            return True
+        ttl = getattr(settings, 'CUSTOMER_SEARCH_INDEX_TTL', 300)
+        return ttl is not None and (time.monotonic() - self._built_at) > ttl
+
+    def build(self):
+        """Load all customers from the local mirror and rebuild the index"""
+        from .models import Customer
+
+        entries = []
+        prefix_pairs = []
+        rows = Customer.objects.exclude(status='inactive').values_list(
+            'manager_customer_id', 'name', 'code', 'status', 'balance'
+        )
+        for manager_id, name, code, status, balance in rows:
+            name_lower = (name or '').lower()
+            code_lower = (code or '').lower()
+            idx = len(entries)
+            entries.append({
+                'name_lower': name_lower,
+                'code_lower': code_lower,
+                'payload': {
+                    'key': manager_id,
+                    'id': manager_id,
+                    'name': name,
+                    'code': code or '',
+                    'status': status,
+                    'balance': float(balance or 0),
+                },
+            })
+            if name_lower:
+                prefix_pairs.append((name_lower, idx))
+                for word in name_lower.split()[1:]:
+                    prefix_pairs.append((word, idx))
+            if code_lower:
+                prefix_pairs.append((code_lower, idx))
+
+        prefix_pairs.sort()
+
+        with self._lock:
+            self._entries = entries
+            self._prefix_keys = [key for key, _ in prefix_pairs]
+            self._prefix_refs = [idx for _, idx in prefix_pairs]
+            self._built_at = time.monotonic()
+
+        logger.debug("Customer search index built with %d customers", len(entries))
+        return len(entries)
+
+    def ensure_built(self):
+        if self._is_stale():
+            self.build()
+
+    def _rank(self, entry, term):
+        name_lower = entry['name_lower']
+        code_lower = entry['code_lower']
+        if name_lower == term:
+            return self.RANK_EXACT_NAME
+        if code_lower and code_lower == term:
+            return self.RANK_EXACT_CODE
+        if name_lower.startswith(term):
+            return self.RANK_NAME_PREFIX
+        if code_lower.startswith(term):
+            return self.RANK_CODE_PREFIX
+        return self.RANK_WORD_PREFIX
+
+    def search(self, term, limit=100):
+        """Return customer dicts matching term, best matches first"""
+        term = (term or '').strip().lower()
+        if not term:
+            return []
+
+        self.ensure_built()
+
+        with self._lock:
+            entries = self._entries
+            prefix_keys = self._prefix_keys
+            prefix_refs = self._prefix_refs
+
+        ranked = {}
+
+        # Prefix matches via binary search over the sorted name/word/code keys
+        start = bisect.bisect_left(prefix_keys, term)
+        for pos in range(start, len(prefix_keys)):
+            if not prefix_keys[pos].startswith(term):
+                break
+            idx = prefix_refs[pos]
+            if idx not in ranked:
+                ranked[idx] = self._rank(entries[idx], term)
+
+        # Substring matches anywhere in name or code
+        for idx, entry in enumerate(entries):
+            if idx in ranked:
+                continue
+            if term in entry['name_lower'] or term in entry['code_lower']:
+                ranked[idx] = self.RANK_SUBSTRING
+
+        ordered = sorted(ranked.items(), key=lambda pair: (pair[1], entries[pair[0]]['name_lower']))
+        return [entries[idx]['payload'] for idx, _ in ordered[:limit]]
+
+    def all(self):
+        """Return every indexed customer ordered by name"""
+        self.ensure_built()
+        with self._lock:
+            entries = self._entries
+        return [entry['payload'] for entry in sorted(entries, key=lambda e: e['name_lower'])]
+
+
+customer_index = CustomerSearchIndex()
+
+
+def search_local_customers(term, limit=100):
+    """Search the local customer mirror, returning the same shape as ManagerApiService.search_customers.
+
+    Returns None while the mirror is empty so callers can fall back to Manager.io.
+    """
+    customer_index.ensure_built()
+    if not len(customer_index):
+        return None
+
+    customers = customer_index.search(term, limit=limit)
+    return {
+        'success': True,
+        'customers': customers,
+        'totalCount': len(customers),
+        'searchTerm': term,
+        'source': 'local'
+    }
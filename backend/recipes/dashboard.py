@@ -0,0 +1,121 @@
+# backend/recipes/dashboard.py - Cached dashboard snapshot
+#
+# The dashboard payload is computed once into a versioned cache entry. Writes that
+# change what the dashboard shows (sync completion, recipes, production orders,
+# price history) bump the version, so the next request recomputes it. A short TTL
+# covers anything that changes without going through those paths.
+
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+from django.utils import timezone
+from .price_history import recent_price_changes_prefetch, volatile_ingredients
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'dashboard:version'
+SNAPSHOT_KEY = 'dashboard:snapshot:v{version}'
+
+
+def _get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def invalidate_dashboard():
+    """Bump the snapshot version so the next dashboard request recomputes it"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 2, timeout=None)
+    except Exception as e:
+        logger.warning(f"Could not invalidate dashboard cache: {str(e)}")
+
+
+def build_dashboard_snapshot():
+    """Compute the dashboard payload from the database"""
+    from .models import ManagerInventoryItem, Recipe, ProductionOrder, InventoryPriceHistory
+    from .serializers import (
+        ManagerInventoryItemSerializer, RecipeSerializer,
+        ProductionOrderSerializer, InventoryPriceHistorySerializer
+    )
+
+    low_stock_limit = getattr(settings, 'DASHBOARD_LOW_STOCK_LIMIT', 20)
+    recent_limit = getattr(settings, 'DASHBOARD_RECENT_LIMIT', 5)
+    price_changes_limit = getattr(settings, 'DASHBOARD_PRICE_CHANGES_LIMIT', 10)
+    alert_threshold = getattr(settings, 'DASHBOARD_PRICE_ALERT_THRESHOLD', 10.0)
+
+    now = timezone.now()
+    seven_days_ago = now - timedelta(days=7)
+    thirty_days_ago = now - timedelta(days=30)
+
+    # Low inventory items, most depleted first
+    low_inventory = ManagerInventoryItem.objects.filter(
+        quantity_available__lte=models.F('threshold_quantity')
+    )
+    low_inventory_count = low_inventory.count()
+    low_inventory_items = low_inventory.order_by('quantity_available', 'name')[:low_stock_limit]
+
+    # Price changes are prefetched too, for each recipe's cost_history_summary
+    recent_recipes = Recipe.objects.prefetch_related(
+        'recipeingredient_set__inventory_item',
+        recent_price_changes_prefetch('recipeingredient_set__inventory_item')
+    ).order_by('-created_at')[:recent_limit]
+
+    recent_productions = ProductionOrder.objects.select_related('recipe', 'shift').prefetch_related(
+        'recipe__recipeingredient_set__inventory_item',
+        recent_price_changes_prefetch('recipe__recipeingredient_set__inventory_item')
+    ).order_by('-created_at')[:recent_limit]
+
+    recent_window = InventoryPriceHistory.objects.filter(changed_at__gte=seven_days_ago)
+    recent_price_changes = recent_window.select_related('inventory_item').order_by('-changed_at')[:price_changes_limit]
+
+    # 30-day window reads whole days from the daily rollup
+    volatile = volatile_ingredients(thirty_days_ago, limit=5)
+
+    alerts = recent_window.filter(change_percentage__gte=alert_threshold)
+    price_alerts = alerts.select_related('inventory_item').order_by('-change_percentage')[:5]
+
+    window_totals = recent_window.aggregate(
+        total=models.Count('id'),
+        alerts=models.Count('id', filter=models.Q(change_percentage__gte=alert_threshold))
+    )
+
+    return {
+        'recipesCount': Recipe.objects.count(),
+        'productionsCount': ProductionOrder.objects.count(),
+        'inventoryCount': ManagerInventoryItem.objects.count(),
+        'lowInventoryCount': low_inventory_count,
+        'recentRecipes': RecipeSerializer(recent_recipes, many=True).data,
+        'lowInventoryItems': ManagerInventoryItemSerializer(low_inventory_items, many=True).data,
+        'lowInventoryTruncated': low_inventory_count > low_stock_limit,
+        'recentProductions': ProductionOrderSerializer(recent_productions, many=True).data,
+        # Price insights
+        'recentPriceChanges': InventoryPriceHistorySerializer(recent_price_changes, many=True).data,
+        'priceChangesLast7Days': window_totals['total'],
+        'volatileIngredients': volatile,
+        'priceAlerts': InventoryPriceHistorySerializer(price_alerts, many=True).data,
+        'significantChangesLast7Days': window_totals['alerts'],
+        'generatedAt': now.isoformat(),
+    }
+
+
+def get_dashboard_snapshot(refresh=False):
+    """Return the cached dashboard payload, recomputing it when stale"""
+    version = _get_version()
+    key = SNAPSHOT_KEY.format(version=version)
+
+    if not refresh:
+        snapshot = cache.get(key)
+        if snapshot is not None:
+            return snapshot
+
+    snapshot = build_dashboard_snapshot()
+    snapshot['cacheVersion'] = version
+    cache.set(key, snapshot, timeout=getattr(settings, 'DASHBOARD_CACHE_TTL', 60))
+    return snapshot
@@ -0,0 +1,328 @@
+# backend/recipes/fake_manager.py - Local Manager.io stand-in for offline sync and load tests
+#
+# Serves the subset of the Manager.io API this app uses (inventory-items, customers,
+# their single-record GETs, customer-form, sales-order-form, production-order-form)
+# from generated data, with configurable latency, error and 429 rates and a page size
+# cap. Run it standalone with `manage.py run_fake_manager`, or in-process:
+#
+#     with running_fake_manager(latency_ms=20, rate_limit_rate=0.05) as server:
+#         ManagerApiService().sync_inventory_items()   # MANAGER_API_URL points at server.url
+#
+# Only the standard library is used so it runs wherever the app runs.
+
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from django.test import override_settings
+from .synthetic_data import (
+    ACCESSORIES, CUSTOMER_TYPES, CUSTOMER_WORDS, DIVISIONS, FLAVOURS, PRODUCTS, RAW_MATERIALS, RAW_VARIANTS,
+    SIZES, UNITS
+)
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = '/api2'
+
+
+@dataclass
+class FakeManagerConfig:
+    """Behaviour knobs for the fake server; all can be changed while it runs"""
+    seed: int = 42
+    inventory_items: int = 2000
+    customers: int = 1000
+    max_page_size: int = 100           # Larger pageSize requests are capped to this
+    latency_ms: float = 0.0            # Added to every request
+    latency_jitter_ms: float = 0.0     # Uniform extra latency on top of latency_ms
+    error_rate: float = 0.0            # Probability of a 500 response
+    rate_limit_rate: float = 0.0       # Probability of a 429 response
+    retry_after: int = 1               # Retry-After seconds sent with 429s
+    reprice_rate: float = 0.0          # Share of items whose cost changes each full inventory pass
+    api_key: str = None                # When set, requests without this X-API-KEY get 401
+
+
+class FakeManagerData:
+    """Generated Manager.io records plus everything posted to the form endpoints"""
+
+    def __init__(self, config):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.inventory = self._generate_inventory(config.inventory_items)
+        self.customers = self._generate_customers(config.customers)
+        self.sales_orders = []
+        self.production_orders = []
+        self.created_customers = []
+
+    def _key(self, kind, number):
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"fake-manager/{self.config.seed}/{kind}/{number}"))
+
+    def _generate_inventory(self, count):
+        rng = self.rng
+        items = []
+        for i in range(count):
+            bucket = i % 10
+            if bucket < 6:
+                prefix = 'RM'
+                name = f"{RAW_VARIANTS[i % len(RAW_VARIANTS)]} {RAW_MATERIALS[i % len(RAW_MATERIALS)]} {i}".strip()
+                unit = UNITS[i % len(UNITS)]
+            elif bucket < 9:
+                prefix = 'FG'
+                name = f"{SIZES[i % len(SIZES)]} {FLAVOURS[i % len(FLAVOURS)]} {PRODUCTS[i % len(PRODUCTS)]} {i}"
+                unit = 'piece'
+            else:
+                prefix = 'ACS'
+                name = f"{ACCESSORIES[i % len(ACCESSORIES)]} {i}"
+                unit = 'piece'
+            cost = Decimal(str(round(rng.uniform(5, 1500), 2)))
+            items.append({
+                'key': self._key('item', i),
+                'itemCode': f"{prefix}-F{i:05d}",
+                'itemName': name,
+                'unitName': unit,
+                'division': DIVISIONS[i % len(DIVISIONS)],
+                'qtyOnHand': round(rng.uniform(0, 500), 2),
+                'averageCost': {'value': float(cost), 'currency': 'BDT'},
+                'salePrice': {'value': float(cost * Decimal('1.35')) if prefix == 'FG' else 0, 'currency': 'BDT'},
+            })
+        return items
+
+    def _generate_customers(self, count):
+        rng = self.rng
+        return [
+            {
+                'key': self._key('customer', i),
+                'name': f"{CUSTOMER_WORDS[i % len(CUSTOMER_WORDS)]} {CUSTOMER_TYPES[(i // len(CUSTOMER_WORDS)) % len(CUSTOMER_TYPES)]} {i + 1}",
+                'code': f"FC-{i + 1:05d}",
+                'accountsReceivable': {'value': round(rng.uniform(-5000, 50000), 2), 'currency': 'BDT'},
+                'inactive': rng.random() < 0.03,
+            }
+            for i in range(count)
+        ]
+
+    def reprice(self):
+        """Change the average cost of a share of items, as a new Manager.io sync would see"""
+        rate = self.config.reprice_rate
+        if rate <= 0:
+            return 0
+        changed = 0
+        with self.lock:
+            for item in self.inventory:
+                if self.rng.random() < rate:
+                    cost = item['averageCost']['value'] * (1 + self.rng.gauss(0, 0.05))
+                    item['averageCost']['value'] = round(max(cost, 0.01), 2)
+                    changed += 1
+        return changed
+
+    def page(self, records, params):
+        skip = max(int(params.get('skip', 0) or 0), 0)
+        requested = int(params.get('pageSize', 50) or 50)
+        page_size = max(1, min(requested, self.config.max_page_size))
+        return records[skip:skip + page_size], len(records)
+
+    def find(self, records, key):
+        return next((record for record in records if record['key'] == key), None)
+
+    def record(self, collection, payload):
+        key = str(uuid.uuid4())
+        with self.lock:
+            collection.append({'key': key, 'payload': payload, 'received_at': time.time()})
+        return key
+
+
+class FakeManagerHandler(BaseHTTPRequestHandler):
+    """Request handler; the server instance carries config, data and stats"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        logger.debug("fake-manager: " + format, *args)
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+        self.server.count(f"status_{status}")
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return None
+
+    def _route(self):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        if path.startswith(API_PREFIX):
+            path = path[len(API_PREFIX):]
+        params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        return path.rstrip('/') or '/', params
+
+    def _inject_faults(self, path):
+        """Apply latency, auth and random failures; returns True if a response was sent"""
+        config = self.server.config
+        if path.startswith('/_fake'):
+            return False
+
+        delay = config.latency_ms + (random.uniform(0, config.latency_jitter_ms) if config.latency_jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000)
+
+        if config.api_key and self.headers.get('X-API-KEY') != config.api_key:
+            self._send_json(401, {'error': 'Unauthorized'})
+            return True
+        if config.rate_limit_rate and random.random() < config.rate_limit_rate:
+            self._send_json(429, {'error': 'Too Many Requests'}, {'Retry-After': str(config.retry_after)})
+            return True
+        if config.error_rate and random.random() < config.error_rate:
+            self._send_json(500, {'error': 'Injected server error'})
+            return True
+        return False
+
+    def do_GET(self):
+        path, params = self._route()
+        self.server.count(f"GET {path}")
+        if self._inject_faults(path):
+            return
+
+        data = self.server.data
+        if path == '/inventory-items':
+            if int(params.get('skip', 0) or 0) == 0:
+                data.reprice()
+            items, total = data.page(data.inventory, params)
+            self._send_json(200, {'inventoryItems': items, 'totalRecords': total})
+        elif path == '/customers':
+            customers = data.customers + data.created_customers
+            term = (params.get('filter') or '').lower()
+            if term:
+                customers = [c for c in customers if term in c['name'].lower() or term in (c.get('code') or '').lower()]
+            page, total = data.page(customers, params)
+            self._send_json(200, {'customers': page, 'totalRecords': total})
+        elif path.startswith(('/inventory-items/', '/customers/')):
+            collection, key = path.lstrip('/').split('/', 1)
+            records = data.inventory if collection == 'inventory-items' else data.customers + data.created_customers
+            record = data.find(records, key)
+            if record is None:
+                self._send_json(404, {'error': f'No {collection} record {key}'})
+            else:
+                self._send_json(200, record)
+        elif path == '/_fake/stats':
+            self._send_json(200, self.server.stats())
+        else:
+            self._send_json(404, {'error': f'Unknown endpoint {path}'})
+
+    def do_POST(self):
+        path, params = self._route()
+        self.server.count(f"POST {path}")
+        if self._inject_faults(path):
+            return
+
+        data = self.server.data
+        body = self._read_json()
+        if path in ('/sales-order-form', '/production-order-form', '/customer-form'):
+            if not isinstance(body, dict):
+                self._send_json(400, {'error': 'Expected a JSON object'})
+                return
+            if path == '/sales-order-form':
+                if not body.get('Customer') or not body.get('Lines'):
+                    self._send_json(400, {'error': 'Customer and Lines are required'})
+                    return
+                key = data.record(data.sales_orders, body)
+            elif path == '/production-order-form':
+                key = data.record(data.production_orders, body)
+            else:
+                key = str(uuid.uuid4())
+                with data.lock:
+                    data.created_customers.append({'key': key, 'name': body.get('Name') or '', 'code': None})
+            self._send_json(201, {'key': key})
+        elif path == '/_fake/reset':
+            self.server.reset()
+            self._send_json(200, {'status': 'reset'})
+        elif path == '/_fake/config':
+            if isinstance(body, dict):
+                self.server.configure(**body)
+            self._send_json(200, asdict(self.server.config))
+        else:
+            self._send_json(404, {'error': f'Unknown endpoint {path}'})
+
+
+class FakeManagerServer(ThreadingHTTPServer):
+    """Threaded fake Manager.io server with request counters"""
+
+    daemon_threads = True
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        self.config = config or FakeManagerConfig()
+        self.data = FakeManagerData(self.config)
+        self._stats_lock = threading.Lock()
+        self._counters = {}
+        self._thread = None
+        super().__init__((host, port), FakeManagerHandler)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def count(self, name):
+        with self._stats_lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+
+    def stats(self):
+        with self._stats_lock:
+            counters = dict(self._counters)
+        return {
+            'requests': counters,
+            'sales_orders': len(self.data.sales_orders),
+            'production_orders': len(self.data.production_orders),
+            'config': asdict(self.config),
+        }
+
+    def configure(self, **options):
+        for name, value in options.items():
+            if hasattr(self.config, name):
+                setattr(self.config, name, value)
+
+    def reset(self):
+        with self._stats_lock:
+            self._counters.clear()
+        self.data = FakeManagerData(self.config)
+
+    def start(self):
+        """Serve from a background thread and return self"""
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-manager', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+@contextmanager
+def running_fake_manager(**options):
+    """Run a fake server on a free port with MANAGER_API_URL/KEY pointed at it"""
+    config = FakeManagerConfig(**options)
+    server = FakeManagerServer(config).start()
+    try:
+        with override_settings(MANAGER_API_URL=server.url, MANAGER_API_KEY=config.api_key or 'fake-manager-key'):
+            yield server
+    finally:
+        server.stop()
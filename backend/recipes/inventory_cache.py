@@ -0,0 +1,90 @@
+# backend/recipes/inventory_cache.py - Read-through cache for ManagerInventoryItem lookups
+#
+# Single-item lookups by id, Manager.io UUID, code or name go through
+# inventory_repository instead of hitting the table each time. Every key embeds the
+# current sync generation; the inventory sync and any ManagerInventoryItem save or
+# delete bump it, which orphans all cached entries at once. Misses are cached too.
+# Entries also expire after INVENTORY_CACHE_TTL as a fallback for writes that skip
+# both paths. Uses the default cache: per-process locmem unless CACHES points at Redis.
+
+import hashlib
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from .models import ManagerInventoryItem
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'inventory:generation'
+ITEM_KEY = 'inventory:g{generation}:{kind}:{value}'
+MISSING = '__missing__'
+
+
+class InventoryRepository:
+    """Cached ManagerInventoryItem lookups; each method returns an item or None"""
+
+    def generation(self):
+        generation = cache.get(GENERATION_KEY)
+        if generation is None:
+            cache.add(GENERATION_KEY, 1, timeout=None)
+            generation = cache.get(GENERATION_KEY, 1)
+        return generation
+
+    def invalidate(self):
+        """Start a new generation so every cached lookup is reloaded"""
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.add(GENERATION_KEY, 2, timeout=None)
+        except Exception as e:
+            logger.warning(f"Could not invalidate inventory cache: {str(e)}")
+
+    def _lookup(self, kind, value, load):
+        if value in (None, ''):
+            return None
+        # Codes and names contain spaces, which are not portable in cache keys
+        key = ITEM_KEY.format(
+            generation=self.generation(), kind=kind, value=hashlib.sha1(str(value).encode()).hexdigest()
+        )
+        item = cache.get(key)
+        if item is None:
+            item = load() or MISSING
+            cache.set(key, item, getattr(settings, 'INVENTORY_CACHE_TTL', 300))
+        return None if item == MISSING else item
+
+    def get_by_id(self, item_id):
+        return self._lookup('id', item_id, lambda: ManagerInventoryItem.objects.filter(id=item_id).first())
+
+    def get_by_uuid(self, manager_item_id, case_insensitive=False):
+        if case_insensitive:
+            return self._lookup(
+                'iuuid', (manager_item_id or '').lower(),
+                lambda: ManagerInventoryItem.objects.filter(manager_item_id__iexact=manager_item_id).first()
+            )
+        return self._lookup(
+            'uuid', manager_item_id,
+            lambda: ManagerInventoryItem.objects.filter(manager_item_id=manager_item_id).first()
+        )
+
+    def get_by_code(self, code, case_insensitive=False):
+        """First item with this code; codes are not unique in Manager.io"""
+        if case_insensitive:
+            return self._lookup(
+                'icode', (code or '').lower(),
+                lambda: ManagerInventoryItem.objects.filter(code__iexact=code).order_by('id').first()
+            )
+        return self._lookup(
+            'code', code, lambda: ManagerInventoryItem.objects.filter(code=code).order_by('id').first()
+        )
+
+    def get_by_name(self, name):
+        return self._lookup(
+            'name', name, lambda: ManagerInventoryItem.objects.filter(name=name).order_by('id').first()
+        )
+
+    def get_by_uuid_or_code(self, manager_item_id=None, code=None):
+        """Prefer the Manager.io UUID, falling back to the item code"""
+        return self.get_by_uuid(manager_item_id) or self.get_by_code(code)
+
+
+inventory_repository = InventoryRepository()
@@ -0,0 +1,44 @@
+# backend/recipes/management/commands/compact_price_history.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from recipes.price_history import compact_price_history, prune_price_history
+
+
+class Command(BaseCommand):
+    help = 'Roll up price history into daily summaries and prune raw rows past the retention window'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=None,
+            help='Override PRICE_HISTORY_RETENTION_DAYS',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Rows deleted per statement',
+        )
+        parser.add_argument(
+            '--no-prune',
+            action='store_true',
+            help='Only build rollups, keep all raw rows',
+        )
+
+    def handle(self, *args, **options):
+        compacted = compact_price_history()
+        self.stdout.write(f"Wrote {compacted} daily rollup rows")
+
+        if options['no_prune']:
+            self.stdout.write(self.style.SUCCESS('Compaction complete (pruning skipped)'))
+            return
+
+        retention_days = options['retention_days']
+        if retention_days is None:
+            retention_days = getattr(settings, 'PRICE_HISTORY_RETENTION_DAYS', 365)
+        pruned = prune_price_history(retention_days=retention_days, chunk_size=options['chunk_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Pruned {pruned} price history rows older than {retention_days} days'
+        ))
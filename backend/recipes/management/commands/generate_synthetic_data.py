@@ -0,0 +1,64 @@
+# backend/recipes/management/commands/generate_synthetic_data.py
+from dataclasses import fields, replace
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from recipes.synthetic_data import PRESETS, flush_synthetic_data, generate_dataset
+
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic synthetic bakery dataset for load testing and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--preset',
+            choices=sorted(PRESETS),
+            default='medium',
+            help='Base dataset size (default: medium)',
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+        parser.add_argument(
+            '--as-of',
+            help='Date the dataset is generated relative to, YYYY-MM-DD (default: today)',
+        )
+        parser.add_argument(
+            '--flush-only',
+            action='store_true',
+            help='Remove previously generated synthetic rows and exit',
+        )
+        for field in fields(PRESETS['medium']):
+            parser.add_argument(
+                f"--{field.name.replace('_', '-')}",
+                type=int,
+                dest=field.name,
+                default=None,
+                help=f'Override {field.name} from the preset',
+            )
+
+    def handle(self, *args, **options):
+        if options['flush_only']:
+            deleted = flush_synthetic_data()
+            self.stdout.write(self.style.SUCCESS(f'Removed {deleted} synthetic rows'))
+            return
+
+        as_of = None
+        if options['as_of']:
+            try:
+                as_of = datetime.strptime(options['as_of'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--as-of must be YYYY-MM-DD')
+
+        overrides = {
+            field.name: options[field.name]
+            for field in fields(PRESETS['medium'])
+            if options.get(field.name) is not None
+        }
+        size = replace(PRESETS[options['preset']], **overrides)
+        if size.min_ingredients > size.max_ingredients:
+            raise CommandError('--min-ingredients cannot exceed --max-ingredients')
+
+        self.stdout.write(f"Generating synthetic dataset (preset={options['preset']}, seed={options['seed']})")
+        counts = generate_dataset(size=size, seed=options['seed'], as_of=as_of, log=self.stdout.write)
+
+        for model_name, count in counts.items():
+            self.stdout.write(f"  {model_name}: {count}")
+        self.stdout.write(self.style.SUCCESS('Successfully generated synthetic dataset'))
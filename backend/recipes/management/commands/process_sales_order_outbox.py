@@ -0,0 +1,85 @@
+# backend/recipes/management/commands/process_sales_order_outbox.py
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from recipes.models import SalesOrderOutbox
+from recipes.outbox import process_sales_order_outbox, prune_sales_order_outbox, requeue_messages, resolve_message
+
+
+class Command(BaseCommand):
+    help = 'Send queued sales orders to Manager.io, once or continuously with --loop'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Override MANAGER_OUTBOX_BATCH_SIZE')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox until interrupted')
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds between polls when nothing is due with --loop (default: 5)',
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Delete sent messages older than MANAGER_OUTBOX_RETENTION_DAYS and exit',
+        )
+        parser.add_argument(
+            '--review',
+            action='store_true',
+            help='List messages held for review because Manager.io may already have their order, and exit',
+        )
+        parser.add_argument(
+            '--requeue',
+            type=int,
+            nargs='+',
+            metavar='ID',
+            help='Send reviewed or failed messages again (check Manager.io has no such order first) and exit',
+        )
+        parser.add_argument(
+            '--resolve',
+            type=int,
+            metavar='ID',
+            help='Mark a reviewed or failed message sent, with the key from --manager-key, and exit',
+        )
+        parser.add_argument('--manager-key', help='Manager.io key of the sales order found for --resolve')
+
+    def handle(self, *args, **options):
+        if options['review']:
+            for message in SalesOrderOutbox.objects.filter(status='review').select_related('order'):
+                self.stdout.write(
+                    f"#{message.id} order #{message.order_id} ({message.order.customer_name}, "
+                    f"{message.order.order_date}) attempts={message.attempts}: {message.error}"
+                )
+            return
+
+        if options['requeue']:
+            requeued = requeue_messages(options['requeue'])
+            self.stdout.write(self.style.SUCCESS(f'Requeued {requeued} messages'))
+            return
+
+        if options['resolve']:
+            if not options['manager_key']:
+                raise CommandError('--resolve needs --manager-key')
+            try:
+                message = resolve_message(options['resolve'], options['manager_key'])
+            except SalesOrderOutbox.DoesNotExist:
+                raise CommandError(f"No reviewed or failed message #{options['resolve']}")
+            self.stdout.write(self.style.SUCCESS(f'Order #{message.order_id} marked synced as {message.manager_key}'))
+            return
+
+        if options['prune']:
+            days = getattr(settings, 'MANAGER_OUTBOX_RETENTION_DAYS', 30)
+            removed = prune_sales_order_outbox(days)
+            self.stdout.write(self.style.SUCCESS(f'Removed {removed} sent messages older than {days} days'))
+            return
+
+        while True:
+            summary = process_sales_order_outbox(limit=options['limit'])
+            if summary['messages']:
+                self.stdout.write(f"Processed {summary['messages']} messages: {summary}")
+            if not options['loop']:
+                break
+            if not summary['messages']:
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS('Sales order outbox processed'))
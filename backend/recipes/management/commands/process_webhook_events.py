@@ -0,0 +1,42 @@
+# backend/recipes/management/commands/process_webhook_events.py
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from recipes.webhooks import process_webhook_events, prune_webhook_events
+
+
+class Command(BaseCommand):
+    help = 'Apply queued Manager.io webhook events, once or continuously with --loop'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Override MANAGER_WEBHOOK_BATCH_SIZE')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the queue until interrupted')
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds between polls of an empty queue with --loop (default: 5)',
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Delete processed events older than MANAGER_WEBHOOK_EVENT_RETENTION_DAYS and exit',
+        )
+
+    def handle(self, *args, **options):
+        if options['prune']:
+            days = getattr(settings, 'MANAGER_WEBHOOK_EVENT_RETENTION_DAYS', 7)
+            removed = prune_webhook_events(days)
+            self.stdout.write(self.style.SUCCESS(f'Removed {removed} processed events older than {days} days'))
+            return
+
+        while True:
+            summary = process_webhook_events(limit=options['limit'])
+            if summary['events']:
+                self.stdout.write(f"Processed {summary['events']} events: {summary}")
+            if not options['loop']:
+                break
+            if not summary['events']:
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS('Webhook queue processed'))
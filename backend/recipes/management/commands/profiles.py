@@ -0,0 +1,118 @@
+# backend/recipes/management/commands/profiles.py
+import io
+import json
+import pstats
+from collections import defaultdict
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from recipes.profiling import get_profiling_dir, load_profiles, prune_profiles
+
+
+class Command(BaseCommand):
+    help = 'List and summarize request profiles saved by ProfilingMiddleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Number of recent profiles to list (default: 20)')
+        parser.add_argument('--view', help='Only profiles for this view name, e.g. recipe-list')
+        parser.add_argument(
+            '--summary',
+            action='store_true',
+            help='Aggregate duration and query counts per view instead of listing profiles',
+        )
+        parser.add_argument('--show', help='Print the details of one profile (file name or id)')
+        parser.add_argument(
+            '--sort',
+            default='cumulative',
+            choices=['cumulative', 'tottime', 'calls'],
+            help='Sort order for --show function stats (default: cumulative)',
+        )
+        parser.add_argument('--top', type=int, default=25, help='Functions and queries shown by --show')
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Delete profiles older than PROFILING_RETENTION_DAYS',
+        )
+
+    def handle(self, *args, **options):
+        directory = get_profiling_dir()
+
+        if options['prune']:
+            days = getattr(settings, 'PROFILING_RETENTION_DAYS', 7)
+            removed = prune_profiles(days)
+            self.stdout.write(self.style.SUCCESS(f'Removed {removed} profiles older than {days} days'))
+            return
+
+        if options['show']:
+            self._show(directory, options['show'], options['sort'], options['top'])
+            return
+
+        records = load_profiles(view_name=options['view'], limit=None if options['summary'] else options['limit'])
+        if not records:
+            self.stdout.write(f'No profiles found in {directory}')
+            return
+
+        if options['summary']:
+            self._summary(records)
+        else:
+            self._list(records)
+
+    def _list(self, records):
+        self.stdout.write(f"{'id':<52} {'method':<6} {'status':>6} {'ms':>9} {'queries':>8} {'sql ms':>9}  trigger")
+        for record in records:
+            self.stdout.write(
+                f"{Path(record['_path']).stem:<52} {record['method']:<6} {record['status_code']:>6} "
+                f"{record['duration_ms']:>9.1f} {record['db_queries']:>8} {record['db_time_ms']:>9.1f}  "
+                f"{record['trigger']}"
+            )
+
+    def _summary(self, records):
+        by_view = defaultdict(list)
+        for record in records:
+            by_view[record['view_name']].append(record)
+
+        self.stdout.write(f"{'view':<45} {'count':>6} {'avg ms':>9} {'max ms':>9} {'avg queries':>12} {'sql %':>6}")
+        rows = sorted(by_view.items(), key=lambda item: -max(r['duration_ms'] for r in item[1]))
+        for view_name, view_records in rows:
+            durations = [r['duration_ms'] for r in view_records]
+            total_ms = sum(durations)
+            sql_ms = sum(r['db_time_ms'] for r in view_records)
+            self.stdout.write(
+                f"{view_name:<45} {len(view_records):>6} {total_ms / len(view_records):>9.1f} {max(durations):>9.1f} "
+                f"{sum(r['db_queries'] for r in view_records) / len(view_records):>12.1f} "
+                f"{(sql_ms / total_ms * 100 if total_ms else 0):>5.0f}%"
+            )
+
+    def _show(self, directory, name, sort, top):
+        path = directory / f"{name.removesuffix('.json').removesuffix('.prof')}.json"
+        try:
+            record = json.loads(path.read_text())
+        except (OSError, ValueError):
+            raise CommandError(f'No readable profile named {name} in {directory}')
+
+        self.stdout.write(f"{record['method']} {record['path']} -> {record['status_code']} ({record['view_name']})")
+        self.stdout.write(
+            f"{record['duration_ms']:.1f}ms total, {record['db_queries']} queries in {record['db_time_ms']:.1f}ms, "
+            f"{record['function_calls']} function calls, trigger={record['trigger']}, user={record['user']}"
+        )
+
+        profile_path = directory / record['profile_file']
+        if profile_path.exists():
+            self.stdout.write(f"\nTop {top} functions by {sort}:")
+            output = io.StringIO()
+            pstats.Stats(str(profile_path), stream=output).sort_stats(sort).print_stats(top)
+            self.stdout.write(output.getvalue())
+
+        queries = sorted(record['queries'], key=lambda query: -query['ms'])[:top]
+        self.stdout.write(f"Slowest {len(queries)} of {record['db_queries']} queries:")
+        for query in queries:
+            self.stdout.write(f"  {query['ms']:>8.2f}ms  {query['sql'][:200]}")
+
+        repeated = defaultdict(int)
+        for query in record['queries']:
+            repeated[query['sql']] += 1
+        duplicates = sorted(((count, sql) for sql, count in repeated.items() if count > 1), reverse=True)[:10]
+        if duplicates:
+            self.stdout.write("Repeated statements (possible N+1):")
+            for count, sql in duplicates:
+                self.stdout.write(f"  {count:>5}x  {sql[:200]}")
@@ -0,0 +1,31 @@
+# backend/recipes/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+from django.db import connection
+from recipes.search import PostgresTrigramBackend, get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for inventory items and recipes'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        if backend is None:
+            hint = ' (set POSTGRES_FULL_TEXT_SEARCH to enable it)' if connection.vendor == 'postgresql' else ''
+            self.stdout.write(self.style.WARNING(
+                f"No full-text backend for database vendor '{connection.vendor}'{hint}, nothing to do"
+            ))
+            return
+
+        if isinstance(backend, PostgresTrigramBackend):
+            # Migration 0009 skips this when the backend was off at migrate time
+            backend.create_schema()
+            self.stdout.write("Created search schema")
+
+        backend.index_inventory_items()
+        self.stdout.write("Indexed inventory items")
+        backend.index_recipes()
+        self.stdout.write("Indexed recipes")
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully rebuilt search index using {type(backend).__name__}'
+        ))
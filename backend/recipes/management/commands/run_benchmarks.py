@@ -0,0 +1,72 @@
+# backend/recipes/management/commands/run_benchmarks.py
+import json
+from django.core.management.base import BaseCommand, CommandError
+from recipes.benchmarks import compare_reports, run_benchmarks, write_report
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the main endpoints and the inventory sync, writing a JSON report'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default='benchmark-report.json',
+            help='Where to write the JSON report (default: benchmark-report.json)',
+        )
+        parser.add_argument('--iterations', type=int, default=5, help='Timed runs per case (default: 5)')
+        parser.add_argument('--warmup', type=int, default=1, help='Untimed runs per case (default: 1)')
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            help='Run only these cases, e.g. --only recipe_list dashboard_cold',
+        )
+        parser.add_argument(
+            '--compare',
+            help='Previous report to compare against',
+        )
+        parser.add_argument(
+            '--fake-manager',
+            action='store_true',
+            help='Also time full syncs over HTTP against a local fake Manager.io',
+        )
+        parser.add_argument(
+            '--fake-latency-ms',
+            type=float,
+            default=0,
+            help='Latency the fake Manager.io adds to each request (default: 0)',
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read {options['compare']}: {e}")
+
+        self.stdout.write(self.style.WARNING(
+            'The inventory_sync case rewrites unit costs; run against a synthetic or scratch database'
+        ))
+        report = run_benchmarks(
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            only=options['only'],
+            log=self.stdout.write,
+            fake_manager={'latency_ms': options['fake_latency_ms']} if options['fake_manager'] else None,
+        )
+        write_report(report, options['output'])
+
+        if baseline:
+            self.stdout.write("\nChange vs baseline (median ms, queries):")
+            for name, delta in compare_reports(baseline, report).items():
+                before_ms, after_ms = delta['median_ms']
+                before_q, after_q = delta['queries']
+                change = f"{delta['median_change_pct']:+.1f}%" if delta['median_change_pct'] is not None else 'n/a'
+                line = f"  {name:<34} {before_ms:>9.1f} -> {after_ms:>9.1f} ({change}), queries {before_q} -> {after_q}"
+                self.stdout.write(self.style.ERROR(line) if after_q > before_q else line)
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote benchmark report to {options['output']}"))
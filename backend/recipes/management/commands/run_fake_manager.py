@@ -0,0 +1,55 @@
+# backend/recipes/management/commands/run_fake_manager.py
+from django.core.management.base import BaseCommand, CommandError
+from recipes.fake_manager import FakeManagerConfig, FakeManagerServer
+
+
+class Command(BaseCommand):
+    help = 'Run a local Manager.io stand-in for offline sync and load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+        parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for generated data (default: 42)')
+        parser.add_argument('--items', type=int, default=2000, help='Number of inventory items (default: 2000)')
+        parser.add_argument('--customers', type=int, default=1000, help='Number of customers (default: 1000)')
+        parser.add_argument('--page-size', type=int, default=100, help='Maximum page size served (default: 100)')
+        parser.add_argument('--latency-ms', type=float, default=0, help='Latency added to every request')
+        parser.add_argument('--jitter-ms', type=float, default=0, help='Random extra latency up to this value')
+        parser.add_argument('--error-rate', type=float, default=0, help='Share of requests answered with 500')
+        parser.add_argument('--rate-limit-rate', type=float, default=0, help='Share of requests answered with 429')
+        parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429s')
+        parser.add_argument('--reprice-rate', type=float, default=0,
+                            help='Share of items repriced on each full inventory pass')
+        parser.add_argument('--api-key', help='Require this X-API-KEY (default: accept any key)')
+
+    def handle(self, *args, **options):
+        for name in ('error_rate', 'rate_limit_rate', 'reprice_rate'):
+            if not 0 <= options[name] <= 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be between 0 and 1")
+
+        config = FakeManagerConfig(
+            seed=options['seed'],
+            inventory_items=options['items'],
+            customers=options['customers'],
+            max_page_size=options['page_size'],
+            latency_ms=options['latency_ms'],
+            latency_jitter_ms=options['jitter_ms'],
+            error_rate=options['error_rate'],
+            rate_limit_rate=options['rate_limit_rate'],
+            retry_after=options['retry_after'],
+            reprice_rate=options['reprice_rate'],
+            api_key=options['api_key'],
+        )
+        server = FakeManagerServer(config, host=options['host'], port=options['port'])
+
+        self.stdout.write(self.style.SUCCESS(f"Fake Manager.io listening on {server.url}"))
+        self.stdout.write(f"  export MANAGER_API_URL={server.url}")
+        if config.api_key:
+            self.stdout.write(f"  export MANAGER_API_KEY={config.api_key}")
+        self.stdout.write("  GET /_fake/stats, POST /_fake/config and /_fake/reset control the server")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping fake Manager.io')
+        finally:
+            server.server_close()
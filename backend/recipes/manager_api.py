@@ -1,16 +1,107 @@
 # backend/recipes/manager_api.py - RESTORED VERSION - Only missing methods added
 
 import requests
+import contextvars
+import hashlib
 import json
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from urllib.parse import urlencode
 from decimal import Decimal, InvalidOperation
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, DecimalField, Q
 from django.utils import timezone
+from .bulk import bulk_insert, bulk_upsert
 from .models import ManagerInventoryItem, InventoryPriceHistory
+from .search import deferred_indexing, index_inventory_items
+from .dashboard import invalidate_dashboard
+from .inventory_cache import inventory_repository
+from .production_financials import refresh_for_inventory_items
+from .metrics import ManagerClientStats, track_manager_call
+from .rate_limit import get_manager_rate_limiter
+from .circuit_breaker import get_manager_circuit_breaker
+from .single_flight import manager_single_flight
 
 logger = logging.getLogger(__name__)
 
+# Resent for GETs only; 429s are resent for any method (see send())
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRY_DELAY = 30
+MAX_CHANGE_PERCENTAGE = Decimal('999.99')  # InventoryPriceHistory.change_percentage is max_digits=5
+
+# ManagerInventoryItem fields overwritten by every inventory sync
+SYNC_FIELDS = [
+    'code', 'name', 'description', 'unit', 'unit_cost', 'sales_price', 'quantity_available',
+    'threshold_quantity', 'category', 'division_name', 'last_synced'
+]
+
+# Single-record endpoints used by the webhook-driven incremental syncs
+INVENTORY_ITEM_ENDPOINT = 'inventory-items/{key}'
+CUSTOMER_ENDPOINT = 'customers/{key}'
+CUSTOMER_FIELDS = ['name', 'code', 'status', 'balance', 'last_synced']
+
+# Assembled get_customers() list; see get_customers() for the refresh rules
+CUSTOMER_LIST_KEY = 'manager:customers:list'
+CUSTOMER_PAGE_SIZE = 100
+
+
+def invalidate_customer_list():
+    """Drop the cached get_customers() list so the next call refetches every page"""
+    cache.delete(CUSTOMER_LIST_KEY)
+
+
+def _customer_fingerprint(first_page, total_records):
+    """Digest of the first customers page and totalRecords.
+
+    Changes when customers are added or removed, or edited on the first page; edits
+    further down leave it unchanged.
+    """
+    return hashlib.sha1(json.dumps([total_records, first_page], sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _unfit_field(model, row):
+    """Describe the first value in ``row`` that its column on ``model`` can't hold, or None.
+
+    Syncs write every row in one bulk statement per batch, so a value that doesn't
+    fit would fail the whole sync; the row is skipped instead.
+    """
+    for name, value in row.items():
+        if value is None:
+            continue
+        field = model._meta.get_field(name)
+        if isinstance(value, str) and field.max_length and len(value) > field.max_length:
+            return f"{name} is longer than {field.max_length} characters"
+        if isinstance(field, DecimalField):
+            try:
+                digits = value.quantize(Decimal(1).scaleb(-field.decimal_places)).as_tuple().digits
+            except InvalidOperation:
+                digits = None
+            if not value.is_finite() or digits is None or len(digits) > field.max_digits:
+                return f"{name} {value} does not fit {field.max_digits} digits"
+    return None
+
+
+class ManagerRecordNotFound(Exception):
+    """Manager.io answered 404, e.g. for a record deleted since the event was sent"""
+
+
+class ManagerRequestRejected(Exception):
+    """Manager.io refused the request itself (4xx other than 401/404/408/429); resending won't help"""
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def rejection_status(status_code):
+    """True for 4xx responses that ManagerRequestRejected stands for"""
+    return 400 <= status_code < 500 and status_code not in (401, 404, 408, 429)
+
+
 class ManagerApiService:
     """Service to interact with Manager.io API with pagination support"""
     
@@ -19,9 +110,17 @@ class ManagerApiService:
         self.api_url = getattr(settings, 'MANAGER_API_URL', 'https://esourcingbd.ap-southeast-1.manager.io/api2')
         self.api_key = getattr(settings, 'MANAGER_API_KEY', '')
         
+        self.max_retries = getattr(settings, 'MANAGER_API_MAX_RETRIES', 2)
+        self.retry_backoff = getattr(settings, 'MANAGER_API_RETRY_BACKOFF', 0.5)
+        self.max_throttle_retries = getattr(settings, 'MANAGER_API_MAX_THROTTLE_RETRIES', 5)
+        self.client_stats = ManagerClientStats()
+        self.rate_limiter = get_manager_rate_limiter()
+        self.circuit_breaker = get_manager_circuit_breaker()
+        self.timeout = getattr(settings, 'MANAGER_API_TIMEOUT', 30)
+        self.coalesce_reads = getattr(settings, 'MANAGER_COALESCE_READS', True)
+
         # Log the API configuration (without exposing the full key)
-        logger.info(f"Manager.io API URL: {self.api_url}")
-        logger.info(f"API Key configured: {'Yes' if self.api_key else 'No'} (length: {len(self.api_key)})")
+        logger.debug("Manager.io API URL: %s, API key configured: %s", self.api_url, bool(self.api_key))
         
         # Setup headers with proper authentication
         self.headers = {
@@ -30,44 +129,142 @@ class ManagerApiService:
             'Accept': 'application/json'
         }
 
-    def _make_request(self, method, endpoint, params=None, data=None):
-        """Make a request to the Manager.io API with robust error handling"""
+    def _send(self, method, url, params=None, data=None, headers=None):
+        headers = {**self.headers, **headers} if headers else self.headers
+        if method == 'get':
+            return requests.get(url, headers=headers, params=params, timeout=self.timeout)
+        elif method == 'post':
+            return requests.post(url, headers=headers, json=data, timeout=self.timeout)
+        elif method == 'put':
+            return requests.put(url, headers=headers, json=data, timeout=self.timeout)
+        elif method == 'delete':
+            return requests.delete(url, headers=headers, timeout=self.timeout)
+        raise ValueError(f"Unsupported HTTP method: {method}")
+
+    def _retry_delay(self, attempt, response=None):
+        """Seconds to wait before retry ``attempt``, honouring Retry-After when sent"""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), MAX_RETRY_DELAY)
+            except ValueError:
+                pass
+        return min(self.retry_backoff * (2 ** attempt), MAX_RETRY_DELAY)
+
+    def _make_request(self, method, endpoint, params=None, data=None, label=None, headers=None):
+        """Make a request to the Manager.io API; concurrent identical GETs share one fetch"""
+        if method.lower() == 'get' and self.coalesce_reads and not headers:
+            key = f"GET {self.api_url}/{endpoint}?{urlencode(sorted((params or {}).items()))}"
+            return manager_single_flight.do(key, lambda: self._request(method, endpoint, params, data, label))
+        return self._request(method, endpoint, params=params, data=data, label=label, headers=headers)
+
+    def send(self, method, endpoint, params=None, data=None, label=None, headers=None):
+        """Send one request to the Manager.io API and return the requests.Response.
+
+        Every request waits on the shared adaptive rate limiter (recipes/rate_limit.py)
+        and fails fast with CircuitOpenError while the circuit breaker is open.
+        429s are resent up to MANAGER_API_MAX_THROTTLE_RETRIES times for any method;
+        idempotent GETs are also retried on connection errors and 500/502/503/504.
+        Every attempt is recorded in self.client_stats under ``label`` (default: the
+        endpoint); pass the endpoint template for per-record URLs. ``headers`` are
+        added to the defaults, e.g. an Idempotency-Key. Status codes are left to the
+        caller; connection errors and timeouts are raised once retries run out.
+        """
         url = f"{self.api_url}/{endpoint}"
-        
-        try:
-            logger.info(f"Making {method.upper()} request to: {url}")
-            logger.debug(f"Headers: X-API-KEY: {self.api_key[:10]}...{self.api_key[-10:] if len(self.api_key) > 20 else ''}")
-            
-            # Verify we have an API key
-            if not self.api_key:
-                raise Exception("Manager.io API key is not configured in settings.py")
-            
-            if method.lower() == 'get':
-                response = requests.get(url, headers=self.headers, params=params, timeout=30)
-            elif method.lower() == 'post':
-                response = requests.post(url, headers=self.headers, json=data, timeout=30)
-            elif method.lower() == 'put':
-                response = requests.put(url, headers=self.headers, json=data, timeout=30)
-            elif method.lower() == 'delete':
-                response = requests.delete(url, headers=self.headers, timeout=30)
+        label = label or endpoint
+        method = method.lower()
+        max_attempts = 1 + (self.max_retries if method == 'get' else 0)
+
+        logger.debug("Making %s request to: %s", method.upper(), url)
+
+        # Verify we have an API key
+        if not self.api_key:
+            raise Exception("Manager.io API key is not configured in settings.py")
+
+        attempt = 0
+        throttled = 0
+        while True:
+            # Raises CircuitOpenError while Manager.io is marked unavailable
+            self.circuit_breaker.before_call()
+            try:
+                with self.rate_limiter.slot(), track_manager_call():
+                    start = time.perf_counter()
+                    response = self._send(method, url, params=params, data=data, headers=headers)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                elapsed = time.perf_counter() - start
+                self.rate_limiter.record(None, elapsed)
+                self.circuit_breaker.record_failure(type(e).__name__)
+                self.client_stats.record_response(label, method.upper(), 'error', elapsed)
+                if attempt + 1 >= max_attempts:
+                    raise
+                self.client_stats.record_retry(label, method.upper(), type(e).__name__)
+                time.sleep(self._retry_delay(attempt))
+                attempt += 1
+                continue
+
+            elapsed = time.perf_counter() - start
+            self.rate_limiter.record(response.status_code, elapsed, response.headers.get('Retry-After'))
+            if response.status_code >= 500:
+                self.circuit_breaker.record_failure(f"HTTP {response.status_code}")
             else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            logger.info(f"Response status: {response.status_code}")
-            
+                self.circuit_breaker.record_success(elapsed)
+            self.client_stats.record_response(
+                label, method.upper(), response.status_code, elapsed, len(response.content)
+            )
+            logger.debug("Response status: %s", response.status_code)
+
+            # A 429 was not processed, so any method may be resent; the limiter waits out Retry-After,
+            # and without one the retry backs off, as the limiter may still hold burst tokens
+            if response.status_code == 429 and throttled < self.max_throttle_retries:
+                self.client_stats.record_retry(label, method.upper(), 429)
+                if not response.headers.get('Retry-After'):
+                    time.sleep(self._retry_delay(throttled))
+                throttled += 1
+                logger.info("Manager.io throttled %s %s, retry %d", method.upper(), endpoint, throttled)
+                continue
+            if response.status_code in RETRY_STATUSES and attempt + 1 < max_attempts:
+                self.client_stats.record_retry(label, method.upper(), response.status_code)
+                delay = self._retry_delay(attempt, response)
+                logger.warning(
+                    "Manager.io returned %s for %s %s, retrying in %.1fs", response.status_code,
+                    method.upper(), endpoint, delay
+                )
+                time.sleep(delay)
+                attempt += 1
+                continue
+            return response
+
+    def _request(self, method, endpoint, params=None, data=None, label=None, headers=None):
+        """send() with robust error handling; returns the decoded JSON body.
+
+        Requests Manager.io refuses outright raise ManagerRequestRejected and a
+        missing record raises ManagerRecordNotFound; other failures raise Exception.
+        """
+        try:
+            response = self.send(method, endpoint, params=params, data=data, label=label, headers=headers)
+
             # Handle 401 Unauthorized specifically
             if response.status_code == 401:
                 logger.error("401 Unauthorized - Check your Manager.io API key")
                 logger.error(f"Current API URL: {self.api_url}")
                 logger.error(f"API Key starts with: {self.api_key[:20] if self.api_key else 'NOT SET'}")
                 raise Exception("Manager.io API authentication failed. Please check your API key in settings.py")
-            
+
+            if response.status_code == 404:
+                raise ManagerRecordNotFound(f"Manager.io has no {endpoint}")
+
+            if rejection_status(response.status_code):
+                raise ManagerRequestRejected(
+                    response.status_code,
+                    f"Manager.io rejected {method.upper()} {endpoint}: {response.status_code} {response.text[:300]}"
+                )
+
             response.raise_for_status()
-            
+
             if response.content:
                 return response.json()
             return None
-            
+
         except requests.exceptions.RequestException as e:
             logger.error(f"Manager.io API request failed: {str(e)}")
             if hasattr(e, 'response') and e.response is not None:
@@ -106,9 +303,15 @@ class ManagerApiService:
             }
 
     def _fetch_all_inventory_items(self):
+        """Fetch ALL inventory items; concurrent callers share one pagination run"""
+        if not self.coalesce_reads:
+            return self._paginate_inventory_items()
+        return manager_single_flight.do(f"inventory-items:all {self.api_url}", self._paginate_inventory_items)
+
+    def _paginate_inventory_items(self):
         """Fetch ALL inventory items with proper pagination"""
         try:
-            logger.info("=== FETCHING ALL INVENTORY ITEMS WITH PAGINATION ===")
+            logger.debug("Fetching all inventory items with pagination")
             
             all_items = []
             page_size = 100  # Reasonable page size
@@ -117,7 +320,7 @@ class ManagerApiService:
             iterations = 0
             
             while iterations < max_iterations:
-                logger.info(f"Fetching page: skip={skip}, pageSize={page_size}")
+                logger.debug("Fetching page: skip=%d, pageSize=%d", skip, page_size)
                 
                 # Make API call for this page
                 params = {
@@ -132,41 +335,45 @@ class ManagerApiService:
                     break
                 
                 # Extract items from response
-                page_items = []
-                if isinstance(response, dict) and 'inventoryItems' in response:
-                    page_items = response['inventoryItems']
-                elif isinstance(response, list):
-                    page_items = response
-                elif isinstance(response, dict):
-                    # Try to find items in any list field
-                    for key, value in response.items():
-                        if isinstance(value, list) and len(value) > 0:
-                            page_items = value
-                            break
+                page_items = self._inventory_page_items(response)
                 
+                self.client_stats.record_page('inventory-items', len(page_items))
                 if not page_items:
-                    logger.info(f"No items found on page {iterations}, stopping pagination")
+                    logger.debug("No items found on page %d, stopping pagination", iterations)
                     break
                 
-                logger.info(f"Found {len(page_items)} items on page {iterations}")
+                logger.debug("Found %d items on page %d", len(page_items), iterations)
                 all_items.extend(page_items)
                 
                 # If we got fewer items than page_size, we've reached the end
                 if len(page_items) < page_size:
-                    logger.info(f"Got {len(page_items)} < {page_size}, reached end of data")
+                    logger.debug("Got %d < %d, reached end of data", len(page_items), page_size)
                     break
                 
                 # Move to next page
                 skip += page_size
                 iterations += 1
             
-            logger.info(f"=== PAGINATION COMPLETE: Fetched {len(all_items)} total items in {iterations} pages ===")
+            logger.info("Fetched %d inventory items from Manager.io in %d pages", len(all_items), iterations + 1)
             return all_items
             
         except Exception as e:
             logger.error(f"Error fetching all inventory items: {str(e)}")
             raise
     
+    def _inventory_page_items(self, response):
+        """Items on one inventory-items page, whichever shape Manager.io returned"""
+        if isinstance(response, dict) and 'inventoryItems' in response:
+            return response['inventoryItems']
+        if isinstance(response, list):
+            return response
+        if isinstance(response, dict):
+            # Try to find items in any list field
+            for value in response.values():
+                if isinstance(value, list) and len(value) > 0:
+                    return value
+        return []
+
     def sync_inventory_items(self):
         """Main sync method with proper pagination and database operations"""
         try:
@@ -182,7 +389,7 @@ class ManagerApiService:
                     'details': {'total_from_manager': 0, 'processed_items': 0}
                 }
             
-            logger.info(f"Processing {len(all_items)} items from Manager.io...")
+            logger.debug("Processing %d items from Manager.io", len(all_items))
             
             # Track statistics
             stats = {
@@ -195,40 +402,47 @@ class ManagerApiService:
                 'skipped_count': 0
             }
             
-            # Process each item
+            # Parse every item first, then write them in bulk; the search index is rebuilt once afterwards
+            rows = {}
             for index, item in enumerate(all_items):
                 try:
-                    if index % 10 == 0:  # Log progress every 10 items
-                        logger.info(f"Processing item {index + 1}/{len(all_items)}")
-                    
-                    result = self._process_inventory_item_safely(item, stats, index)
-                    if result:
-                        stats['processed_count'] += 1
-                    else:
-                        stats['skipped_count'] += 1
-                        
+                    row = self._parse_inventory_item(item, index)
                 except Exception as item_error:
                     error_msg = f"Error processing item {index}: {str(item_error)}"
                     logger.error(error_msg)
                     stats['errors'].append(error_msg)
                     continue
+                if row is None or row['manager_item_id'] in rows:
+                    stats['skipped_count'] += 1
+                if row is not None:
+                    rows[row['manager_item_id']] = row
+
+            with deferred_indexing():
+                self._write_inventory_items(list(rows.values()), stats)
+            
+            invalidate_dashboard()
+            inventory_repository.invalidate()
             
             # Final database counts
-            total_in_db = ManagerInventoryItem.objects.count()
-            raw_materials = ManagerInventoryItem.objects.filter(category='RAW_MATERIAL').count()
-            finished_goods = ManagerInventoryItem.objects.filter(category='FINISHED_GOOD').count()
-            accessories = ManagerInventoryItem.objects.filter(category='ACCESSORY').count()
+            totals = ManagerInventoryItem.objects.aggregate(
+                total=Count('id'),
+                raw_materials=Count('id', filter=Q(category='RAW_MATERIAL')),
+                finished_goods=Count('id', filter=Q(category='FINISHED_GOOD')),
+                accessories=Count('id', filter=Q(category='ACCESSORY')),
+            )
+            total_in_db = totals['total']
+            raw_materials = totals['raw_materials']
+            finished_goods = totals['finished_goods']
+            accessories = totals['accessories']
             
             # Log final statistics
-            logger.info(f"=== SYNC COMPLETED ===")
-            logger.info(f"Items from Manager.io: {len(all_items)}")
-            logger.info(f"Items processed: {stats['processed_count']}")
-            logger.info(f"Items skipped: {stats['skipped_count']}")
-            logger.info(f"New items created: {stats['new_items_count']}")
-            logger.info(f"Items updated: {stats['updated_items_count']}")
-            logger.info(f"Price changes tracked: {stats['price_changes_count']}")
-            logger.info(f"Total in database: {total_in_db}")
-            logger.info(f"Errors: {len(stats['errors'])}")
+            logger.info(
+                "Inventory sync completed: %d from Manager.io, %d processed, %d skipped, %d new, %d updated, "
+                "%d price changes, %d in database, %d errors, %d API requests (%d retries)",
+                len(all_items), stats['processed_count'], stats['skipped_count'], stats['new_items_count'],
+                stats['updated_items_count'], stats['price_changes_count'], total_in_db, len(stats['errors']),
+                self.client_stats.requests, self.client_stats.retries
+            )
             
             result = {
                 'status': 'success',
@@ -246,7 +460,9 @@ class ManagerApiService:
                     'finished_goods': finished_goods,
                     'accessories': accessories,
                     'errors_count': len(stats['errors']),
-                    'errors': stats['errors'][:5] if stats['errors'] else []
+                    'errors': stats['errors'][:5] if stats['errors'] else [],
+                    'api': self.client_stats.summary(),
+                    'rate_limit': self.rate_limiter.state()
                 }
             }
             
@@ -258,9 +474,78 @@ class ManagerApiService:
             return {
                 'status': 'error',
                 'message': f"Sync failed: {str(e)}",
-                'details': {'error_type': type(e).__name__}
+                'details': {'error_type': type(e).__name__, 'api': self.client_stats.summary()}
             }
     
+    def _fetch_records(self, endpoint, keys, parse):
+        """GET one record per Manager.io key and parse it.
+
+        Returns (rows, missing_keys, failed) where ``failed`` maps key -> error message.
+        """
+        rows, missing, failed = [], [], {}
+        for index, key in enumerate(dict.fromkeys(keys)):
+            try:
+                raw = self._make_request('GET', endpoint.format(key=key), label=endpoint)
+                if isinstance(raw, dict):
+                    # Some record endpoints omit the key from the body
+                    raw = {'key': key, **raw}
+                row = parse(raw or {}, index)
+            except ManagerRecordNotFound:
+                missing.append(key)
+                continue
+            except Exception as e:
+                failed[key] = str(e)
+                continue
+            if row is None:
+                failed[key] = 'Record is missing required fields'
+            else:
+                rows.append(row)
+        return rows, missing, failed
+
+    def sync_inventory_items_by_key(self, keys):
+        """Re-fetch and upsert only the given Manager.io inventory items.
+
+        Price changes are recorded exactly like the full sync. Items deleted in
+        Manager.io are reported as missing and left in place for the nightly full sync.
+        """
+        stats = {
+            'processed_count': 0,
+            'price_changes_count': 0,
+            'significant_changes': [],
+            'new_items_count': 0,
+            'updated_items_count': 0,
+            'errors': [],
+            'skipped_count': 0
+        }
+        rows, missing, failed = self._fetch_records(INVENTORY_ITEM_ENDPOINT, keys, self._parse_inventory_item)
+        if rows:
+            self._write_inventory_items(rows, stats, partial=True)
+            item_ids = list(ManagerInventoryItem.objects.filter(
+                manager_item_id__in=[row['manager_item_id'] for row in rows]
+            ).values_list('id', flat=True))
+            index_inventory_items(item_ids)
+            inventory_repository.invalidate()
+            if stats['price_changes_count']:
+                invalidate_dashboard()
+
+        logger.info(
+            "Incremental inventory sync: %d updated, %d new, %d price changes, %d missing, %d failed",
+            stats['updated_items_count'], stats['new_items_count'], stats['price_changes_count'],
+            len(missing), len(failed)
+        )
+        return {
+            'synced': [row['manager_item_id'] for row in rows],
+            'missing': missing,
+            'failed': failed,
+            'details': {
+                'new_items': stats['new_items_count'],
+                'updated_items': stats['updated_items_count'],
+                'price_changes': stats['price_changes_count'],
+                'significant_changes': stats['significant_changes'],
+                'api': self.client_stats.summary()
+            }
+        }
+
     def _safe_decimal(self, value, default=0):
         """Safely convert value to Decimal"""
         if value is None:
@@ -271,135 +556,152 @@ class ManagerApiService:
         except (ValueError, TypeError, InvalidOperation):
             return Decimal(str(default))
     
-    def _process_inventory_item_safely(self, item, stats, index):
-        """Process a single inventory item with comprehensive validation"""
-        
-        try:
-            # Extract and validate UUID
-            manager_uuid = self._extract_field(item, ['id', 'ID', 'key', 'Key'])
-            if not manager_uuid:
-                logger.debug(f"Item {index}: Missing UUID, skipping")
-                return None
-            
-            # Extract item details with safe defaults
-            item_code = self._extract_field(item, ['ItemCode', 'itemCode', 'code', 'Code'])
-            item_name = self._extract_field(item, ['ItemName', 'itemName', 'name', 'Name'])
+    def _parse_inventory_item(self, item, index):
+        """Map one Manager.io inventory item to ManagerInventoryItem field values, or None to skip it"""
+        # Extract and validate UUID
+        manager_uuid = self._extract_field(item, ['id', 'ID', 'key', 'Key'])
+        if not manager_uuid:
+            logger.debug("Item %d: Missing UUID, skipping", index)
+            return None
 
-            # FIX: Extract division name from the correct field
-            division_name = self._extract_field(item, ['division', 'Division', 'divisionName', 'DivisionName'])
-            
-            # Skip items without essential data
-            if not item_code or not item_name:
-                logger.debug(f"Item {index}: Missing code ({item_code}) or name ({item_name}), skipping")
-                return None
-            
-            unit = self._extract_field(item, ['UnitName', 'unitName', 'unit', 'Unit']) or 'piece'
-            
-            # Extract numeric values safely
-            quantity = self._extract_numeric_field(item, ['qtyOnHand', 'qtyOwned', 'qty', 'Qty', 'quantity'])
-            sales_price = self._extract_sales_price(item)
-            cost = self._extract_cost(item)
-            
-            # Determine category
-            category = self._determine_category(item_code)
-            
-            # Check for existing item to track price changes
-            old_price = None
-            item_created = False
-            
-            try:
-                existing_item = ManagerInventoryItem.objects.get(manager_item_id=manager_uuid)
-                old_price = existing_item.unit_cost
-                item_created = False
-                stats['updated_items_count'] += 1
-            except ManagerInventoryItem.DoesNotExist:
-                existing_item = None
-                old_price = None
-                item_created = True
+        # Extract item details with safe defaults
+        item_code = self._extract_field(item, ['ItemCode', 'itemCode', 'code', 'Code'])
+        item_name = self._extract_field(item, ['ItemName', 'itemName', 'name', 'Name'])
+
+        # FIX: Extract division name from the correct field
+        division_name = self._extract_field(item, ['division', 'Division', 'divisionName', 'DivisionName'])
+
+        # Skip items without essential data
+        if not item_code or not item_name:
+            logger.debug("Item %d: Missing code (%s) or name (%s), skipping", index, item_code, item_name)
+            return None
+
+        row = {
+            'manager_item_id': manager_uuid,
+            'code': item_code,
+            'name': item_name,
+            'unit': self._extract_field(item, ['UnitName', 'unitName', 'unit', 'Unit']) or 'piece',
+            'unit_cost': self._extract_cost(item),
+            'sales_price': self._extract_sales_price(item),
+            'quantity_available': self._extract_numeric_field(
+                item, ['qtyOnHand', 'qtyOwned', 'qty', 'Qty', 'quantity']
+            ),
+            'category': self._determine_category(item_code),
+            'division_name': division_name,
+        }
+        problem = _unfit_field(ManagerInventoryItem, row)
+        if problem:
+            logger.warning("Item %d (%s): %s, skipping", index, item_code, problem)
+            return None
+        return row
+
+    def _write_inventory_items(self, rows, stats, partial=False):
+        """Upsert parsed inventory rows and record their price changes in bulk.
+
+        With ``partial`` only the rows' own items are looked up, for small incremental batches.
+        """
+        existing_items = ManagerInventoryItem.objects.all()
+        if partial:
+            existing_items = existing_items.filter(manager_item_id__in=[row['manager_item_id'] for row in rows])
+        existing = {
+            manager_id: (item_id, unit_cost, sales_price)
+            for manager_id, item_id, unit_cost, sales_price in existing_items.values_list(
+                'manager_item_id', 'id', 'unit_cost', 'sales_price'
+            )
+        }
+        now = timezone.now()
+        items = []
+        history = []
+        # Items whose cost or sales price production order financials may depend on
+        repriced = []
+
+        for row in rows:
+            items.append(ManagerInventoryItem(
+                description='', threshold_quantity=Decimal('1.0'), last_synced=now, **row
+            ))
+            if row['manager_item_id'] not in existing:
                 stats['new_items_count'] += 1
-            
-            # Create or update the item
+                repriced.append(row['manager_item_id'])
+                continue
+
+            stats['updated_items_count'] += 1
+            item_id, old_price, old_sales_price = existing[row['manager_item_id']]
+            change = self._price_change(old_price, row['unit_cost'])
+            if change is not None or self._price_change(old_sales_price, row['sales_price']) is not None:
+                repriced.append(row['manager_item_id'])
+            if change is None:
+                continue
+
+            change_amount, change_percentage = change
+            history.append(InventoryPriceHistory(
+                inventory_item_id=item_id,
+                old_price=old_price,
+                new_price=row['unit_cost'],
+                change_amount=change_amount,
+                change_percentage=max(min(change_percentage, MAX_CHANGE_PERCENTAGE), -MAX_CHANGE_PERCENTAGE),
+                sync_source='manager_sync'
+            ))
+            stats['price_changes_count'] += 1
+
+            # Track significant changes (> 5%)
+            if old_price > 0 and abs(change_percentage) > 5:
+                stats['significant_changes'].append({
+                    'name': row['name'],
+                    'code': row['code'],
+                    'old_price': float(old_price),
+                    'new_price': float(row['unit_cost']),
+                    'change_percentage': round(float(abs(change_percentage)), 1)
+                })
+
+        with transaction.atomic():
+            bulk_upsert(ManagerInventoryItem, items, unique_fields=['manager_item_id'], update_fields=SYNC_FIELDS)
+            bulk_insert(InventoryPriceHistory, history)
+        stats['processed_count'] += len(items)
+
+        if repriced:
             try:
-                item_obj, created = ManagerInventoryItem.objects.update_or_create(
-                    manager_item_id=manager_uuid,
-                    defaults={
-                        'code': item_code,
-                        'name': item_name,
-                        'description': '',
-                        'unit': unit,
-                        'unit_cost': cost,
-                        'sales_price': sales_price,
-                        'quantity_available': quantity,
-                        'threshold_quantity': Decimal('1.0'),
-                        'category': category,
-                        'division_name': division_name,  # FIX: Add division_name to the update
-                        'last_synced': timezone.now()
-                    }
-                )
-                
-                # Track price changes for existing items
-                if not item_created and old_price is not None:
-                    try:
-                        price_changed = self._track_price_change(item_obj, old_price, cost, 'manager_sync')
-                        if price_changed:
-                            stats['price_changes_count'] += 1
-                            
-                            # Track significant changes (> 5%)
-                            if old_price > 0:
-                                change_percentage = abs((cost - old_price) / old_price) * 100
-                                if change_percentage > 5:
-                                    stats['significant_changes'].append({
-                                        'name': item_name,
-                                        'code': item_code,
-                                        'old_price': float(old_price),
-                                        'new_price': float(cost),
-                                        'change_percentage': round(float(change_percentage), 1)
-                                    })
-                    except Exception as price_error:
-                        logger.warning(f"Could not track price change for {item_code}: {str(price_error)}")
-                
-                logger.debug(f"{'Created' if created else 'Updated'} item: {item_code} - {item_name} (Division: {division_name or 'Unknown'})")
-                return item_obj
-                
-            except Exception as db_error:
-                logger.error(f"Database error for item {item_code}: {str(db_error)}")
-                stats['errors'].append(f"Database error for {item_code}: {str(db_error)}")
-                return None
-                
-        except Exception as e:
-            logger.error(f"Error processing item {index}: {str(e)}")
-            stats['errors'].append(f"Processing error for item {index}: {str(e)}")
+                refresh_for_inventory_items(ManagerInventoryItem.objects.filter(manager_item_id__in=repriced))
+            except Exception as e:
+                logger.error(f"Error refreshing production order financials: {str(e)}")
+
+    def _price_change(self, old_price, new_price):
+        """Return (change_amount, change_percentage), or None if the price did not meaningfully change"""
+        old_price = self._safe_decimal(old_price, 0)
+        new_price = self._safe_decimal(new_price, 0)
+
+        # Only track if there's a meaningful change
+        if abs(old_price - new_price) < Decimal('0.01'):
             return None
-    
+
+        change_amount = new_price - old_price
+        if old_price > 0:
+            change_percentage = (change_amount / old_price) * 100
+        else:
+            change_percentage = Decimal('100') if new_price > 0 else Decimal('0')
+        return change_amount, change_percentage
+
     def _track_price_change(self, inventory_item, old_price, new_price, source='manager_sync'):
         """Safely track price changes"""
         try:
-            old_price = self._safe_decimal(old_price, 0)
-            new_price = self._safe_decimal(new_price, 0)
-            
-            # Only track if there's a meaningful change
-            if abs(old_price - new_price) < Decimal('0.01'):
+            change = self._price_change(old_price, new_price)
+            if change is None:
                 return False
-            
-            change_amount = new_price - old_price
-            
-            if old_price > 0:
-                change_percentage = (change_amount / old_price) * 100
-            else:
-                change_percentage = Decimal('100') if new_price > 0 else Decimal('0')
+            change_amount, change_percentage = change
             
             try:
-                price_history = InventoryPriceHistory.objects.create(
+                InventoryPriceHistory.objects.create(
                     inventory_item=inventory_item,
-                    old_price=old_price,
-                    new_price=new_price,
+                    old_price=self._safe_decimal(old_price, 0),
+                    new_price=self._safe_decimal(new_price, 0),
                     change_amount=change_amount,
-                    change_percentage=change_percentage,
+                    change_percentage=max(min(change_percentage, MAX_CHANGE_PERCENTAGE), -MAX_CHANGE_PERCENTAGE),
                     sync_source=source
                 )
                 
-                logger.info(f"Price change tracked for {inventory_item.name}: "
-                           f"{old_price} → {new_price} ({change_percentage:+.1f}%)")
+                logger.debug(
+                    "Price change tracked for %s: %s → %s (%+.1f%%)",
+                    inventory_item.name, old_price, new_price, change_percentage
+                )
                 
                 return True
                 
@@ -469,28 +771,337 @@ class ManagerApiService:
         else:
             return 'OTHER'
     
-    # Keep your existing methods for customers, sales orders, etc.
-    def get_customers(self):
-        """Get all customers from Manager.io"""
+    def _fetch_all_customers(self, page_size=100, max_iterations=200):
+        """Fetch ALL customers; concurrent callers share one pagination run"""
+        if not self.coalesce_reads:
+            return self._paginate_customers(page_size, max_iterations)
+        return manager_single_flight.do(
+            f"customers:all {self.api_url} {page_size} {max_iterations}",
+            lambda: self._paginate_customers(page_size, max_iterations)
+        )
+
+    def _customer_page(self, response):
+        """(customers, totalRecords or None) from one customers page"""
+        if isinstance(response, dict):
+            total_records = response.get('totalRecords')
+            return response.get('customers') or [], int(total_records) if total_records is not None else None
+        if isinstance(response, list):
+            return response, None
+        return [], None
+
+    def _remaining_customer_skips(self, first_page, total_records, page_size, max_iterations):
+        """``skip`` of every page after the first, or None when totalRecords is unknown"""
+        if total_records is None:
+            return None
+        # Manager.io may cap pageSize below what was asked for
+        step = min(page_size, len(first_page)) or page_size
+        return list(range(step, min(total_records, step * max_iterations), step))
+
+    def _paginate_customers(self, page_size=CUSTOMER_PAGE_SIZE, max_iterations=200, first_response=None):
+        """Fetch ALL customers from Manager.io.
+
+        The first page's totalRecords says how many pages remain. Those are fetched
+        concurrently by up to MANAGER_CUSTOMER_PAGE_WORKERS threads, still within the
+        rate limiter. Without totalRecords the pages are walked one at a time until a
+        short page comes back.
+        """
+        if first_response is None:
+            first_response = self._make_request('GET', 'customers', params={'pageSize': page_size, 'skip': 0})
+        first_page, total_records = self._customer_page(first_response)
+        self.client_stats.record_page('customers', len(first_page))
+        all_customers = list(first_page)
+        if not first_page:
+            return all_customers
+
+        skips = self._remaining_customer_skips(first_page, total_records, page_size, max_iterations)
+        if skips is not None:
+            def fetch_page(skip):
+                return self._make_request('GET', 'customers', params={'pageSize': page_size, 'skip': skip})
+
+            if skips:
+                workers = min(getattr(settings, 'MANAGER_CUSTOMER_PAGE_WORKERS', 4), len(skips))
+                with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix='manager-customers') as pool:
+                    # Each page runs in a copy of this context so its calls count against the current request
+                    futures = [pool.submit(contextvars.copy_context().run, fetch_page, skip) for skip in skips]
+                    for future in futures:
+                        page_customers, _ = self._customer_page(future.result())
+                        self.client_stats.record_page('customers', len(page_customers))
+                        all_customers.extend(page_customers)
+            logger.debug("Fetched %d of %d customers in %d pages", len(all_customers), total_records, len(skips) + 1)
+            return all_customers
+
+        skip = 0
+        page_customers = first_page
+        for iteration in range(1, max_iterations):
+            if len(page_customers) < page_size:
+                break
+            skip += page_size
+            response = self._make_request('GET', 'customers', params={'pageSize': page_size, 'skip': skip})
+            page_customers, _ = self._customer_page(response)
+            self.client_stats.record_page('customers', len(page_customers))
+            if not page_customers:
+                break
+            all_customers.extend(page_customers)
+            logger.debug("Fetched %d customers on page %d", len(page_customers), iteration)
+
+        return all_customers
+
+    def _parse_customer(self, raw, index):
+        """Map one Manager.io customer to Customer field values, or None to skip it"""
+        from .models import Customer
+
+        manager_id = self._extract_field(raw, ['key', 'Key', 'id', 'ID'])
+        name = self._extract_field(raw, ['name', 'Name'])
+        if not manager_id or not name:
+            logger.debug("Customer %d: Missing key or name, skipping", index)
+            return None
+
+        code = self._extract_field(raw, ['code', 'Code']) or None
+        balance_raw = raw.get('accountsReceivable', raw.get('balance'))
+        if isinstance(balance_raw, dict):
+            balance_raw = balance_raw.get('value')
+        row = {
+            'manager_customer_id': manager_id,
+            'name': name[:255],
+            'code': code[:50] if code else None,
+            'status': 'inactive' if raw.get('inactive') or raw.get('Inactive') else 'active',
+            'balance': self._safe_decimal(balance_raw, 0),
+        }
+        problem = _unfit_field(Customer, row)
+        if problem:
+            logger.warning("Customer %d (%s): %s, skipping", index, name, problem)
+            return None
+        return row
+
+    def sync_customers(self):
+        """Mirror all Manager.io customers into the local Customer table"""
+        from .models import Customer
+        from .customer_search import customer_index
+
         try:
-            logger.info("Fetching customers from Manager.io")
+            logger.info("=== STARTING CUSTOMER SYNC ===")
+            remote_customers = self._fetch_all_customers()
+
+            existing = {c.manager_customer_id: c for c in Customer.objects.all()}
+            now = timezone.now()
+            to_create = []
+            to_update = []
+            seen_ids = set()
+            skipped = 0
+
+            for index, raw in enumerate(remote_customers):
+                row = self._parse_customer(raw, index)
+                if row is None or row['manager_customer_id'] in seen_ids:
+                    skipped += 1
+                    continue
+                manager_id = row['manager_customer_id']
+                seen_ids.add(manager_id)
+
+                customer = existing.get(manager_id)
+                if customer is None:
+                    to_create.append(Customer(last_synced=now, **row))
+                elif (customer.name, customer.code, customer.status, customer.balance) != (row['name'], row['code'], row['status'], row['balance']):
+                    customer.name = row['name']
+                    customer.code = row['code']
+                    customer.status = row['status']
+                    customer.balance = row['balance']
+                    customer.last_synced = now
+                    to_update.append(customer)
+
+            # Customers removed in Manager.io are kept for order history but hidden from search
+            removed_ids = [mid for mid in existing if mid not in seen_ids and existing[mid].status != 'inactive']
+
+            with transaction.atomic():
+                bulk_upsert(
+                    Customer, to_create + to_update, unique_fields=['manager_customer_id'],
+                    update_fields=CUSTOMER_FIELDS
+                )
+                if removed_ids and remote_customers:
+                    Customer.objects.filter(manager_customer_id__in=removed_ids).update(status='inactive')
+
+            customer_index.invalidate()
+            invalidate_customer_list()
+
+            details = {
+                'total_from_manager': len(remote_customers),
+                'new_customers': len(to_create),
+                'updated_customers': len(to_update),
+                'deactivated_customers': len(removed_ids) if remote_customers else 0,
+                'skipped_customers': skipped,
+                'total_in_database': Customer.objects.count(),
+                'api': self.client_stats.summary(),
+                'rate_limit': self.rate_limiter.state()
+            }
+            logger.info("Customer sync completed: %s", details)
+
+            return {
+                'status': 'success',
+                'message': f"Synced {len(seen_ids)} customers from Manager.io",
+                'details': details
+            }
+
+        except Exception as e:
+            logger.error(f"Critical error in customer sync: {str(e)}")
+            logger.exception(e)
+            return {
+                'status': 'error',
+                'message': f"Customer sync failed: {str(e)}",
+                'details': {'error_type': type(e).__name__, 'api': self.client_stats.summary()}
+            }
+
+    def sync_customers_by_key(self, keys, deleted_keys=()):
+        """Re-fetch and upsert only the given Manager.io customers.
+
+        Customers in ``deleted_keys`` or no longer found in Manager.io are marked
+        inactive, as the full sync does, so order history keeps its customer.
+        """
+        from .models import Customer
+        from .customer_search import customer_index
+
+        rows, missing, failed = self._fetch_records(CUSTOMER_ENDPOINT, keys, self._parse_customer)
+        now = timezone.now()
+        removed = list(dict.fromkeys([*deleted_keys, *missing]))
+        with transaction.atomic():
+            bulk_upsert(
+                Customer, [Customer(last_synced=now, **row) for row in rows],
+                unique_fields=['manager_customer_id'], update_fields=CUSTOMER_FIELDS
+            )
+            deactivated = Customer.objects.filter(manager_customer_id__in=removed).exclude(
+                status='inactive'
+            ).update(status='inactive', last_synced=now) if removed else 0
+
+        if rows or deactivated:
+            customer_index.invalidate()
+        # Also drops customers deleted in Manager.io from the cached list
+        invalidate_customer_list()
+
+        logger.info(
+            "Incremental customer sync: %d upserted, %d deactivated, %d failed", len(rows), deactivated, len(failed)
+        )
+        return {
+            'synced': [row['manager_customer_id'] for row in rows],
+            'missing': missing,
+            'failed': failed,
+            'details': {
+                'upserted_customers': len(rows),
+                'deactivated_customers': deactivated,
+                'api': self.client_stats.summary()
+            }
+        }
+
+    def _customer_list_fresh(self, entry):
+        """True while a cached customer list may be served without asking Manager.io"""
+        return (
+            entry is not None and entry['api_url'] == self.api_url
+            and time.time() - entry['checked_at'] < getattr(settings, 'MANAGER_CUSTOMER_CACHE_TTL', 300)
+        )
+
+    def _revalidate_customer_list(self, entry, first_response):
+        """The cached entry, re-stamped, if the first page shows no change; otherwise None"""
+        if entry is None or entry['api_url'] != self.api_url:
+            return None
+        now = time.time()
+        first_page, total_records = self._customer_page(first_response)
+        if (entry['fingerprint'] != _customer_fingerprint(first_page, total_records)
+                or now - entry['fetched_at'] >= getattr(settings, 'MANAGER_CUSTOMER_CACHE_MAX_AGE', 600)):
+            return None
+        entry['checked_at'] = now
+        return entry
+
+    def _new_customer_list(self, customers, first_response):
+        """Cache entry for a freshly fetched list; customers get the 'id' the frontend expects"""
+        if not isinstance(first_response, (dict, list)):
+            raise Exception('Unexpected response format')
+        first_page, total_records = self._customer_page(first_response)
+        # Before 'id' is added below: the first page dicts are in ``customers`` too
+        fingerprint = _customer_fingerprint(first_page, total_records)
+        unique = {}
+        for customer in customers:
+            if 'key' in customer:
+                customer.setdefault('id', customer['key'])
+            unique.setdefault(customer.get('key') or id(customer), customer)
+        now = time.time()
+        return {
+            'api_url': self.api_url,
+            'customers': list(unique.values()),
+            'total': total_records if total_records is not None else len(unique),
+            'fingerprint': fingerprint,
+            'fetched_at': now,
+            'checked_at': now,
+        }
+
+    def _customer_list_result(self, entry):
+        logger.debug("Returning %d customers", len(entry['customers']))
+        return {
+            'success': True,
+            'customers': entry['customers'],
+            'totalCount': entry['total']
+        }
+
+    def _refresh_customer_list(self):
+        entry = cache.get(CUSTOMER_LIST_KEY)
+        if self._customer_list_fresh(entry):
+            # Refreshed by another process while we waited
+            return entry
+        first_response = self._make_request(
+            'GET', 'customers', params={'pageSize': CUSTOMER_PAGE_SIZE, 'skip': 0}
+        )
+        entry = self._revalidate_customer_list(entry, first_response)
+        if entry is None:
+            customers = self._paginate_customers(first_response=first_response)
+            entry = self._new_customer_list(customers, first_response)
+        cache.set(CUSTOMER_LIST_KEY, entry, getattr(settings, 'MANAGER_CUSTOMER_CACHE_MAX_AGE', 600))
+        return entry
+
+    def _customer_search_result(self, response, term):
+        """search_customers() result, best matches first"""
+        if 'customers' in response and isinstance(response['customers'], list):
+            customers = response['customers']
+            term_lower = term.lower()
             
-            response = self._make_request('GET', 'customers', params={'pageSize': 100, 'skip': 0})
+            # Sort by relevance
+            sorted_customers = sorted(customers, key=lambda c: (
+                0 if c.get('name', '').lower() == term_lower else
+                1 if c.get('name', '').lower().startswith(term_lower) else
+                2 if term_lower in c.get('name', '').lower() else 3
+            ))
             
-            if 'customers' in response and isinstance(response['customers'], list):
-                logger.info(f"Successfully fetched {len(response['customers'])} customers")
-                return {
-                    'success': True,
-                    'customers': response['customers'],
-                    'totalCount': response.get('totalRecords', len(response['customers']))
-                }
-            else:
-                logger.warning("Unexpected response format from Manager.io API")
-                return {
-                    'success': False,
-                    'error': 'Unexpected response format',
-                    'customers': []
-                }
+            logger.debug("Found %d customers matching '%s'", len(sorted_customers), term)
+            
+            return {
+                'success': True,
+                'customers': sorted_customers,
+                'totalCount': len(sorted_customers),
+                'searchTerm': term
+            }
+        return {
+            'success': True,
+            'customers': [],
+            'totalCount': 0,
+            'searchTerm': term
+        }
+
+    # Keep your existing methods for customers, sales orders, etc.
+    def get_customers(self):
+        """Get all customers from Manager.io.
+
+        The assembled list is cached for MANAGER_CUSTOMER_CACHE_TTL seconds. After
+        that only the first page is re-read. If it and totalRecords are unchanged the
+        cached list is kept, up to MANAGER_CUSTOMER_CACHE_MAX_AGE. Otherwise every
+        page is fetched again. This check is a heuristic, not a conditional request:
+        an edit to a customer past the first page (name, inactive flag, balance) is
+        only picked up at MANAGER_CUSTOMER_CACHE_MAX_AGE. Customer syncs, customer
+        webhooks and create_customer() drop the cache.
+        """
+        try:
+            entry = cache.get(CUSTOMER_LIST_KEY)
+            if not self._customer_list_fresh(entry):
+                logger.debug("Fetching customers from Manager.io")
+                if self.coalesce_reads:
+                    entry = manager_single_flight.do(f"customers:list {self.api_url}", self._refresh_customer_list)
+                else:
+                    entry = self._refresh_customer_list()
+            return self._customer_list_result(entry)
                 
         except Exception as e:
             logger.error(f"Error fetching customers: {str(e)}")
@@ -503,36 +1114,10 @@ class ManagerApiService:
     def search_customers(self, term):
         """Search for customers by name or code"""
         try:
-            logger.info(f"Searching for customers with term: {term}")
+            logger.debug("Searching for customers with term: %s", term)
             
             response = self._make_request('GET', 'customers', params={'filter': term, 'pageSize': 100})
-            
-            if 'customers' in response and isinstance(response['customers'], list):
-                customers = response['customers']
-                term_lower = term.lower()
-                
-                # Sort by relevance
-                sorted_customers = sorted(customers, key=lambda c: (
-                    0 if c.get('name', '').lower() == term_lower else
-                    1 if c.get('name', '').lower().startswith(term_lower) else
-                    2 if term_lower in c.get('name', '').lower() else 3
-                ))
-                
-                logger.info(f"Found {len(sorted_customers)} customers matching '{term}'")
-                
-                return {
-                    'success': True,
-                    'customers': sorted_customers,
-                    'totalCount': len(sorted_customers),
-                    'searchTerm': term
-                }
-            else:
-                return {
-                    'success': True,
-                    'customers': [],
-                    'totalCount': 0,
-                    'searchTerm': term
-                }
+            return self._customer_search_result(response, term)
                 
         except Exception as e:
             logger.error(f"Error searching customers: {str(e)}")
@@ -559,6 +1144,7 @@ class ManagerApiService:
                 customer_key = response.get('key') or (response.get('data', {}).get('key'))
             
             logger.info(f"Customer created with key: {customer_key}")
+            invalidate_customer_list()
             
             return {
                 'success': True,
@@ -626,11 +1212,10 @@ class ManagerApiService:
                 else:
                     # Try to find the item in our database to get the proper UUID
                     try:
-                        from django.db import models
-                        inventory_item = ManagerInventoryItem.objects.filter(
-                            models.Q(manager_item_id__iexact=item_code) |
-                            models.Q(code__iexact=item_code)
-                        ).first()
+                        inventory_item = (
+                            inventory_repository.get_by_uuid(item_code, case_insensitive=True)
+                            or inventory_repository.get_by_code(item_code, case_insensitive=True)
+                        )
                         
                         if inventory_item:
                             item_uuid = inventory_item.manager_item_id
@@ -666,7 +1251,7 @@ class ManagerApiService:
                 }
             
             # Log the final payload for debugging
-            logger.info(f"Sending to Manager.io: {json.dumps(payload)}")
+            logger.debug("Sending to Manager.io: %s", payload)
             
             # Make the API call
             response = self._make_request('POST', 'sales-order-form', data=payload)
@@ -0,0 +1,163 @@
+# backend/recipes/manager_payloads.py - Manager.io form payloads shared by the sync and async views
+#
+# The sales-order-form and production-order-form bodies, and parsing of the keys
+# Manager.io returns, used to be built inline in views_compat.py. They live here
+# so that the async views (views_async.py) send exactly the same requests.
+
+from datetime import datetime
+
+
+def empty_custom_fields2(images=False):
+    fields = {
+        "Strings": {},
+        "Decimals": {},
+        "Dates": {},
+        "Booleans": {},
+        "StringArrays": {}
+    }
+    if images:
+        fields["Images"] = {}
+    return fields
+
+
+def looks_like_uuid(value):
+    """Manager.io keys are UUIDs; item codes are short and hyphen-free"""
+    return len(str(value)) > 30 and '-' in str(value)
+
+
+def sales_order_lines(data):
+    """Normalize the line formats the frontend, batch sync and Manager.io clients send"""
+    if 'Lines' in data:
+        # Direct format from Manager.io
+        return data.get('Lines', [])
+    if 'item_data' in data:
+        # Format from batch sync
+        return [
+            {
+                "Item": item.get('id'),
+                "LineDescription": item.get('name', 'Item'),
+                "Qty": float(item.get('quantity', 0)),
+                "SalesUnitPrice": float(item.get('price', 0))
+            } for item in data.get('item_data', [])
+        ]
+    if 'items' in data:
+        # Format from frontend
+        return [
+            {
+                "Item": item.get('inventory_item_id'),
+                "LineDescription": item.get('name', 'Item'),
+                "Qty": float(item.get('quantity', 0)),
+                "SalesUnitPrice": float(item.get('price', 0))
+            } for item in data.get('items', [])
+        ]
+    return []
+
+
+def sales_order_date(value):
+    """Manager.io wants a full timestamp; default to now"""
+    if not value or 'T' not in value:
+        return datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+    return value
+
+
+def find_item_uuid(inventory_items, item_code):
+    """Key of the Manager.io inventory item with this code, or None"""
+    for inv_item in inventory_items:
+        if inv_item.get('ItemCode') == item_code or inv_item.get('itemCode') == item_code:
+            found_uuid = inv_item.get('id') or inv_item.get('key')
+            if found_uuid:
+                return found_uuid
+    return None
+
+
+def inventory_list(inventory_data):
+    """Items from an inventory-items response in either of its formats"""
+    if isinstance(inventory_data, dict) and 'inventoryItems' in inventory_data:
+        return inventory_data['inventoryItems']
+    if isinstance(inventory_data, list):
+        return inventory_data
+    return []
+
+
+def sales_order_payload(customer_id, date_str, description, lines):
+    """EXACT sales-order-form body Manager.io requires"""
+    return {
+        "Date": date_str,
+        "Reference": "1",
+        "Customer": customer_id,
+        "Description": description,
+        "Lines": [
+            {
+                "Item": line.get('Item'),
+                "LineDescription": line.get('LineDescription', 'Item'),
+                "CustomFields": {},
+                "CustomFields2": empty_custom_fields2(),
+                "Qty": float(line.get('Qty', 0)),
+                "SalesUnitPrice": float(line.get('SalesUnitPrice', 0))
+            } for line in lines
+        ],
+        "SalesOrderFooters": [],
+        "CustomFields": {},
+        "CustomFields2": empty_custom_fields2()
+    }
+
+
+def order_sales_payload(order, items):
+    """sales-order-form body for a local Order and its OrderItems"""
+    lines = [
+        {
+            "Item": item.inventory_item_id,
+            "LineDescription": f"{item.name} ({item.unit})",
+            "Qty": float(item.quantity),
+            "SalesUnitPrice": float(item.price)
+        } for item in items
+    ]
+    return sales_order_payload(order.customer_id, f"{order.order_date}T00:00:00", order.notes or '', lines)
+
+
+def production_quantity(production_order):
+    return float(production_order.actual_quantity or production_order.planned_quantity or 1)
+
+
+def production_bill_of_materials(production_order, recipe_ingredients):
+    """BillOfMaterials lines for ingredients with a valid Manager.io UUID, scaled to the batch"""
+    if not production_order.recipe:
+        return []
+    recipe_yield = float(production_order.recipe.yield_quantity or 1)
+    batch_multiplier = production_quantity(production_order) / recipe_yield
+
+    bill_of_materials = []
+    for ingredient in recipe_ingredients:
+        item = ingredient.inventory_item
+        if item and item.manager_item_id and len(item.manager_item_id) > 30:  # Valid UUID
+            # Convert Decimal to float before calculation
+            total_qty = round(float(ingredient.quantity) * batch_multiplier, 2)
+            if total_qty > 0:
+                bill_of_materials.append({
+                    "BillOfMaterials": item.manager_item_id,
+                    "Qty": total_qty
+                })
+    return bill_of_materials
+
+
+def production_order_payload(production_order, finished_item, bill_of_materials):
+    """EXACT production-order-form body Manager.io requires"""
+    return {
+        "Date": production_order.scheduled_date.strftime('%Y-%m-%dT%H:%M:%S'),
+        "FinishedInventoryItem": finished_item.manager_item_id,
+        "Qty": production_quantity(production_order),
+        "BillOfMaterials": bill_of_materials,
+        "ExpenseItems": [{}],
+        "CustomFields": {},
+        "CustomFields2": empty_custom_fields2(images=True)
+    }
+
+
+def response_key(response_data, default=None):
+    """Key of the record Manager.io created, from either response shape"""
+    if not isinstance(response_data, dict):
+        return default
+    key = response_data.get('key')
+    if not key and isinstance(response_data.get('data'), dict):
+        key = response_data['data'].get('key')
+    return key or default
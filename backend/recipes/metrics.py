@@ -0,0 +1,295 @@
+# backend/recipes/metrics.py - Per-view request metrics in Prometheus text format
+#
+# InstrumentationMiddleware (recipes/middleware.py) opens a RequestStats for every
+# request. Database queries are counted through count_queries(), an execute wrapper
+# installed on every connection, and Manager.io calls through track_manager_call().
+# The current RequestStats lives in a context variable, so async views and the
+# sync_to_async threads they hand ORM work to count against the right request. When the response is ready the
+# totals are folded into the process-wide registry, which /api/_metrics renders.
+# Values are per process; each worker exposes its own counters.
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+PAGE_ITEM_BUCKETS = (0, 1, 10, 25, 50, 100, 200, 500, 1000)
+
+_request_stats = ContextVar('request_stats', default=None)
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms keyed by metric name and label set"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+
+    def describe(self, name, kind, help_text):
+        self._help[name] = (kind, help_text)
+
+    def inc(self, name, labels=None, value=1):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=None, buckets=DEFAULT_LATENCY_BUCKETS):
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {
+                    'buckets': buckets, 'counts': [0] * len(buckets), 'sum': 0.0, 'count': 0
+                }
+            for i, bound in enumerate(histogram['buckets']):
+                if value <= bound:
+                    histogram['counts'][i] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """Return plain copies of the counters and histograms"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {
+                key: dict(value, counts=list(value['counts']))
+                for key, value in self._histograms.items()
+            }
+        return counters, histograms
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format"""
+        counters, histograms = self.snapshot()
+        lines = []
+        histogram_names = {name for name, _ in histograms}
+        for name in sorted({name for name, _ in counters} | histogram_names):
+            default_kind = 'histogram' if name in histogram_names else 'counter'
+            kind, help_text = self._help.get(name, (default_kind, ''))
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+            for (metric, labels), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, count in zip(histogram['buckets'], histogram['counts']):
+                    bucket_labels = labels + (('le', _format_value(bound)),)
+                    lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {count}")
+                inf_labels = labels + (('le', '+Inf'),)
+                lines.append(f"{name}_bucket{_format_labels(inf_labels)} {histogram['count']}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram['sum'])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+registry = MetricsRegistry()
+registry.describe('ccf_http_requests_total', 'counter', 'Requests handled, by view, method and status')
+registry.describe('ccf_http_request_duration_seconds', 'histogram', 'Total request latency by view')
+registry.describe('ccf_db_queries', 'histogram', 'Database queries per request by view')
+registry.describe('ccf_db_query_seconds_total', 'counter', 'Time spent in database queries by view')
+registry.describe('ccf_manager_calls_total', 'counter', 'Manager.io API calls made while serving a view')
+registry.describe('ccf_manager_call_seconds_total', 'counter', 'Time spent waiting on Manager.io by view')
+registry.describe('ccf_query_budget_exceeded_total', 'counter', 'Requests that ran more queries than the view budget')
+registry.describe('ccf_manager_request_duration_seconds', 'histogram', 'Manager.io API latency by endpoint and method')
+registry.describe('ccf_manager_responses_total', 'counter', 'Manager.io API responses by endpoint, method and status')
+registry.describe('ccf_manager_retries_total', 'counter', 'Manager.io API requests retried, by endpoint and reason')
+registry.describe('ccf_manager_response_bytes_total', 'counter', 'Bytes received from Manager.io by endpoint')
+registry.describe('ccf_manager_page_items', 'histogram', 'Items returned per Manager.io list page by endpoint')
+registry.describe('ccf_manager_throttle_seconds_total', 'counter', 'Time requests waited on the Manager.io rate limiter')
+registry.describe('ccf_manager_backoffs_total', 'counter', 'Manager.io rate and concurrency cuts, by reason')
+registry.describe('ccf_manager_circuit_transitions_total', 'counter', 'Manager.io circuit breaker state changes')
+registry.describe('ccf_manager_stale_responses_total', 'counter', 'Responses served from the last good Manager.io payload')
+registry.describe('ccf_manager_coalesced_total', 'counter', 'Manager.io reads answered by another in-flight fetch')
+
+
+class RequestStats:
+    """Database and Manager.io totals for the request being served"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.manager_calls = 0
+        self.manager_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Called by count_queries() for each query
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+def get_request_stats():
+    """Return the RequestStats for the current request context, or None outside a request"""
+    return _request_stats.get()
+
+
+@contextmanager
+def request_stats():
+    stats = RequestStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+def count_queries(execute, sql, params, many, context):
+    """Execute wrapper charging each query to the current request, if any"""
+    stats = get_request_stats()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def _install_query_counter(sender, connection, **kwargs):
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_queries)
+
+
+connection_created.connect(_install_query_counter, dispatch_uid='recipes.metrics.count_queries')
+
+
+@contextmanager
+def track_manager_call():
+    """Time a Manager.io HTTP call against the current request"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = get_request_stats()
+        if stats is not None:
+            stats.manager_calls += 1
+            stats.manager_time += time.perf_counter() - start
+
+
+class ManagerClientStats:
+    """Manager.io client totals for one ManagerApiService, mirrored into the registry.
+
+    The registry keeps process-wide series for /api/_metrics; summary() gives the
+    same numbers for a single sync so they can be returned in its ``details``.
+    Safe to share between the threads of one service (concurrent page fetches).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.bytes_received = 0
+        self.seconds = 0.0
+        self.statuses = {}
+        self.endpoints = {}
+        self.pages = {}
+
+    def record_response(self, endpoint, method, status, seconds, size=0):
+        """Record one HTTP attempt; ``status`` is 'error' when no response arrived"""
+        labels = {'endpoint': endpoint, 'method': method}
+        registry.observe('ccf_manager_request_duration_seconds', seconds, labels)
+        registry.inc('ccf_manager_responses_total', dict(labels, status=str(status)))
+        if size:
+            registry.inc('ccf_manager_response_bytes_total', {'endpoint': endpoint}, size)
+
+        with self._lock:
+            self.requests += 1
+            self.seconds += seconds
+            self.bytes_received += size
+            self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+            if status == 'error' or status >= 400:
+                self.errors += 1
+            endpoint_stats = self.endpoints.setdefault(
+                f"{method} {endpoint}", {'requests': 0, 'seconds': 0.0, 'max_seconds': 0.0}
+            )
+            endpoint_stats['requests'] += 1
+            endpoint_stats['seconds'] += seconds
+            endpoint_stats['max_seconds'] = max(endpoint_stats['max_seconds'], seconds)
+
+    def record_retry(self, endpoint, method, reason):
+        registry.inc('ccf_manager_retries_total', {'endpoint': endpoint, 'method': method, 'reason': str(reason)})
+        with self._lock:
+            self.retries += 1
+
+    def record_page(self, endpoint, items):
+        registry.observe('ccf_manager_page_items', items, {'endpoint': endpoint}, buckets=PAGE_ITEM_BUCKETS)
+        with self._lock:
+            page_stats = self.pages.setdefault(endpoint, {'pages': 0, 'items': 0})
+            page_stats['pages'] += 1
+            page_stats['items'] += items
+
+    def summary(self):
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'errors': self.errors,
+            'bytes_received': self.bytes_received,
+            'total_ms': round(self.seconds * 1000, 1),
+            'statuses': dict(self.statuses),
+            'endpoints': {
+                name: {
+                    'requests': values['requests'],
+                    'avg_ms': round(values['seconds'] / values['requests'] * 1000, 1),
+                    'max_ms': round(values['max_seconds'] * 1000, 1),
+                }
+                for name, values in self.endpoints.items()
+            },
+            'pages': {
+                endpoint: dict(values, avg_items=round(values['items'] / values['pages'], 1))
+                for endpoint, values in self.pages.items()
+            },
+        }
+
+
+def get_query_budget(view_name):
+    """Return the configured query budget for a view name, or None"""
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+
+
+def record_request(view_name, method, status_code, stats):
+    """Fold one finished request into the registry; returns the elapsed seconds"""
+    elapsed = time.perf_counter() - stats.started
+    labels = {'view': view_name}
+    registry.inc('ccf_http_requests_total', dict(labels, method=method, status=str(status_code)))
+    registry.observe('ccf_http_request_duration_seconds', elapsed, labels)
+    registry.observe('ccf_db_queries', stats.db_queries, labels, buckets=DEFAULT_COUNT_BUCKETS)
+    registry.inc('ccf_db_query_seconds_total', labels, stats.db_time)
+    registry.inc('ccf_manager_calls_total', labels, stats.manager_calls)
+    registry.inc('ccf_manager_call_seconds_total', labels, stats.manager_time)
+
+    budget = get_query_budget(view_name)
+    if budget is not None and stats.db_queries > budget:
+        registry.inc('ccf_query_budget_exceeded_total', labels)
+    return elapsed
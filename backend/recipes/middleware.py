@@ -0,0 +1,194 @@
+# backend/recipes/middleware.py - Request instrumentation middleware
+#
+# Each middleware is sync- and async-capable, so under ASGI the async views in
+# views_async.py run on the event loop without being pinned to a thread.
+
+import logging
+import random
+import time
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from rest_framework.authentication import BasicAuthentication
+from rest_framework.request import Request
+from .metrics import get_query_budget, record_request, request_stats
+from .profiling import PROFILE_HEADER, PROFILE_PARAM, QueryLog, save_profile, start_profiler
+from .routers import activate_reporting, deactivate_reporting
+
+logger = logging.getLogger(__name__)
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match.route or 'unresolved'
+
+
+class InstrumentationMiddleware:
+    """Record DB query count/time, Manager.io calls and latency per view name"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # Queries are charged to ``stats`` by metrics.count_queries
+        with request_stats() as stats:
+            response = self.get_response(request)
+        return self._record(request, response, stats)
+
+    async def __acall__(self, request):
+        with request_stats() as stats:
+            response = await self.get_response(request)
+        return self._record(request, response, stats)
+
+    def _record(self, request, response, stats):
+        view_name = _view_name(request)
+        elapsed = record_request(view_name, request.method, response.status_code, stats)
+
+        budget = get_query_budget(view_name)
+        if budget is not None and stats.db_queries > budget:
+            logger.warning(
+                "Query budget exceeded for %s: %d queries (budget %d) in %.1fms",
+                view_name, stats.db_queries, budget, elapsed * 1000
+            )
+
+        response['Server-Timing'] = (
+            f"db;desc=\"{stats.db_queries} queries\";dur={stats.db_time * 1000:.1f}, "
+            f"manager;desc=\"{stats.manager_calls} calls\";dur={stats.manager_time * 1000:.1f}, "
+            f"total;dur={elapsed * 1000:.1f}"
+        )
+        return response
+
+
+def _is_staff(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    # The API also accepts HTTP Basic auth, which only DRF resolves
+    if request.META.get('HTTP_AUTHORIZATION', '').lower().startswith('basic '):
+        try:
+            result = BasicAuthentication().authenticate(Request(request))
+        except Exception:
+            return False
+        return bool(result and result[0].is_staff)
+    return False
+
+
+class ProfilingMiddleware:
+    """Profile requests on demand (staff, X-Profile header or ?_profile=1) or by sampling"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _requested(self, request):
+        return request.META.get(PROFILE_HEADER) or PROFILE_PARAM in request.GET
+
+    def _trigger(self, request):
+        if self._requested(request) and _is_staff(request):
+            return 'requested'
+        sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+        if sample_rate and random.random() < sample_rate:
+            return 'sampled'
+        return None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        trigger = self._trigger(request)
+        profiler = start_profiler() if trigger else None
+        if profiler is None:
+            return self.get_response(request)
+
+        # Parameters can hold customer data; keep them only when staff asked for the profile
+        record_params = trigger == 'requested'
+        query_logs = [QueryLog(connection.alias, record_params) for connection in connections.all()]
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection, query_log in zip(connections.all(), query_logs):
+                    stack.enter_context(connection.execute_wrapper(query_log))
+                response = self.get_response(request)
+        finally:
+            profiler.disable()
+        elapsed = time.perf_counter() - start
+
+        self._save(profiler, request, response, elapsed, query_logs, trigger)
+        return response
+
+    async def __acall__(self, request):
+        # The staff check may hit the database
+        if self._requested(request):
+            trigger = await sync_to_async(self._trigger)(request)
+        else:
+            trigger = self._trigger(request)
+        profiler = start_profiler() if trigger else None
+        if profiler is None:
+            return await self.get_response(request)
+
+        # cProfile only sees the event loop thread, and with it any other request it
+        # is serving; queries run in sync_to_async threads are not logged
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+        elapsed = time.perf_counter() - start
+
+        await sync_to_async(self._save)(profiler, request, response, elapsed, [], trigger)
+        return response
+
+    def _save(self, profiler, request, response, elapsed, query_logs, trigger):
+        try:
+            path = save_profile(profiler, request, response, _view_name(request), elapsed, query_logs, trigger)
+            response['X-Profile-Id'] = path.stem
+            logger.info(f"Saved {trigger} profile for {request.method} {request.path} to {path}")
+        except Exception as e:
+            logger.error(f"Failed to save request profile: {e}")
+
+
+class ReportingDatabaseMiddleware:
+    """Route reads for settings.REPORTING_VIEW_NAMES to the read-only reporting alias"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.view_names = set(getattr(settings, 'REPORTING_VIEW_NAMES', ()))
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request._reporting_token = None
+        try:
+            return self.get_response(request)
+        finally:
+            if request._reporting_token is not None:
+                deactivate_reporting(request._reporting_token)
+
+    async def __acall__(self, request):
+        # Under ASGI process_view runs in a sync_to_async copy of this request's
+        # context and its token can't be reset here; the flag ends with the request
+        request._reporting_token = None
+        return await self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if _view_name(request) in self.view_names:
+            request._reporting_token = activate_reporting()
+        return None
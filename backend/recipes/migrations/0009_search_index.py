@@ -0,0 +1,78 @@
+# Full-text search schema for inventory items and recipes (see recipes/search.py)
+
+from django.db import migrations
+from recipes.search import PostgresTrigramBackend, postgres_search_enabled
+
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS recipes_inventory_fts USING fts5(
+        name, description, code,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS recipes_recipe_fts USING fts5(
+        name, description, instructions, ingredients,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    INSERT INTO recipes_inventory_fts(rowid, name, description, code)
+    SELECT id, name, COALESCE(description, ''), COALESCE(code, '')
+    FROM recipes_managerinventoryitem
+    """,
+    """
+    INSERT INTO recipes_recipe_fts(rowid, name, description, instructions, ingredients)
+    SELECT r.id, r.name, COALESCE(r.description, ''), COALESCE(r.instructions, ''),
+           COALESCE((SELECT group_concat(i.name, ' ')
+                     FROM recipes_recipeingredient ri
+                     JOIN recipes_managerinventoryitem i ON i.id = ri.inventory_item_id
+                     WHERE ri.recipe_id = r.id), '')
+    FROM recipes_recipe r
+    """,
+]
+
+SQLITE_REVERSE = [
+    "DROP TABLE IF EXISTS recipes_recipe_fts",
+    "DROP TABLE IF EXISTS recipes_inventory_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        statements = statements_by_vendor.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+def _postgres_forward(apps, schema_editor):
+    # The PostgreSQL backend is opt-in (POSTGRES_FULL_TEXT_SEARCH); rebuild_search_index
+    # creates the same schema if it is turned on after this has run
+    if schema_editor.connection.vendor != 'postgresql' or not postgres_search_enabled():
+        return
+    for statement in PostgresTrigramBackend.SCHEMA_SQL:
+        schema_editor.execute(statement)
+    schema_editor.execute(PostgresTrigramBackend.RECIPE_UPSERT_SQL.format(source=PostgresTrigramBackend.RECIPE_SOURCE_SQL))
+
+
+def _postgres_reverse(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in PostgresTrigramBackend.DROP_SCHEMA_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_pagepermission_userprofile'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run({'sqlite': SQLITE_FORWARD}), _run({'sqlite': SQLITE_REVERSE})),
+        migrations.RunPython(_postgres_forward, _postgres_reverse),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-19 03:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryPriceDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('open_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('close_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('change_count', models.PositiveIntegerField(default=0)),
+                ('total_change_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_change_percentage', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('inventory_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_rollups', to='recipes.managerinventoryitem')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date'], name='recipes_inv_date_9dd4fc_idx')],
+                'unique_together': {('inventory_item', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-19 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_inventorypricedailyrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventorypricehistory',
+            index=models.Index(fields=['changed_at', 'change_percentage'], name='recipes_inv_changed_8132c6_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-19 03:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_inventorypricehistory_changed_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ManagerWebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(choices=[('inventory_item', 'Inventory Item'), ('customer', 'Customer'), ('sales_order', 'Sales Order')], max_length=20)),
+                ('entity_key', models.CharField(max_length=255)),
+                ('action', models.CharField(default='updated', max_length=20)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['received_at'],
+                'indexes': [models.Index(fields=['status', 'received_at'], name='recipes_man_status_7c86b6_idx'), models.Index(fields=['entity_type', 'entity_key', 'status'], name='recipes_man_entity__bb273c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.1 on 2026-10-19 03:55
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+FINANCIAL_FIELDS = ['total_cost', 'unit_sales_price', 'total_sales_value', 'profit_margin', 'profit_percentage']
+CENT = Decimal('0.01')
+
+
+def backfill_financials(apps, schema_editor):
+    """Store financials for existing orders as recipes/production_financials.py computes them.
+
+    Self-contained for historical models; the finished good is found by recipe UUID
+    or item code only, and the next save or price refresh applies the name fallback.
+    """
+    ProductionOrder = apps.get_model('recipes', 'ProductionOrder')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    ManagerInventoryItem = apps.get_model('recipes', 'ManagerInventoryItem')
+
+    batch_costs = {}
+    for ingredient in RecipeIngredient.objects.select_related('inventory_item'):
+        cost = ingredient.quantity * ingredient.inventory_item.unit_cost
+        batch_costs[ingredient.recipe_id] = batch_costs.get(ingredient.recipe_id, Decimal('0')) + cost
+
+    by_uuid = {}
+    by_code = {}
+    for item in ManagerInventoryItem.objects.order_by('-id').only('manager_item_id', 'code', 'sales_price'):
+        by_uuid[item.manager_item_id] = item
+        by_code[item.code] = item
+
+    orders = []
+    for order in ProductionOrder.objects.select_related('recipe').iterator():
+        recipe = order.recipe
+        item = (by_uuid.get(recipe.manager_inventory_item_id) if recipe else None) or by_code.get(order.item_code)
+        sales_price = item.sales_price if item else Decimal('0')
+        total_cost = Decimal('0')
+        if recipe:
+            batches = max(1, int(order.planned_quantity / recipe.yield_quantity)) if recipe.yield_quantity > 0 else 1
+            total_cost = batches * batch_costs.get(recipe.id, Decimal('0'))
+        total_sales_value = order.planned_quantity * sales_price
+        profit_margin = total_sales_value - total_cost
+
+        order.total_cost = total_cost.quantize(CENT)
+        order.unit_sales_price = sales_price
+        order.total_sales_value = total_sales_value.quantize(CENT)
+        order.profit_margin = profit_margin.quantize(CENT)
+        order.profit_percentage = (
+            (profit_margin / total_sales_value * 100).quantize(CENT) if total_sales_value > 0 else Decimal('0')
+        )
+        orders.append(order)
+    ProductionOrder.objects.bulk_update(orders, FINANCIAL_FIELDS, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_salesorderoutbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productionorder',
+            name='profit_margin',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='productionorder',
+            name='profit_percentage',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='productionorder',
+            name='total_cost',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='productionorder',
+            name='total_sales_value',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='productionorder',
+            name='unit_sales_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddIndex(
+            model_name='productionorder',
+            index=models.Index(fields=['profit_margin'], name='recipes_pro_profit__c5af96_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productionorder',
+            index=models.Index(fields=['profit_percentage'], name='recipes_pro_profit__a7d2d5_idx'),
+        ),
+        migrations.RunPython(backfill_financials, migrations.RunPython.noop),
+    ]
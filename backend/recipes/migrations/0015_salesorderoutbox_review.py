@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 04:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_productionorder_financials'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='salesorderoutbox',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed'), ('review', 'Needs review')], default='pending', max_length=20),
+        ),
+    ]
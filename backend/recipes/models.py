@@ -1,5 +1,6 @@
 # backend/recipes/models.py - FIXED VERSION with correct model ordering
 
+import uuid
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
@@ -9,7 +10,7 @@ from datetime import datetime, time
 from django.contrib.auth.models import User
  
  
-from django.db.models.signals import post_save, post_migrate
+from django.db.models.signals import post_save, post_delete, post_migrate
 from django.dispatch import receiver
 
 class UserProfile(models.Model):
@@ -71,34 +72,45 @@ class PagePermission(models.Model):
         access = "✓" if self.can_access else "✗"
         return f"{self.get_role_display()} - {self.get_page_display()} ({access})"
 
+# Default page access per role, applied on migrate without overwriting admin edits
+DEFAULT_PAGE_PERMISSIONS = {
+    'admin': ['dashboard', 'inventory', 'recipes', 'production', 'orders', 'reports', 'settings'],
+    'customer': ['orders'],
+    'manager': ['dashboard', 'inventory', 'recipes', 'production', 'orders', 'reports'],
+}
+
+
 # Signal to create default permissions
 @receiver(post_migrate)
 def create_default_permissions(sender, **kwargs):
     if sender.name == 'recipes':
-        # Default admin permissions (all pages)
-        admin_pages = ['dashboard', 'inventory', 'recipes', 'production', 'orders', 'reports', 'settings']
-        for page in admin_pages:
-            PagePermission.objects.get_or_create(
-                role='admin',
-                page=page,
-                defaults={'can_access': True}
-            )
-        
-        # Default customer permissions (only orders)
-        PagePermission.objects.get_or_create(
-            role='customer',
-            page='orders',
-            defaults={'can_access': True}
-        )
-        
-        # Default manager permissions (dashboard, inventory, recipes, production, orders, reports)
-        manager_pages = ['dashboard', 'inventory', 'recipes', 'production', 'orders', 'reports']
-        for page in manager_pages:
-            PagePermission.objects.get_or_create(
-                role='manager',
-                page=page,
-                defaults={'can_access': True}
-            )
+        existing = set(PagePermission.objects.values_list('role', 'page'))
+        missing = [
+            PagePermission(role=role, page=page, can_access=True)
+            for role, pages in DEFAULT_PAGE_PERMISSIONS.items()
+            for page in pages
+            if (role, page) not in existing
+        ]
+        if missing:
+            PagePermission.objects.bulk_create(missing, ignore_conflicts=True)
+            from .auth_backends import role_pages_cache
+            role_pages_cache.invalidate()
+
+
+@receiver(post_save, sender=PagePermission)
+@receiver(post_delete, sender=PagePermission)
+def invalidate_role_pages_cache(sender, **kwargs):
+    from .auth_backends import role_pages_cache
+    role_pages_cache.invalidate()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_cached_auth_user(sender, instance, **kwargs):
+    from .auth_backends import invalidate_cached_user
+    invalidate_cached_user(instance.pk if sender is User else instance.user_id)
 
 
 class ManagerDivision(models.Model):
@@ -157,6 +169,7 @@ class InventoryPriceHistory(models.Model):
         ordering = ['-changed_at']
         indexes = [
             models.Index(fields=['inventory_item', '-changed_at']),
+            models.Index(fields=['changed_at', 'change_percentage']),
         ]
     
     def __str__(self):
@@ -164,6 +177,29 @@ class InventoryPriceHistory(models.Model):
         return f"{self.inventory_item.name}: {direction} {self.change_percentage}% ({self.old_price} → {self.new_price})"
 
 
+class InventoryPriceDailyRollup(models.Model):
+    """Daily per-item summary of InventoryPriceHistory, kept after raw rows are pruned"""
+    inventory_item = models.ForeignKey(ManagerInventoryItem, on_delete=models.CASCADE, related_name='price_rollups')
+    date = models.DateField()
+    open_price = models.DecimalField(max_digits=10, decimal_places=2)
+    close_price = models.DecimalField(max_digits=10, decimal_places=2)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2)
+    change_count = models.PositiveIntegerField(default=0)
+    total_change_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_change_percentage = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-date']
+        unique_together = ['inventory_item', 'date']
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+    def __str__(self):
+        return f"{self.inventory_item.name} {self.date}: {self.open_price} → {self.close_price} ({self.change_count} changes)"
+
+
 class ProductionCategory(models.Model):
     """Production categories - updated to 3-category system"""
     CATEGORY_CODES = (
@@ -313,6 +349,7 @@ class Recipe(models.Model):
             from django.utils import timezone
             from datetime import timedelta
             from decimal import Decimal
+            from .price_history import RECENT_CHANGES_ATTR
             
             cutoff_date = timezone.now() - timedelta(days=days)
             ingredients = self.recipeingredient_set.all()
@@ -321,12 +358,15 @@ class Recipe(models.Model):
             
             for ingredient in ingredients:
                 if ingredient.inventory_item:
-                    price_changes = InventoryPriceHistory.objects.filter(
-                        inventory_item=ingredient.inventory_item,
-                        changed_at__gte=cutoff_date
-                    )
+                    # Set by recent_price_changes_prefetch() on list endpoints
+                    price_changes = getattr(ingredient.inventory_item, RECENT_CHANGES_ATTR.format(days=days), None)
+                    if price_changes is None:
+                        price_changes = list(InventoryPriceHistory.objects.filter(
+                            inventory_item=ingredient.inventory_item,
+                            changed_at__gte=cutoff_date
+                        ))
                     
-                    if price_changes.exists():
+                    if price_changes:
                         ingredient_impact = sum(
                             change.change_amount * ingredient.quantity 
                             for change in price_changes
@@ -336,7 +376,7 @@ class Recipe(models.Model):
                             'name': ingredient.inventory_item.name,
                             'code': ingredient.inventory_item.code,
                             'recipe_impact': float(ingredient_impact),
-                            'changes_count': price_changes.count()
+                            'changes_count': len(price_changes)
                         })
             
             return {
@@ -530,79 +570,32 @@ class ProductionOrder(models.Model):
     # Manager.io integration
     manager_order_id = models.CharField(max_length=255, null=True, blank=True)
     
+    # Financials at current prices, stored for sorting and filtering (recipes/production_financials.py)
+    total_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    unit_sales_price = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    total_sales_value = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    profit_margin = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    profit_percentage = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    
     class Meta:
         ordering = ['-scheduled_date', 'production_category_code', 'item_name']
+        indexes = [
+            models.Index(fields=['profit_margin']),
+            models.Index(fields=['profit_percentage']),
+        ]
     
     def __str__(self):
         return f"{self.item_name} - {self.planned_quantity} units ({self.scheduled_date}) - {self.assigned_to}"
     
-    @property
-    def total_cost(self):
-        """Calculate total production cost using ingredient costs"""
-        if self.recipe:
-            batch_quantity = self.calculate_batch_quantity()
-            return batch_quantity * self.recipe.total_cost
-        return 0
-
-    @property 
-    def unit_sales_price(self):
-        """Get unit sales price from Manager.io inventory"""
-        # Try to find inventory item by manager_inventory_item_id or item_code
-        inventory_item = None
-        
-        if hasattr(self.recipe, 'manager_inventory_item_id') and self.recipe.manager_inventory_item_id:
-            try:
-                inventory_item = ManagerInventoryItem.objects.get(
-                    manager_item_id=self.recipe.manager_inventory_item_id
-                )
-            except ManagerInventoryItem.DoesNotExist:
-                pass
-        
-        # Try to find by item_code if no direct match
-        if not inventory_item and self.item_code:
-            try:
-                inventory_item = ManagerInventoryItem.objects.get(code=self.item_code)
-            except ManagerInventoryItem.DoesNotExist:
-                pass
-        
-        # Try to find by item_name as last resort
-        if not inventory_item and self.item_name:
-            inventory_item = ManagerInventoryItem.objects.filter(
-                name__icontains=self.item_name
-            ).first()
-        
-        return inventory_item.sales_price if inventory_item else 0
-    
-    @property
-    def total_sales_value(self):
-        """Calculate total sales value using inventory sales prices"""
-        return self.planned_quantity * self.unit_sales_price
-
-    @property
-    def profit_margin(self):
-        """Calculate profit margin"""
-        return self.total_sales_value - self.total_cost
-
-    @property
-    def profit_percentage(self):
-        """Calculate profit percentage"""
-        if self.total_sales_value > 0:
-            return (self.profit_margin / self.total_sales_value) * 100
-        return 0
-
-    # Add this method to Recipe model around line 200
-    @property
-    def total_sales_value(self):
-        """Calculate total sales value using inventory sales prices"""
-        if hasattr(self, 'manager_inventory_item_id') and self.manager_inventory_item_id:
-            try:
-                inventory_item = ManagerInventoryItem.objects.get(
-                    manager_item_id=self.manager_inventory_item_id
-                )
-                return inventory_item.sales_price * self.yield_quantity
-            except ManagerInventoryItem.DoesNotExist:
-                pass
-        return 0
+    def save(self, *args, **kwargs):
+        """Keep the financial columns in step with the recipe, quantity and finished good"""
+        from .production_financials import FINANCIAL_FIELDS, FINANCIAL_INPUTS, apply_financials
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or FINANCIAL_INPUTS.intersection(update_fields):
+            apply_financials([self])
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(FINANCIAL_FIELDS)
+        super().save(*args, **kwargs)
     
     def calculate_batch_quantity(self):
         """Calculate how many recipe batches needed"""
@@ -673,6 +666,78 @@ class ProductionRequirement(models.Model):
         return self.manual_override if self.manual_override is not None else self.recommended_production
 
 
+class ManagerWebhookEvent(models.Model):
+    """Manager.io change event queued by manager_webhook until its record is re-fetched"""
+    ENTITY_CHOICES = (
+        ('inventory_item', 'Inventory Item'),
+        ('customer', 'Customer'),
+        ('sales_order', 'Sales Order'),
+    )
+
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    entity_type = models.CharField(max_length=20, choices=ENTITY_CHOICES)
+    entity_key = models.CharField(max_length=255)
+    action = models.CharField(max_length=20, default='updated')
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['received_at']
+        indexes = [
+            models.Index(fields=['status', 'received_at']),
+            models.Index(fields=['entity_type', 'entity_key', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.entity_type} {self.entity_key} {self.action} ({self.status})"
+
+
+
+class SalesOrderOutbox(models.Model):
+    """Sales order waiting to be pushed to Manager.io by the outbox worker (recipes/outbox.py)"""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+        ('review', 'Needs review'),
+    )
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='outbox_messages')
+    # Sent as Idempotency-Key on every attempt of this message
+    idempotency_key = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    manager_key = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['order', 'status']),
+        ]
+
+    def __str__(self):
+        return f"Outbox #{self.id} for order #{self.order_id} ({self.status})"
+
 # Signal to create default production categories
 from django.db.models.signals import post_migrate
 from django.dispatch import receiver
@@ -681,4 +746,85 @@ from django.dispatch import receiver
 def create_default_production_categories(sender, **kwargs):
     """Create default production categories after migrations"""
     if sender.name == 'recipes':  # Only run for recipes app
-        ProductionCategory.ensure_defaults_exist()
\ No newline at end of file
+        ProductionCategory.ensure_defaults_exist()
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_customer_search_index(sender, **kwargs):
+    """Rebuild the in-process customer search index on the next search"""
+    from .customer_search import customer_index
+    customer_index.invalidate()
+
+
+# Keep the full-text search index (recipes/search.py) in step with writes
+@receiver(post_save, sender=ManagerInventoryItem)
+def index_inventory_item_for_search(sender, instance, **kwargs):
+    from .search import index_inventory_items
+    index_inventory_items([instance.pk])
+
+
+@receiver(post_delete, sender=ManagerInventoryItem)
+def remove_inventory_item_from_search(sender, instance, **kwargs):
+    from .search import remove_inventory_items
+    remove_inventory_items([instance.pk])
+
+
+@receiver(post_save, sender=ManagerInventoryItem)
+@receiver(post_delete, sender=ManagerInventoryItem)
+def invalidate_inventory_cache(sender, **kwargs):
+    """Start a new inventory cache generation (recipes/inventory_cache.py)"""
+    from .inventory_cache import inventory_repository
+    inventory_repository.invalidate()
+
+
+@receiver(post_save, sender=Recipe)
+def index_recipe_for_search(sender, instance, **kwargs):
+    from .search import index_recipes
+    index_recipes([instance.pk])
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_recipe_from_search(sender, instance, **kwargs):
+    from .search import remove_recipes
+    remove_recipes([instance.pk])
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def reindex_recipe_ingredients_for_search(sender, instance, **kwargs):
+    from .search import index_recipes
+    index_recipes([instance.recipe_id])
+
+
+# Recompute the cached dashboard snapshot (recipes/dashboard.py) after relevant writes
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+@receiver(post_save, sender=ProductionOrder)
+@receiver(post_delete, sender=ProductionOrder)
+@receiver(post_save, sender=InventoryPriceHistory)
+@receiver(post_delete, sender=InventoryPriceHistory)
+def invalidate_dashboard_snapshot(sender, **kwargs):
+    from .dashboard import invalidate_dashboard
+    invalidate_dashboard()
+
+
+# Keep stored production order financials (recipes/production_financials.py) at current prices
+@receiver(post_save, sender=ManagerInventoryItem)
+def refresh_financials_for_inventory_item(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    from .production_financials import refresh_for_inventory_items
+    refresh_for_inventory_items(ManagerInventoryItem.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def refresh_financials_for_recipe(sender, instance, raw=False, origin=None, **kwargs):
+    # Ingredients deleted along with their recipe leave no orders to refresh
+    if raw or isinstance(origin, Recipe) or getattr(origin, 'model', None) is Recipe:
+        return
+    from .production_financials import refresh_recipes_on_commit
+    refresh_recipes_on_commit([instance.pk if sender is Recipe else instance.recipe_id])
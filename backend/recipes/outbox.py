@@ -0,0 +1,378 @@
+# backend/recipes/outbox.py - Transactional outbox for pushing sales orders to Manager.io
+#
+# Every view that sends an order to Manager.io goes through submit_sales_order(). It
+# writes a SalesOrderOutbox row in the same transaction as the Order it belongs to
+# and marks the order sync_status='pending'. Then, depending on MANAGER_SALES_ORDER_OUTBOX:
+#
+#   - Off (the default): the message is sent before the request returns, once the
+#     transaction commits. A failure is final, as when views posted inline; the
+#     order is left 'failed' for the user to send again.
+#   - On: the view returns 202 and `manage.py process_sales_order_outbox --loop`,
+#     run as its own long-lived process, sends it. Nothing else drains the queue.
+#
+# process_sales_order_outbox() does the sending either way:
+#
+#   - Due messages are claimed MANAGER_OUTBOX_BATCH_SIZE at a time, like webhook
+#     events, and share one Manager.io client and one inventory lookup per batch.
+#   - Item codes still in a payload are resolved to Manager.io UUIDs when it is sent.
+#   - Every attempt carries the message's Idempotency-Key header, but nothing shows
+#     Manager.io honours it. An order that was synced another way since it was
+#     queued is marked sent without posting again.
+#   - Failures where Manager.io certainly did not create the order (no connection,
+#     429, 401, 404, 408) are retried with exponential backoff
+#     (MANAGER_OUTBOX_RETRY_BASE doubling up to MANAGER_OUTBOX_RETRY_MAX) until
+#     MANAGER_OUTBOX_MAX_ATTEMPTS. Requests Manager.io rejects fail at once. While
+#     the circuit breaker is open the batch is put back without using an attempt.
+#   - Failures after the POST may have arrived (timeouts, dropped connections, 5xx)
+#     are not resent, since that could create a duplicate sales order. The message
+#     goes to 'review', as does one whose worker stopped mid-send; after checking
+#     Manager.io, `process_sales_order_outbox --requeue` or `--resolve` settles it.
+#
+# Each outcome is saved as soon as it is known. A sent message sets the order's
+# manager_order_id and sync_status='synced'; a failed or review one sets 'failed'.
+
+import logging
+import random
+from datetime import timedelta
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from urllib3.exceptions import NewConnectionError
+from .circuit_breaker import CircuitOpenError
+from .inventory_cache import inventory_repository
+from .manager_api import ManagerRequestRejected, rejection_status
+from .manager_payloads import find_item_uuid, looks_like_uuid, order_sales_payload, response_key
+from .models import Order, SalesOrderOutbox
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+# A message in any of these is the order's only one; 'review' holds it until someone checks Manager.io
+ACTIVE_STATUSES = ('pending', 'processing', 'sending', 'review')
+
+
+class AmbiguousDelivery(Exception):
+    """The POST may have reached Manager.io, so resending could duplicate the sales order"""
+
+
+def enqueue_sales_order(order, payload=None):
+    """Queue ``order`` for Manager.io; call it inside the transaction that writes the order.
+
+    The payload is built from the order's items unless one is given. A message
+    still waiting for the same order is reused and keeps its idempotency key.
+    """
+    if payload is None:
+        payload = order_sales_payload(order, order.items.all())
+
+    now = timezone.now()
+    with transaction.atomic():
+        message = SalesOrderOutbox.objects.select_for_update().filter(
+            order=order, status__in=ACTIVE_STATUSES
+        ).first()
+        if message is None:
+            message = SalesOrderOutbox.objects.create(order=order, payload=payload)
+        elif message.status == 'pending':
+            message.payload = payload
+            message.next_attempt_at = now
+            message.save(update_fields=['payload', 'next_attempt_at'])
+        if message.status == 'review':
+            return message
+        Order.objects.filter(id=order.id).update(sync_status='pending', updated_at=now)
+    order.sync_status = 'pending'
+
+    return message
+
+
+def outbox_worker_enabled():
+    """True when a process_sales_order_outbox worker sends queued orders"""
+    return getattr(settings, 'MANAGER_SALES_ORDER_OUTBOX', False)
+
+
+def submit_sales_order(order, payload=None):
+    """Send ``order`` to Manager.io through the outbox; call it inside the transaction that writes the order.
+
+    Without an outbox worker the message is sent as soon as that transaction commits
+    (at once outside one), so it has been sent or has failed by the time the view
+    builds its response with submission_response().
+    """
+    message = enqueue_sales_order(order, payload)
+    if message.status == 'pending' and not outbox_worker_enabled():
+        transaction.on_commit(lambda: process_sales_order_outbox(message_ids=[message.id], retry=False))
+    return message
+
+
+def submission_response(message):
+    """(body, HTTP status) for a view that submitted ``message``"""
+    message.refresh_from_db()
+    body = {'order_id': message.order_id, 'outbox_id': message.id}
+    if message.status == 'sent':
+        return {
+            **body,
+            'success': True,
+            'queued': False,
+            'message': 'Sales order created successfully',
+            'key': message.manager_key,
+            'manager_order_id': message.manager_key,
+            'sync_status': 'synced',
+        }, 200
+    if message.status == 'review':
+        return {
+            **body,
+            'success': False,
+            'queued': False,
+            'message': 'An earlier attempt may already have created this sales order in Manager.io; '
+                       'it needs review before it is sent again',
+            'sync_status': 'failed',
+        }, 409
+    if message.status == 'failed':
+        return {
+            **body,
+            'success': False,
+            'queued': False,
+            'message': message.error or 'Unknown error from Manager.io',
+            'sync_status': 'failed',
+        }, 500
+    return {
+        **body,
+        'success': True,
+        'queued': True,
+        'message': 'Sales order queued for Manager.io',
+        'idempotency_key': str(message.idempotency_key),
+        'sync_status': 'pending',
+    }, 202
+
+
+def _claim_messages(limit, message_ids=None):
+    """Mark up to ``limit`` due messages as processing and return them with their orders"""
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=getattr(settings, 'MANAGER_OUTBOX_CLAIM_TIMEOUT', 600))
+    SalesOrderOutbox.objects.filter(status='processing', claimed_at__lt=stale_before).update(status='pending')
+    # A worker that stopped mid-send may or may not have created the order
+    stopped = SalesOrderOutbox.objects.filter(status='sending', claimed_at__lt=stale_before)
+    Order.objects.filter(outbox_messages__in=stopped).update(sync_status='failed', updated_at=now)
+    stopped.update(status='review', error='Worker stopped while sending; check Manager.io for this order')
+
+    due = SalesOrderOutbox.objects.filter(status='pending')
+    due = due.filter(id__in=message_ids) if message_ids is not None else due.filter(next_attempt_at__lte=now)
+    ids = list(due.order_by('next_attempt_at').values_list('id', flat=True)[:limit])
+    if not ids:
+        return []
+    # The claim time doubles as a token, as for webhook events
+    claimed_at = timezone.now()
+    SalesOrderOutbox.objects.filter(id__in=ids, status='pending').update(status='processing', claimed_at=claimed_at)
+    return list(
+        SalesOrderOutbox.objects.filter(id__in=ids, status='processing', claimed_at=claimed_at)
+        .select_related('order').order_by('next_attempt_at')
+    )
+
+
+class _ItemResolver:
+    """Item code -> Manager.io UUID from the local mirror, else one inventory fetch per batch"""
+
+    def __init__(self, api_service):
+        self.api_service = api_service
+        self._remote_items = None
+
+    def __call__(self, item_code):
+        if looks_like_uuid(item_code):
+            return item_code
+        inventory_item = inventory_repository.get_by_code(item_code)
+        if inventory_item and inventory_item.manager_item_id and '-' in inventory_item.manager_item_id:
+            return inventory_item.manager_item_id
+        if self._remote_items is None:
+            self._remote_items = self.api_service._fetch_all_inventory_items()
+        return find_item_uuid(self._remote_items, item_code)
+
+
+def _may_have_arrived(error):
+    """False only when no connection was made, so Manager.io cannot have seen the request"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return False
+    if isinstance(error, requests.exceptions.ConnectionError):
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return not isinstance(reason, NewConnectionError)
+    return True
+
+
+def _send(api_service, message, resolve):
+    """POST one message; returns the Manager.io key of the sales order"""
+    order = message.order
+    if order.manager_order_id and order.sync_status == 'synced':
+        return order.manager_order_id
+
+    lines = []
+    for line in message.payload.get('Lines', []):
+        uuid = resolve(line['Item']) if line.get('Item') else None
+        if uuid:
+            lines.append({**line, 'Item': uuid})
+        else:
+            logger.warning(f"Outbox #{message.id}: no Manager.io UUID for item {line.get('Item')}, line dropped")
+    if not lines:
+        raise ManagerRequestRejected(None, 'No items with valid UUIDs could be processed')
+
+    # From here on a failure may leave the order created in Manager.io
+    SalesOrderOutbox.objects.filter(id=message.id).update(status='sending')
+    try:
+        response = api_service.send(
+            'post', 'sales-order-form', data={**message.payload, 'Lines': lines},
+            headers={IDEMPOTENCY_HEADER: str(message.idempotency_key)}
+        )
+    except requests.exceptions.RequestException as e:
+        if _may_have_arrived(e):
+            raise AmbiguousDelivery(f"{type(e).__name__}: {str(e)}") from e
+        raise
+
+    if response.status_code >= 500:
+        raise AmbiguousDelivery(f"Manager.io returned {response.status_code}: {response.text[:300]}")
+    if rejection_status(response.status_code):
+        raise ManagerRequestRejected(
+            response.status_code,
+            f"Manager.io rejected the sales order: {response.status_code} {response.text[:300]}"
+        )
+    if response.status_code >= 400:
+        # 401, 404, 408 and 429 exhausted: the order was not created
+        raise Exception(f"Manager.io returned {response.status_code}: {response.text[:300]}")
+    try:
+        body = response.json() if response.content else None
+    except ValueError:
+        body = None
+    return response_key(body, 'submitted')
+
+
+def _retry_delay(attempts):
+    base = getattr(settings, 'MANAGER_OUTBOX_RETRY_BASE', 30)
+    delay = min(base * 2 ** max(attempts - 1, 0), getattr(settings, 'MANAGER_OUTBOX_RETRY_MAX', 3600))
+    # Jitter so a backlog doesn't retry in lockstep
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _record_sent(message, manager_key):
+    now = timezone.now()
+    message.status = 'sent'
+    message.attempts += 1
+    message.manager_key = manager_key or ''
+    message.error = ''
+    message.sent_at = now
+    with transaction.atomic():
+        message.save(update_fields=['status', 'attempts', 'manager_key', 'error', 'sent_at'])
+        Order.objects.filter(id=message.order_id).update(
+            manager_order_id=manager_key, sync_status='synced', updated_at=now
+        )
+
+
+def _record_failure(message, error, permanent=False):
+    """Schedule a retry, or fail the message and its order; returns the new status"""
+    now = timezone.now()
+    message.attempts += 1
+    message.error = str(error)[:1000]
+    if permanent or message.attempts >= getattr(settings, 'MANAGER_OUTBOX_MAX_ATTEMPTS', 8):
+        message.status = 'failed'
+    else:
+        message.status = 'pending'
+        message.next_attempt_at = now + timedelta(seconds=_retry_delay(message.attempts))
+    with transaction.atomic():
+        message.save(update_fields=['status', 'attempts', 'error', 'next_attempt_at'])
+        if message.status == 'failed':
+            Order.objects.filter(id=message.order_id).update(sync_status='failed', updated_at=now)
+    return message.status
+
+
+def _record_review(message, error):
+    """Hold a message that may already have created its order until someone checks Manager.io"""
+    now = timezone.now()
+    message.status = 'review'
+    message.attempts += 1
+    message.error = str(error)[:1000]
+    with transaction.atomic():
+        message.save(update_fields=['status', 'attempts', 'error'])
+        Order.objects.filter(id=message.order_id).update(sync_status='failed', updated_at=now)
+
+
+def _defer(messages, seconds):
+    """Put messages back without using an attempt"""
+    SalesOrderOutbox.objects.filter(id__in=[message.id for message in messages]).update(
+        status='pending', next_attempt_at=timezone.now() + timedelta(seconds=seconds)
+    )
+
+
+def process_sales_order_outbox(limit=None, message_ids=None, retry=True):
+    """Send due outbox messages to Manager.io; returns a summary.
+
+    With ``retry=False`` (sending during a request, with no worker to come back to
+    it) a failure is final and an open circuit fails the messages instead of
+    deferring them.
+    """
+    from .manager_api import ManagerApiService
+
+    limit = limit or getattr(settings, 'MANAGER_OUTBOX_BATCH_SIZE', 50)
+    messages = _claim_messages(limit, message_ids)
+    summary = {'messages': len(messages), 'sent': 0, 'retrying': 0, 'failed': 0, 'review': 0, 'deferred': 0}
+    if not messages:
+        return summary
+
+    api_service = ManagerApiService()
+    resolve = _ItemResolver(api_service)
+    for index, message in enumerate(messages):
+        try:
+            manager_key = _send(api_service, message, resolve)
+        except CircuitOpenError as e:
+            # Manager.io is down; everything left would fail fast the same way
+            if not retry:
+                for remaining in messages[index:]:
+                    _record_failure(remaining, e, permanent=True)
+                summary['failed'] += len(messages) - index
+                break
+            logger.warning(f"Outbox paused, {len(messages) - index} messages deferred: {str(e)}")
+            _defer(messages[index:], api_service.circuit_breaker.reset_timeout)
+            summary['deferred'] = len(messages) - index
+            break
+        except AmbiguousDelivery as e:
+            logger.error(f"Outbox #{message.id} for order #{message.order_id} needs review, not resent: {str(e)}")
+            _record_review(message, e)
+            summary['review'] += 1
+            continue
+        except ManagerRequestRejected as e:
+            logger.error(f"Outbox #{message.id} for order #{message.order_id} rejected: {str(e)}")
+            _record_failure(message, e, permanent=True)
+            summary['failed'] += 1
+            continue
+        except Exception as e:
+            status = _record_failure(message, e, permanent=not retry)
+            logger.warning(f"Outbox #{message.id} for order #{message.order_id} attempt {message.attempts} failed: {str(e)}")
+            summary['retrying' if status == 'pending' else 'failed'] += 1
+            continue
+
+        _record_sent(message, manager_key)
+        summary['sent'] += 1
+        logger.info(f"Outbox #{message.id}: order #{message.order_id} created in Manager.io as {manager_key}")
+
+    summary['api'] = api_service.client_stats.summary()
+    return summary
+
+
+def requeue_messages(message_ids):
+    """Send reviewed messages again, once Manager.io is known not to have their orders"""
+    now = timezone.now()
+    # A failed message is skipped when its order has been queued again since
+    busy_orders = SalesOrderOutbox.objects.filter(status__in=ACTIVE_STATUSES).exclude(id__in=message_ids).values('order_id')
+    messages = SalesOrderOutbox.objects.filter(
+        id__in=message_ids, status__in=('review', 'failed')
+    ).exclude(order_id__in=busy_orders)
+    with transaction.atomic():
+        Order.objects.filter(outbox_messages__in=messages).update(sync_status='pending', updated_at=now)
+        return messages.update(status='pending', next_attempt_at=now, error='')
+
+
+def resolve_message(message_id, manager_key):
+    """Mark a reviewed message sent with the key of the order found in Manager.io"""
+    message = SalesOrderOutbox.objects.get(id=message_id, status__in=('review', 'failed'))
+    _record_sent(message, manager_key)
+    return message
+
+
+def prune_sales_order_outbox(older_than_days):
+    """Delete sent messages older than ``older_than_days``; failed ones are kept for inspection"""
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = SalesOrderOutbox.objects.filter(status='sent', sent_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,236 @@
+# backend/recipes/price_history.py - Price history retention and daily rollups
+#
+# Raw InventoryPriceHistory rows are compacted into InventoryPriceDailyRollup (one row
+# per item per day) and then pruned once older than PRICE_HISTORY_RETENTION_DAYS.
+# Rollups cover every complete day up to the latest compacted date, so reports over
+# long windows read rollups for whole days and raw rows only for the partial first
+# day and anything newer than the last compaction.
+
+import logging
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.utils import timezone
+from .bulk import bulk_insert
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+# Attribute recent_price_changes_prefetch() stores each item's changes under
+RECENT_CHANGES_ATTR = 'recent_price_changes_{days}d'
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def recent_price_changes_prefetch(lookup, days=30):
+    """Prefetch the raw price changes of the last ``days`` days for items reached by ``lookup``.
+
+    ``lookup`` ends at ManagerInventoryItem, e.g. 'recipeingredient_set__inventory_item'.
+    Recipe.get_cost_history_summary() reads the prefetched lists instead of querying
+    once per ingredient.
+    """
+    from .models import InventoryPriceHistory
+    since = timezone.now() - timedelta(days=days)
+    return models.Prefetch(
+        f'{lookup}__price_history',
+        queryset=InventoryPriceHistory.objects.filter(changed_at__gte=since),
+        to_attr=RECENT_CHANGES_ATTR.format(days=days),
+    )
+
+
+def get_rollup_watermark():
+    """Return the latest date covered by the daily rollup, or None"""
+    from .models import InventoryPriceDailyRollup
+    return InventoryPriceDailyRollup.objects.aggregate(latest=models.Max('date'))['latest']
+
+
+def compact_price_history(until=None):
+    """Roll up raw price history for every complete day before ``until`` (default: today).
+
+    Days after the current watermark are recomputed from raw rows, so running this
+    repeatedly is safe. Returns the number of rollup rows written.
+    """
+    from .models import InventoryPriceHistory, InventoryPriceDailyRollup
+
+    until = until or timezone.localdate()
+    watermark = get_rollup_watermark()
+
+    raw = InventoryPriceHistory.objects.filter(changed_at__lt=_start_of_day(until))
+    if watermark:
+        raw = raw.filter(changed_at__gte=_start_of_day(watermark + timedelta(days=1)))
+
+    rollups = {}
+    rows = raw.order_by('changed_at', 'id').values_list(
+        'inventory_item_id', 'changed_at', 'old_price', 'new_price', 'change_amount', 'change_percentage'
+    )
+    for item_id, changed_at, old_price, new_price, change_amount, change_percentage in rows.iterator(chunk_size=2000):
+        day = timezone.localdate(changed_at)
+        rollup = rollups.get((item_id, day))
+        if rollup is None:
+            rollup = rollups[(item_id, day)] = InventoryPriceDailyRollup(
+                inventory_item_id=item_id,
+                date=day,
+                open_price=old_price,
+                close_price=new_price,
+                min_price=min(old_price, new_price),
+                max_price=max(old_price, new_price),
+                change_count=0,
+                total_change_amount=Decimal('0'),
+                total_change_percentage=Decimal('0'),
+            )
+        rollup.close_price = new_price
+        rollup.min_price = min(rollup.min_price, new_price)
+        rollup.max_price = max(rollup.max_price, new_price)
+        rollup.change_count += 1
+        rollup.total_change_amount += change_amount
+        rollup.total_change_percentage += change_percentage
+
+    if not rollups:
+        return 0
+
+    days = {day for _, day in rollups}
+    with transaction.atomic():
+        InventoryPriceDailyRollup.objects.filter(date__in=days).delete()
+        bulk_insert(InventoryPriceDailyRollup, rollups.values())
+
+    logger.info(f"Compacted price history into {len(rollups)} daily rollups ({min(days)} to {max(days)})")
+    return len(rollups)
+
+
+def prune_price_history(retention_days=None, chunk_size=1000):
+    """Delete raw price history older than the retention window in chunks.
+
+    Only rows on days already covered by the rollup are removed. Returns the number
+    of rows deleted.
+    """
+    from .models import InventoryPriceHistory
+
+    if retention_days is None:
+        retention_days = getattr(settings, 'PRICE_HISTORY_RETENTION_DAYS', 365)
+    watermark = get_rollup_watermark()
+    if watermark is None:
+        return 0
+
+    cutoff = min(
+        timezone.now() - timedelta(days=retention_days),
+        _start_of_day(watermark + timedelta(days=1))
+    )
+    table = InventoryPriceHistory._meta.db_table
+    deleted = 0
+
+    # Raw DELETE keeps per-row post_delete signals (dashboard invalidation) out of the loop
+    while True:
+        ids = list(
+            InventoryPriceHistory.objects.filter(changed_at__lt=cutoff)
+            .order_by('id').values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            break
+        placeholders = ', '.join(['%s'] * len(ids))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", ids)
+        deleted += len(ids)
+
+    if deleted:
+        from .dashboard import invalidate_dashboard
+        invalidate_dashboard()
+        logger.info(f"Pruned {deleted} price history rows older than {cutoff:%Y-%m-%d}")
+    return deleted
+
+
+def apply_price_history_retention(retention_days=None, chunk_size=1000):
+    """Compact complete days into the rollup, then prune expired raw rows"""
+    compacted = compact_price_history()
+    pruned = prune_price_history(retention_days=retention_days, chunk_size=chunk_size)
+    return {'compacted': compacted, 'pruned': pruned}
+
+
+def _uses_rollup(since, until):
+    raw_window = getattr(settings, 'PRICE_HISTORY_RAW_WINDOW_DAYS', 7)
+    return until - since > timedelta(days=raw_window)
+
+
+def price_change_totals(since, until=None):
+    """Return {inventory_item_id: {'change_count', 'total_change', 'total_percentage'}} for [since, until).
+
+    Short windows are aggregated from raw rows. Long windows use rollups for whole
+    days and raw rows for the partial first/last day and any days not yet compacted.
+    """
+    from .models import InventoryPriceHistory, InventoryPriceDailyRollup
+
+    totals = {}
+
+    def add(item_id, count, amount, percentage):
+        entry = totals.setdefault(item_id, {
+            'change_count': 0, 'total_change': Decimal('0'), 'total_percentage': Decimal('0')
+        })
+        entry['change_count'] += count
+        # SQLite sums decimals as floats; round back to the column precision
+        entry['total_change'] += Decimal(amount or 0).quantize(CENT)
+        entry['total_percentage'] += Decimal(percentage or 0).quantize(CENT)
+
+    now = timezone.now()
+    raw = InventoryPriceHistory.objects.filter(changed_at__gte=since)
+    if until is not None:
+        raw = raw.filter(changed_at__lt=until)
+    until = until or now
+
+    watermark = get_rollup_watermark() if _uses_rollup(since, until) else None
+    first_full_day = timezone.localdate(since) + timedelta(days=1)
+
+    # Past the retention window the first day's raw rows are gone, so count it whole
+    retention_days = getattr(settings, 'PRICE_HISTORY_RETENTION_DAYS', 365)
+    if since < now - timedelta(days=retention_days):
+        first_full_day -= timedelta(days=1)
+
+    last_full_day = watermark and min(watermark, timezone.localdate(until) - timedelta(days=1))
+
+    if last_full_day and last_full_day >= first_full_day:
+        rollups = InventoryPriceDailyRollup.objects.filter(
+            date__gte=first_full_day, date__lte=last_full_day
+        ).values('inventory_item_id').annotate(
+            count=models.Sum('change_count'),
+            amount=models.Sum('total_change_amount'),
+            percentage=models.Sum('total_change_percentage')
+        )
+        for row in rollups:
+            add(row['inventory_item_id'], row['count'], row['amount'], row['percentage'])
+
+        raw = raw.filter(
+            models.Q(changed_at__lt=_start_of_day(first_full_day)) |
+            models.Q(changed_at__gte=_start_of_day(last_full_day + timedelta(days=1)))
+        )
+
+    raw_totals = raw.values('inventory_item_id').annotate(
+        count=models.Count('id'),
+        amount=models.Sum('change_amount'),
+        percentage=models.Sum('change_percentage')
+    )
+    for row in raw_totals:
+        add(row['inventory_item_id'], row['count'], row['amount'], row['percentage'])
+
+    return totals
+
+
+def volatile_ingredients(since, until=None, limit=5):
+    """Most frequently repriced items in [since, until), in the dashboard's row shape"""
+    from .models import ManagerInventoryItem
+
+    totals = price_change_totals(since, until)
+    top = sorted(totals.items(), key=lambda pair: pair[1]['change_count'], reverse=True)[:limit]
+    items = ManagerInventoryItem.objects.only('name', 'code').in_bulk([item_id for item_id, _ in top])
+
+    return [
+        {
+            'inventory_item__name': items[item_id].name,
+            'inventory_item__code': items[item_id].code,
+            'change_count': entry['change_count'],
+            'avg_change': entry['total_percentage'] / entry['change_count'],
+            'total_impact': entry['total_change'],
+        }
+        for item_id, entry in top
+        if item_id in items
+    ]
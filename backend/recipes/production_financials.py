@@ -0,0 +1,152 @@
+# backend/recipes/production_financials.py - Stored financial columns on ProductionOrder
+#
+# total_cost, unit_sales_price, total_sales_value, profit_margin and profit_percentage
+# are columns so production orders can be sorted and filtered by profitability in
+# SQL. ProductionOrder.save() fills them in, and bulk_create callers run
+# apply_financials() first. When inventory costs or sales prices change (inventory
+# sync, webhooks, item edits) or a recipe changes, refresh_production_financials()
+# recomputes every affected order with a few queries and one bulk UPDATE per chunk.
+# Recipe and ingredient saves only note the recipe; refresh_recipes_on_commit()
+# refreshes every recipe noted in a transaction once, after it commits.
+#
+# The values match what the old properties computed from current prices:
+#   total_cost        = recipe batches * sum(ingredient quantity * unit cost)
+#   unit_sales_price  = sales price of the finished good (recipe UUID, item code, then name)
+#   total_sales_value = planned_quantity * unit_sales_price
+
+import logging
+import threading
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, Sum
+from .models import ManagerInventoryItem, ProductionOrder, RecipeIngredient
+
+logger = logging.getLogger(__name__)
+
+FINANCIAL_FIELDS = ['total_cost', 'unit_sales_price', 'total_sales_value', 'profit_margin', 'profit_percentage']
+# Saving any of these recomputes the financial columns
+FINANCIAL_INPUTS = {'recipe', 'recipe_id', 'item_code', 'item_name', 'planned_quantity'}
+CHUNK_SIZE = 500
+CENT = Decimal('0.01')
+
+_pending = threading.local()
+
+
+def recipe_costs(recipe_ids):
+    """{recipe_id: cost of one batch at current inventory prices}, in one query"""
+    line_cost = ExpressionWrapper(
+        F('quantity') * F('inventory_item__unit_cost'), output_field=DecimalField(max_digits=20, decimal_places=4)
+    )
+    rows = RecipeIngredient.objects.filter(recipe_id__in=recipe_ids).values('recipe_id').annotate(cost=Sum(line_cost))
+    return {row['recipe_id']: Decimal(str(row['cost'] or 0)) for row in rows}
+
+
+def finished_good_prices(orders):
+    """Sales price of each order's finished good, in order, looked up as the old property did"""
+    uuids = {
+        order.recipe.manager_inventory_item_id
+        for order in orders if order.recipe_id and order.recipe.manager_inventory_item_id
+    }
+    codes = {order.item_code for order in orders if order.item_code}
+    by_uuid = {}
+    by_code = {}
+    if uuids or codes:
+        # Highest id first so the lowest wins per code, as in inventory_repository.get_by_code()
+        for item in ManagerInventoryItem.objects.filter(Q(manager_item_id__in=uuids) | Q(code__in=codes)).order_by('-id'):
+            by_uuid[item.manager_item_id] = item
+            by_code[item.code] = item
+
+    # A list, not a dict: unsaved orders are not hashable
+    prices = []
+    for order in orders:
+        item = by_uuid.get(order.recipe.manager_inventory_item_id) if order.recipe_id else None
+        item = item or by_code.get(order.item_code)
+        if not item and order.item_name:
+            # Last resort, one query each; rare once items carry codes
+            item = ManagerInventoryItem.objects.filter(name__icontains=order.item_name).first()
+        prices.append(item.sales_price if item else Decimal('0'))
+    return prices
+
+
+def compute_financials(order, batch_cost, sales_price):
+    """Set the financial columns on ``order`` from one recipe batch cost and the finished good price"""
+    planned_quantity = Decimal(str(order.planned_quantity or 0))
+    total_cost = order.calculate_batch_quantity() * batch_cost if order.recipe_id else Decimal('0')
+    total_sales_value = planned_quantity * Decimal(str(sales_price or 0))
+    profit_margin = total_sales_value - total_cost
+
+    order.total_cost = Decimal(total_cost).quantize(CENT)
+    order.unit_sales_price = Decimal(str(sales_price or 0)).quantize(CENT)
+    order.total_sales_value = total_sales_value.quantize(CENT)
+    order.profit_margin = profit_margin.quantize(CENT)
+    order.profit_percentage = (
+        (profit_margin / total_sales_value * 100).quantize(CENT) if total_sales_value > 0 else Decimal('0.00')
+    )
+
+
+def apply_financials(orders):
+    """Compute the financial columns for unsaved or changed orders without saving them"""
+    orders = list(orders)
+    if not orders:
+        return orders
+    costs = recipe_costs({order.recipe_id for order in orders if order.recipe_id})
+    prices = finished_good_prices(orders)
+    for order, sales_price in zip(orders, prices):
+        compute_financials(order, costs.get(order.recipe_id, Decimal('0')), sales_price)
+    return orders
+
+
+def refresh_production_financials(queryset=None):
+    """Recompute and store the financial columns for ``queryset`` (default: every order); returns the count"""
+    queryset = ProductionOrder.objects.all() if queryset is None else queryset
+    ids = list(queryset.order_by().values_list('id', flat=True).distinct())
+    for start in range(0, len(ids), CHUNK_SIZE):
+        orders = apply_financials(
+            ProductionOrder.objects.filter(id__in=ids[start:start + CHUNK_SIZE]).select_related('recipe')
+        )
+        ProductionOrder.objects.bulk_update(orders, FINANCIAL_FIELDS)
+    if ids:
+        logger.info("Refreshed financials for %d production orders", len(ids))
+    return len(ids)
+
+
+def refresh_for_inventory_items(items):
+    """Refresh orders whose ingredients or finished good are among ``items``, a ManagerInventoryItem queryset"""
+    rows = list(items.values_list('id', 'manager_item_id', 'code'))
+    if not rows:
+        return 0
+    item_ids = [item_id for item_id, _, _ in rows]
+    uuids = [uuid for _, uuid, _ in rows if uuid]
+    codes = [code for _, _, code in rows if code]
+    return refresh_production_financials(ProductionOrder.objects.filter(
+        Q(recipe__recipeingredient__inventory_item_id__in=item_ids)
+        | Q(recipe__manager_inventory_item_id__in=uuids)
+        | Q(item_code__in=codes)
+    ))
+
+
+def refresh_for_recipes(recipe_ids):
+    """Refresh orders for recipes whose yield, finished good or ingredients changed"""
+    if not recipe_ids:
+        return 0
+    return refresh_production_financials(ProductionOrder.objects.filter(recipe_id__in=recipe_ids))
+
+
+def _refresh_pending_recipes():
+    recipe_ids = getattr(_pending, 'recipe_ids', None)
+    _pending.recipe_ids = set()
+    if recipe_ids:
+        refresh_for_recipes(sorted(recipe_ids))
+
+
+def refresh_recipes_on_commit(recipe_ids):
+    """Refresh orders for ``recipe_ids`` once the current transaction commits.
+
+    Ids noted during one transaction share a single refresh, so saving a recipe with
+    28 ingredients refreshes its orders once. Outside a transaction it runs at once.
+    """
+    if not hasattr(_pending, 'recipe_ids'):
+        _pending.recipe_ids = set()
+    _pending.recipe_ids.update(recipe_ids)
+    # The first callback to run takes every pending id; the rest find nothing to do
+    transaction.on_commit(_refresh_pending_recipes)
@@ -0,0 +1,213 @@
+# backend/recipes/production_submission.py - Submit many production orders to Manager.io at once
+#
+# Backs the bulk submit-to-manager endpoints in views_compat.py and views_async.py.
+# Every order is loaded with its recipe, ingredients and finished item in a fixed
+# number of queries, and all payloads are built before anything is sent. Orders are
+# then posted with at most MANAGER_PRODUCTION_SUBMIT_WORKERS requests in flight,
+# still within the rate limiter and circuit breaker. As with a single submission,
+# an order Manager.io refuses with its bill of materials is resent without it.
+# Results are saved in one bulk update and reported per order.
+
+import asyncio
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Prefetch
+from .dashboard import invalidate_dashboard
+from .manager_payloads import production_bill_of_materials, production_order_payload, response_key
+from .models import ManagerInventoryItem, ProductionOrder, RecipeIngredient
+
+logger = logging.getLogger(__name__)
+
+SUCCESS_STATUSES = (200, 201, 202)
+
+
+def requested_order_ids(data):
+    """Unique ``order_ids`` from a request body in their original order; ValueError if unusable"""
+    order_ids = data.get('order_ids')
+    if not order_ids or not isinstance(order_ids, list):
+        raise ValueError('order_ids must be a non-empty list')
+    try:
+        return list(dict.fromkeys(int(order_id) for order_id in order_ids))
+    except (TypeError, ValueError):
+        raise ValueError('order_ids must be production order ids')
+
+
+class ProductionSubmission:
+    """One production order with its full and simple payloads; submission fills in the outcome"""
+
+    def __init__(self, order, finished_item):
+        self.order = order
+        self.finished_item = finished_item
+        ingredients = order.recipe.recipeingredient_set.all() if order.recipe else []
+        self.bill_of_materials = production_bill_of_materials(order, ingredients)
+        self.payload = production_order_payload(order, finished_item, self.bill_of_materials)
+        self.simple_payload = production_order_payload(order, finished_item, [])
+        self.manager_order_id = None
+        self.warning = None
+        self.error = None
+        self.details = None
+
+    def record(self, response, full_response=None):
+        """Store the outcome; ``full_response`` is the refused first attempt when ``response`` is the retry"""
+        if response.status_code not in SUCCESS_STATUSES:
+            refused = full_response or response
+            self.error = f'Manager.io API error: {refused.status_code}'
+            self.details = refused.text[:200]
+            return
+        if full_response is not None:
+            self.warning = 'Ingredients could not be included'
+        try:
+            self.manager_order_id = response_key(response.json(), 'submitted')
+        except ValueError:
+            self.manager_order_id = 'submitted'
+
+    def result(self):
+        if self.error:
+            result = {'order_id': self.order.id, 'success': False, 'error': self.error}
+            if self.details:
+                result['details'] = self.details
+            return result
+        result = {
+            'order_id': self.order.id,
+            'success': True,
+            'manager_order_id': self.manager_order_id,
+            'bill_of_materials_count': 0 if self.warning else len(self.bill_of_materials),
+            'finished_item': self.finished_item.name,
+        }
+        if self.warning:
+            result['warning'] = self.warning
+        return result
+
+
+def load_production_submissions(order_ids):
+    """Build submissions for ``order_ids``.
+
+    Returns (submissions, results): results maps the ids that will not be sent
+    (missing, already submitted, no finished good) to their per-order result.
+    """
+    orders = {
+        order.id: order for order in ProductionOrder.objects.filter(id__in=order_ids).select_related('recipe')
+        .prefetch_related(Prefetch(
+            'recipe__recipeingredient_set', queryset=RecipeIngredient.objects.select_related('inventory_item')
+        ))
+    }
+    codes = {order.item_code for order in orders.values() if order.item_code and not order.manager_order_id}
+    finished_items = {}
+    # Highest id first so the lowest wins, as in inventory_repository.get_by_code()
+    for item in ManagerInventoryItem.objects.filter(code__in=codes).order_by('-id'):
+        finished_items[item.code] = item
+
+    submissions = []
+    results = {}
+    for order_id in order_ids:
+        order = orders.get(order_id)
+        if order is None:
+            results[order_id] = {'order_id': order_id, 'success': False, 'error': 'Production order not found'}
+        elif order.manager_order_id:
+            results[order_id] = {
+                'order_id': order_id,
+                'success': True,
+                'message': 'Already submitted to Manager.io',
+                'manager_order_id': order.manager_order_id
+            }
+        elif order.item_code not in finished_items:
+            results[order_id] = {
+                'order_id': order_id, 'success': False, 'error': f'Finished good not found: {order.item_code}'
+            }
+        else:
+            submissions.append(ProductionSubmission(order, finished_items[order.item_code]))
+    return submissions, results
+
+
+def save_production_submissions(submissions):
+    """Mark every submitted order completed with its Manager.io key in one UPDATE"""
+    orders = []
+    for submission in submissions:
+        if submission.manager_order_id:
+            submission.order.manager_order_id = submission.manager_order_id
+            submission.order.status = 'completed'
+            orders.append(submission.order)
+    if orders:
+        ProductionOrder.objects.bulk_update(orders, ['manager_order_id', 'status'])
+        invalidate_dashboard()
+
+
+def _summary(order_ids, submissions, results):
+    results.update((submission.order.id, submission.result()) for submission in submissions)
+    ordered = [results[order_id] for order_id in order_ids]
+    successful = sum(1 for result in ordered if result['success'])
+    return {
+        'success': True,
+        'total': len(ordered),
+        'successful': successful,
+        'failed': len(ordered) - successful,
+        'results': ordered,
+    }
+
+
+def _workers(count):
+    return max(min(getattr(settings, 'MANAGER_PRODUCTION_SUBMIT_WORKERS', 4), count), 1)
+
+
+def _submit(api_service, submission):
+    try:
+        response = api_service.send('post', 'production-order-form', data=submission.payload)
+        if response.status_code in SUCCESS_STATUSES:
+            submission.record(response)
+            return
+        logger.warning(f"Order {submission.order.id}: full payload failed ({response.status_code}), trying without ingredients...")
+        simple_response = api_service.send('post', 'production-order-form', data=submission.simple_payload)
+        submission.record(simple_response, full_response=response)
+    except Exception as e:
+        logger.error(f"Error submitting production order {submission.order.id} to Manager.io: {str(e)}")
+        submission.error = str(e)
+
+
+def submit_production_orders(order_ids):
+    """Submit ``order_ids`` to Manager.io concurrently; returns per-order results in request order"""
+    from .manager_api import ManagerApiService
+
+    submissions, results = load_production_submissions(order_ids)
+    if submissions:
+        api_service = ManagerApiService()
+        with ThreadPoolExecutor(max_workers=_workers(len(submissions)), thread_name_prefix='manager-production') as pool:
+            # Each submission runs in a copy of this context so its calls count against the current request
+            futures = [
+                pool.submit(contextvars.copy_context().run, _submit, api_service, submission)
+                for submission in submissions
+            ]
+            for future in futures:
+                future.result()
+        save_production_submissions(submissions)
+    return _summary(order_ids, submissions, results)
+
+
+async def _asubmit(service, semaphore, submission):
+    async with semaphore:
+        try:
+            response = await service.asend('post', 'production-order-form', data=submission.payload)
+            if response.status_code in SUCCESS_STATUSES:
+                submission.record(response)
+                return
+            logger.warning(f"Order {submission.order.id}: full payload failed ({response.status_code}), trying without ingredients...")
+            simple_response = await service.asend('post', 'production-order-form', data=submission.simple_payload)
+            submission.record(simple_response, full_response=response)
+        except Exception as e:
+            logger.error(f"Error submitting production order {submission.order.id} to Manager.io: {str(e)}")
+            submission.error = str(e)
+
+
+async def asubmit_production_orders(order_ids):
+    """submit_production_orders() for coroutines"""
+    from .async_manager import AsyncManagerService
+
+    submissions, results = await sync_to_async(load_production_submissions)(order_ids)
+    if submissions:
+        service = AsyncManagerService()
+        semaphore = asyncio.Semaphore(_workers(len(submissions)))
+        await asyncio.gather(*[_asubmit(service, semaphore, submission) for submission in submissions])
+        await sync_to_async(save_production_submissions)(submissions)
+    return _summary(order_ids, submissions, results)
@@ -0,0 +1,159 @@
+# backend/recipes/profiling.py - On-demand request profiling
+#
+# ProfilingMiddleware (recipes/middleware.py) profiles a request when a staff user
+# asks for it with the X-Profile header or ?_profile=1, or when it is picked by
+# PROFILING_SAMPLE_RATE. Each profile is saved under PROFILING_DIR as a pair of
+# files named <timestamp>-<view name>:
+#
+#   .prof  cProfile stats, loadable with pstats / snakeviz
+#   .json  request details, the SQL query log and the slowest functions
+#
+# Sampled profiles can come from any user, so they keep neither SQL parameters nor
+# the query string; only profiles a staff user asked for record them.
+#
+# `manage.py profiles` lists and summarizes what has been collected.
+
+import cProfile
+import io
+import json
+import logging
+import pstats
+import re
+import time
+from pathlib import Path
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = '_profile'
+TOP_FUNCTIONS = 25
+
+
+def get_profiling_dir():
+    return Path(getattr(settings, 'PROFILING_DIR', Path(settings.BASE_DIR) / 'profiles'))
+
+
+class QueryLog:
+    """execute_wrapper callable recording every SQL statement with its duration"""
+
+    def __init__(self, alias, record_params=True):
+        self.alias = alias
+        self.record_params = record_params
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'database': self.alias,
+                'sql': sql,
+                'params': repr(params)[:500] if self.record_params else None,
+                'many': many,
+                'ms': round((time.perf_counter() - start) * 1000, 3),
+            })
+
+
+def start_profiler():
+    """Return an enabled cProfile.Profile, or None if another profiler is already active"""
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        logger.warning("Request profiling skipped: another profiler is active")
+        return None
+    return profiler
+
+
+def top_functions(stats, sort='cumulative', limit=TOP_FUNCTIONS):
+    """Return the ``limit`` most expensive functions of a pstats.Stats as dicts"""
+    stats.sort_stats(sort)
+    rows = []
+    for func in stats.fcn_list[:limit]:
+        primitive_calls, total_calls, total_time, cumulative_time, _ = stats.stats[func]
+        filename, line, name = func
+        rows.append({
+            'function': f"{filename}:{line}({name})",
+            'calls': total_calls,
+            'primitive_calls': primitive_calls,
+            'tottime_ms': round(total_time * 1000, 3),
+            'cumtime_ms': round(cumulative_time * 1000, 3),
+        })
+    return rows
+
+
+def _slug(value):
+    return re.sub(r'[^A-Za-z0-9_-]+', '_', value).strip('_') or 'unresolved'
+
+
+def save_profile(profiler, request, response, view_name, elapsed, query_logs, trigger):
+    """Write the .prof and .json files for a profiled request and return the .json path"""
+    directory = get_profiling_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    now = timezone.now()
+    name = f"{now.strftime('%Y%m%d-%H%M%S-%f')}-{_slug(view_name)}"
+
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    stats.dump_stats(str(directory / f"{name}.prof"))
+
+    queries = [query for log in query_logs for query in log.queries]
+    user = getattr(request, 'user', None)
+    record = {
+        'created_at': now.isoformat(),
+        'view_name': view_name,
+        'method': request.method,
+        'path': request.get_full_path() if trigger == 'requested' else request.path,
+        'status_code': response.status_code,
+        'user': user.get_username() if user is not None and user.is_authenticated else None,
+        'trigger': trigger,
+        'duration_ms': round(elapsed * 1000, 3),
+        'profile_file': f"{name}.prof",
+        'function_calls': stats.total_calls,
+        'db_queries': len(queries),
+        'db_time_ms': round(sum(query['ms'] for query in queries), 3),
+        'top_functions': top_functions(stats),
+        'queries': queries,
+    }
+    path = directory / f"{name}.json"
+    path.write_text(json.dumps(record, indent=2, default=str))
+    return path
+
+
+def load_profiles(directory=None, view_name=None, limit=None):
+    """Return saved profile records, newest first, with their file path under '_path'"""
+    directory = Path(directory) if directory else get_profiling_dir()
+    if not directory.exists():
+        return []
+
+    records = []
+    for path in sorted(directory.glob('*.json'), reverse=True):
+        try:
+            record = json.loads(path.read_text())
+        except (OSError, ValueError):
+            logger.warning(f"Skipping unreadable profile {path}")
+            continue
+        if view_name and record.get('view_name') != view_name:
+            continue
+        record['_path'] = str(path)
+        records.append(record)
+        if limit and len(records) >= limit:
+            break
+    return records
+
+
+def prune_profiles(older_than_days, directory=None):
+    """Delete profiles older than ``older_than_days``; returns the number of requests removed"""
+    directory = Path(directory) if directory else get_profiling_dir()
+    if not directory.exists():
+        return 0
+    cutoff = time.time() - older_than_days * 86400
+    removed = 0
+    for path in directory.glob('*.json'):
+        if path.stat().st_mtime < cutoff:
+            path.with_suffix('.prof').unlink(missing_ok=True)
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
@@ -0,0 +1,62 @@
+# backend/recipes/query_budget.py - Test helpers for per-endpoint query budgets
+#
+# Budgets live in settings.QUERY_BUDGETS keyed by URL name, the same names the
+# instrumentation middleware reports. Use these from Django TestCases:
+#
+#     class DashboardTests(QueryBudgetMixin, TestCase):
+#         def test_dashboard_budget(self):
+#             self.assertQueryBudget('/api/dashboard/')
+#
+#     with query_budget(3):
+#         list(Recipe.objects.all())
+
+from contextlib import contextmanager
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from .metrics import get_query_budget
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block or endpoint runs more queries than its budget"""
+
+
+def _format_failure(label, budget, captured):
+    queries = '\n'.join(f"  {i}. {query['sql']}" for i, query in enumerate(captured, start=1))
+    return f"{label} ran {len(captured)} queries, budget is {budget}:\n{queries}"
+
+
+@contextmanager
+def query_budget(budget, using=DEFAULT_DB_ALIAS, label='Block'):
+    """Fail if the block runs more than ``budget`` queries on the given database"""
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    if len(context.captured_queries) > budget:
+        raise QueryBudgetExceeded(_format_failure(label, budget, context.captured_queries))
+
+
+def assert_endpoint_query_budget(client, path, method='get', budget=None, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Request ``path`` with a test client and fail if it exceeds its query budget.
+
+    The budget defaults to settings.QUERY_BUDGETS for the path's URL name. Returns
+    the response so callers can make further assertions.
+    """
+    view_name = resolve(path.split('?', 1)[0]).view_name
+    if budget is None:
+        budget = get_query_budget(view_name)
+        if budget is None:
+            raise ValueError(f"No query budget configured for '{view_name}' in settings.QUERY_BUDGETS")
+
+    with query_budget(budget, using=using, label=f"{method.upper()} {path} ({view_name})"):
+        response = getattr(client, method.lower())(path, **kwargs)
+    return response
+
+
+class QueryBudgetMixin:
+    """TestCase mixin adding assertQueryBudget()"""
+
+    def assertQueryBudget(self, path, method='get', budget=None, **kwargs):
+        try:
+            return assert_endpoint_query_budget(self.client, path, method=method, budget=budget, **kwargs)
+        except QueryBudgetExceeded as e:
+            self.fail(str(e))
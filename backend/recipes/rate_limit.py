@@ -0,0 +1,260 @@
+# backend/recipes/rate_limit.py - Adaptive rate and concurrency limits for the Manager.io client
+#
+# Every ManagerApiService request goes through get_manager_rate_limiter().slot(), which
+# waits for two things:
+#
+#   rate         a token bucket refilled at the current rate (requests/second). With
+#                MANAGER_API_SHARED_RATE_LIMIT the tokens come from a per-second
+#                counter in the default cache, so all workers sharing a Redis cache
+#                share one budget. With locmem the budget is per process.
+#   concurrency  a cap on requests in flight in this process.
+#
+# Both limits adapt AIMD-style from record(): every good response adds a little to
+# the rate and to the concurrency limit. A 429, a 5xx, a connection failure or a
+# response slower than MANAGER_API_LATENCY_TARGET halves them. Both stay within
+# their configured minimum and maximum. A Retry-After header pauses every thread,
+# and every worker through the cache, until it has passed. Throughput then settles
+# just under the point where Manager.io starts throttling.
+#
+# Async callers (recipes/async_manager.py) use aslot(), which waits with asyncio.sleep.
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from django.conf import settings
+from django.core.cache import cache
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+WINDOW_KEY = 'manager:rate:{window}'
+BLOCKED_UNTIL_KEY = 'manager:rate:blocked_until'
+OVERLOAD_STATUSES = (429, 500, 502, 503, 504)
+MAX_PAUSE = 60
+SLOT_POLL_INTERVAL = 0.01
+
+
+class AdaptiveRateLimiter:
+    """Token bucket plus concurrency cap whose limits follow additive-increase/multiplicative-decrease"""
+
+    def __init__(self, max_rate=5.0, min_rate=0.5, burst=10, max_concurrency=8, min_concurrency=1,
+                 latency_target=5.0, shared=True):
+        self.max_rate = float(max_rate)
+        self.min_rate = float(min_rate)
+        self.burst = float(burst)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.latency_target = latency_target
+        self.shared = shared
+
+        self._lock = threading.Lock()
+        self._slots = threading.Condition(self._lock)
+        self.rate = self.max_rate
+        self.concurrency = float(max_concurrency)
+        self.in_flight = 0
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+        self._blocked_until = 0.0
+        self.throttled = 0
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_rate=getattr(settings, 'MANAGER_API_RATE_LIMIT', 5.0),
+            min_rate=getattr(settings, 'MANAGER_API_MIN_RATE', 0.5),
+            burst=getattr(settings, 'MANAGER_API_BURST', 10),
+            max_concurrency=getattr(settings, 'MANAGER_API_MAX_CONCURRENCY', 8),
+            min_concurrency=getattr(settings, 'MANAGER_API_MIN_CONCURRENCY', 1),
+            latency_target=getattr(settings, 'MANAGER_API_LATENCY_TARGET', 5.0),
+            shared=getattr(settings, 'MANAGER_API_SHARED_RATE_LIMIT', True),
+        )
+
+    # --- waiting -----------------------------------------------------------
+
+    def _pause_remaining(self):
+        """Seconds left of a Retry-After pause seen by this or another worker"""
+        blocked_until = self._blocked_until
+        if self.shared:
+            try:
+                blocked_until = max(blocked_until, cache.get(BLOCKED_UNTIL_KEY) or 0)
+            except Exception as e:
+                logger.debug("Rate limit cache unavailable: %s", e)
+        return blocked_until - time.time()
+
+    def _take_local_token(self):
+        """Take a token from the in-process bucket; returns seconds to wait if none is left"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+            self._refilled_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def _take_shared_token(self):
+        """Count against the cache's per-second window; returns seconds to wait if it is full"""
+        # Windows stretch past one second when the rate drops below 1 request/second
+        period = max(1.0, 1 / self.rate)
+        now = time.time()
+        window = int(now / period)
+        key = WINDOW_KEY.format(window=window)
+        try:
+            cache.add(key, 0, timeout=int(period) + 5)
+            used = cache.incr(key)
+        except Exception as e:
+            # Fall back to this process' bucket while the cache is unavailable
+            logger.debug("Rate limit cache unavailable: %s", e)
+            return self._take_local_token()
+        if used <= max(1, math.floor(self.rate * period)):
+            return 0
+        return (window + 1) * period - now
+
+    def _token_delay(self):
+        """Take a token and return 0, or return how long to wait before trying again"""
+        pause = self._pause_remaining()
+        if pause > 0:
+            return min(pause, MAX_PAUSE)
+        return self._take_shared_token() if self.shared else self._take_local_token()
+
+    def _acquire_token(self):
+        waited = 0.0
+        while True:
+            delay = self._token_delay()
+            if delay <= 0:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    def _has_free_slot(self):
+        # Caller holds the lock
+        return self.in_flight < max(self.min_concurrency, int(self.concurrency))
+
+    def _acquire_slot(self):
+        start = time.monotonic()
+        with self._slots:
+            while not self._has_free_slot():
+                self._slots.wait()
+            self.in_flight += 1
+        return time.monotonic() - start
+
+    def _try_acquire_slot(self):
+        with self._slots:
+            if not self._has_free_slot():
+                return False
+            self.in_flight += 1
+            return True
+
+    def _release_slot(self):
+        with self._slots:
+            self.in_flight -= 1
+            self._slots.notify()
+
+    @contextmanager
+    def slot(self):
+        """Wait for a token and a concurrency slot, then hold the slot for one request"""
+        waited = self._acquire_slot()
+        try:
+            waited += self._acquire_token()
+            if waited > 0:
+                registry.inc('ccf_manager_throttle_seconds_total', value=waited)
+            yield
+        finally:
+            self._release_slot()
+
+    @asynccontextmanager
+    async def aslot(self):
+        """slot() for coroutines: waits with asyncio.sleep instead of blocking the event loop"""
+        waited = 0.0
+        while not self._try_acquire_slot():
+            await asyncio.sleep(SLOT_POLL_INTERVAL)
+            waited += SLOT_POLL_INTERVAL
+        try:
+            while True:
+                delay = self._token_delay()
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+                waited += delay
+            if waited > 0:
+                registry.inc('ccf_manager_throttle_seconds_total', value=waited)
+            yield
+        finally:
+            self._release_slot()
+
+    # --- feedback ----------------------------------------------------------
+
+    def pause(self, seconds):
+        """Hold every request, in all workers when shared, for ``seconds``"""
+        seconds = min(max(seconds, 0), MAX_PAUSE)
+        until = time.time() + seconds
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, until)
+        if self.shared:
+            try:
+                cache.set(BLOCKED_UNTIL_KEY, until, timeout=int(seconds) + 1)
+            except Exception as e:
+                logger.debug("Rate limit cache unavailable: %s", e)
+
+    def record(self, status, seconds, retry_after=None):
+        """Adapt the limits from one response; ``status`` is None when no response arrived"""
+        overloaded = status is None or status in OVERLOAD_STATUSES or seconds > self.latency_target
+        with self._slots:
+            if overloaded:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.concurrency = max(float(self.min_concurrency), self.concurrency / 2)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+                self.concurrency = min(float(self.max_concurrency), self.concurrency + 1 / max(self.concurrency, 1))
+            self._slots.notify_all()
+            if status == 429:
+                self.throttled += 1
+
+        if overloaded:
+            registry.inc('ccf_manager_backoffs_total', {'reason': 'error' if status is None else str(status)})
+            logger.debug(
+                "Manager.io limits lowered to %.2f req/s, concurrency %d (status=%s, %.2fs)",
+                self.rate, int(self.concurrency), status, seconds
+            )
+        if retry_after:
+            try:
+                self.pause(float(retry_after))
+            except ValueError:
+                pass
+
+    def state(self):
+        with self._lock:
+            return {
+                'rate': round(self.rate, 2),
+                'max_rate': self.max_rate,
+                'concurrency': int(self.concurrency),
+                'max_concurrency': self.max_concurrency,
+                'in_flight': self.in_flight,
+                'throttled': self.throttled,
+                'paused_seconds': round(max(self._pause_remaining(), 0), 1),
+                'shared': self.shared,
+            }
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_manager_rate_limiter():
+    """Process-wide limiter shared by every ManagerApiService instance"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = AdaptiveRateLimiter.from_settings()
+    return _limiter
+
+
+def reset_manager_rate_limiter():
+    """Drop the limiter so the next request builds one from the current settings"""
+    global _limiter
+    with _limiter_lock:
+        _limiter = None
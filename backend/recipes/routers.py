@@ -0,0 +1,63 @@
+# backend/recipes/routers.py - Route reporting reads to the read-only database alias
+#
+# With the tuned SQLite profile (settings.SQLITE_PROFILE = 'tuned') a second alias,
+# 'reporting', opens the same database file read-only. ReportingDatabaseMiddleware
+# marks requests for the views in settings.REPORTING_VIEW_NAMES and ReportingRouter
+# sends their reads to that alias, so in WAL mode reports read a consistent
+# snapshot instead of queueing behind the sync's write transaction. Writes always
+# go to 'default'. Without the alias configured the router does nothing.
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+
+REPORTING_ALIAS = 'reporting'
+
+_reporting = ContextVar('reporting_database', default=False)
+
+
+def reporting_alias_configured():
+    return REPORTING_ALIAS in settings.DATABASES
+
+
+def activate_reporting():
+    """Route reads in the current context to the reporting alias; returns a token for deactivate_reporting()"""
+    return _reporting.set(True)
+
+
+def deactivate_reporting(token):
+    _reporting.reset(token)
+
+
+@contextmanager
+def reporting_database():
+    """Send ORM reads inside the block to the reporting alias when it is configured"""
+    token = activate_reporting()
+    try:
+        yield
+    finally:
+        deactivate_reporting(token)
+
+
+class ReportingRouter:
+    """Reads in reporting_database() blocks go to the read-only alias; everything else to default"""
+
+    def db_for_read(self, model, **hints):
+        if _reporting.get() and reporting_alias_configured():
+            return REPORTING_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Instances loaded from the reporting alias must still be saved through default
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if {obj1._state.db, obj2._state.db} <= {'default', REPORTING_ALIAS}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The reporting alias is the same database opened read-only
+        if db == REPORTING_ALIAS:
+            return False
+        return None
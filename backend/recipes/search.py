@@ -0,0 +1,363 @@
+# backend/recipes/search.py - Full-text search for inventory items and recipes
+#
+# SQLite uses FTS5 virtual tables (recipes_inventory_fts / recipes_recipe_fts) whose
+# rowid is the primary key of the indexed row. PostgreSQL can use a tsvector + pg_trgm
+# expression index on the inventory table and a recipes_recipe_search side table for
+# recipes, since recipe documents include ingredient names from other tables.
+#
+# The SQLite schema is created by migration 0009_search_index. The PostgreSQL backend
+# has not been run against a real server yet, so it is off unless
+# POSTGRES_FULL_TEXT_SEARCH is set; without it PostgreSQL gets the plain LIKE search.
+# Its schema is created by 0009 when the setting is on at migrate time, or by
+# `manage.py rebuild_search_index` once it is turned on later.
+
+import logging
+import re
+import threading
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, When
+from rest_framework import filters
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_state = threading.local()
+
+
+def _tokens(term):
+    return [token.lower() for token in _TOKEN_RE.findall(term or '')]
+
+
+def _chunks(values, size=500):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class SqliteFtsBackend:
+    """FTS5 backend ranked with bm25()"""
+
+    INVENTORY_WEIGHTS = (10.0, 1.0, 5.0)             # name, description, code
+    RECIPE_WEIGHTS = (10.0, 2.0, 1.0, 4.0)           # name, description, instructions, ingredients
+
+    INVENTORY_SOURCE_SQL = """
+        SELECT id, name, COALESCE(description, ''), COALESCE(code, '')
+        FROM recipes_managerinventoryitem
+    """
+    RECIPE_SOURCE_SQL = """
+        SELECT r.id, r.name, COALESCE(r.description, ''), COALESCE(r.instructions, ''),
+               COALESCE((SELECT group_concat(i.name, ' ')
+                         FROM recipes_recipeingredient ri
+                         JOIN recipes_managerinventoryitem i ON i.id = ri.inventory_item_id
+                         WHERE ri.recipe_id = r.id), '')
+        FROM recipes_recipe r
+    """
+
+    def _match_query(self, term):
+        tokens = _tokens(term)
+        if not tokens:
+            return None
+        return ' AND '.join(f'"{token}"*' for token in tokens)
+
+    def index_inventory_items(self, ids=None):
+        with connection.cursor() as cursor:
+            if ids is None:
+                cursor.execute("DELETE FROM recipes_inventory_fts")
+                cursor.execute(
+                    "INSERT INTO recipes_inventory_fts(rowid, name, description, code) " + self.INVENTORY_SOURCE_SQL
+                )
+                return
+            for chunk in _chunks(ids):
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f"DELETE FROM recipes_inventory_fts WHERE rowid IN ({placeholders})", chunk)
+                cursor.execute(
+                    "INSERT INTO recipes_inventory_fts(rowid, name, description, code) "
+                    + self.INVENTORY_SOURCE_SQL + f" WHERE id IN ({placeholders})",
+                    chunk
+                )
+
+    def remove_inventory_items(self, ids):
+        with connection.cursor() as cursor:
+            for chunk in _chunks(ids):
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f"DELETE FROM recipes_inventory_fts WHERE rowid IN ({placeholders})", chunk)
+
+    def index_recipes(self, ids=None):
+        with connection.cursor() as cursor:
+            if ids is None:
+                cursor.execute("DELETE FROM recipes_recipe_fts")
+                cursor.execute(
+                    "INSERT INTO recipes_recipe_fts(rowid, name, description, instructions, ingredients) "
+                    + self.RECIPE_SOURCE_SQL
+                )
+                return
+            for chunk in _chunks(ids):
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f"DELETE FROM recipes_recipe_fts WHERE rowid IN ({placeholders})", chunk)
+                cursor.execute(
+                    "INSERT INTO recipes_recipe_fts(rowid, name, description, instructions, ingredients) "
+                    + self.RECIPE_SOURCE_SQL + f" WHERE r.id IN ({placeholders})",
+                    chunk
+                )
+
+    def remove_recipes(self, ids):
+        with connection.cursor() as cursor:
+            for chunk in _chunks(ids):
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f"DELETE FROM recipes_recipe_fts WHERE rowid IN ({placeholders})", chunk)
+
+    def _search(self, table, weights, term, limit):
+        match = self._match_query(term)
+        if match is None:
+            return None
+        weight_args = ', '.join(str(w) for w in weights)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {table} WHERE {table} MATCH %s "
+                f"ORDER BY bm25({table}, {weight_args}) LIMIT %s",
+                [match, limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def search_inventory(self, term, limit=500):
+        return self._search('recipes_inventory_fts', self.INVENTORY_WEIGHTS, term, limit)
+
+    def search_recipes(self, term, limit=500):
+        return self._search('recipes_recipe_fts', self.RECIPE_WEIGHTS, term, limit)
+
+
+class PostgresTrigramBackend:
+    """tsvector + pg_trgm backend ranked with ts_rank() and similarity()"""
+
+    INVENTORY_VECTOR = (
+        "setweight(to_tsvector('simple', COALESCE(name, '')), 'A') || "
+        "setweight(to_tsvector('simple', COALESCE(code, '')), 'A') || "
+        "setweight(to_tsvector('simple', COALESCE(description, '')), 'C')"
+    )
+    RECIPE_SOURCE_SQL = """
+        SELECT r.id,
+               concat_ws(' ', r.name, r.description, r.instructions, ing.names),
+               setweight(to_tsvector('simple', COALESCE(r.name, '')), 'A') ||
+               setweight(to_tsvector('simple', COALESCE(ing.names, '')), 'B') ||
+               setweight(to_tsvector('simple', COALESCE(r.description, '')), 'B') ||
+               setweight(to_tsvector('simple', COALESCE(r.instructions, '')), 'C')
+        FROM recipes_recipe r
+        LEFT JOIN LATERAL (
+            SELECT string_agg(i.name, ' ') AS names
+            FROM recipes_recipeingredient ri
+            JOIN recipes_managerinventoryitem i ON i.id = ri.inventory_item_id
+            WHERE ri.recipe_id = r.id
+        ) ing ON TRUE
+    """
+    RECIPE_UPSERT_SQL = (
+        "INSERT INTO recipes_recipe_search(recipe_id, document, tsv) "
+        "{source} "
+        "ON CONFLICT (recipe_id) DO UPDATE SET document = EXCLUDED.document, tsv = EXCLUDED.tsv"
+    )
+    # Safe to run again; pg_trgm needs a role allowed to create extensions
+    SCHEMA_SQL = [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        f"CREATE INDEX IF NOT EXISTS recipes_inventory_tsv_idx ON recipes_managerinventoryitem USING GIN (({INVENTORY_VECTOR}))",
+        "CREATE INDEX IF NOT EXISTS recipes_inventory_name_trgm_idx ON recipes_managerinventoryitem "
+        "USING GIN (name gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS recipes_inventory_code_trgm_idx ON recipes_managerinventoryitem "
+        "USING GIN ((COALESCE(code, '')) gin_trgm_ops)",
+        """
+        CREATE TABLE IF NOT EXISTS recipes_recipe_search (
+            recipe_id bigint PRIMARY KEY REFERENCES recipes_recipe(id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+            document text NOT NULL DEFAULT '',
+            tsv tsvector NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS recipes_recipe_search_tsv_idx ON recipes_recipe_search USING GIN (tsv)",
+        "CREATE INDEX IF NOT EXISTS recipes_recipe_search_trgm_idx ON recipes_recipe_search USING GIN (document gin_trgm_ops)",
+    ]
+    DROP_SCHEMA_SQL = [
+        "DROP TABLE IF EXISTS recipes_recipe_search",
+        "DROP INDEX IF EXISTS recipes_inventory_code_trgm_idx",
+        "DROP INDEX IF EXISTS recipes_inventory_name_trgm_idx",
+        "DROP INDEX IF EXISTS recipes_inventory_tsv_idx",
+    ]
+
+    def create_schema(self):
+        with connection.cursor() as cursor:
+            for statement in self.SCHEMA_SQL:
+                cursor.execute(statement)
+
+    def _ts_query(self, term):
+        tokens = _tokens(term)
+        if not tokens:
+            return None
+        return ' & '.join(f'{token}:*' for token in tokens)
+
+    def index_inventory_items(self, ids=None):
+        # Inventory is searched through an expression index on the base table
+        return None
+
+    def remove_inventory_items(self, ids):
+        return None
+
+    def index_recipes(self, ids=None):
+        with connection.cursor() as cursor:
+            if ids is None:
+                cursor.execute("DELETE FROM recipes_recipe_search")
+                cursor.execute(self.RECIPE_UPSERT_SQL.format(source=self.RECIPE_SOURCE_SQL))
+                return
+            for chunk in _chunks(ids):
+                cursor.execute(
+                    self.RECIPE_UPSERT_SQL.format(source=self.RECIPE_SOURCE_SQL + " WHERE r.id = ANY(%s)"),
+                    [chunk]
+                )
+
+    def remove_recipes(self, ids):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM recipes_recipe_search WHERE recipe_id = ANY(%s)", [list(ids)])
+
+    def search_inventory(self, term, limit=500):
+        ts_query = self._ts_query(term)
+        if ts_query is None:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT id FROM recipes_managerinventoryitem
+                WHERE ({self.INVENTORY_VECTOR}) @@ to_tsquery('simple', %s)
+                   OR name %% %s OR COALESCE(code, '') %% %s
+                ORDER BY ts_rank({self.INVENTORY_VECTOR}, to_tsquery('simple', %s))
+                       + GREATEST(similarity(name, %s), similarity(COALESCE(code, ''), %s)) DESC
+                LIMIT %s
+                """,
+                [ts_query, term, term, ts_query, term, term, limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def search_recipes(self, term, limit=500):
+        ts_query = self._ts_query(term)
+        if ts_query is None:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT recipe_id FROM recipes_recipe_search
+                WHERE tsv @@ to_tsquery('simple', %s) OR document %% %s
+                ORDER BY ts_rank(tsv, to_tsquery('simple', %s)) + similarity(document, %s) DESC
+                LIMIT %s
+                """,
+                [ts_query, term, ts_query, term, limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+_BACKENDS = {
+    'sqlite': SqliteFtsBackend,
+    'postgresql': PostgresTrigramBackend,
+}
+
+
+def postgres_search_enabled():
+    """True when the PostgreSQL full-text backend has been opted into"""
+    return getattr(settings, 'POSTGRES_FULL_TEXT_SEARCH', False)
+
+
+def get_search_backend():
+    """Return the full-text backend for the default database, or None if unsupported or not enabled"""
+    if connection.vendor == 'postgresql' and not postgres_search_enabled():
+        return None
+    backend_class = _BACKENDS.get(connection.vendor)
+    return backend_class() if backend_class else None
+
+
+def is_deferred():
+    return getattr(_state, 'deferred', 0) > 0
+
+
+@contextmanager
+def deferred_indexing():
+    """Skip per-row signal indexing inside the block and rebuild the index once at the end.
+
+    Used by the inventory sync, which touches every row.
+    """
+    _state.deferred = getattr(_state, 'deferred', 0) + 1
+    try:
+        yield
+    finally:
+        _state.deferred -= 1
+        if not is_deferred():
+            rebuild_search_index()
+
+
+def rebuild_search_index():
+    """Rebuild inventory and recipe search documents from scratch"""
+    backend = get_search_backend()
+    if backend is None:
+        return
+    try:
+        backend.index_inventory_items()
+        backend.index_recipes()
+    except Exception as e:
+        logger.error(f"Error rebuilding search index: {str(e)}")
+
+
+def _safe_index(method_name, ids):
+    if is_deferred():
+        return
+    backend = get_search_backend()
+    if backend is None:
+        return
+    try:
+        getattr(backend, method_name)(ids)
+    except Exception as e:
+        # The search index must never break a write; the next rebuild repairs it
+        logger.warning(f"Search index update failed ({method_name}): {str(e)}")
+
+
+def index_inventory_items(ids):
+    _safe_index('index_inventory_items', ids)
+
+
+def remove_inventory_items(ids):
+    _safe_index('remove_inventory_items', ids)
+
+
+def index_recipes(ids):
+    _safe_index('index_recipes', ids)
+
+
+def remove_recipes(ids):
+    _safe_index('remove_recipes', ids)
+
+
+class RankedSearchFilter(filters.SearchFilter):
+    """SearchFilter that ranks results through the full-text index.
+
+    Views set ``search_index`` to 'inventory' or 'recipes'. When the database has no
+    full-text backend, or the index finds nothing (e.g. an infix like 'lour'), the
+    regular ``search_fields`` LIKE search is used instead.
+    """
+    max_ranked_results = 500
+
+    def filter_queryset(self, request, queryset, view):
+        search_index = getattr(view, 'search_index', None)
+        term = ' '.join(self.get_search_terms(request))
+        backend = get_search_backend() if search_index and term else None
+
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+
+        try:
+            search = backend.search_inventory if search_index == 'inventory' else backend.search_recipes
+            ranked_ids = search(term, limit=self.max_ranked_results)
+        except Exception as e:
+            logger.warning(f"Full-text search failed, falling back to LIKE search: {str(e)}")
+            ranked_ids = None
+
+        if not ranked_ids:
+            return super().filter_queryset(request, queryset, view)
+
+        rank = Case(
+            *[When(pk=pk, then=position) for position, pk in enumerate(ranked_ids)],
+            output_field=IntegerField()
+        )
+        return queryset.filter(pk__in=ranked_ids).annotate(search_rank=rank).order_by('search_rank')
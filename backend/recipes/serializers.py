@@ -2,6 +2,7 @@
 
 from rest_framework import serializers
 from decimal import Decimal
+from django.db import transaction
 from .models import (
     ManagerInventoryItem, RecipeCategory, Recipe, RecipeIngredient,
     Customer, Order, OrderItem, ProductionOrder, InventoryPriceHistory
@@ -110,22 +111,24 @@ class RecipeSerializer(serializers.ModelSerializer):
         # Extract ingredients data from validated data
         ingredients_data = validated_data.pop('recipeingredient_set', [])
         
-        # Create the recipe
-        recipe = Recipe.objects.create(**validated_data)
-        
-        # Process and create each ingredient
-        for ingredient_data in ingredients_data:
-            inventory_item = ingredient_data.pop('inventory_item', None)
+        # One transaction, so dependent production orders are refreshed once on commit
+        with transaction.atomic():
+            # Create the recipe
+            recipe = Recipe.objects.create(**validated_data)
             
-            if inventory_item:
-                quantity = ingredient_data.pop('quantity', 0)
+            # Process and create each ingredient
+            for ingredient_data in ingredients_data:
+                inventory_item = ingredient_data.pop('inventory_item', None)
                 
-                # SIMPLIFIED: Just create with quantity, cost comes from inventory
-                RecipeIngredient.objects.create(
-                    recipe=recipe, 
-                    inventory_item=inventory_item,
-                    quantity=quantity
-                )
+                if inventory_item:
+                    quantity = ingredient_data.pop('quantity', 0)
+                    
+                    # SIMPLIFIED: Just create with quantity, cost comes from inventory
+                    RecipeIngredient.objects.create(
+                        recipe=recipe, 
+                        inventory_item=inventory_item,
+                        quantity=quantity
+                    )
         
         # Refresh recipe to get calculated properties
         recipe.refresh_from_db()
@@ -136,28 +139,30 @@ class RecipeSerializer(serializers.ModelSerializer):
         # Extract ingredients data
         ingredients_data = validated_data.pop('recipeingredient_set', [])
         
-        # Update recipe fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
-        # Handle ingredients update if provided
-        if ingredients_data:
-            # Remove existing ingredients
-            instance.recipeingredient_set.all().delete()
+        # One transaction, so dependent production orders are refreshed once on commit
+        with transaction.atomic():
+            # Update recipe fields
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
             
-            # Create new ingredients
-            for ingredient_data in ingredients_data:
-                inventory_item = ingredient_data.pop('inventory_item', None)
+            # Handle ingredients update if provided
+            if ingredients_data:
+                # Remove existing ingredients
+                instance.recipeingredient_set.all().delete()
                 
-                if inventory_item:
-                    quantity = ingredient_data.pop('quantity', 0)
+                # Create new ingredients
+                for ingredient_data in ingredients_data:
+                    inventory_item = ingredient_data.pop('inventory_item', None)
                     
-                    RecipeIngredient.objects.create(
-                        recipe=instance, 
-                        inventory_item=inventory_item,
-                        quantity=quantity
-                    )
+                    if inventory_item:
+                        quantity = ingredient_data.pop('quantity', 0)
+                        
+                        RecipeIngredient.objects.create(
+                            recipe=instance, 
+                            inventory_item=inventory_item,
+                            quantity=quantity
+                        )
         
         # Refresh recipe to get calculated properties
         instance.refresh_from_db()
@@ -239,13 +244,6 @@ class ProductionOrderSerializer(serializers.ModelSerializer):
     shift_name = serializers.CharField(source='shift.name', read_only=True) 
     shift_time = serializers.SerializerMethodField()
     
-    # Financial fields
-    total_cost = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
-    unit_sales_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
-    total_sales_value = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
-    profit_margin = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
-    profit_percentage = serializers.DecimalField(max_digits=5, decimal_places=2, read_only=True)
-    
     # Production calculations
     batch_quantity = serializers.SerializerMethodField()
     
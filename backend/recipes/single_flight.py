@@ -0,0 +1,121 @@
+# backend/recipes/single_flight.py - Coalesce identical concurrent Manager.io reads
+#
+# SingleFlight.do(key, fetch) runs fetch() once for all callers that ask for the
+# same key at the same time. The first caller fetches and the others wait for it.
+# Each waiting caller gets its own deep copy of the result, because views mutate
+# what they get back. If the fetch raises, every waiting caller gets the error.
+# Nothing is kept once the fetch has finished.
+#
+# With MANAGER_SINGLE_FLIGHT_SHARED the flight also spans processes through the
+# default cache (e.g. Redis). The leader holds a lock key while it fetches and
+# publishes the result for MANAGER_SINGLE_FLIGHT_RESULT_TTL seconds. Other
+# processes poll for that result instead of fetching. If the leader gives up or
+# fails, they fetch themselves. A published result can therefore be reused by
+# requests arriving within that TTL.
+
+import copy
+import hashlib
+import logging
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = 'manager:flight:{digest}:lock'
+RESULT_KEY = 'manager:flight:{digest}:result'
+POLL_INTERVAL = 0.05
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Per-process request coalescing keyed by an arbitrary string"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fetch):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            registry.inc('ccf_manager_coalesced_total', {'scope': 'process'})
+            if not call.done.wait(getattr(settings, 'MANAGER_SINGLE_FLIGHT_WAIT', 120)):
+                logger.warning("Gave up waiting on in-flight Manager.io read %s", key)
+                return fetch()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            result = self._fetch_shared(key, fetch) if getattr(settings, 'MANAGER_SINGLE_FLIGHT_SHARED', False) else fetch()
+        except Exception as e:
+            with self._lock:
+                self._calls.pop(key, None)
+                call.error = e
+            call.done.set()
+            raise
+
+        with self._lock:
+            self._calls.pop(key, None)
+            if call.waiters:
+                # Snapshot before the leader's caller can mutate the result
+                call.result = copy.deepcopy(result)
+        call.done.set()
+        return result
+
+    def _fetch_shared(self, key, fetch):
+        """Coordinate with other processes through the cache; falls back to fetch() on any cache error"""
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        lock_key = LOCK_KEY.format(digest=digest)
+        result_key = RESULT_KEY.format(digest=digest)
+        wait = getattr(settings, 'MANAGER_SINGLE_FLIGHT_WAIT', 120)
+
+        try:
+            published = cache.get(result_key)
+            if published is not None:
+                registry.inc('ccf_manager_coalesced_total', {'scope': 'shared'})
+                return published
+            leader = cache.add(lock_key, 1, timeout=wait)
+        except Exception as e:
+            logger.debug("Single-flight cache unavailable: %s", e)
+            return fetch()
+
+        if not leader:
+            deadline = time.monotonic() + wait
+            while time.monotonic() < deadline:
+                time.sleep(POLL_INTERVAL)
+                published = cache.get(result_key)
+                if published is not None:
+                    registry.inc('ccf_manager_coalesced_total', {'scope': 'shared'})
+                    return published
+                if cache.get(lock_key) is None:
+                    break
+            # The other process failed or timed out; fetch ourselves
+            return fetch()
+
+        try:
+            result = fetch()
+            if result is not None:
+                cache.set(result_key, result, getattr(settings, 'MANAGER_SINGLE_FLIGHT_RESULT_TTL', 5))
+            return result
+        finally:
+            cache.delete(lock_key)
+
+
+manager_single_flight = SingleFlight()
@@ -0,0 +1,503 @@
+# backend/recipes/synthetic_data.py - Deterministic synthetic bakery dataset
+#
+# Generates a production-scale dataset for local load testing and benchmarks:
+# inventory items, a price history per item, recipes with 10-30 ingredients,
+# customers, daily orders, production orders and requirements. The same seed, sizes
+# and as-of date always produce the same rows. Every generated row is tagged with
+# the SYNTHETIC_PREFIX in its Manager.io id, name or notes so it can be flushed
+# without touching real data.
+
+import logging
+import random
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+from .bulk import bulk_insert
+from .production_financials import apply_financials
+from .models import (
+    ManagerDivision, ManagerInventoryItem, InventoryPriceHistory, ProductionCategory,
+    ProductionShift, RecipeCategory, Recipe, RecipeIngredient, Customer, Order, OrderItem,
+    ProductionOrder, ProductionRequirement, UserProfile
+)
+
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_PREFIX = 'synthetic-'
+CENT = Decimal('0.01')
+
+RAW_MATERIALS = [
+    'Flour', 'Sugar', 'Butter', 'Eggs', 'Milk', 'Cream', 'Yeast', 'Salt', 'Cocoa', 'Vanilla',
+    'Almonds', 'Walnuts', 'Raisins', 'Honey', 'Chocolate', 'Cheese', 'Chicken', 'Beef', 'Onion',
+    'Garlic', 'Tomato', 'Spinach', 'Oil', 'Baking Powder', 'Cinnamon', 'Cardamom', 'Coconut',
+    'Strawberry', 'Mango', 'Lemon', 'Orange Peel', 'Gelatin', 'Food Colour', 'Sesame', 'Oats',
+]
+RAW_VARIANTS = ['', 'Premium', 'Organic', 'Imported', 'Local', 'Bulk', 'Fine', 'Coarse', 'Dark', 'White']
+ACCESSORIES = ['Cake Box', 'Board', 'Candle', 'Ribbon', 'Paper Cup', 'Butter Paper', 'Label', 'Carry Bag']
+PRODUCTS = [
+    'Bread', 'Bun', 'Croissant', 'Muffin', 'Cake', 'Pastry', 'Cookie', 'Tart', 'Pie', 'Roll',
+    'Puff', 'Brownie', 'Donut', 'Sandwich', 'Pizza', 'Patty', 'Samosa', 'Cheesecake', 'Danish',
+]
+FLAVOURS = [
+    'Chocolate', 'Vanilla', 'Butter', 'Cheese', 'Chicken', 'Beef', 'Fruit', 'Almond', 'Coffee',
+    'Lemon', 'Strawberry', 'Mango', 'Garlic', 'Cinnamon', 'Honey', 'Coconut', 'Black Forest', 'Red Velvet',
+]
+SIZES = ['Mini', 'Small', 'Regular', 'Large', 'Family', 'Party']
+DIVISIONS = ['Bakery', 'Frozen', 'Savory', 'Cake', 'Pastry', 'Resultant']
+CUSTOMER_WORDS = [
+    'Star', 'Royal', 'City', 'Green', 'Golden', 'Sunrise', 'Dhaka', 'Metro', 'Prime', 'Fresh',
+    'Corner', 'Family', 'Super', 'Daily', 'Happy', 'Central', 'Lake', 'Garden', 'Silver', 'Unity',
+]
+CUSTOMER_TYPES = ['Store', 'Mart', 'Cafe', 'Restaurant', 'Hotel', 'Bakery', 'Shop', 'Traders', 'Foods', 'Club']
+UNITS = ['kg', 'g', 'litre', 'ml', 'piece', 'dozen', 'packet']
+
+
+@dataclass
+class DatasetSize:
+    """Row counts for a generated dataset"""
+    raw_materials: int = 2000
+    finished_goods: int = 600
+    accessories: int = 100
+    recipes: int = 400
+    min_ingredients: int = 10
+    max_ingredients: int = 30
+    history_days: int = 365
+    price_changes_per_item: int = 24
+    customers: int = 1000
+    order_days: int = 30
+    orders_per_day: int = 300
+    max_lines_per_order: int = 8
+    production_orders_per_day: int = 60
+
+
+PRESETS = {
+    'small': DatasetSize(
+        raw_materials=150, finished_goods=60, accessories=10, recipes=40, history_days=90,
+        price_changes_per_item=6, customers=100, order_days=7, orders_per_day=30, production_orders_per_day=10
+    ),
+    'medium': DatasetSize(),
+    'large': DatasetSize(
+        raw_materials=5000, finished_goods=1500, accessories=300, recipes=1000, price_changes_per_item=52,
+        customers=5000, order_days=60, orders_per_day=800, production_orders_per_day=150
+    ),
+}
+
+
+def _money(value):
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+@contextmanager
+def _explicit_timestamps(*fields):
+    """Let bulk_create keep the timestamps we set instead of auto_now/auto_now_add"""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field, _, _ in saved:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+def flush_synthetic_data():
+    """Delete every row created by generate_dataset(); returns the number of rows deleted"""
+    deleted = 0
+    with transaction.atomic():
+        # Price history is removed in one statement rather than through per-row cascades
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {InventoryPriceHistory._meta.db_table} WHERE inventory_item_id IN "
+                f"(SELECT id FROM {ManagerInventoryItem._meta.db_table} WHERE manager_item_id LIKE %s)",
+                [f"{SYNTHETIC_PREFIX}%"]
+            )
+            deleted += cursor.rowcount
+        synthetic_items = ManagerInventoryItem.objects.filter(manager_item_id__startswith=SYNTHETIC_PREFIX)
+        synthetic_recipes = Recipe.objects.filter(manager_inventory_item_id__startswith=SYNTHETIC_PREFIX)
+        steps = [
+            ProductionRequirement.objects.filter(finished_good__in=synthetic_items),
+            ProductionOrder.objects.filter(notes__startswith=SYNTHETIC_PREFIX),
+            Order.objects.filter(customer_id__startswith=SYNTHETIC_PREFIX),
+            RecipeIngredient.objects.filter(recipe__in=synthetic_recipes),
+            synthetic_recipes,
+            synthetic_items,
+            Customer.objects.filter(manager_customer_id__startswith=SYNTHETIC_PREFIX),
+            ManagerDivision.objects.filter(manager_division_id__startswith=SYNTHETIC_PREFIX),
+            RecipeCategory.objects.filter(slug__startswith=SYNTHETIC_PREFIX),
+            ProductionShift.objects.filter(notes__startswith=SYNTHETIC_PREFIX),
+            User.objects.filter(username__startswith='synthetic_'),
+        ]
+        for queryset in steps:
+            count, _ = queryset.delete()
+            deleted += count
+    return deleted
+
+
+class SyntheticDatasetGenerator:
+    """Builds the dataset with bulk inserts, one model at a time"""
+
+    def __init__(self, size=None, seed=42, as_of=None, batch_size=1000, log=None):
+        self.size = size or DatasetSize()
+        self.seed = seed
+        self.as_of = as_of or timezone.localdate()
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.log = log or logger.info
+        self.counts = {}
+
+    def _aware(self, day, seconds=0):
+        return timezone.make_aware(datetime.combine(day, time.min)) + timedelta(seconds=seconds)
+
+    def _bulk(self, model, objects):
+        created = model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.counts[model.__name__] = self.counts.get(model.__name__, 0) + len(created)
+        return created
+
+    def generate(self):
+        """Generate the full dataset and return row counts per model"""
+        started = timezone.now()
+        with transaction.atomic():
+            self._create_reference_data()
+            self._create_inventory()
+            self._create_price_history()
+            self._create_recipes()
+            self._create_customers()
+            self._create_orders()
+            self._create_production()
+
+        self._refresh_derived_data()
+        elapsed = (timezone.now() - started).total_seconds()
+        self.log(f"Synthetic dataset generated in {elapsed:.1f}s: {self.counts}")
+        return dict(self.counts)
+
+    def _create_reference_data(self):
+        for code, name in ProductionCategory.CATEGORY_CODES:
+            ProductionCategory.objects.get_or_create(code=code, defaults={'name': name})
+        self.production_categories = list(ProductionCategory.objects.filter(
+            code__in=[code for code, _ in ProductionCategory.CATEGORY_CODES]
+        ))
+
+        self.divisions = self._bulk(ManagerDivision, [
+            ManagerDivision(manager_division_id=f"{SYNTHETIC_PREFIX}division-{i}", code=f"DIV{i}", name=name)
+            for i, name in enumerate(DIVISIONS, start=1)
+        ])
+        self._bulk(RecipeCategory, [
+            RecipeCategory(
+                name=name, slug=f"{SYNTHETIC_PREFIX}{name.lower()}",
+                production_category=self.production_categories[i % len(self.production_categories)]
+            )
+            for i, name in enumerate(DIVISIONS)
+        ])
+        self.shifts = self._bulk(ProductionShift, [
+            ProductionShift(name='Synthetic Morning', shift_type='morning', start_time=time(6), end_time=time(14),
+                            notes=f"{SYNTHETIC_PREFIX}shift"),
+            ProductionShift(name='Synthetic Evening', shift_type='evening', start_time=time(14), end_time=time(22),
+                            notes=f"{SYNTHETIC_PREFIX}shift"),
+        ])
+
+        self.users = []
+        for role in ('admin', 'manager', 'customer'):
+            user, _ = User.objects.get_or_create(username=f"synthetic_{role}", defaults={'is_staff': role == 'admin'})
+            UserProfile.objects.update_or_create(user=user, defaults={'role': role})
+            self.users.append(user)
+        self.counts['User'] = len(self.users)
+
+    def _create_inventory(self):
+        size = self.size
+        rng = self.rng
+        items = []
+
+        for i in range(size.raw_materials):
+            base = RAW_MATERIALS[i % len(RAW_MATERIALS)]
+            variant = RAW_VARIANTS[(i // len(RAW_MATERIALS)) % len(RAW_VARIANTS)]
+            items.append(('RM', f"{variant} {base} {i // (len(RAW_MATERIALS) * len(RAW_VARIANTS)) + 1}".strip(),
+                          rng.choice(UNITS), _money(rng.uniform(20, 1500))))
+        for i in range(size.finished_goods):
+            name = f"{SIZES[i % len(SIZES)]} {FLAVOURS[(i // len(SIZES)) % len(FLAVOURS)]} " \
+                   f"{PRODUCTS[(i // (len(SIZES) * len(FLAVOURS))) % len(PRODUCTS)]}"
+            if i >= len(SIZES) * len(FLAVOURS) * len(PRODUCTS):
+                name = f"{name} {i}"
+            items.append(('FG', name, 'piece', _money(rng.uniform(10, 900))))
+        for i in range(size.accessories):
+            items.append(('ACS', f"{ACCESSORIES[i % len(ACCESSORIES)]} {i + 1}", 'piece', _money(rng.uniform(2, 120))))
+
+        objects = []
+        counters = {}
+        for prefix, name, unit, cost in items:
+            counters[prefix] = counters.get(prefix, 0) + 1
+            code = f"{prefix}-{counters[prefix]:05d}"
+            category = {'RM': 'RAW_MATERIAL', 'FG': 'FINISHED_GOOD', 'ACS': 'ACCESSORY'}[prefix]
+            objects.append(ManagerInventoryItem(
+                manager_item_id=f"{SYNTHETIC_PREFIX}item-{code.lower()}",
+                code=code,
+                name=name,
+                description=f"Synthetic {category.replace('_', ' ').lower()}",
+                unit=unit,
+                unit_cost=cost,
+                sales_price=_money(cost * Decimal('1.35')) if prefix == 'FG' else Decimal('0'),
+                quantity_available=_money(rng.uniform(0, 500)),
+                threshold_quantity=_money(rng.uniform(5, 50)),
+                category=category,
+                division_name=self.divisions[len(objects) % len(self.divisions)].name,
+            ))
+
+        self.items = self._bulk(ManagerInventoryItem, objects)
+        if not self.items or self.items[0].pk is None:
+            self.items = list(ManagerInventoryItem.objects.filter(
+                manager_item_id__startswith=SYNTHETIC_PREFIX
+            ).order_by('id'))
+        self.raw_materials = [item for item in self.items if item.category == 'RAW_MATERIAL']
+        self.finished_goods = [item for item in self.items if item.category == 'FINISHED_GOOD']
+        self.log(f"Created {len(self.items)} inventory items")
+
+    def _create_price_history(self):
+        size = self.size
+        rng = self.rng
+        history = []
+        start_seconds = size.history_days * 86400
+        first_day = self.as_of - timedelta(days=size.history_days)
+        updated_items = []
+
+        for item in self.items:
+            changes = rng.randint(0, size.price_changes_per_item * 2)
+            if not changes:
+                continue
+            offsets = sorted(rng.randrange(start_seconds) for _ in range(changes))
+            price = item.unit_cost
+            for offset in offsets:
+                new_price = max(_money(price * Decimal(str(1 + rng.gauss(0, 0.05)))), CENT)
+                if new_price == price:
+                    continue
+                change = new_price - price
+                history.append(InventoryPriceHistory(
+                    inventory_item=item,
+                    old_price=price,
+                    new_price=new_price,
+                    change_amount=change,
+                    change_percentage=min(_money(change / price * 100), Decimal('999.99')),
+                    changed_at=self._aware(first_day, offset),
+                    sync_source=rng.choice(['manager_sync', 'manager_sync', 'manager_sync', 'webhook']),
+                ))
+                price = new_price
+            if price != item.unit_cost:
+                item.unit_cost = price
+                updated_items.append(item)
+
+        # Nothing refers back to the history rows, so they can take the COPY path on PostgreSQL
+        with _explicit_timestamps(InventoryPriceHistory._meta.get_field('changed_at')):
+            self.counts['InventoryPriceHistory'] = bulk_insert(
+                InventoryPriceHistory, history, batch_size=self.batch_size
+            )
+        ManagerInventoryItem.objects.bulk_update(updated_items, ['unit_cost'], batch_size=self.batch_size)
+        self.log(f"Created {len(history)} price history rows over {size.history_days} days")
+
+    def _create_recipes(self):
+        size = self.size
+        rng = self.rng
+        finished_goods = self.finished_goods[:size.recipes]
+        recipe_objects = []
+
+        for i, fg in enumerate(finished_goods):
+            created_at = self._aware(self.as_of - timedelta(days=rng.randint(0, size.history_days)), rng.randrange(86400))
+            recipe_objects.append(Recipe(
+                name=fg.name,
+                category=fg.division_name,
+                description=f"Synthetic recipe for {fg.name}",
+                instructions="Mix, rest, shape, proof and bake.",
+                yield_quantity=rng.choice([1, 6, 12, 24, 48]),
+                yield_unit='piece',
+                prep_time_minutes=rng.randint(10, 90),
+                cook_time_minutes=rng.randint(10, 120),
+                created_by=self.users[1],
+                created_at=created_at,
+                updated_at=created_at,
+                manager_inventory_item_id=fg.manager_item_id,
+                production_category=self.production_categories[i % len(self.production_categories)],
+            ))
+
+        with _explicit_timestamps(Recipe._meta.get_field('created_at'), Recipe._meta.get_field('updated_at')):
+            self.recipes = self._bulk(Recipe, recipe_objects)
+        if self.recipes and self.recipes[0].pk is None:
+            self.recipes = list(Recipe.objects.filter(
+                manager_inventory_item_id__startswith=SYNTHETIC_PREFIX
+            ).order_by('id'))
+
+        ingredients = []
+        for recipe in self.recipes:
+            count = rng.randint(size.min_ingredients, size.max_ingredients)
+            for raw in rng.sample(self.raw_materials, min(count, len(self.raw_materials))):
+                ingredients.append(RecipeIngredient(
+                    recipe=recipe, inventory_item=raw, quantity=_money(rng.uniform(0.05, 5))
+                ))
+        self._bulk(RecipeIngredient, ingredients)
+        self.recipe_by_fg = {recipe.manager_inventory_item_id: recipe for recipe in self.recipes}
+        self.log(f"Created {len(self.recipes)} recipes with {len(ingredients)} ingredients")
+
+    def _create_customers(self):
+        rng = self.rng
+        customers = []
+        for i in range(self.size.customers):
+            name = f"{CUSTOMER_WORDS[i % len(CUSTOMER_WORDS)]} {CUSTOMER_WORDS[(i * 7 + 3) % len(CUSTOMER_WORDS)]} " \
+                   f"{CUSTOMER_TYPES[(i // len(CUSTOMER_WORDS)) % len(CUSTOMER_TYPES)]} {i + 1}"
+            customers.append(Customer(
+                manager_customer_id=f"{SYNTHETIC_PREFIX}customer-{i + 1:06d}",
+                name=name,
+                code=f"C-{i + 1:05d}",
+                status='active' if rng.random() > 0.05 else 'inactive',
+                balance=_money(rng.uniform(-5000, 50000)),
+            ))
+        self.customers = self._bulk(Customer, customers)
+
+    def _create_orders(self):
+        size = self.size
+        rng = self.rng
+        if not self.customers or not self.finished_goods:
+            return
+
+        orders = []
+        lines_per_order = []
+        # Past days are completed; today and the next two days are still pending
+        for day_offset in range(-size.order_days + 1, 3):
+            order_date = self.as_of + timedelta(days=day_offset)
+            for n in range(size.orders_per_day):
+                customer = rng.choice(self.customers)
+                created_at = self._aware(order_date - timedelta(days=1), rng.randrange(86400))
+                lines = []
+                for fg in rng.sample(self.finished_goods, min(rng.randint(1, size.max_lines_per_order), len(self.finished_goods))):
+                    lines.append((fg, _money(rng.randint(1, 40))))
+                total = sum((fg.sales_price * qty for fg, qty in lines), Decimal('0'))
+                pending = day_offset >= 0
+                orders.append(Order(
+                    customer_id=customer.manager_customer_id,
+                    customer_name=customer.name,
+                    customer_code=customer.code,
+                    order_date=order_date,
+                    notes=f"{SYNTHETIC_PREFIX}order",
+                    status='pending' if pending else rng.choice(['completed'] * 9 + ['cancelled']),
+                    payment_status='pending' if pending else rng.choice(['paid', 'paid', 'partial']),
+                    total_amount=_money(total),
+                    tax_amount=_money(total * Decimal('0.05')),
+                    sync_status='not_synced' if pending else 'synced',
+                    manager_order_id=None if pending else f"{SYNTHETIC_PREFIX}so-{len(orders) + 1}",
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+                lines_per_order.append(lines)
+
+        with _explicit_timestamps(Order._meta.get_field('created_at'), Order._meta.get_field('updated_at')):
+            created = self._bulk(Order, orders)
+        if created and created[0].pk is None:
+            created = list(Order.objects.filter(customer_id__startswith=SYNTHETIC_PREFIX).order_by('id'))
+
+        items = [
+            OrderItem(
+                order=order,
+                inventory_item_id=fg.manager_item_id,
+                name=fg.name,
+                code=fg.code,
+                quantity=qty,
+                unit='piece',
+                price=fg.sales_price,
+                type='finished_good',
+            )
+            for order, lines in zip(created, lines_per_order)
+            for fg, qty in lines
+        ]
+        self._bulk(OrderItem, items)
+        self.orders = created
+        self.log(f"Created {len(created)} orders with {len(items)} lines")
+
+    def _create_production(self):
+        size = self.size
+        rng = self.rng
+        if not self.recipes:
+            return
+
+        fg_codes = {fg.manager_item_id: fg.code for fg in self.finished_goods}
+        production_orders = []
+        for day_offset in range(-size.order_days + 1, 3):
+            scheduled_date = self.as_of + timedelta(days=day_offset)
+            for recipe in rng.sample(self.recipes, min(size.production_orders_per_day, len(self.recipes))):
+                planned = _money(rng.randint(10, 400))
+                past = day_offset < 0
+                category = recipe.production_category
+                created_at = self._aware(scheduled_date - timedelta(days=1), rng.randrange(86400))
+                production_orders.append(ProductionOrder(
+                    recipe=recipe,
+                    item_name=recipe.name,
+                    item_code=fg_codes.get(recipe.manager_inventory_item_id, ''),
+                    planned_quantity=planned,
+                    actual_quantity=_money(planned * Decimal(str(rng.uniform(0.9, 1.05)))) if past else None,
+                    production_category_code=category.code if category else 'Production-001',
+                    assigned_to=category.get_code_display().split(' - ')[-1] if category else 'Unassigned',
+                    scheduled_date=scheduled_date,
+                    shift=rng.choice(self.shifts),
+                    status='completed' if past else 'planned',
+                    notes=f"{SYNTHETIC_PREFIX}production",
+                    source_orders=[],
+                    created_by=self.users[1],
+                    created_at=created_at,
+                    completed_at=created_at + timedelta(hours=20) if past else None,
+                ))
+
+        # bulk_create skips save(), which fills in the stored financials
+        apply_financials(production_orders)
+        with _explicit_timestamps(ProductionOrder._meta.get_field('created_at')):
+            self._bulk(ProductionOrder, production_orders)
+
+        # Requirements for the pending order days, one per finished good ordered
+        ordered = {}
+        for order in Order.objects.filter(
+            customer_id__startswith=SYNTHETIC_PREFIX, status='pending'
+        ).prefetch_related('items'):
+            for line in order.items.all():
+                key = (order.order_date, line.inventory_item_id)
+                ordered[key] = ordered.get(key, Decimal('0')) + line.quantity
+
+        fg_by_manager_id = {fg.manager_item_id: fg for fg in self.finished_goods}
+        requirements = []
+        for (order_date, manager_id), total in sorted(ordered.items()):
+            fg = fg_by_manager_id[manager_id]
+            recipe = self.recipe_by_fg.get(manager_id)
+            net = max(total - fg.quantity_available, Decimal('0'))
+            requirements.append(ProductionRequirement(
+                date=order_date,
+                shift=self.shifts[0],
+                finished_good=fg,
+                recipe=recipe,
+                total_ordered=total,
+                current_stock=fg.quantity_available,
+                net_required=net,
+                recommended_production=net,
+                production_category=recipe.production_category if recipe else None,
+                assigned_to='Unassigned',
+            ))
+        self._bulk(ProductionRequirement, requirements)
+
+    def _refresh_derived_data(self):
+        """Rebuild indexes and caches that bulk inserts bypass"""
+        from .customer_search import customer_index
+        from .dashboard import invalidate_dashboard
+        from .inventory_cache import inventory_repository
+        from .price_history import compact_price_history
+        from .search import rebuild_search_index
+
+        rebuild_search_index()
+        customer_index.invalidate()
+        invalidate_dashboard()
+        inventory_repository.invalidate()
+        self.counts['InventoryPriceDailyRollup'] = compact_price_history()
+
+
+def generate_dataset(size=None, seed=42, as_of=None, flush=True, log=None):
+    """Generate the synthetic dataset, replacing any previous synthetic rows"""
+    if flush:
+        deleted = flush_synthetic_data()
+        if deleted and log:
+            log(f"Removed {deleted} previous synthetic rows")
+    generator = SyntheticDatasetGenerator(size=size, seed=seed, as_of=as_of, log=log)
+    return generator.generate()
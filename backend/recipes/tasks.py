@@ -16,4 +16,54 @@ def sync_inventory_task():
         return inventory_data
     except Exception as e:
         logger.error(f"Error syncing inventory: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+def sync_customers_task():
+    """
+    Mirror Manager.io customers into the local Customer table
+    This keeps the in-process customer search index fresh
+    """
+    try:
+        api_service = ManagerApiService()
+        return api_service.sync_customers()
+    except Exception as e:
+        logger.error(f"Error syncing customers: {str(e)}")
+        raise
+
+def price_history_retention_task():
+    """
+    Compact price history into daily rollups and prune raw rows
+    older than PRICE_HISTORY_RETENTION_DAYS
+    """
+    try:
+        from .price_history import apply_price_history_retention
+        return apply_price_history_retention()
+    except Exception as e:
+        logger.error(f"Error applying price history retention: {str(e)}")
+        raise
+
+def prune_webhook_events_task():
+    """
+    Delete processed webhook events older than
+    MANAGER_WEBHOOK_EVENT_RETENTION_DAYS
+    """
+    try:
+        from django.conf import settings
+        from .webhooks import prune_webhook_events
+        return prune_webhook_events(getattr(settings, 'MANAGER_WEBHOOK_EVENT_RETENTION_DAYS', 7))
+    except Exception as e:
+        logger.error(f"Error pruning webhook events: {str(e)}")
+        raise
+
+def prune_sales_order_outbox_task():
+    """
+    Delete sent outbox messages older than
+    MANAGER_OUTBOX_RETENTION_DAYS
+    """
+    try:
+        from django.conf import settings
+        from .outbox import prune_sales_order_outbox
+        return prune_sales_order_outbox(getattr(settings, 'MANAGER_OUTBOX_RETENTION_DAYS', 30))
+    except Exception as e:
+        logger.error(f"Error pruning sales order outbox: {str(e)}")
+        raise
@@ -0,0 +1,194 @@
+# backend/recipes/tests/test_circuit_breaker.py - Circuit breaker states and the views that report them
+#
+# CircuitBreakerTests drive one breaker through closed -> open -> half-open and back
+# with a probe the test controls. The view tests use the process-wide breaker and the
+# fake Manager.io server, so they reset the breaker, rate limiter and cache per test.
+
+import threading
+import time
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from recipes.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, get_manager_circuit_breaker
+from recipes.fake_manager import running_fake_manager
+from recipes.rate_limit import reset_manager_rate_limiter
+
+INVENTORY_GET = 'GET /inventory-items'
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.healthy = True
+        self.probed = threading.Event()
+        self.breaker = CircuitBreaker('test', probe=self.probe, failure_threshold=3, reset_timeout=0.05, slow_call_seconds=1)
+
+    def probe(self):
+        self.probed.set()
+        return self.healthy
+
+    def open_breaker(self):
+        for _ in range(self.breaker.failure_threshold):
+            self.breaker.record_failure('HTTP 500')
+        self.assertEqual(self.breaker.status, OPEN)
+
+    def wait_for_status(self, status):
+        self.assertTrue(self.probed.wait(2), 'probe was not started')
+        deadline = time.monotonic() + 2
+        while self.breaker.status != status and time.monotonic() < deadline:
+            time.sleep(0.005)
+        self.assertEqual(self.breaker.status, status)
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure('HTTP 500')
+        self.breaker.record_failure('HTTP 500')
+        self.breaker.record_success(0.1)
+        self.breaker.record_failure('HTTP 500')
+        self.breaker.record_failure('HTTP 500')
+        self.assertEqual(self.breaker.status, CLOSED)
+        self.breaker.before_call()
+
+        self.breaker.record_failure('HTTP 503')
+        self.assertEqual(self.breaker.status, OPEN)
+        with self.assertRaisesMessage(CircuitOpenError, 'HTTP 503'):
+            self.breaker.before_call()
+        self.assertFalse(self.probed.is_set())
+
+    def test_slow_response_counts_as_failure(self):
+        for _ in range(self.breaker.failure_threshold):
+            self.breaker.record_success(2.0)
+        self.assertEqual(self.breaker.status, OPEN)
+
+    def test_successful_probe_closes(self):
+        self.open_breaker()
+        time.sleep(self.breaker.reset_timeout)
+
+        # The call that starts the probe still fails fast
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+        self.assertEqual(self.breaker.status, HALF_OPEN)
+
+        self.wait_for_status(CLOSED)
+        self.assertEqual(self.breaker.failures, 0)
+        self.breaker.before_call()
+
+    def test_failed_probe_stays_open_for_another_interval(self):
+        self.healthy = False
+        self.open_breaker()
+        time.sleep(self.breaker.reset_timeout)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+        self.wait_for_status(OPEN)
+        self.breaker.reset_timeout = 60
+        self.assertGreater(self.breaker.state()['probe_in_seconds'], 59)
+        self.probed.clear()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+        self.assertFalse(self.probed.is_set())
+
+    def test_probe_error_stays_open(self):
+        def probe():
+            self.probed.set()
+            raise ConnectionError('refused')
+
+        self.breaker.probe = probe
+        self.open_breaker()
+        time.sleep(self.breaker.reset_timeout)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+        self.wait_for_status(OPEN)
+        self.assertIn('refused', self.breaker.last_failure)
+
+    def test_success_while_open_closes(self):
+        self.open_breaker()
+        self.breaker.record_success(0.1)
+        self.assertEqual(self.breaker.status, CLOSED)
+        self.breaker.before_call()
+
+
+@override_settings(MANAGER_API_RETRY_BACKOFF=0)
+class CircuitBreakerViewTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = cls.enterClassContext(running_fake_manager(inventory_items=30, customers=5))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('breaker', password='breaker', is_staff=True, is_superuser=True)
+
+    def setUp(self):
+        self.server.reset()
+        self.server.configure(error_rate=0.0)
+        cache.clear()
+        self.breaker = get_manager_circuit_breaker()
+        self.breaker.reset()
+        reset_manager_rate_limiter()
+        self.addCleanup(reset_manager_rate_limiter)
+        self.addCleanup(self.breaker.reset)
+        self.client.force_login(self.user)
+
+    def open_breaker(self):
+        for _ in range(self.breaker.failure_threshold):
+            self.breaker.record_failure('HTTP 500')
+
+    def inventory_gets(self):
+        return self.server.stats()['requests'].get(INVENTORY_GET, 0)
+
+    def test_connection_succeeds_while_closed(self):
+        response = self.client.get(reverse('test_manager_connection'))
+
+        body = response.json()
+        self.assertTrue(body['connection_test']['success'])
+        self.assertEqual(body['circuit_breaker']['state'], CLOSED)
+
+    def test_connection_reports_open_circuit(self):
+        # A good result from before the outage must not be reported
+        self.client.get(reverse('test_manager_connection'))
+        self.open_breaker()
+        requests_before = self.inventory_gets()
+
+        response = self.client.get(reverse('test_manager_connection'))
+
+        body = response.json()
+        self.assertFalse(body['connection_test']['success'])
+        self.assertEqual(body['connection_test']['circuit'], 'open')
+        self.assertNotIn('stale', body['connection_test'])
+        self.assertEqual(body['circuit_breaker']['state'], OPEN)
+        self.assertEqual(self.inventory_gets(), requests_before)
+
+    def test_inventory_items_served_stale_while_manager_fails(self):
+        fresh = self.client.get(reverse('inventory_items_compat'))
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotIn('X-Manager-Stale', fresh.headers)
+
+        self.server.configure(error_rate=1.0)
+        stale = self.client.get(reverse('inventory_items_compat'))
+
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(stale.headers['X-Manager-Stale'], 'true')
+        self.assertTrue(stale.headers['X-Manager-Cached-At'])
+        self.assertEqual(stale.json(), fresh.json())
+
+    def test_inventory_items_served_stale_while_circuit_open(self):
+        fresh = self.client.get(reverse('inventory_items_compat'))
+        self.open_breaker()
+        requests_before = self.inventory_gets()
+
+        stale = self.client.get(reverse('inventory_items_compat'))
+
+        self.assertEqual(stale.headers['X-Manager-Stale'], 'true')
+        self.assertEqual(stale.json(), fresh.json())
+        self.assertEqual(self.inventory_gets(), requests_before)
+
+    def test_inventory_items_fail_without_a_good_copy(self):
+        self.open_breaker()
+
+        response = self.client.get(reverse('inventory_items_compat'))
+
+        self.assertEqual(response.status_code, 500)
+        self.assertNotIn('X-Manager-Stale', response.headers)
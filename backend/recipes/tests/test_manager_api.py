@@ -0,0 +1,47 @@
+# backend/recipes/tests/test_manager_api.py - ManagerApiService retries against the fake Manager.io server
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from recipes.circuit_breaker import get_manager_circuit_breaker
+from recipes.fake_manager import running_fake_manager
+from recipes.manager_api import ManagerApiService
+from recipes.rate_limit import reset_manager_rate_limiter
+
+
+@override_settings(
+    MANAGER_API_MAX_RETRIES=2, MANAGER_API_RETRY_BACKOFF=0, MANAGER_COALESCE_READS=False,
+    MANAGER_API_SHARED_RATE_LIMIT=False,
+)
+class ManagerApiRetryTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = cls.enterClassContext(running_fake_manager(inventory_items=10, customers=5))
+
+    def setUp(self):
+        self.server.reset()
+        self.server.configure(error_rate=1.0)
+        cache.clear()
+        get_manager_circuit_breaker().reset()
+        reset_manager_rate_limiter()
+        self.addCleanup(reset_manager_rate_limiter)
+        self.addCleanup(get_manager_circuit_breaker().reset)
+
+    def requests(self, name):
+        return self.server.stats()['requests'].get(name, 0)
+
+    def test_get_is_retried_on_500(self):
+        service = ManagerApiService()
+
+        response = service.send('get', 'customers', params={'pageSize': 1, 'skip': 0})
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(self.requests('GET /customers'), 3)
+        self.assertEqual(service.client_stats.summary()['retries'], 2)
+
+    def test_post_is_not_retried_on_500(self):
+        response = ManagerApiService().send('post', 'customer-form', data={'Name': 'New Cafe'})
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(self.requests('POST /customer-form'), 1)
@@ -0,0 +1,254 @@
+# backend/recipes/tests/test_outbox.py - Sales order outbox against the fake Manager.io server
+#
+# Each test queues a message for one order and runs process_sales_order_outbox()
+# against running_fake_manager(), configured to fail the way the test needs. The
+# circuit breaker and rate limiter are process-wide, so both are reset per test.
+
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from recipes.circuit_breaker import get_manager_circuit_breaker
+from recipes.fake_manager import running_fake_manager
+from recipes.models import Order, SalesOrderOutbox
+from recipes.outbox import enqueue_sales_order, process_sales_order_outbox, submission_response, submit_sales_order
+from recipes.rate_limit import reset_manager_rate_limiter
+
+CUSTOMER_KEY = '11111111-1111-1111-1111-111111111111'
+ITEM_KEY = '22222222-2222-2222-2222-222222222222'
+PAYLOAD = {
+    'Customer': CUSTOMER_KEY,
+    'Lines': [{'Item': ITEM_KEY, 'Qty': 2, 'SalesUnitPrice': 50}],
+}
+SALES_ORDER_POST = 'POST /sales-order-form'
+
+
+@override_settings(MANAGER_API_MAX_THROTTLE_RETRIES=0, MANAGER_API_RETRY_BACKOFF=0, MANAGER_SALES_ORDER_OUTBOX=True)
+class SalesOrderOutboxTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = cls.enterClassContext(running_fake_manager(inventory_items=10, customers=5))
+
+    def setUp(self):
+        self.server.reset()
+        self.server.configure(error_rate=0.0, rate_limit_rate=0.0, latency_ms=0.0, retry_after=0)
+        get_manager_circuit_breaker().reset()
+        reset_manager_rate_limiter()
+        self.addCleanup(reset_manager_rate_limiter)
+        self.addCleanup(get_manager_circuit_breaker().reset)
+
+        self.order = Order.objects.create(
+            customer_id=CUSTOMER_KEY, customer_name='Corner Cafe', order_date=timezone.localdate()
+        )
+
+    def posts(self):
+        return self.server.stats()['requests'].get(SALES_ORDER_POST, 0)
+
+    def queue(self, payload=PAYLOAD):
+        return enqueue_sales_order(self.order, payload)
+
+    def assertMessage(self, message, status, order_status):
+        message.refresh_from_db()
+        self.order.refresh_from_db()
+        self.assertEqual(message.status, status, message.error)
+        self.assertEqual(self.order.sync_status, order_status)
+
+    def test_sent_message_syncs_order(self):
+        message = self.queue()
+
+        summary = process_sales_order_outbox()
+
+        self.assertEqual(summary['sent'], 1)
+        self.assertMessage(message, 'sent', 'synced')
+        self.assertEqual(self.order.manager_order_id, message.manager_key)
+        self.assertEqual(self.server.data.sales_orders[0]['payload'], PAYLOAD)
+
+    def test_order_synced_since_queued_is_not_posted(self):
+        message = self.queue()
+        Order.objects.filter(id=self.order.id).update(manager_order_id='already-there', sync_status='synced')
+
+        summary = process_sales_order_outbox()
+
+        self.assertEqual(summary['sent'], 1)
+        self.assertEqual(self.posts(), 0)
+        self.assertMessage(message, 'sent', 'synced')
+        self.assertEqual(message.manager_key, 'already-there')
+
+    @override_settings(MANAGER_API_TIMEOUT=0.2)
+    def test_timeout_after_send_goes_to_review(self):
+        self.server.configure(latency_ms=600)
+        message = self.queue()
+
+        summary = process_sales_order_outbox()
+
+        self.assertEqual(summary['review'], 1)
+        self.assertMessage(message, 'review', 'failed')
+        self.assertIn('Timeout', message.error)
+
+        # Not sent again by later runs
+        self.server.configure(latency_ms=0)
+        self.assertEqual(process_sales_order_outbox()['messages'], 0)
+        self.assertEqual(self.posts(), 1)
+
+    def test_server_error_goes_to_review(self):
+        self.server.configure(error_rate=1.0)
+        message = self.queue()
+
+        self.assertEqual(process_sales_order_outbox()['review'], 1)
+        self.assertMessage(message, 'review', 'failed')
+
+    def test_rejected_order_fails_at_once(self):
+        message = self.queue({**PAYLOAD, 'Customer': ''})
+
+        summary = process_sales_order_outbox()
+
+        self.assertEqual(summary['failed'], 1)
+        self.assertMessage(message, 'failed', 'failed')
+        self.assertEqual(message.attempts, 1)
+        self.assertIn('400', message.error)
+
+    @override_settings(MANAGER_OUTBOX_RETRY_BASE=30, MANAGER_OUTBOX_RETRY_MAX=3600, MANAGER_OUTBOX_MAX_ATTEMPTS=3)
+    def test_throttled_order_is_retried_with_backoff(self):
+        self.server.configure(rate_limit_rate=1.0)
+        message = self.queue()
+
+        for attempt, base_delay in enumerate((30, 60), start=1):
+            started = timezone.now()
+            summary = process_sales_order_outbox(message_ids=[message.id])
+            self.assertEqual(summary['retrying'], 1)
+            self.assertMessage(message, 'pending', 'pending')
+            self.assertEqual(message.attempts, attempt)
+            delay = (message.next_attempt_at - started).total_seconds()
+            self.assertGreaterEqual(delay, base_delay * 0.8)
+            self.assertLessEqual(delay, base_delay * 1.2 + 1)
+
+        # Not due yet
+        self.assertEqual(process_sales_order_outbox()['messages'], 0)
+
+        summary = process_sales_order_outbox(message_ids=[message.id])
+        self.assertEqual(summary['failed'], 1)
+        self.assertMessage(message, 'failed', 'failed')
+        self.assertEqual(message.attempts, 3)
+
+    def test_throttled_order_is_sent_once_manager_recovers(self):
+        self.server.configure(rate_limit_rate=1.0)
+        message = self.queue()
+        process_sales_order_outbox()
+
+        self.server.configure(rate_limit_rate=0.0)
+        SalesOrderOutbox.objects.filter(id=message.id).update(next_attempt_at=timezone.now())
+        self.assertEqual(process_sales_order_outbox()['sent'], 1)
+        self.assertMessage(message, 'sent', 'synced')
+        self.assertEqual(message.attempts, 2)
+
+    def open_circuit(self):
+        breaker = get_manager_circuit_breaker()
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure('test')
+
+    def test_open_circuit_defers_without_using_an_attempt(self):
+        message = self.queue()
+        self.open_circuit()
+
+        summary = process_sales_order_outbox()
+
+        self.assertEqual(summary['deferred'], 1)
+        self.assertEqual(self.posts(), 0)
+        self.assertMessage(message, 'pending', 'pending')
+        self.assertEqual(message.attempts, 0)
+        self.assertGreater(message.next_attempt_at, timezone.now())
+
+        get_manager_circuit_breaker().reset()
+        SalesOrderOutbox.objects.filter(id=message.id).update(next_attempt_at=timezone.now())
+        self.assertEqual(process_sales_order_outbox()['sent'], 1)
+
+    def test_open_circuit_fails_inline_send(self):
+        message = self.queue()
+        self.open_circuit()
+
+        summary = process_sales_order_outbox(message_ids=[message.id], retry=False)
+
+        self.assertEqual(summary['failed'], 1)
+        self.assertMessage(message, 'failed', 'failed')
+
+    def test_stale_send_goes_to_review(self):
+        message = self.queue()
+        SalesOrderOutbox.objects.filter(id=message.id).update(
+            status='sending', claimed_at=timezone.now() - timedelta(hours=1)
+        )
+
+        process_sales_order_outbox()
+
+        self.assertEqual(self.posts(), 0)
+        self.assertMessage(message, 'review', 'failed')
+
+    def test_review_requeue_and_resolve_commands(self):
+        self.server.configure(error_rate=1.0)
+        message = self.queue()
+        process_sales_order_outbox()
+
+        out = StringIO()
+        call_command('process_sales_order_outbox', '--review', stdout=out)
+        self.assertIn(f'#{message.id} order #{self.order.id}', out.getvalue())
+
+        call_command('process_sales_order_outbox', '--requeue', str(message.id), stdout=StringIO())
+        self.assertMessage(message, 'pending', 'pending')
+        self.assertEqual(message.error, '')
+
+        process_sales_order_outbox()
+        self.assertMessage(message, 'review', 'failed')
+        self.assertEqual(self.posts(), 2)
+
+        with self.assertRaises(CommandError):
+            call_command('process_sales_order_outbox', '--resolve', str(message.id), stdout=StringIO())
+        call_command(
+            'process_sales_order_outbox', '--resolve', str(message.id), '--manager-key', 'found-key', stdout=StringIO()
+        )
+        self.assertMessage(message, 'sent', 'synced')
+        self.assertEqual(self.order.manager_order_id, 'found-key')
+
+    def test_requeue_skips_order_queued_again(self):
+        message = self.queue({**PAYLOAD, 'Customer': ''})
+        process_sales_order_outbox()
+        newer = self.queue()
+
+        call_command('process_sales_order_outbox', '--requeue', str(message.id), stdout=StringIO())
+
+        self.assertMessage(message, 'failed', 'pending')
+        self.assertNotEqual(newer.id, message.id)
+
+    def test_submit_queues_for_worker(self):
+        message = submit_sales_order(self.order, PAYLOAD)
+
+        body, status = submission_response(message)
+
+        self.assertEqual(status, 202)
+        self.assertTrue(body['queued'])
+        self.assertEqual(self.posts(), 0)
+
+    @override_settings(MANAGER_SALES_ORDER_OUTBOX=False)
+    def test_submit_sends_inline_without_worker(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            message = submit_sales_order(self.order, PAYLOAD)
+
+        body, status = submission_response(message)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body['sync_status'], 'synced')
+        self.assertEqual(self.posts(), 1)
+
+    @override_settings(MANAGER_SALES_ORDER_OUTBOX=False)
+    def test_submit_inline_failure_is_final(self):
+        self.server.configure(rate_limit_rate=1.0)
+        with self.captureOnCommitCallbacks(execute=True):
+            message = submit_sales_order(self.order, PAYLOAD)
+
+        body, status = submission_response(message)
+
+        self.assertEqual(status, 500)
+        self.assertEqual(body['sync_status'], 'failed')
+        self.assertMessage(message, 'failed', 'failed')
@@ -0,0 +1,42 @@
+# backend/recipes/tests/test_postgres_opt_in.py - PostgreSQL-only backends stay off unless enabled
+#
+# The test database is SQLite, so the connection is swapped for one that reports
+# the postgresql vendor; nothing is sent to it.
+
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from recipes import bulk, search
+
+
+class BulkBackendOptInTests(SimpleTestCase):
+
+    def backend(self):
+        with mock.patch.object(bulk, 'connections', {'default': mock.Mock(vendor='postgresql')}):
+            return bulk.get_bulk_backend()
+
+    @override_settings(POSTGRES_BULK_COPY=False)
+    def test_postgres_uses_portable_backend_by_default(self):
+        self.assertIs(type(self.backend()), bulk.PortableBulkBackend)
+
+    @override_settings(POSTGRES_BULK_COPY=True)
+    def test_postgres_copy_backend_when_enabled(self):
+        self.assertIs(type(self.backend()), bulk.PostgresBulkBackend)
+
+
+class SearchBackendOptInTests(SimpleTestCase):
+
+    def backend(self):
+        with mock.patch.object(search, 'connection', mock.Mock(vendor='postgresql')):
+            return search.get_search_backend()
+
+    @override_settings(POSTGRES_FULL_TEXT_SEARCH=False)
+    def test_postgres_has_no_full_text_backend_by_default(self):
+        self.assertIsNone(self.backend())
+
+    @override_settings(POSTGRES_FULL_TEXT_SEARCH=True)
+    def test_postgres_trigram_backend_when_enabled(self):
+        self.assertIsInstance(self.backend(), search.PostgresTrigramBackend)
+
+    @override_settings(POSTGRES_FULL_TEXT_SEARCH=False)
+    def test_sqlite_backend_is_not_affected(self):
+        self.assertIsInstance(search.get_search_backend(), search.SqliteFtsBackend)
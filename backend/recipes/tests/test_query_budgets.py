@@ -0,0 +1,145 @@
+# backend/recipes/tests/test_query_budgets.py - Query budgets for the endpoints in settings.QUERY_BUDGETS
+#
+# Each budgeted URL name is requested once against a few rows of everything, with
+# the cache cleared first so the session user, role pages, customer index and
+# dashboard snapshot are all loaded cold. List endpoints get several rows with
+# ingredients and price history so a per-row query shows up as a failure.
+
+from datetime import time, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from recipes.customer_search import customer_index
+from recipes.models import (
+    Customer, InventoryPriceHistory, ManagerInventoryItem, ProductionOrder,
+    ProductionShift, Recipe, RecipeIngredient
+)
+from recipes.query_budget import QueryBudgetMixin
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('budget', password='budget', is_staff=True, is_superuser=True)
+        cls.shift = ProductionShift.objects.create(
+            name='Morning', shift_type='morning', start_time=time(6), end_time=time(14)
+        )
+
+        items = [
+            ManagerInventoryItem.objects.create(
+                manager_item_id=f'00000000-0000-0000-0000-00000000000{i}', code=f'RM{i}', name=f'Item {i}',
+                unit='kg', unit_cost=Decimal('10.00') + i, quantity_available=Decimal(i), threshold_quantity=Decimal(5)
+            )
+            for i in range(6)
+        ]
+        for i in range(4):
+            ManagerInventoryItem.objects.create(
+                manager_item_id=f'00000000-0000-0000-0000-0000000000f{i}', code=f'FG{i}', name=f'Recipe {i}',
+                unit='piece', unit_cost=Decimal('0.00'), sales_price=Decimal('50.00'), quantity_available=Decimal(0)
+            )
+        for days_ago, item in enumerate(items):
+            for change in (Decimal('1.00'), Decimal('-0.50')):
+                history = InventoryPriceHistory.objects.create(
+                    inventory_item=item, old_price=item.unit_cost, new_price=item.unit_cost + change,
+                    change_amount=change, change_percentage=change * 10, sync_source='test'
+                )
+                InventoryPriceHistory.objects.filter(pk=history.pk).update(
+                    changed_at=timezone.now() - timedelta(days=days_ago)
+                )
+
+        cls.recipes = []
+        for i in range(4):
+            recipe = Recipe.objects.create(name=f'Recipe {i}', yield_quantity=10, category='Bakery')
+            for item in items[i:i + 3]:
+                RecipeIngredient.objects.create(recipe=recipe, inventory_item=item, quantity=Decimal('1.50'))
+            cls.recipes.append(recipe)
+            ProductionOrder.objects.create(
+                recipe=recipe, item_name=recipe.name, item_code=f'FG{i}', planned_quantity=20,
+                assigned_to='Team', scheduled_date=timezone.localdate(), shift=cls.shift
+            )
+
+        for i in range(5):
+            Customer.objects.create(manager_customer_id=f'customer-{i}', name=f'Bakery Customer {i}', code=f'C{i}')
+
+    def setUp(self):
+        cache.clear()
+        customer_index.invalidate()
+        self.client.force_login(self.user)
+
+    def production_items(self):
+        items = [
+            {'recipe_id': recipe.id, 'item_name': recipe.name, 'item_code': f'FG{i}',
+             'production_quantity': 10, 'production_category_code': 'A', 'orders': [i]}
+            for i, recipe in enumerate(self.recipes)
+        ]
+        items[0].update(is_split=True, split_assignments=[
+            {'quantity': 4, 'shift_id': self.shift.id, 'category_code': 'A'},
+            {'quantity': 6, 'shift_id': self.shift.id, 'category_code': 'B'},
+        ])
+        return items
+
+    def test_budgets_cover_url_names(self):
+        tested = {
+            'user', 'permissions', 'dashboard-list', 'inventorypricehistory-list',
+            'inventorypricehistory-summary', 'inventorypricehistory-significant-changes',
+            'recipe-list', 'managerinventoryitem-list', 'customers-search', 'customers_search_compat',
+            'create_direct_production_orders', 'create_direct_production_plan',
+        }
+        self.assertEqual(set(settings.QUERY_BUDGETS), tested)
+
+    def test_auth(self):
+        self.assertEqual(self.assertQueryBudget(reverse('user')).status_code, 200)
+        self.assertEqual(self.assertQueryBudget(reverse('permissions')).status_code, 200)
+
+    def test_dashboard_cold(self):
+        response = self.assertQueryBudget(reverse('dashboard-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['recentRecipes']), 4)
+
+    def test_price_history(self):
+        self.assertEqual(self.assertQueryBudget(reverse('inventorypricehistory-list')).status_code, 200)
+        for days in (7, 30):
+            path = f"{reverse('inventorypricehistory-summary')}?days={days}"
+            self.assertEqual(self.assertQueryBudget(path).status_code, 200)
+            path = f"{reverse('inventorypricehistory-significant-changes')}?days={days}"
+            self.assertEqual(self.assertQueryBudget(path).status_code, 200)
+
+    def test_recipe_list(self):
+        response = self.assertQueryBudget(reverse('recipe-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 4)
+        response = self.assertQueryBudget(f"{reverse('recipe-list')}?search=item")
+        self.assertEqual(response.status_code, 200)
+
+    def test_inventory_list(self):
+        response = self.assertQueryBudget(reverse('managerinventoryitem-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 10)
+
+    def test_customer_search(self):
+        response = self.assertQueryBudget(f"{reverse('customers-search')}?term=bakery")
+        self.assertEqual(response.json()['totalCount'], 5)
+        customer_index.invalidate()
+        response = self.assertQueryBudget(f"{reverse('customers_search_compat')}?term=bakery")
+        self.assertEqual(response.status_code, 200)
+
+    def test_create_direct_production_orders(self):
+        response = self.assertQueryBudget(
+            reverse('create_direct_production_orders'), method='post', content_type='application/json',
+            data={'date': '2026-10-20', 'shift_id': self.shift.id, 'production_items': self.production_items()}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ProductionOrder.objects.filter(scheduled_date='2026-10-20').count(), 6)
+
+    def test_create_direct_production_plan(self):
+        response = self.assertQueryBudget(
+            reverse('create_direct_production_plan'), method='post', content_type='application/json',
+            data={'date': '2026-10-20', 'shift_id': self.shift.id, 'production_items': self.production_items()}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['requirements']), 4)
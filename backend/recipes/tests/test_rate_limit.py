@@ -0,0 +1,124 @@
+# backend/recipes/tests/test_rate_limit.py - Adaptive rate limiter under concurrent Manager.io calls
+#
+# Requests go through ManagerApiService.send() to the fake Manager.io server, so
+# every response is fed back into the process-wide limiter as in production. The
+# limiter is rebuilt from the overridden settings for each test.
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from recipes.circuit_breaker import get_manager_circuit_breaker
+from recipes.fake_manager import running_fake_manager
+from recipes.manager_api import ManagerApiService
+from recipes.rate_limit import get_manager_rate_limiter, reset_manager_rate_limiter
+
+INVENTORY_PAGE = {'pageSize': 1, 'skip': 0}
+
+
+def run_concurrently(count, call):
+    """Call ``call()`` from ``count`` threads released together; returns the results in order"""
+    barrier = Barrier(count)
+
+    def run(_):
+        barrier.wait()
+        return call()
+
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return list(pool.map(run, range(count)))
+
+
+@override_settings(
+    MANAGER_API_RATE_LIMIT=100, MANAGER_API_MIN_RATE=1, MANAGER_API_BURST=100,
+    MANAGER_API_MAX_CONCURRENCY=8, MANAGER_API_MIN_CONCURRENCY=1, MANAGER_API_SHARED_RATE_LIMIT=False,
+    MANAGER_API_MAX_RETRIES=0, MANAGER_API_MAX_THROTTLE_RETRIES=0,
+)
+class AdaptiveRateLimiterTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = cls.enterClassContext(running_fake_manager(inventory_items=10, customers=5))
+
+    def setUp(self):
+        self.server.reset()
+        self.server.configure(rate_limit_rate=0.0, retry_after=0, latency_ms=0.0)
+        cache.clear()
+        get_manager_circuit_breaker().reset()
+        reset_manager_rate_limiter()
+        self.addCleanup(reset_manager_rate_limiter)
+        self.limiter = get_manager_rate_limiter()
+
+    def get(self):
+        response = ManagerApiService().send('get', 'inventory-items', params=INVENTORY_PAGE)
+        return response.status_code, time.monotonic()
+
+    def test_429_halves_rate_and_concurrency(self):
+        self.server.configure(rate_limit_rate=1.0)
+
+        self.assertEqual(self.get()[0], 429)
+        self.assertEqual(self.limiter.rate, 50)
+        self.assertEqual(int(self.limiter.concurrency), 4)
+
+        run_concurrently(4, self.get)
+        self.assertEqual(self.limiter.rate, 100 / 32)
+        self.assertEqual(int(self.limiter.concurrency), 1)
+        self.assertEqual(self.limiter.throttled, 5)
+
+    def test_rate_floors_at_minimum_and_recovers(self):
+        self.server.configure(rate_limit_rate=1.0)
+        for _ in range(10):
+            self.get()
+        self.assertEqual(self.limiter.rate, 1)
+        self.assertEqual(int(self.limiter.concurrency), 1)
+
+        self.server.configure(rate_limit_rate=0.0)
+        statuses = [status for status, _ in run_concurrently(4, self.get)]
+        self.assertEqual(statuses, [200] * 4)
+        # Additive increase: 5% of the ceiling per good response
+        self.assertAlmostEqual(self.limiter.rate, 1 + 4 * 5)
+
+    def check_retry_after_blocks_other_threads(self):
+        self.server.configure(rate_limit_rate=1.0, retry_after=1)
+        status, throttled_at = self.get()
+        self.assertEqual(status, 429)
+
+        self.server.configure(rate_limit_rate=0.0)
+        results = run_concurrently(4, self.get)
+
+        self.assertEqual([status for status, _ in results], [200] * 4)
+        for _, finished_at in results:
+            self.assertGreaterEqual(finished_at - throttled_at, 0.9)
+
+    def test_retry_after_blocks_other_threads(self):
+        self.check_retry_after_blocks_other_threads()
+
+    @override_settings(MANAGER_API_SHARED_RATE_LIMIT=True)
+    def test_retry_after_blocks_other_workers_through_cache(self):
+        reset_manager_rate_limiter()
+        self.limiter = get_manager_rate_limiter()
+        self.check_retry_after_blocks_other_threads()
+
+        # A second worker's limiter honours the pause it finds in the cache
+        self.server.configure(rate_limit_rate=1.0, retry_after=1)
+        self.get()
+        reset_manager_rate_limiter()
+        self.server.configure(rate_limit_rate=0.0)
+        started = time.monotonic()
+        self.assertEqual(self.get()[0], 200)
+        self.assertGreaterEqual(time.monotonic() - started, 0.9)
+
+    @override_settings(MANAGER_API_MAX_CONCURRENCY=2)
+    def test_concurrency_cap_holds_extra_threads(self):
+        reset_manager_rate_limiter()
+        self.limiter = get_manager_rate_limiter()
+        self.server.configure(latency_ms=200)
+
+        started = time.monotonic()
+        results = run_concurrently(6, self.get)
+
+        self.assertEqual([status for status, _ in results], [200] * 6)
+        # Three rounds of two requests
+        self.assertGreaterEqual(time.monotonic() - started, 0.55)
+        self.assertEqual(self.limiter.in_flight, 0)
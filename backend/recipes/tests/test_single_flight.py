@@ -0,0 +1,86 @@
+# backend/recipes/tests/test_single_flight.py - Coalesced Manager.io reads under concurrent callers
+#
+# Threads call ManagerApiService._make_request() for the same GET at the same time
+# while the fake Manager.io server holds each response long enough for all of them
+# to join the first caller's flight.
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from recipes.circuit_breaker import get_manager_circuit_breaker
+from recipes.fake_manager import running_fake_manager
+from recipes.manager_api import ManagerApiService
+from recipes.rate_limit import reset_manager_rate_limiter
+from .test_rate_limit import run_concurrently
+
+CALLERS = 6
+INVENTORY_PAGE = {'pageSize': 5, 'skip': 0}
+
+
+@override_settings(MANAGER_COALESCE_READS=True, MANAGER_API_MAX_RETRIES=0, MANAGER_API_SHARED_RATE_LIMIT=False)
+class SingleFlightTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = cls.enterClassContext(running_fake_manager(inventory_items=10, customers=5))
+
+    def setUp(self):
+        self.server.reset()
+        self.server.configure(error_rate=0.0, latency_ms=300)
+        cache.clear()
+        get_manager_circuit_breaker().reset()
+        reset_manager_rate_limiter()
+        self.addCleanup(reset_manager_rate_limiter)
+        self.addCleanup(get_manager_circuit_breaker().reset)
+
+    def gets(self):
+        return self.server.stats()['requests'].get('GET /inventory-items', 0)
+
+    def read(self, params=INVENTORY_PAGE):
+        try:
+            return ManagerApiService()._make_request('GET', 'inventory-items', params=params)
+        except Exception as e:
+            return e
+
+    def test_identical_reads_make_one_request(self):
+        results = run_concurrently(CALLERS, self.read)
+
+        self.assertEqual(self.gets(), 1)
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertEqual(len(results[0]['inventoryItems']), 5)
+
+    def test_each_caller_gets_its_own_copy(self):
+        results = run_concurrently(CALLERS, self.read)
+
+        self.assertEqual(len({id(result) for result in results}), CALLERS)
+        self.assertEqual(len({id(result['inventoryItems'][0]) for result in results}), CALLERS)
+        results[0]['inventoryItems'][0]['itemName'] = 'Changed by one view'
+        self.assertNotEqual(results[1]['inventoryItems'][0]['itemName'], 'Changed by one view')
+
+    def test_leader_error_reaches_waiters(self):
+        self.server.configure(error_rate=1.0)
+
+        results = run_concurrently(CALLERS, self.read)
+
+        self.assertEqual(self.gets(), 1)
+        for result in results:
+            self.assertIsInstance(result, Exception)
+            self.assertIn('500', str(result))
+
+        # Nothing is kept once the flight has failed
+        self.server.configure(error_rate=0.0, latency_ms=0)
+        self.assertNotIsInstance(self.read(), Exception)
+        self.assertEqual(self.gets(), 2)
+
+    def test_different_reads_are_not_coalesced(self):
+        results = run_concurrently(3, lambda: self.read({'pageSize': 5, 'skip': 0}))
+        results += run_concurrently(3, lambda: self.read({'pageSize': 5, 'skip': 5}))
+
+        self.assertEqual(self.gets(), 2)
+        self.assertNotEqual(results[0], results[3])
+
+    @override_settings(MANAGER_COALESCE_READS=False)
+    def test_coalescing_can_be_turned_off(self):
+        run_concurrently(3, self.read)
+
+        self.assertEqual(self.gets(), 3)
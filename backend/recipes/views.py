@@ -3,11 +3,13 @@
 from rest_framework import viewsets, filters, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 from .models import (
     ManagerInventoryItem, RecipeCategory, Recipe, 
@@ -22,6 +24,11 @@ from .serializers import (
     InventoryPriceHistorySerializer
 )
 from .manager_api import ManagerApiService
+from .outbox import submission_response, submit_sales_order
+from .customer_search import search_local_customers
+from .search import RankedSearchFilter
+from .dashboard import get_dashboard_snapshot
+from .price_history import price_change_totals, recent_price_changes_prefetch, volatile_ingredients
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,9 +38,10 @@ class ManagerInventoryViewSet(viewsets.ModelViewSet):
     queryset = ManagerInventoryItem.objects.all()
     serializer_class = ManagerInventoryItemSerializer
     pagination_class = None
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, RankedSearchFilter, filters.OrderingFilter]
     filterset_fields = ['name', 'unit', 'category']
     search_fields = ['name', 'description', 'code']
+    search_index = 'inventory'
     ordering_fields = ['name', 'unit_cost', 'quantity_available', 'last_synced']
     
     def list(self, request, *args, **kwargs):
@@ -194,11 +202,16 @@ class RecipeCategoryViewSet(viewsets.ModelViewSet):
 
 class RecipeViewSet(viewsets.ModelViewSet):
     """Enhanced Recipe ViewSet with working price history"""
-    queryset = Recipe.objects.all()
+    # Ingredients, their items and recent price changes (for cost_history_summary) are prefetched
+    queryset = Recipe.objects.prefetch_related(
+        'recipeingredient_set__inventory_item',
+        recent_price_changes_prefetch('recipeingredient_set__inventory_item')
+    )
     serializer_class = RecipeSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, RankedSearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'created_by']
-    search_fields = ['name', 'description', 'instructions']
+    search_fields = ['name', 'description', 'instructions', 'recipeingredient__inventory_item__name']
+    search_index = 'recipes'
     ordering_fields = ['name', 'created_at', 'updated_at']
     
     def get_serializer_class(self):
@@ -246,47 +259,42 @@ class RecipeViewSet(viewsets.ModelViewSet):
             
             cutoff_date = timezone.now() - timedelta(days=days)
             
+            # Per-item change totals for the window (rollup-backed for long windows)
+            change_totals = price_change_totals(cutoff_date)
+            
             # Get all recipes and calculate their price volatility
             recipes_with_impact = []
+            impact_by_recipe = {}
+            
+            ingredients = RecipeIngredient.objects.filter(
+                inventory_item_id__in=change_totals.keys()
+            ).values_list('recipe_id', 'inventory_item_id', 'quantity')
+            for recipe_id, item_id, quantity in ingredients:
+                total_impact, affected_ingredients_count = impact_by_recipe.get(recipe_id, (Decimal('0'), 0))
+                impact_by_recipe[recipe_id] = (
+                    total_impact + change_totals[item_id]['total_change'] * quantity,
+                    affected_ingredients_count + 1
+                )
             
-            for recipe in Recipe.objects.all():
+            affected_recipes = Recipe.objects.filter(
+                id__in=[recipe_id for recipe_id, (impact, _) in impact_by_recipe.items() if impact != 0]
+            ).prefetch_related('recipeingredient_set__inventory_item')
+            
+            for recipe in affected_recipes:
                 try:
-                    # Get all ingredients for this recipe
-                    ingredients = RecipeIngredient.objects.filter(recipe=recipe)
-                    
-                    total_impact = Decimal('0')
-                    affected_ingredients_count = 0
-                    
-                    for ingredient in ingredients:
-                        # Get price changes for this ingredient in the time period
-                        price_changes = InventoryPriceHistory.objects.filter(
-                            inventory_item=ingredient.inventory_item,
-                            changed_at__gte=cutoff_date
-                        )
-                        
-                        if price_changes.exists():
-                            affected_ingredients_count += 1
-                            
-                            # Calculate impact on this recipe
-                            ingredient_impact = sum(
-                                change.change_amount * ingredient.quantity 
-                                for change in price_changes
-                            )
-                            total_impact += ingredient_impact
+                    total_impact, affected_ingredients_count = impact_by_recipe[recipe.id]
+                    current_cost = recipe.total_cost
+                    impact_percentage = (float(total_impact) / float(current_cost)) * 100 if current_cost > 0 else 0
                     
-                    if total_impact != 0:
-                        current_cost = recipe.total_cost
-                        impact_percentage = (float(total_impact) / float(current_cost)) * 100 if current_cost > 0 else 0
-                        
-                        recipes_with_impact.append({
-                            'recipe_id': recipe.id,
-                            'recipe_name': recipe.name,
-                            'current_total_cost': float(current_cost),
-                            'current_unit_cost': float(recipe.unit_cost),
-                            'cost_impact': float(total_impact),
-                            'affected_ingredients_count': affected_ingredients_count,
-                            'impact_percentage': round(impact_percentage, 2)
-                        })
+                    recipes_with_impact.append({
+                        'recipe_id': recipe.id,
+                        'recipe_name': recipe.name,
+                        'current_total_cost': float(current_cost),
+                        'current_unit_cost': float(recipe.unit_cost),
+                        'cost_impact': float(total_impact),
+                        'affected_ingredients_count': affected_ingredients_count,
+                        'impact_percentage': round(impact_percentage, 2)
+                    })
                         
                 except Exception as recipe_error:
                     logger.error(f"Error processing recipe {recipe.id}: {str(recipe_error)}")
@@ -310,36 +318,82 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
 
 class PriceHistoryViewSet(viewsets.ReadOnlyModelViewSet):
-    """ENHANCED: ViewSet for price history data"""
-    queryset = InventoryPriceHistory.objects.all()
+    """ENHANCED: ViewSet for price history data
+    
+    All endpoints accept ``as_of`` (ISO date or datetime, default now) and ``days``
+    to select the window [as_of - days, as_of), served by the changed_at index. This
+    is the same half-open window price_change_totals() uses for the rollup-backed
+    figures, so a change exactly on a boundary is counted once on either path.
+    """
+    queryset = InventoryPriceHistory.objects.select_related('inventory_item').only(
+        'id', 'old_price', 'new_price', 'change_amount', 'change_percentage', 'changed_at', 'sync_source',
+        'inventory_item__name', 'inventory_item__code'
+    )
     serializer_class = InventoryPriceHistorySerializer
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['inventory_item', 'sync_source']
     ordering_fields = ['changed_at', 'change_percentage', 'change_amount']
     ordering = ['-changed_at']
     
+    def get_window(self, default_days=None):
+        """Return (start, end) from the as_of/days query params; start is None without days"""
+        params = self.request.query_params
+        as_of = params.get('as_of')
+        end = timezone.now()
+        if as_of:
+            # Dates first: parse_datetime() also accepts a bare date, as midnight
+            parsed_date = parse_date(as_of)
+            if parsed_date is not None:
+                # A bare date means the end of that day
+                parsed = datetime.combine(parsed_date + timedelta(days=1), time.min)
+            else:
+                parsed = parse_datetime(as_of)
+                if parsed is None:
+                    raise ValidationError({'as_of': 'Expected an ISO date or datetime'})
+            end = parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+        
+        days = params.get('days', default_days)
+        if days is None:
+            return None, end
+        try:
+            days = int(days)
+        except (TypeError, ValueError):
+            raise ValidationError({'days': 'Expected a whole number of days'})
+        return end - timedelta(days=days), end
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            start, end = self.get_window()
+            queryset = queryset.filter(changed_at__lt=end)
+            if start is not None:
+                queryset = queryset.filter(changed_at__gte=start)
+        return queryset
+    
     @action(detail=False, methods=['get'])
     def significant_changes(self, request):
         """FIXED: Get significant price changes (> threshold %)"""
         try:
-            days = int(request.query_params.get('days', 30))
-            threshold = float(request.query_params.get('threshold', 5.0))
+            start, end = self.get_window(default_days=30)
+            threshold = float(request.query_params.get('threshold', settings.SIGNIFICANT_CHANGE_THRESHOLD))
             
-            cutoff_date = timezone.now() - timedelta(days=days)
-            
-            significant_changes = self.queryset.filter(
-                changed_at__gte=cutoff_date,
+            significant_changes = self.get_queryset().filter(
+                changed_at__gte=start,
+                changed_at__lt=end,
                 change_percentage__gte=threshold
-            ).select_related('inventory_item').order_by('-change_percentage')[:20]
+            ).order_by('-change_percentage')[:20]
             
             serializer = self.get_serializer(significant_changes, many=True)
             
             return Response({
                 'significant_changes': serializer.data,
-                'period_days': days,
+                'period_days': (end - start).days,
+                'as_of': end.isoformat(),
                 'threshold_percentage': threshold
             })
             
+        except ValidationError:
+            raise
         except Exception as e:
             logger.error(f"Error fetching significant changes: {str(e)}")
             return Response({
@@ -350,37 +404,44 @@ class PriceHistoryViewSet(viewsets.ReadOnlyModelViewSet):
     def summary(self, request):
         """Get price history summary for dashboard"""
         try:
-            days = int(request.query_params.get('days', 7))
-            cutoff_date = timezone.now() - timedelta(days=days)
+            start, end = self.get_window(default_days=7)
+            threshold = float(request.query_params.get('threshold', settings.SIGNIFICANT_CHANGE_THRESHOLD))
+            window = self.get_queryset().filter(changed_at__gte=start, changed_at__lt=end)
+            
+            # All counts in one conditional-aggregation pass over the window
+            totals = window.aggregate(
+                total_changes=models.Count('id'),
+                significant_changes=models.Count('id', filter=models.Q(change_percentage__gte=threshold)),
+                increases=models.Count('id', filter=models.Q(change_amount__gt=0)),
+                decreases=models.Count('id', filter=models.Q(change_amount__lt=0)),
+                total_change_amount=models.Sum('change_amount'),
+                avg_change_percentage=models.Avg('change_percentage')
+            )
             
             # Get recent changes
-            recent_changes = InventoryPriceHistory.objects.filter(
-                changed_at__gte=cutoff_date
-            ).select_related('inventory_item').order_by('-changed_at')[:10]
-            
-            # Get significant changes (>5%)
-            significant_changes = InventoryPriceHistory.objects.filter(
-                changed_at__gte=cutoff_date,
-                change_percentage__gte=5.0
-            ).count()
-            
-            # Get most volatile ingredients
-            volatile_ingredients = InventoryPriceHistory.objects.filter(
-                changed_at__gte=cutoff_date
-            ).values('inventory_item__name', 'inventory_item__code').annotate(
-                change_count=models.Count('id'),
-                avg_change=models.Avg('change_percentage')
-            ).order_by('-change_count')[:5]
+            recent_changes = window.order_by('-changed_at')[:10]
+            
+            # Get most volatile ingredients (rollup-backed for long windows)
+            volatile = volatile_ingredients(start, end, limit=5)
             
             serializer = self.get_serializer(recent_changes, many=True)
             
             return Response({
                 'recent_changes': serializer.data,
-                'significant_changes_count': significant_changes,
-                'volatile_ingredients': list(volatile_ingredients),
-                'period_days': days
+                'significant_changes_count': totals['significant_changes'],
+                'total_changes': totals['total_changes'],
+                'increases': totals['increases'],
+                'decreases': totals['decreases'],
+                'total_change_amount': totals['total_change_amount'] or 0,
+                'avg_change_percentage': totals['avg_change_percentage'] or 0,
+                'volatile_ingredients': volatile,
+                'period_days': (end - start).days,
+                'as_of': end.isoformat(),
+                'threshold_percentage': threshold
             })
             
+        except ValidationError:
+            raise
         except Exception as e:
             logger.error(f"Error fetching price history summary: {str(e)}")
             return Response({
@@ -390,12 +451,27 @@ class PriceHistoryViewSet(viewsets.ReadOnlyModelViewSet):
 
 class ProductionOrderViewSet(viewsets.ModelViewSet):
     """ViewSet for production orders"""
-    queryset = ProductionOrder.objects.all()
+    queryset = ProductionOrder.objects.select_related('recipe', 'shift').prefetch_related(
+        'recipe__recipeingredient_set__inventory_item',
+        recent_price_changes_prefetch('recipe__recipeingredient_set__inventory_item')
+    )
     serializer_class = ProductionOrderSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['recipe', 'status', 'created_by']
+    # Financials are stored columns, so e.g. ?profit_percentage__lt=10&ordering=-profit_margin runs in SQL
+    filterset_fields = {
+        'recipe': ['exact'],
+        'status': ['exact'],
+        'created_by': ['exact'],
+        'total_cost': ['gte', 'lte'],
+        'total_sales_value': ['gte', 'lte'],
+        'profit_margin': ['gte', 'lte', 'lt'],
+        'profit_percentage': ['gte', 'lte', 'lt'],
+    }
     search_fields = ['recipe__name', 'notes']
-    ordering_fields = ['created_at', 'scheduled_date', 'completed_at']
+    ordering_fields = [
+        'created_at', 'scheduled_date', 'completed_at',
+        'total_cost', 'unit_sales_price', 'total_sales_value', 'profit_margin', 'profit_percentage'
+    ]
     
     def get_serializer_class(self):
         if self.action == 'plan':
@@ -450,64 +526,8 @@ class DashboardViewSet(viewsets.ViewSet):
     def list(self, request):
         """Get enhanced dashboard data with price insights"""
         try:
-            # Get basic counts
-            recipes_count = Recipe.objects.count()
-            production_count = ProductionOrder.objects.count()
-            inventory_count = ManagerInventoryItem.objects.count()
-            
-            # Get low inventory items
-            low_inventory = ManagerInventoryItem.objects.filter(
-                quantity_available__lte=models.F('threshold_quantity')
-            )
-            low_inventory_serializer = ManagerInventoryItemSerializer(low_inventory, many=True)
-            
-            # Get recent recipes
-            recent_recipes = Recipe.objects.all().order_by('-created_at')[:5]
-            recent_recipes_serializer = RecipeSerializer(recent_recipes, many=True)
-            
-            # Get recent production orders
-            recent_productions = ProductionOrder.objects.all().order_by('-created_at')[:5]
-            recent_productions_serializer = ProductionOrderSerializer(recent_productions, many=True)
-            
-            # ENHANCED: Get recent price changes (last 7 days)
-            seven_days_ago = timezone.now() - timedelta(days=7)
-            recent_price_changes = InventoryPriceHistory.objects.filter(
-                changed_at__gte=seven_days_ago
-            ).select_related('inventory_item').order_by('-changed_at')[:10]
-            price_changes_serializer = InventoryPriceHistorySerializer(recent_price_changes, many=True)
-            
-            # ENHANCED: Get most volatile ingredients (last 30 days)
-            thirty_days_ago = timezone.now() - timedelta(days=30)
-            volatile_ingredients = InventoryPriceHistory.objects.filter(
-                changed_at__gte=thirty_days_ago
-            ).values('inventory_item__name', 'inventory_item__code').annotate(
-                change_count=models.Count('id'),
-                avg_change=models.Avg('change_percentage'),
-                total_impact=models.Sum('change_amount')
-            ).order_by('-change_count')[:5]
-            
-            # ENHANCED: Get price alerts (significant changes > 10%)
-            price_alerts = InventoryPriceHistory.objects.filter(
-                changed_at__gte=seven_days_ago,
-                change_percentage__gte=10.0
-            ).select_related('inventory_item').order_by('-change_percentage')[:5]
-            price_alerts_serializer = InventoryPriceHistorySerializer(price_alerts, many=True)
-            
-            return Response({
-                'recipesCount': recipes_count,
-                'productionsCount': production_count,
-                'inventoryCount': inventory_count,
-                'lowInventoryCount': low_inventory.count(),
-                'recentRecipes': recent_recipes_serializer.data,
-                'lowInventoryItems': low_inventory_serializer.data,
-                'recentProductions': recent_productions_serializer.data,
-                # ENHANCED: Price insights
-                'recentPriceChanges': price_changes_serializer.data,
-                'priceChangesLast7Days': recent_price_changes.count(),
-                'volatileIngredients': list(volatile_ingredients),
-                'priceAlerts': price_alerts_serializer.data,
-                'significantChangesLast7Days': price_alerts.count()
-            })
+            refresh = request.query_params.get('refresh') in ('1', 'true')
+            return Response(get_dashboard_snapshot(refresh=refresh))
             
         except Exception as e:
             logger.error(f"Error fetching dashboard data: {str(e)}")
@@ -526,17 +546,11 @@ class CustomerViewSet(viewsets.ViewSet):
             result = api_service.get_customers()
             
             if 'customers' in result and isinstance(result['customers'], list):
-                transformed_customers = []
-                for customer in result['customers']:
-                    transformed_customer = customer.copy()
-                    if 'key' in customer and 'id' not in customer:
-                        transformed_customer['id'] = customer['key']
-                    transformed_customers.append(transformed_customer)
-                
+                # Customers already carry 'id'; see ManagerApiService.get_customers
                 return Response({
                     "success": True,
-                    "customers": transformed_customers,
-                    "totalCount": result.get('totalCount', len(transformed_customers))
+                    "customers": result['customers'],
+                    "totalCount": result.get('totalCount', len(result['customers']))
                 })
             else:
                 return Response({
@@ -563,6 +577,11 @@ class CustomerViewSet(viewsets.ViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
+            # Answer from the local mirror; only hit Manager.io before the first customer sync
+            local_result = search_local_customers(term)
+            if local_result is not None:
+                return Response(local_result)
+            
             api_service = ManagerApiService()
             result = api_service.search_customers(term)
             return Response(result)
@@ -573,6 +592,21 @@ class CustomerViewSet(viewsets.ViewSet):
                 'error': str(e)
             }, status=500)
     
+    @action(detail=False, methods=['post'])
+    def sync(self, request):
+        """Mirror all Manager.io customers into the local Customer table"""
+        try:
+            api_service = ManagerApiService()
+            sync_result = api_service.sync_customers()
+            status_code = 200 if sync_result.get('status') == 'success' else 500
+            return Response(sync_result, status=status_code)
+        except Exception as e:
+            logger.error(f"Error syncing customers: {str(e)}")
+            return Response({
+                'status': 'error',
+                'message': str(e)
+            }, status=500)
+    
     @action(detail=False, methods=['post'])
     def create_in_manager(self, request):
         """Create a customer in Manager.io"""
@@ -599,20 +633,25 @@ class OrderViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(data=request.data)
             serializer.is_valid(raise_exception=True)
             
-            order = serializer.save()
-            
-            items_data = request.data.get('items', [])
-            for item_data in items_data:
-                OrderItem.objects.create(
-                    order=order,
-                    inventory_item_id=item_data.get('inventory_item_id'),
-                    name=item_data.get('name', ''),
-                    code=item_data.get('code', ''),
-                    quantity=item_data.get('quantity', 1),
-                    unit=item_data.get('unit', 'piece'),
-                    price=item_data.get('price', 0),
-                    type=item_data.get('type', 'finished_good')
-                )
+            with transaction.atomic():
+                order = serializer.save()
+                
+                items_data = request.data.get('items', [])
+                for item_data in items_data:
+                    OrderItem.objects.create(
+                        order=order,
+                        inventory_item_id=item_data.get('inventory_item_id'),
+                        name=item_data.get('name', ''),
+                        code=item_data.get('code', ''),
+                        quantity=item_data.get('quantity', 1),
+                        unit=item_data.get('unit', 'piece'),
+                        price=item_data.get('price', 0),
+                        type=item_data.get('type', 'finished_good')
+                    )
+                
+                # Submitted with the order, so it reaches Manager.io once committed
+                if request.data.get('sync_to_manager'):
+                    submit_sales_order(order)
             
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except Exception as e:
@@ -623,14 +662,10 @@ class OrderViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def sync_to_manager(self, request, pk=None):
-        """Sync order to Manager.io"""
+        """Send the order to Manager.io through the sales order outbox"""
         try:
             order = self.get_object()
             
-            # Update sync_status to pending while we process
-            order.sync_status = 'pending'
-            order.save()
-            
             # Don't re-sync if already synced
             force_resync = request.data.get('force_resync', False)
             if order.manager_order_id and order.sync_status == 'synced' and not force_resync:
@@ -640,58 +675,13 @@ class OrderViewSet(viewsets.ModelViewSet):
                     'manager_order_id': order.manager_order_id
                 })
             
-            # Get order items
-            items = OrderItem.objects.filter(order=order)
-            
-            # Prepare Manager.io order data
-            sales_order_data = {
-                'Date': f"{order.order_date}T00:00:00",
-                'Customer': order.customer_id,
-                'Lines': [
-                    {
-                        'Item': item.inventory_item_id,
-                        'LineDescription': f"{item.name} ({item.unit})",
-                        'CustomFields2': {},
-                        'Qty': float(item.quantity),
-                        'SalesUnitPrice': float(item.price)
-                    } for item in items
-                ],
-                'CustomFields2': {}
-            }
-            
-            # Add notes if available
-            if order.notes:
-                sales_order_data['CustomFields2']['Strings'] = {
-                    'Notes': order.notes
-                }
-            
-            # Submit to Manager.io
-            api_service = ManagerApiService()
-            result = api_service.create_sales_order(sales_order_data)
-            
-            # Update order with Manager.io ID if successful
-            if result.get('success') and result.get('key'):
-                order.manager_order_id = result.get('key')
-                order.sync_status = 'synced'
-                order.save()
-            else:
-                # Update status to failed
-                order.sync_status = 'failed'
-                order.save()
-                return Response({
-                    'success': False,
-                    'message': result.get('error', 'Unknown error from Manager.io'),
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
-            return Response(result)
+            with transaction.atomic():
+                message = submit_sales_order(order)
+            body, status_code = submission_response(message)
+            return Response(body, status=status_code)
         
         except Exception as e:
-            # Update status to failed on exception
-            if 'order' in locals():
-                order.sync_status = 'failed'
-                order.save()
-            
-            logger.error(f"Error syncing order to Manager.io: {str(e)}")
+            logger.error(f"Error queueing order for Manager.io: {str(e)}")
             return Response({
                 'success': False,
                 'message': f'Error syncing order: {str(e)}'
@@ -0,0 +1,407 @@
+# backend/recipes/views_async.py - Async versions of the Manager.io proxy views
+#
+# Same URLs, request formats and responses as the views_compat.py functions they
+# replace when ASYNC_MANAGER_VIEWS is set (see config/urls.py). Under uvicorn the
+# Manager.io round trip no longer holds a worker thread; database work runs through
+# sync_to_async or the async ORM.
+
+import hashlib
+import json
+import logging
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from .async_manager import AsyncManagerService
+from .circuit_breaker import afetch_with_fallback
+from .customer_search import search_local_customers
+from .inventory_cache import inventory_repository
+from .manager_payloads import (
+    find_item_uuid, looks_like_uuid, production_bill_of_materials, production_order_payload,
+    response_key, sales_order_date, sales_order_lines, sales_order_payload
+)
+from .models import Order, ProductionOrder, RecipeIngredient
+from .outbox import submission_response, submit_sales_order
+from .production_submission import asubmit_production_orders, requested_order_ids
+from .views_compat import _circuit_open_result, _connection_test_payload, _customers_response, _transform_inventory_items
+
+logger = logging.getLogger(__name__)
+
+
+def _json_body(request):
+    """Request data as views_compat sees it through DRF's request.data"""
+    if request.content_type == 'application/json' or not request.POST:
+        return json.loads(request.body or b'{}')
+    return request.POST.dict()
+
+
+@require_GET
+async def inventory_items(request):
+    """Fetch inventory data from Manager.io with proper error handling"""
+    try:
+        service = AsyncManagerService()
+        all_items, stale_since = await afetch_with_fallback('inventory_items', service.afetch_all_inventory_items)
+
+        transformed = _transform_inventory_items(all_items)
+        logger.info(f"Final transformed items: {len(transformed)}")
+        response = JsonResponse(transformed, safe=False)
+        if stale_since:
+            response['X-Manager-Stale'] = 'true'
+            response['X-Manager-Cached-At'] = stale_since
+        return response
+
+    except Exception as exc:
+        logger.error("Error fetching inventory items: %s", exc)
+        logger.exception(exc)
+        return JsonResponse({
+            "error": "Failed to fetch inventory items",
+            "details": str(exc),
+        }, status=500)
+
+
+@require_GET
+async def customers(request):
+    """Get all customers from Manager.io; cached as in the sync view"""
+    try:
+        service = AsyncManagerService()
+
+        async def fetch():
+            result = await service.aget_customers()
+            if not result.get('success'):
+                raise Exception(result.get('error') or 'Failed to get customers')
+            return result
+
+        result, stale_since = await afetch_with_fallback('customers', fetch)
+        return _customers_response(result, stale_since)
+
+    except Exception as e:
+        logger.error(f"Error in customers async view: {str(e)}")
+        logger.exception(e)
+        return JsonResponse({
+            "success": False,
+            "error": str(e),
+            "customers": []
+        }, status=500)
+
+
+@require_GET
+async def customers_search(request):
+    """Search customers by name or code"""
+    try:
+        term = request.GET.get('term', '')
+        if not term:
+            return JsonResponse({
+                'success': False,
+                'error': 'Search term is required'
+            }, status=400)
+
+        # Answer from the local mirror; only hit Manager.io before the first customer sync
+        local_result = await sync_to_async(search_local_customers)(term)
+        if local_result is not None:
+            return JsonResponse(local_result)
+
+        service = AsyncManagerService()
+
+        async def fetch():
+            result = await service.asearch_customers(term)
+            if not result.get('success'):
+                raise Exception(result.get('error') or 'Customer search failed')
+            return result
+
+        term_key = hashlib.sha1(term.lower().encode()).hexdigest()
+        result, stale_since = await afetch_with_fallback(f'customers_search:{term_key}', fetch)
+        if stale_since:
+            result = dict(result, stale=True, cached_at=stale_since)
+
+        # Ensure customer objects have 'id' field
+        for customer in result.get('customers') or []:
+            if 'key' in customer and 'id' not in customer:
+                customer['id'] = customer['key']
+
+        return JsonResponse(result)
+    except Exception as e:
+        logger.error(f"Error in customers search: {str(e)}")
+        logger.exception(e)
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+
+@require_GET
+async def test_manager_connection(request):
+    """Test Manager.io API connection and authentication"""
+    try:
+        service = AsyncManagerService()
+        result = _circuit_open_result(service) or await service.atest_connection()
+
+        return JsonResponse(_connection_test_payload(result, service.circuit_breaker.state()))
+
+    except Exception as e:
+        logger.error(f"Connection test error: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'check_settings': 'Please check MANAGER_API_KEY and MANAGER_API_URL in settings.py'
+        }, status=500)
+
+
+def _submit(order, payload):
+    with transaction.atomic():
+        message = submit_sales_order(order, payload)
+    return submission_response(message)
+
+
+async def _set_order_sync(order_id, sync_status, manager_order_id=None):
+    try:
+        order = await Order.objects.aget(id=order_id)
+        if manager_order_id is not None:
+            order.manager_order_id = manager_order_id
+        order.sync_status = sync_status
+        await order.asave()
+        logger.info(f"Updated order #{order_id} with sync_status={sync_status}")
+    except Exception as e:
+        logger.error(f"Failed to update order {order_id}: {str(e)}")
+
+
+@csrf_exempt
+@require_POST
+async def sales_order_form(request):
+    """
+    Create a sales order in Manager.io using the exact required format
+    with automatic UUID lookup for inventory items
+    """
+    try:
+        try:
+            data = _json_body(request)
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Invalid JSON body'}, status=400)
+
+        customer_id = data.get('Customer') or data.get('customer_id')
+        order_id = data.get('order_id')
+        lines = sales_order_lines(data)
+        description = data.get('Description') or data.get('notes', '')
+
+        if not customer_id:
+            return JsonResponse({
+                'success': False,
+                'error': 'Customer ID is required'
+            }, status=400)
+
+        if not lines:
+            return JsonResponse({
+                'success': False,
+                'error': 'Line items are required'
+            }, status=400)
+
+        date_str = sales_order_date(data.get('Date'))
+
+        # A saved order goes through the outbox; item codes are resolved when it is sent
+        if order_id:
+            order = await Order.objects.filter(id=order_id).afirst()
+            if order is None:
+                return JsonResponse({'success': False, 'error': 'Order not found'}, status=404)
+            payload = sales_order_payload(customer_id, date_str, description, lines)
+            body, status_code = await sync_to_async(_submit)(order, payload)
+            return JsonResponse(body, status=status_code)
+
+        service = AsyncManagerService()
+
+        # Resolve item codes to UUIDs: local database first, then one (coalesced)
+        # Manager.io inventory fetch shared by every code the database doesn't know
+        get_by_code = sync_to_async(inventory_repository.get_by_code)
+        remote_items = None
+        processed_lines = []
+        for line in lines:
+            item_code = line.get('Item')
+            if not item_code:
+                logger.warning("Skipping line item with no Item ID")
+                continue
+            if looks_like_uuid(item_code):
+                processed_lines.append(line)
+                continue
+
+            try:
+                inventory_item = await get_by_code(item_code)
+            except Exception as db_err:
+                logger.error(f"Database error looking up item {item_code}: {str(db_err)}")
+                continue
+            if inventory_item and inventory_item.manager_item_id and '-' in inventory_item.manager_item_id:
+                processed_lines.append({**line, 'Item': inventory_item.manager_item_id})
+                continue
+
+            if remote_items is None:
+                try:
+                    remote_items = await service.afetch_all_inventory_items()
+                except Exception as lookup_err:
+                    logger.error(f"Error looking up item in Manager.io: {str(lookup_err)}")
+                    remote_items = []
+            found_uuid = find_item_uuid(remote_items, item_code)
+            if found_uuid:
+                logger.info(f"Found UUID in Manager.io for {item_code}: {found_uuid}")
+                processed_lines.append({**line, 'Item': found_uuid})
+            else:
+                logger.warning(f"Could not find UUID for {item_code} in Manager.io")
+
+        if not processed_lines:
+            return JsonResponse({
+                'success': False,
+                'error': 'No items with valid UUIDs could be processed'
+            }, status=400)
+
+        payload = sales_order_payload(customer_id, date_str, description, processed_lines)
+        logger.info(f"Final payload for Manager.io: {json.dumps(payload)}")
+
+        response = await service.asend('post', 'sales-order-form', data=payload)
+        logger.info(f"Manager.io response status: {response.status_code}")
+
+        if response.status_code in [200, 201, 202]:
+            try:
+                response_data = response.json()
+            except ValueError:
+                return JsonResponse({
+                    'success': True,
+                    'message': 'Received non-JSON response',
+                    'response_text': response.text[:500]
+                })
+
+            manager_order_id = response_key(response_data)
+            if order_id:
+                await _set_order_sync(order_id, 'synced', manager_order_id)
+
+            return JsonResponse({
+                'success': True,
+                'message': 'Sales order created successfully',
+                'key': manager_order_id,
+                'manager_order_id': manager_order_id,
+                'response': response_data
+            })
+
+        if order_id:
+            await _set_order_sync(order_id, 'failed')
+
+        return JsonResponse({
+            'success': False,
+            'error': f"API error: {response.status_code}",
+            'details': response.text[:500]
+        }, status=response.status_code)
+
+    except Exception as e:
+        logger.error(f"Exception in sales order creation: {str(e)}")
+        logger.exception(e)
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+
+@csrf_exempt
+@require_POST
+async def submit_production_order_to_manager(request, order_id):
+    """Submit completed production order to Manager.io"""
+    try:
+        try:
+            production_order = await ProductionOrder.objects.select_related('recipe').aget(id=order_id)
+        except ProductionOrder.DoesNotExist:
+            return JsonResponse({'success': False, 'error': 'Production order not found'}, status=404)
+
+        if production_order.manager_order_id:
+            return JsonResponse({
+                'success': True,
+                'message': 'Already submitted to Manager.io',
+                'manager_order_id': production_order.manager_order_id
+            })
+
+        finished_item = None
+        if production_order.item_code:
+            finished_item = await sync_to_async(inventory_repository.get_by_code)(production_order.item_code)
+        if not finished_item:
+            return JsonResponse({
+                'success': False,
+                'error': f'Finished good not found: {production_order.item_code}'
+            })
+
+        recipe_ingredients = []
+        if production_order.recipe_id:
+            recipe_ingredients = [
+                ingredient async for ingredient in RecipeIngredient.objects.filter(
+                    recipe_id=production_order.recipe_id
+                ).select_related('inventory_item')
+            ]
+        bill_of_materials = production_bill_of_materials(production_order, recipe_ingredients)
+
+        service = AsyncManagerService()
+        response = await service.asend(
+            'post', 'production-order-form',
+            data=production_order_payload(production_order, finished_item, bill_of_materials)
+        )
+        logger.info(f"Response: {response.status_code}")
+
+        warning = None
+        if response.status_code not in [200, 201, 202]:
+            # If full payload fails, try without ingredients
+            logger.warning(f"Full payload failed ({response.status_code}), trying without ingredients...")
+            simple_response = await service.asend(
+                'post', 'production-order-form',
+                data=production_order_payload(production_order, finished_item, [])
+            )
+            if simple_response.status_code not in [200, 201, 202]:
+                return JsonResponse({
+                    'success': False,
+                    'error': f'Manager.io API error: {response.status_code}',
+                    'details': response.text[:200]
+                }, status=500)
+            response = simple_response
+            warning = 'Ingredients could not be included'
+
+        try:
+            manager_order_id = response_key(response.json(), 'submitted')
+        except ValueError:
+            manager_order_id = 'submitted'
+
+        production_order.manager_order_id = manager_order_id
+        production_order.status = 'completed'
+        await production_order.asave()
+
+        if warning:
+            return JsonResponse({
+                'success': True,
+                'message': 'Successfully submitted to Manager.io! - Bill of materials could not be included due to payload complexity',
+                'manager_order_id': manager_order_id,
+                'warning': warning
+            })
+        return JsonResponse({
+            'success': True,
+            'message': f'Successfully submitted to Manager.io! ({len(bill_of_materials)} ingredients included)',
+            'manager_order_id': manager_order_id,
+            'bill_of_materials_count': len(bill_of_materials),
+            'finished_item': finished_item.name
+        })
+
+    except Exception as e:
+        logger.error(f"Error submitting to Manager.io: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+
+@csrf_exempt
+@require_POST
+async def submit_production_orders_to_manager(request):
+    """Submit several completed production orders to Manager.io in one request"""
+    try:
+        try:
+            order_ids = requested_order_ids(_json_body(request))
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+        return JsonResponse(await asubmit_production_orders(order_ids))
+
+    except Exception as e:
+        logger.error(f"Error in bulk Manager.io submission: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
@@ -1,24 +1,47 @@
 # backend/recipes/views_compat.py - FIXED VERSION with proper error handling
 
-from django.http import JsonResponse
-from rest_framework.decorators import api_view
-from django.db import models 
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.decorators import api_view, authentication_classes
+from django.db import models, transaction
 import requests
 import logging
 import traceback
+import hashlib
 import json
 from django.conf import settings
 from django.utils import timezone
 from datetime import datetime
 from .models import (
     ManagerInventoryItem, RecipeCategory, Recipe, 
-    RecipeIngredient, ProductionOrder,ProductionShift, ProductionCategory, Customer, Order, OrderItem
+    RecipeIngredient, ProductionOrder,ProductionShift, ProductionCategory, Customer, Order, OrderItem,
+    ProductionRequirement
 )
 from .manager_api import ManagerApiService
+from .outbox import submission_response, submit_sales_order
+from .production_financials import apply_financials
+from .production_submission import requested_order_ids, submit_production_orders
+from .manager_payloads import (
+    find_item_uuid, inventory_list, looks_like_uuid, production_bill_of_materials, production_order_payload,
+    response_key, sales_order_date, sales_order_lines, sales_order_payload
+)
+from .customer_search import search_local_customers
+from .dashboard import invalidate_dashboard
+from .inventory_cache import inventory_repository
+from .circuit_breaker import CircuitOpenError, fetch_with_fallback, get_manager_circuit_breaker
+from .metrics import registry as metrics_registry, track_manager_call
 
 logger = logging.getLogger(__name__)
 
 
+def _as_int(value):
+    """Coerce an ID from request data to int, or None if it isn't one"""
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
 @api_view(['GET'])
 def recipe_detail_compat(request, id):
     """Get recipe detail with price history and cost calculations"""
@@ -103,194 +126,118 @@ def recipe_detail_compat(request, id):
 
 
 
-@api_view(["GET"])
-def inventory_items(request):
-    """Fetch inventory data from Manager.io with proper error handling"""
-    api_key = settings.MANAGER_API_KEY
-    api_url = settings.MANAGER_API_URL
-    headers = {
-        "X-API-KEY": api_key,
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-    }
+def _transform_inventory_items(all_items):
+    """Filter and reshape raw Manager.io inventory items for the frontend"""
+    # Filter obviously invalid items (test rows, UUID names, etc.)
+    valid_items = []
+    for raw in all_items:
+        name = raw.get("ItemName") or raw.get("name") or ""
+        code = raw.get("ItemCode") or raw.get("itemCode") or ""
 
-    try:
-        logger.info("Fetching inventory items from Manager.io...")
-        
-        # Start with a smaller batch to avoid timeouts
-        all_items = []
-        page_size = 100  # Reduced from 200
-        skip = 0
-        max_retries = 3
-        
-        while True:
-            retry_count = 0
-            page_items = []
-            
-            while retry_count < max_retries:
-                try:
-                    params = {
-                        'pageSize': page_size,
-                        'skip': skip
-                    }
-                    
-                    logger.info(f"Fetching page: skip={skip}, pageSize={page_size}, attempt={retry_count + 1}")
-                    
-                    # Add timeout to prevent hanging
-                    inv_resp = requests.get(
-                        f"{api_url}/inventory-items", 
-                        headers=headers, 
-                        params=params,
-                        timeout=30  # 30 second timeout
-                    )
+        # More lenient filtering
+        if name and code:
+            valid_items.append(raw)
 
-                    if inv_resp.status_code != 200:
-                        logger.error(f"Manager.io error: {inv_resp.status_code}")
-                        if retry_count == max_retries - 1:
-                            return JsonResponse({
-                                "error": f"Manager.io API error: {inv_resp.status_code}",
-                            }, status=500)
-                        retry_count += 1
-                        continue
+    logger.info("Filtered %d → %d valid items", len(all_items), len(valid_items))
 
-                    inv_data = inv_resp.json()
+    transformed = []
+    for raw in valid_items:
+        try:
+            # Extract sales price from the nested structure
+            sales_price = 0.0
 
-                    # Handle different response formats
-                    if isinstance(inv_data, dict) and "inventoryItems" in inv_data:
-                        page_items = inv_data["inventoryItems"]
-                    elif isinstance(inv_data, list):
-                        page_items = inv_data
-                    else:
-                        logger.error("Unexpected data format from Manager.io")
-                        break
-                        
-                    break  # Success, exit retry loop
-                    
-                except requests.exceptions.Timeout:
-                    logger.warning(f"Request timeout on attempt {retry_count + 1}")
-                    retry_count += 1
-                    if retry_count >= max_retries:
-                        logger.error("Max retries reached due to timeouts")
-                        return JsonResponse({
-                            "error": "Request timeout - Manager.io may be slow",
-                        }, status=500)
-                except Exception as e:
-                    logger.error(f"Request error on attempt {retry_count + 1}: {str(e)}")
-                    retry_count += 1
-                    if retry_count >= max_retries:
-                        return JsonResponse({
-                            "error": f"Failed to fetch data: {str(e)}",
-                        }, status=500)
-
-            if not page_items:
-                logger.info("No more items found, pagination complete")
-                break
-                
-            logger.info(f"Got {len(page_items)} items in this page")
-            all_items.extend(page_items)
-            
-            # Safety check to prevent infinite loops
-            if len(all_items) > 10000:  # Reasonable limit
-                logger.warning("Hit safety limit of 10,000 items")
-                break
-            
-            # If we got fewer items than page_size, we've reached the end
-            if len(page_items) < page_size:
-                logger.info("Last page reached")
-                break
-                
-            skip += page_size
+            # First try the nested salePrice object structure
+            if 'salePrice' in raw and isinstance(raw['salePrice'], dict) and 'value' in raw['salePrice']:
+                try:
+                    sales_price = float(raw['salePrice']['value'] or 0)
+                except (ValueError, TypeError):
+                    pass
+            # Fallback to DefaultSalesUnitPrice
+            elif 'DefaultSalesUnitPrice' in raw and raw['DefaultSalesUnitPrice'] is not None:
+                try:
+                    sales_price = float(raw['DefaultSalesUnitPrice'])
+                except (ValueError, TypeError):
+                    pass
+            # Try other field names
+            else:
+                for price_field in ['defaultSalesUnitPrice', 'salesPrice', 'SalesPrice']:
+                    if price_field in raw and raw[price_field] is not None:
+                        try:
+                            sales_price = float(raw[price_field])
+                            break
+                        except (ValueError, TypeError):
+                            pass
+
+            item = {
+                "id": raw.get("id"),
+                "manager_item_id": raw.get("id"),
+                "ItemCode": raw.get("ItemCode") or raw.get("itemCode"),
+                "ItemName": raw.get("ItemName") or raw.get("name"),
+                "Division": raw.get("Division", ""),
+                "UnitName": raw.get("UnitName") or raw.get("unit"),
+                "quantity_available": float(
+                    raw.get("qtyOnHand", 0)
+                    or raw.get("qtyOwned", 0)
+                    or 0
+                ),
+                "unit_cost": float(
+                    raw.get("averageCost", {}).get("value", 0) or 0
+                ),
+                "sales_price": sales_price,
+                "DefaultSalesUnitPrice": sales_price,
+            }
 
-        logger.info(f"Total items fetched: {len(all_items)}")
+            # Simple category inference by code prefix
+            code = item["ItemCode"]
+            if code.startswith("RM"):
+                item["category"] = "RAW_MATERIAL"
+            elif code.startswith("FG"):
+                item["category"] = "FINISHED_GOOD"
+            elif code.startswith("ACS"):
+                item["category"] = "ACCESSORY"
+            else:
+                item["category"] = "OTHER"
 
-        # Filter obviously invalid items (test rows, UUID names, etc.)
-        valid_items = []
-        for raw in all_items:
-            name = raw.get("ItemName") or raw.get("name") or ""
-            code = raw.get("ItemCode") or raw.get("itemCode") or ""
-            
-            # More lenient filtering
-            if name and code:
-                valid_items.append(raw)
+            # Calculated helpers
+            item["averageCost"] = {
+                "value": item["unit_cost"],
+                "currency": "BDT",
+            }
+            item["totalCost"] = {
+                "value": item["unit_cost"] * item["quantity_available"],
+                "currency": "BDT",
+            }
 
-        logger.info("Filtered %d → %d valid items", len(all_items), len(valid_items))
+            transformed.append(item)
 
-        transformed = []
-        for raw in valid_items:
-            try:
-                # Extract sales price from the nested structure
-                sales_price = 0.0
-                
-                # First try the nested salePrice object structure
-                if 'salePrice' in raw and isinstance(raw['salePrice'], dict) and 'value' in raw['salePrice']:
-                    try:
-                        sales_price = float(raw['salePrice']['value'] or 0)
-                    except (ValueError, TypeError):
-                        pass
-                # Fallback to DefaultSalesUnitPrice
-                elif 'DefaultSalesUnitPrice' in raw and raw['DefaultSalesUnitPrice'] is not None:
-                    try:
-                        sales_price = float(raw['DefaultSalesUnitPrice'])
-                    except (ValueError, TypeError):
-                        pass
-                # Try other field names
-                else:
-                    for price_field in ['defaultSalesUnitPrice', 'salesPrice', 'SalesPrice']:
-                        if price_field in raw and raw[price_field] is not None:
-                            try:
-                                sales_price = float(raw[price_field])
-                                break
-                            except (ValueError, TypeError):
-                                pass
-
-                item = {
-                    "id": raw.get("id"),
-                    "manager_item_id": raw.get("id"),
-                    "ItemCode": raw.get("ItemCode") or raw.get("itemCode"),
-                    "ItemName": raw.get("ItemName") or raw.get("name"),
-                    "Division": raw.get("Division", ""),
-                    "UnitName": raw.get("UnitName") or raw.get("unit"),
-                    "quantity_available": float(
-                        raw.get("qtyOnHand", 0)
-                        or raw.get("qtyOwned", 0)
-                        or 0
-                    ),
-                    "unit_cost": float(
-                        raw.get("averageCost", {}).get("value", 0) or 0
-                    ),
-                    "sales_price": sales_price,
-                    "DefaultSalesUnitPrice": sales_price,
-                }
+        except Exception as item_error:
+            logger.warning(f"Error transforming item {raw.get('ItemCode', 'UNKNOWN')}: {str(item_error)}")
+            continue
+    return transformed
 
-                # Simple category inference by code prefix
-                code = item["ItemCode"]
-                if code.startswith("RM"):
-                    item["category"] = "RAW_MATERIAL"
-                elif code.startswith("FG"):
-                    item["category"] = "FINISHED_GOOD"
-                elif code.startswith("ACS"):
-                    item["category"] = "ACCESSORY"
-                else:
-                    item["category"] = "OTHER"
 
-                # Calculated helpers
-                item["averageCost"] = {
-                    "value": item["unit_cost"],
-                    "currency": "BDT",
-                }
-                item["totalCost"] = {
-                    "value": item["unit_cost"] * item["quantity_available"],
-                    "currency": "BDT",
-                }
+@api_view(["GET"])
+def inventory_items(request):
+    """Fetch inventory data from Manager.io with proper error handling"""
+    try:
+        logger.info("Fetching inventory items from Manager.io...")
 
-                transformed.append(item)
-                
-            except Exception as item_error:
-                logger.warning(f"Error transforming item {raw.get('ItemCode', 'UNKNOWN')}: {str(item_error)}")
-                continue
+        # Paginates with the client's retries, rate limit and circuit breaker; while
+        # Manager.io is unavailable the last good list is served with X-Manager-Stale
+        api_service = ManagerApiService()
+        all_items, stale_since = fetch_with_fallback('inventory_items', api_service._fetch_all_inventory_items)
+
+        logger.info(f"Total items fetched: {len(all_items)}")
+
+        transformed = _transform_inventory_items(all_items)
 
         logger.info(f"Final transformed items: {len(transformed)}")
-        return JsonResponse(transformed, safe=False)
+        response = JsonResponse(transformed, safe=False)
+        if stale_since:
+            # The body stays a plain list for existing clients
+            response['X-Manager-Stale'] = 'true'
+            response['X-Manager-Cached-At'] = stale_since
+        return response
 
     except Exception as exc:
         logger.error("Error fetching inventory items: %s", exc)
@@ -421,35 +368,45 @@ def sync_inventory(request):
             "details": str(exc),
         }, status=500)
 
+def _customers_response(result, stale_since=None):
+    """JsonResponse for the compat customers endpoints from a get_customers() result"""
+    # get_customers() already gives every customer the 'id' the frontend expects
+    if 'customers' in result and isinstance(result['customers'], list):
+        response_data = {
+            "success": True,
+            "customers": result['customers']
+        }
+        if stale_since:
+            response_data.update(stale=True, cached_at=stale_since)
+        return JsonResponse(response_data)
+    else:
+        return JsonResponse({
+            "success": False,
+            "error": "Failed to get customers in expected format",
+            "customers": []
+        })
+
+
 @api_view(['GET'])
 def customers(request):
-    """Get all customers from Manager.io"""
+    """Get all customers from Manager.io.
+
+    Served from a cached list; edits to customers beyond the first page of 100 can
+    take up to MANAGER_CUSTOMER_CACHE_MAX_AGE to show (see get_customers()).
+    """
     try:
         logger.info("Getting customers via compat API")
         api_service = ManagerApiService()
-        result = api_service.get_customers()
+
+        def fetch():
+            result = api_service.get_customers()
+            if not result.get('success'):
+                raise Exception(result.get('error') or 'Failed to get customers')
+            return result
+
+        result, stale_since = fetch_with_fallback('customers', fetch)
         
-        # Transform the data structure to what frontend expects
-        if 'customers' in result and isinstance(result['customers'], list):
-            # Map 'key' to 'id' for each customer
-            transformed_customers = []
-            for customer in result['customers']:
-                transformed_customer = customer.copy()
-                # Use 'key' as 'id' if frontend expects 'id'
-                if 'key' in customer and not 'id' in customer:
-                    transformed_customer['id'] = customer['key']
-                transformed_customers.append(transformed_customer)
-            
-            return JsonResponse({
-                "success": True,
-                "customers": transformed_customers
-            })
-        else:
-            return JsonResponse({
-                "success": False,
-                "error": "Failed to get customers in expected format",
-                "customers": []
-            })
+        return _customers_response(result, stale_since)
             
     except Exception as e:
         logger.error(f"Error in customers compat view: {str(e)}")
@@ -472,9 +429,24 @@ def customers_search(request):
                 'error': 'Search term is required'
             }, status=400)
         
+        # Answer from the local mirror; only hit Manager.io before the first customer sync
+        local_result = search_local_customers(term)
+        if local_result is not None:
+            return JsonResponse(local_result)
+        
         logger.info(f"Searching customers with term: {term}")
         api_service = ManagerApiService()
-        result = api_service.search_customers(term)
+
+        def fetch():
+            result = api_service.search_customers(term)
+            if not result.get('success'):
+                raise Exception(result.get('error') or 'Customer search failed')
+            return result
+
+        term_key = hashlib.sha1(term.lower().encode()).hexdigest()
+        result, stale_since = fetch_with_fallback(f'customers_search:{term_key}', fetch)
+        if stale_since:
+            result = dict(result, stale=True, cached_at=stale_since)
         
         # Ensure customer objects have 'id' field
         if 'customers' in result and isinstance(result['customers'], list):
@@ -590,47 +562,54 @@ def orders(request):
             if not data.get('customer_id'):
                 return JsonResponse({'error': 'Customer ID is required'}, status=400)
             
-            # Create order
-            order = Order.objects.create(
-                customer_id=data.get('customer_id'),
-                customer_name=data.get('customer_name', ''),
-                customer_code=data.get('customer_code', ''),
-                order_date=data.get('order_date', datetime.now().strftime('%Y-%m-%d')),
-                notes=data.get('notes', ''),
-                status=data.get('status', 'pending'),
-                payment_status=data.get('payment_status', 'pending'),
-                total_amount=data.get('total_amount', 0),
-                tax_amount=data.get('tax_amount', 0),
-                sync_status=data.get('sync_status', 'not_synced')
-            )
+            with transaction.atomic():
+                # Create order
+                order = Order.objects.create(
+                    customer_id=data.get('customer_id'),
+                    customer_name=data.get('customer_name', ''),
+                    customer_code=data.get('customer_code', ''),
+                    order_date=data.get('order_date', datetime.now().strftime('%Y-%m-%d')),
+                    notes=data.get('notes', ''),
+                    status=data.get('status', 'pending'),
+                    payment_status=data.get('payment_status', 'pending'),
+                    total_amount=data.get('total_amount', 0),
+                    tax_amount=data.get('tax_amount', 0),
+                    sync_status=data.get('sync_status', 'not_synced')
+                )
             
-            # Log order creation
-            logger.info(f"Order #{order.id} created. Now creating {len(items_data)} items.")
+                # Log order creation
+                logger.info(f"Order #{order.id} created. Now creating {len(items_data)} items.")
             
-            # Create order items with direct reference to order
-            created_items = []
-            for item_data in items_data:
-                try:
-                    # Ensure inventory_item_id is present
-                    if not item_data.get('inventory_item_id'):
-                        logger.warning(f"Missing inventory_item_id in item data: {item_data}")
-                        continue
+                # Create order items with direct reference to order
+                created_items = []
+                for item_data in items_data:
+                    try:
+                        # Ensure inventory_item_id is present
+                        if not item_data.get('inventory_item_id'):
+                            logger.warning(f"Missing inventory_item_id in item data: {item_data}")
+                            continue
                         
-                    # Create the item with explicit reference to order
-                    item = OrderItem.objects.create(
-                        order=order,
-                        inventory_item_id=item_data.get('inventory_item_id'),
-                        name=item_data.get('name', ''),
-                        code=item_data.get('code', ''),
-                        quantity=item_data.get('quantity', 1),
-                        unit=item_data.get('unit', 'piece'),
-                        price=item_data.get('price', 0),
-                        type=item_data.get('type', 'finished_good')
-                    )
-                    created_items.append(item)
-                    logger.info(f"Created item #{item.id} for order #{order.id}")
-                except Exception as item_err:
-                    logger.error(f"Error creating item: {str(item_err)}")
+                        # Create the item with explicit reference to order; the savepoint
+                        # keeps one bad item from aborting the order's transaction
+                        with transaction.atomic():
+                            item = OrderItem.objects.create(
+                                order=order,
+                                inventory_item_id=item_data.get('inventory_item_id'),
+                                name=item_data.get('name', ''),
+                                code=item_data.get('code', ''),
+                                quantity=item_data.get('quantity', 1),
+                                unit=item_data.get('unit', 'piece'),
+                                price=item_data.get('price', 0),
+                                type=item_data.get('type', 'finished_good')
+                            )
+                        created_items.append(item)
+                        logger.info(f"Created item #{item.id} for order #{order.id}")
+                    except Exception as item_err:
+                        logger.error(f"Error creating item: {str(item_err)}")
+
+                # Submitted with the order, so it reaches Manager.io once committed
+                if data.get('sync_to_manager') and created_items:
+                    submit_sales_order(order)
             
             # Log item creation results
             logger.info(f"Created {len(created_items)} items for order #{order.id}")
@@ -847,13 +826,18 @@ def batch_sync_orders(request):
                     results['failed'] += 1
                     continue
                 
-                # Mark as successful for now (implement actual sync logic)
+                with transaction.atomic():
+                    message = submit_sales_order(order)
+                submitted, _ = submission_response(message)
                 results['results'].append({
                     'order_id': order_id,
-                    'success': True,
-                    'message': 'Order sync simulated successfully'
+                    'success': submitted['success'],
+                    'queued': submitted['queued'],
+                    'outbox_id': message.id,
+                    'manager_order_id': submitted.get('manager_order_id'),
+                    'message': submitted['message']
                 })
-                results['successful'] += 1
+                results['successful' if submitted['success'] else 'failed'] += 1
                     
             except Order.DoesNotExist:
                 results['results'].append({
@@ -976,31 +960,7 @@ def sales_order_form(request):
         order_id = request.data.get('order_id')
         
         # Handle different input formats
-        if 'Lines' in request.data:
-            # Direct format from Manager.io
-            lines = request.data.get('Lines', [])
-        elif 'item_data' in request.data:
-            # Format from batch sync
-            lines = [
-                {
-                    "Item": item.get('id'),
-                    "LineDescription": item.get('name', 'Item'),
-                    "Qty": float(item.get('quantity', 0)),
-                    "SalesUnitPrice": float(item.get('price', 0))
-                } for item in request.data.get('item_data', [])
-            ]
-        elif 'items' in request.data:
-            # Format from frontend
-            lines = [
-                {
-                    "Item": item.get('inventory_item_id'),
-                    "LineDescription": item.get('name', 'Item'),
-                    "Qty": float(item.get('quantity', 0)),
-                    "SalesUnitPrice": float(item.get('price', 0))
-                } for item in request.data.get('items', [])
-            ]
-        else:
-            lines = []
+        lines = sales_order_lines(request.data)
             
         # Get description/notes
         description = request.data.get('Description') or request.data.get('notes', '')
@@ -1019,9 +979,17 @@ def sales_order_form(request):
             }, status=400)
         
         # Get date from request or default to current
-        date_str = request.data.get('Date')
-        if not date_str or 'T' not in date_str:
-            date_str = datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+        date_str = sales_order_date(request.data.get('Date'))
+        
+        # A saved order goes through the outbox; item codes are resolved when it is sent
+        if order_id:
+            order = Order.objects.filter(id=order_id).first()
+            if order is None:
+                return JsonResponse({'success': False, 'error': 'Order not found'}, status=404)
+            with transaction.atomic():
+                message = submit_sales_order(order, sales_order_payload(customer_id, date_str, description, lines))
+            body, status_code = submission_response(message)
+            return JsonResponse(body, status=status_code)
         
         # Set up headers for Manager.io API calls
         headers = {
@@ -1042,7 +1010,7 @@ def sales_order_form(request):
                 continue
             
             # Check if it looks like a UUID already (contains hyphens and is long)
-            if len(str(item_code)) > 30 and '-' in str(item_code):
+            if looks_like_uuid(item_code):
                 # It looks like a UUID already, use it as is
                 processed_line = line
                 logger.info(f"Item already has UUID format: {item_code}")
@@ -1050,9 +1018,7 @@ def sales_order_form(request):
                 # Need to look up the UUID for this item code
                 try:
                     # First try to look up in our local database
-                    inventory_item = ManagerInventoryItem.objects.filter(
-                        code=item_code
-                    ).first()
+                    inventory_item = inventory_repository.get_by_code(item_code)
                     
                     if inventory_item and inventory_item.manager_item_id and '-' in inventory_item.manager_item_id:
                         # Found UUID in our database
@@ -1062,40 +1028,24 @@ def sales_order_form(request):
                         # Try to get UUID directly from Manager.io if not found locally
                         try:
                             # Get all inventory items from Manager.io
-                            inventory_response = requests.get(
-                                f"{api_url}/inventory-items",
-                                headers=headers,
-                                timeout=30
-                            )
+                            with track_manager_call():
+                                inventory_response = requests.get(
+                                    f"{api_url}/inventory-items",
+                                    headers=headers,
+                                    timeout=30
+                                )
                             
                             if inventory_response.status_code != 200:
                                 logger.error(f"Failed to fetch inventory from Manager.io: {inventory_response.status_code}")
                                 # Skip this item as we can't find its UUID
                                 continue
                             
-                            # Parse inventory data
-                            inventory_data = inventory_response.json()
-                            
-                            # Handle different response formats
-                            inventory_items = []
-                            if isinstance(inventory_data, dict) and 'inventoryItems' in inventory_data:
-                                inventory_items = inventory_data['inventoryItems']
-                            elif isinstance(inventory_data, list):
-                                inventory_items = inventory_data
-                                
-                            # Find the matching item
-                            found_uuid = None
-                            for inv_item in inventory_items:
-                                if (inv_item.get('ItemCode') == item_code or 
-                                    inv_item.get('itemCode') == item_code):
-                                    # Found matching item, extract UUID
-                                    found_uuid = inv_item.get('id') or inv_item.get('key')
-                                    if found_uuid:
-                                        logger.info(f"Found UUID in Manager.io for {item_code}: {found_uuid}")
-                                        break
+                            # Find the matching item in either response format
+                            found_uuid = find_item_uuid(inventory_list(inventory_response.json()), item_code)
                             
                             if found_uuid:
                                 # Use the UUID we found
+                                logger.info(f"Found UUID in Manager.io for {item_code}: {found_uuid}")
                                 processed_line = {**line, 'Item': found_uuid}
                             else:
                                 # Couldn't find UUID in Manager.io
@@ -1120,48 +1070,19 @@ def sales_order_form(request):
             }, status=400)
             
         # Create EXACT FORMAT matching Manager.io requirements
-        payload = {
-            "Date": date_str,
-            "Reference": "1",
-            "Customer": customer_id,
-            "Description": description,
-            "Lines": [
-                {
-                    "Item": line.get('Item'),
-                    "LineDescription": line.get('LineDescription', 'Item'),
-                    "CustomFields": {},
-                    "CustomFields2": {
-                        "Strings": {},
-                        "Decimals": {},
-                        "Dates": {},
-                        "Booleans": {},
-                        "StringArrays": {}
-                    },
-                    "Qty": float(line.get('Qty', 0)),
-                    "SalesUnitPrice": float(line.get('SalesUnitPrice', 0))
-                } for line in processed_lines
-            ],
-            "SalesOrderFooters": [],
-            "CustomFields": {},
-            "CustomFields2": {
-                "Strings": {},
-                "Decimals": {},
-                "Dates": {},
-                "Booleans": {},
-                "StringArrays": {}
-            }
-        }
+        payload = sales_order_payload(customer_id, date_str, description, processed_lines)
         
         # Log the payload we're sending
         logger.info(f"Final payload for Manager.io: {json.dumps(payload)}")
         
         # Make the API call to Manager.io
-        response = requests.post(
-            f"{api_url}/sales-order-form",
-            headers=headers,
-            json=payload,
-            timeout=30.0
-        )
+        with track_manager_call():
+            response = requests.post(
+                f"{api_url}/sales-order-form",
+                headers=headers,
+                json=payload,
+                timeout=30.0
+            )
         
         # Log the response
         logger.info(f"Manager.io response status: {response.status_code}")
@@ -1173,11 +1094,7 @@ def sales_order_form(request):
                 response_data = response.json()
                 
                 # Extract manager order ID
-                manager_order_id = None
-                if isinstance(response_data, dict):
-                    manager_order_id = response_data.get('key')
-                    if not manager_order_id and 'data' in response_data:
-                        manager_order_id = response_data.get('data', {}).get('key')
+                manager_order_id = response_key(response_data)
                 
                 # Update the order if we have an order_id
                 if order_id:
@@ -1308,7 +1225,7 @@ def test_order_sync(request):
             logger.info(f"Processing item with code: {item_code}")  
             
             # Find the UUID for this item
-            inventory_item = ManagerInventoryItem.objects.filter(code=item_code).first()
+            inventory_item = inventory_repository.get_by_code(item_code)
             
             if inventory_item and inventory_item.manager_item_id and '-' in inventory_item.manager_item_id:
                 # Found the UUID
@@ -1360,12 +1277,13 @@ def test_order_sync(request):
         
         # Make the API call to Manager.io
         try:
-            response = requests.post(
-                f"{api_url}/sales-order-form",
-                headers=headers,
-                json=payload,
-                timeout=30.0
-            )
+            with track_manager_call():
+                response = requests.post(
+                    f"{api_url}/sales-order-form",
+                    headers=headers,
+                    json=payload,
+                    timeout=30.0
+                )
             
             # Log the response
             logger.info(f"Manager.io response status: {response.status_code}")
@@ -1462,12 +1380,38 @@ def test_order_sync(request):
     
 
 @api_view(['POST'])
+@authentication_classes([])
 def manager_webhook(request):
-    """Placeholder for manager webhook endpoint"""
+    """Queue Manager.io change events for incremental sync (recipes/webhooks.py)"""
+    from .webhooks import check_worker_draining, enqueue_events, parse_events, process_webhook_events, verify_request
+
+    # Verify against the raw body before DRF parses it
+    if not verify_request(request):
+        return JsonResponse({'status': 'error', 'message': 'Invalid webhook signature'}, status=401)
+
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Webhook body must be JSON'}, status=400)
+
+    try:
+        events, ignored = parse_events(payload)
+        queued = enqueue_events(events)
+        if events and getattr(settings, 'MANAGER_WEBHOOK_PROCESS_INLINE', True):
+            process_webhook_events()
+        elif events:
+            check_worker_draining()
+    except Exception as e:
+        logger.error(f"Error queuing Manager.io webhook: {str(e)}")
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+
     return JsonResponse({
         'status': 'received',
-        'message': 'Webhook received'
-    })
+        'message': 'Webhook received',
+        'events': len(events),
+        'queued': queued,
+        'ignored': ignored
+    }, status=202)
 
 @api_view(['GET'])
 def check_sync_status(request):
@@ -1476,7 +1420,8 @@ def check_sync_status(request):
         'needs_sync': False,
         'last_sync': None,
         'sync_interval': 300,
-        'items_count': ManagerInventoryItem.objects.count()
+        'items_count': ManagerInventoryItem.objects.count(),
+        'manager_circuit': get_manager_circuit_breaker().state()
     })
 
 
@@ -1487,6 +1432,148 @@ def check_sync_status(request):
 
 # Add these methods to backend/recipes/views_compat.py
 
+def _plan_production_requirements(date, shift_id, production_items):
+    """Resolve and upsert ProductionRequirements for a plan with one query per model.
+
+    Returns (created_requirements, errors) where created_requirements matches the
+    response shape of create_direct_production_plan.
+    """
+    errors = []
+    
+    # Resolve inventory items by Manager.io UUID, falling back to item code
+    item_uuids = {item.get('inventory_item_id') for item in production_items if item.get('inventory_item_id')}
+    item_codes = {item.get('item_code') for item in production_items if item.get('item_code')}
+    items_by_uuid = {}
+    items_by_code = {}
+    if item_uuids or item_codes:
+        for inventory_item in ManagerInventoryItem.objects.filter(
+            models.Q(manager_item_id__in=item_uuids) | models.Q(code__in=item_codes)
+        ):
+            items_by_uuid[inventory_item.manager_item_id] = inventory_item
+            items_by_code.setdefault(inventory_item.code, inventory_item)
+    
+    # Recipes by ID, with a name match for IDs that no longer exist
+    recipes = Recipe.objects.in_bulk({_as_int(item.get('recipe_id')) for item in production_items} - {None})
+    fallback_names = {
+        (item.get('item_name') or '').lower()
+        for item in production_items
+        if item.get('recipe_id') and _as_int(item.get('recipe_id')) not in recipes
+    }
+    fallback_recipes = []
+    if fallback_names:
+        name_filter = models.Q()
+        for name in fallback_names:
+            name_filter |= models.Q(name__icontains=name)
+        fallback_recipes = list(Recipe.objects.filter(name_filter).order_by('id'))
+    
+    # Production categories, creating any missing codes in one insert
+    category_codes = {item.get('production_category_code', 'A') for item in production_items}
+    categories = {c.code: c for c in ProductionCategory.objects.filter(code__in=category_codes)}
+    missing_codes = category_codes - set(categories)
+    if missing_codes:
+        ProductionCategory.objects.bulk_create([
+            ProductionCategory(code=code, name=f"{code} - Production Category")
+            for code in missing_codes
+        ], ignore_conflicts=True)
+        categories.update({c.code: c for c in ProductionCategory.objects.filter(code__in=missing_codes)})
+    
+    shift = ProductionShift.objects.filter(id=_as_int(shift_id)).first() if shift_id else None
+    
+    # Build one requirement per finished good; later lines for the same item win
+    planned = {}
+    for item_data in production_items:
+        inventory_item = items_by_uuid.get(item_data.get('inventory_item_id')) or items_by_code.get(item_data.get('item_code'))
+        if not inventory_item:
+            logger.warning(f"Could not find inventory item: {item_data}")
+            errors.append(f"Inventory item not found: {item_data.get('item_code') or item_data.get('inventory_item_id')}")
+            continue
+        
+        recipe = None
+        if item_data.get('recipe_id'):
+            recipe = recipes.get(_as_int(item_data['recipe_id']))
+            if recipe is None:
+                item_name = (item_data.get('item_name') or '').lower()
+                recipe = next((r for r in fallback_recipes if item_name in r.name.lower()), None)
+        
+        production_category = categories.get(item_data.get('production_category_code', 'A'))
+        planned[inventory_item.id] = (inventory_item, item_data, {
+            'recipe': recipe,
+            'total_ordered': item_data.get('total_ordered', 0),
+            'current_stock': inventory_item.quantity_available,
+            'net_required': item_data.get('net_required', 0),
+            'recommended_production': item_data.get('production_quantity', 0),
+            'manual_override': item_data.get('production_quantity'),
+            'production_category': production_category,
+            'assigned_to': item_data.get('assigned_to', 'Unassigned'),
+            'is_approved': True  # Auto-approve direct planning
+        })
+    
+    if not planned:
+        return [], errors
+    
+    with transaction.atomic():
+        existing = {
+            req.finished_good_id: req
+            for req in ProductionRequirement.objects.select_for_update().filter(
+                date=date, shift=shift, finished_good_id__in=planned.keys()
+            )
+        }
+        
+        now = timezone.now()
+        to_create = []
+        to_update = []
+        for finished_good_id, (inventory_item, item_data, values) in planned.items():
+            requirement = existing.get(finished_good_id)
+            if requirement is None:
+                to_create.append(ProductionRequirement(
+                    date=date, shift=shift, finished_good=inventory_item, **values
+                ))
+            else:
+                for field, value in values.items():
+                    setattr(requirement, field, value)
+                requirement.updated_at = now
+                to_update.append(requirement)
+        
+        ProductionRequirement.objects.bulk_create(to_create)
+        if to_update:
+            ProductionRequirement.objects.bulk_update(
+                to_update, list(planned[to_update[0].finished_good_id][2].keys()) + ['updated_at']
+            )
+        
+        # Link orders through the M2M table; lines that send orders replace their links
+        requirements = {req.finished_good_id: req for req in to_create + to_update}
+        linked = {
+            requirements[fg_id].id: {_as_int(o) for o in item_data['orders']} - {None}
+            for fg_id, (_, item_data, _) in planned.items()
+            if item_data.get('orders')
+        }
+        if linked:
+            Through = ProductionRequirement.orders.through
+            valid_order_ids = set(Order.objects.filter(
+                id__in=set().union(*linked.values())
+            ).values_list('id', flat=True))
+            Through.objects.filter(productionrequirement_id__in=linked.keys()).delete()
+            Through.objects.bulk_create([
+                Through(productionrequirement_id=req_id, order_id=order_id)
+                for req_id, order_ids in linked.items()
+                for order_id in order_ids & valid_order_ids
+            ], ignore_conflicts=True)
+    
+    created_ids = {req.id for req in to_create}
+    created_requirements = [
+        {
+            'id': requirement.id,
+            'item_name': planned[fg_id][0].name,
+            'production_quantity': requirement.final_production_quantity,
+            'assigned_to': requirement.assigned_to,
+            'created': requirement.id in created_ids
+        }
+        for fg_id, requirement in requirements.items()
+    ]
+    logger.info(f"Planned {len(created_requirements)} requirements ({len(created_ids)} new) for {date}")
+    return created_requirements, errors
+
+
 @api_view(['POST'])
 def create_direct_production_plan(request):
     """Create a direct production plan from analytics FG selection"""
@@ -1504,106 +1591,13 @@ def create_direct_production_plan(request):
                 'error': 'Date and production items are required'
             }, status=400)
         
-        # Create production requirements for each item
-        created_requirements = []
-        
-        for item_data in production_items:
-            try:
-                # Find or create inventory item
-                inventory_item = None
-                if item_data.get('inventory_item_id'):
-                    try:
-                        inventory_item = ManagerInventoryItem.objects.get(
-                            manager_item_id=item_data['inventory_item_id']
-                        )
-                    except ManagerInventoryItem.DoesNotExist:
-                        # Try by code
-                        try:
-                            inventory_item = ManagerInventoryItem.objects.get(
-                                code=item_data.get('item_code')
-                            )
-                        except ManagerInventoryItem.DoesNotExist:
-                            logger.warning(f"Could not find inventory item: {item_data}")
-                            continue
-                
-                if not inventory_item:
-                    continue
-                
-                # Find recipe if available
-                recipe = None
-                if item_data.get('recipe_id'):
-                    try:
-                        recipe = Recipe.objects.get(id=item_data['recipe_id'])
-                    except Recipe.DoesNotExist:
-                        # Try to find by name
-                        recipe = Recipe.objects.filter(
-                            name__icontains=item_data.get('item_name', '')
-                        ).first()
-                
-                # Find production category
-                production_category = None
-                category_code = item_data.get('production_category_code', 'A')
-                try:
-                    production_category = ProductionCategory.objects.get(code=category_code)
-                except ProductionCategory.DoesNotExist:
-                    # Create default categories if they don't exist
-                    production_category, _ = ProductionCategory.objects.get_or_create(
-                        code=category_code,
-                        defaults={
-                            'name': f"{category_code} - Production Category",
-                            'assigned_person': item_data.get('assigned_to', 'Unassigned')
-                        }
-                    )
-                
-                # Get shift if provided
-                shift = None
-                if shift_id:
-                    try:
-                        shift = ProductionShift.objects.get(id=shift_id)
-                    except ProductionShift.DoesNotExist:
-                        pass
-                
-                # Create or update production requirement
-                requirement, created = ProductionRequirement.objects.update_or_create(
-                    date=date,
-                    shift=shift,
-                    finished_good=inventory_item,
-                    defaults={
-                        'recipe': recipe,
-                        'total_ordered': item_data.get('total_ordered', 0),
-                        'current_stock': inventory_item.quantity_available,
-                        'net_required': item_data.get('net_required', 0),
-                        'recommended_production': item_data.get('production_quantity', 0),
-                        'manual_override': item_data.get('production_quantity'),
-                        'production_category': production_category,
-                        'assigned_to': item_data.get('assigned_to', production_category.assigned_person),
-                        'is_approved': True  # Auto-approve direct planning
-                    }
-                )
-                
-                # Link to orders if provided
-                if item_data.get('orders'):
-                    order_objects = Order.objects.filter(id__in=item_data['orders'])
-                    requirement.orders.set(order_objects)
-                
-                created_requirements.append({
-                    'id': requirement.id,
-                    'item_name': inventory_item.name,
-                    'production_quantity': requirement.final_production_quantity,
-                    'assigned_to': requirement.assigned_to,
-                    'created': created
-                })
-                
-                logger.info(f"{'Created' if created else 'Updated'} requirement for {inventory_item.name}")
-                
-            except Exception as item_error:
-                logger.error(f"Error processing item {item_data}: {str(item_error)}")
-                continue
+        created_requirements, errors = _plan_production_requirements(date, shift_id, production_items)
         
         return JsonResponse({
             'success': True,
             'message': f"Created production plan with {len(created_requirements)} items",
-            'requirements': created_requirements
+            'requirements': created_requirements,
+            'errors': errors
         })
         
     except Exception as e:
@@ -1666,9 +1660,7 @@ def analyze_fg_items_for_production(request):
                 
                 if total_ordered > 0:
                     # Find inventory item for stock check
-                    inventory_item = ManagerInventoryItem.objects.filter(
-                        models.Q(code=code) | models.Q(name=name)
-                    ).first()
+                    inventory_item = inventory_repository.get_by_code(code) or inventory_repository.get_by_name(name)
                     
                     current_stock = inventory_item.quantity_available if inventory_item else 0
                     net_required = max(0, total_ordered - current_stock)
@@ -1767,37 +1759,45 @@ def create_direct_production_orders(request):
                 'error': f'Invalid date format: {date}. Expected YYYY-MM-DD'
             }, status=400)
         
-        # Get shift if provided
-        shift = None
-        if shift_id:
-            try:
-                shift = ProductionShift.objects.get(id=shift_id)
-                logger.info(f"Using shift: {shift.name}")
-            except ProductionShift.DoesNotExist:
-                logger.warning(f"Shift {shift_id} not found, proceeding without shift")
+        # Preload every referenced recipe and shift with one query each
+        recipe_ids = set()
+        shift_ids = {_as_int(shift_id)}
+        for item_data in production_items:
+            recipe_ids.add(_as_int(item_data.get('recipe_id')))
+            shift_ids.add(_as_int(item_data.get('shift_id')))
+            for split_assignment in item_data.get('split_assignments') or []:
+                shift_ids.add(_as_int(split_assignment.get('shift_id')))
+        recipe_ids.discard(None)
+        shift_ids.discard(None)
+        
+        recipes = Recipe.objects.in_bulk(recipe_ids)
+        shifts = ProductionShift.objects.in_bulk(shift_ids)
+        
+        shift = shifts.get(_as_int(shift_id))
+        if shift_id and not shift:
+            logger.warning(f"Shift {shift_id} not found, proceeding without shift")
+        
+        def resolve_shift(candidate_id, label):
+            if candidate_id and candidate_id != shift_id:
+                candidate = shifts.get(_as_int(candidate_id))
+                if candidate:
+                    return candidate
+                logger.warning(f"{label} shift {candidate_id} not found")
+            return shift
         
-        created_orders = []
         errors = []
+        # (order, item_data) pairs for regular orders, and (parent, item_data, recipe) for split groups
+        single_orders = []
+        split_groups = []
         
         for item_data in production_items:
             try:
-                logger.info(f"Processing item: {item_data.get('item_name')}")
+                recipe = recipes.get(_as_int(item_data.get('recipe_id')))
+                if item_data.get('recipe_id') and not recipe:
+                    logger.warning(f"Recipe {item_data['recipe_id']} not found")
                 
-                # Get recipe if available
-                recipe = None
-                if item_data.get('recipe_id'):
-                    try:
-                        recipe = Recipe.objects.get(id=item_data['recipe_id'])
-                        logger.info(f"Found recipe: {recipe.name}")
-                    except Recipe.DoesNotExist:
-                        logger.warning(f"Recipe {item_data['recipe_id']} not found")
-                
-                # Handle split orders
                 if item_data.get('is_split') and item_data.get('split_assignments'):
-                    logger.info(f"Creating split orders for {item_data.get('item_name')}")
-                    
-                    # Create parent order first
-                    parent_order = ProductionOrder.objects.create(
+                    parent_order = ProductionOrder(
                         recipe=recipe,
                         item_name=item_data.get('item_name'),
                         item_code=item_data.get('item_code', ''),
@@ -1811,67 +1811,10 @@ def create_direct_production_orders(request):
                         source_orders=item_data.get('orders', []),
                         status='planned'
                     )
-                    logger.info(f"Created parent order: {parent_order.id}")
-                    
-                    # Create orders for each split assignment
-                    for i, split_assignment in enumerate(item_data.get('split_assignments', [])):
-                        try:
-                            # Get shift for this split
-                            split_shift = shift
-                            if split_assignment.get('shift_id') and split_assignment['shift_id'] != shift_id:
-                                try:
-                                    split_shift = ProductionShift.objects.get(id=split_assignment['shift_id'])
-                                except ProductionShift.DoesNotExist:
-                                    logger.warning(f"Split shift {split_assignment['shift_id']} not found")
-                            
-                            split_order = ProductionOrder.objects.create(
-                                recipe=recipe,
-                                item_name=f"{item_data.get('item_name')} (Split {i+1})",
-                                item_code=item_data.get('item_code', ''),
-                                planned_quantity=float(split_assignment.get('quantity', 0)),
-                                production_category_code=split_assignment.get('category_code', 'A'),
-                                assigned_to=split_assignment.get('assigned_to', 'Unassigned'),
-                                scheduled_date=production_date,
-                                shift=split_shift,
-                                is_split_order=True,
-                                parent_order=parent_order,
-                                notes=f"Split {i+1} of {item_data.get('item_name')} - Part of order #{parent_order.id}",
-                                source_orders=item_data.get('orders', []),
-                                status='planned'
-                            )
-                            
-                            created_orders.append({
-                                'id': split_order.id,
-                                'item_name': split_order.item_name,
-                                'recipe_name': recipe.name if recipe else None,
-                                'planned_quantity': float(split_assignment.get('quantity', 0)),
-                                'assigned_to': split_order.assigned_to,
-                                'category': split_assignment.get('category_code', 'A'),
-                                'is_split': True,
-                                'parent_id': parent_order.id
-                            })
-                            
-                            logger.info(f"Created split production order {split_order.id}")
-                            
-                        except Exception as split_error:
-                            error_msg = f"Error creating split {i+1} for {item_data.get('item_name')}: {str(split_error)}"
-                            logger.error(error_msg)
-                            errors.append(error_msg)
-                
+                    split_groups.append((parent_order, item_data, recipe))
                 else:
-                    # Regular single order
-                    logger.info(f"Creating regular order for {item_data.get('item_name')}")
-                    
-                    # Get shift - use item-specific shift if provided
-                    item_shift = shift
-                    if item_data.get('shift_id') and item_data['shift_id'] != shift_id:
-                        try:
-                            item_shift = ProductionShift.objects.get(id=item_data['shift_id'])
-                        except ProductionShift.DoesNotExist:
-                            logger.warning(f"Item shift {item_data['shift_id']} not found")
-                    
-                    # Create production order with all required fields
-                    production_order = ProductionOrder.objects.create(
+                    item_shift = resolve_shift(item_data.get('shift_id'), 'Item')
+                    production_order = ProductionOrder(
                         recipe=recipe,
                         item_name=item_data.get('item_name'),
                         item_code=item_data.get('item_code', ''),
@@ -1885,35 +1828,80 @@ def create_direct_production_orders(request):
                         source_orders=item_data.get('orders', []),
                         status='planned'
                     )
+                    single_orders.append((production_order, item_data))
                     
-                    created_orders.append({
-                        'id': production_order.id,
-                        'item_name': production_order.item_name,
-                        'recipe_name': recipe.name if recipe else None,
-                        'planned_quantity': float(item_data.get('production_quantity', 0)),
-                        'assigned_to': production_order.assigned_to,
-                        'category': item_data.get('production_category_code', 'A'),
-                        'is_split': False,
-                        'scheduled_date': production_date.isoformat(),
-                        'shift_name': item_shift.name if item_shift else None
-                    })
-                    
-                    logger.info(f"Created production order {production_order.id}")
-                
             except Exception as item_error:
                 error_msg = f"Error creating order for {item_data.get('item_name', 'unknown')}: {str(item_error)}"
                 logger.error(error_msg)
-                logger.exception(item_error)  # Full stack trace
                 errors.append(error_msg)
                 continue
         
-        # Verify orders were actually created
-        total_created = ProductionOrder.objects.filter(
-            scheduled_date=production_date,
-            created_at__gte=timezone.now() - timezone.timedelta(minutes=1)
-        ).count()
+        created_orders = []
+        rows_inserted = 0
+        
+        with transaction.atomic():
+            # Parents and regular orders first so split children can reference parent IDs
+            top_level = [order for order, _ in single_orders] + [parent for parent, _, _ in split_groups]
+            ProductionOrder.objects.bulk_create(apply_financials(top_level))
+            rows_inserted += len(top_level)
+            
+            split_children = []
+            for parent_order, item_data, recipe in split_groups:
+                for i, split_assignment in enumerate(item_data.get('split_assignments', [])):
+                    try:
+                        split_order = ProductionOrder(
+                            recipe=recipe,
+                            item_name=f"{item_data.get('item_name')} (Split {i+1})",
+                            item_code=item_data.get('item_code', ''),
+                            planned_quantity=float(split_assignment.get('quantity', 0)),
+                            production_category_code=split_assignment.get('category_code', 'A'),
+                            assigned_to=split_assignment.get('assigned_to', 'Unassigned'),
+                            scheduled_date=production_date,
+                            shift=resolve_shift(split_assignment.get('shift_id'), 'Split'),
+                            is_split_order=True,
+                            parent_order=parent_order,
+                            notes=f"Split {i+1} of {item_data.get('item_name')} - Part of order #{parent_order.id}",
+                            source_orders=item_data.get('orders', []),
+                            status='planned'
+                        )
+                        split_children.append((split_order, split_assignment, recipe))
+                    except Exception as split_error:
+                        error_msg = f"Error creating split {i+1} for {item_data.get('item_name')}: {str(split_error)}"
+                        logger.error(error_msg)
+                        errors.append(error_msg)
+            
+            ProductionOrder.objects.bulk_create(apply_financials([order for order, _, _ in split_children]))
+            rows_inserted += len(split_children)
         
-        logger.info(f"Database verification: {total_created} orders created in last minute")
+        # bulk_create skips post_save, so refresh dependent caches explicitly
+        invalidate_dashboard()
+        
+        for production_order, item_data in single_orders:
+            created_orders.append({
+                'id': production_order.id,
+                'item_name': production_order.item_name,
+                'recipe_name': production_order.recipe.name if production_order.recipe else None,
+                'planned_quantity': float(item_data.get('production_quantity', 0)),
+                'assigned_to': production_order.assigned_to,
+                'category': item_data.get('production_category_code', 'A'),
+                'is_split': False,
+                'scheduled_date': production_date.isoformat(),
+                'shift_name': production_order.shift.name if production_order.shift else None
+            })
+        
+        for split_order, split_assignment, recipe in split_children:
+            created_orders.append({
+                'id': split_order.id,
+                'item_name': split_order.item_name,
+                'recipe_name': recipe.name if recipe else None,
+                'planned_quantity': float(split_assignment.get('quantity', 0)),
+                'assigned_to': split_order.assigned_to,
+                'category': split_assignment.get('category_code', 'A'),
+                'is_split': True,
+                'parent_id': split_order.parent_order_id
+            })
+        
+        logger.info(f"Bulk created {rows_inserted} production orders for {production_date}")
         
         return JsonResponse({
             'success': len(created_orders) > 0,
@@ -1921,7 +1909,8 @@ def create_direct_production_orders(request):
             'created_orders': created_orders,
             'errors': errors,
             'total_created': len(created_orders),
-            'database_count': total_created
+            'database_count': rows_inserted,
+            'created_ids': [order['id'] for order in created_orders]
         })
         
     except Exception as e:
@@ -2113,6 +2102,26 @@ def get_production_assignments(request):
 
 
 
+@api_view(['POST'])
+def submit_production_orders_to_manager(request):
+    """Submit several completed production orders to Manager.io in one request"""
+    try:
+        try:
+            order_ids = requested_order_ids(request.data)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+        logger.info(f"=== MANAGER.IO BULK SUBMISSION FOR {len(order_ids)} ORDERS ===")
+        return JsonResponse(submit_production_orders(order_ids))
+
+    except Exception as e:
+        logger.error(f"Error in bulk Manager.io submission: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+
 @api_view(['POST'])
 def submit_production_order_to_manager(request, order_id):
     """Submit completed production order to Manager.io - FINAL WORKING VERSION"""
@@ -2136,7 +2145,7 @@ def submit_production_order_to_manager(request, order_id):
         # Find finished good item
         finished_item = None
         if production_order.item_code:
-            finished_item = ManagerInventoryItem.objects.filter(code=production_order.item_code).first()
+            finished_item = inventory_repository.get_by_code(production_order.item_code)
             
         if not finished_item:
             return JsonResponse({
@@ -2145,47 +2154,11 @@ def submit_production_order_to_manager(request, order_id):
             })
         
         # Process ingredients - FIXED decimal/float issue
-        bill_of_materials = []
-        if production_order.recipe:
-            recipe_ingredients = production_order.recipe.recipeingredient_set.all()
-            recipe_yield = float(production_order.recipe.yield_quantity or 1)
-            actual_qty = float(production_order.actual_quantity or production_order.planned_quantity or 1)
-            batch_multiplier = actual_qty / recipe_yield
-            
-            for ingredient in recipe_ingredients:
-                if (ingredient.inventory_item and 
-                    ingredient.inventory_item.manager_item_id and 
-                    len(ingredient.inventory_item.manager_item_id) > 30):  # Valid UUID
-                    
-                    # FIXED: Convert Decimal to float before calculation
-                    ingredient_qty = float(ingredient.quantity)
-                    total_qty = round(ingredient_qty * batch_multiplier, 2)
-                    
-                    if total_qty > 0:
-                        bill_of_materials.append({
-                            "BillOfMaterials": ingredient.inventory_item.manager_item_id,
-                            "Qty": total_qty
-                        })
+        recipe_ingredients = production_order.recipe.recipeingredient_set.all() if production_order.recipe else []
+        bill_of_materials = production_bill_of_materials(production_order, recipe_ingredients)
         
         # Create EXACT Manager.io format - FIXED: Added Qty field for finished good
-        finished_qty = float(production_order.actual_quantity or production_order.planned_quantity or 1)
-        
-        payload = {
-            "Date": production_order.scheduled_date.strftime('%Y-%m-%dT%H:%M:%S'),
-            "FinishedInventoryItem": finished_item.manager_item_id,
-            "Qty": finished_qty,  # FIXED: Add the finished good quantity
-            "BillOfMaterials": bill_of_materials,
-            "ExpenseItems": [{}],
-            "CustomFields": {},
-            "CustomFields2": {
-                "Strings": {},
-                "Decimals": {},
-                "Dates": {},
-                "Booleans": {},
-                "StringArrays": {},
-                "Images": {}
-            }
-        }
+        payload = production_order_payload(production_order, finished_item, bill_of_materials)
         
         logger.info(f"Submitting: {len(bill_of_materials)} ingredients")
         
@@ -2199,21 +2172,21 @@ def submit_production_order_to_manager(request, order_id):
             'Accept': 'application/json'
         }
         
-        response = requests.post(
-            f"{api_url}/production-order-form",
-            headers=headers,
-            json=payload,
-            timeout=30.0
-        )
+        with track_manager_call():
+            response = requests.post(
+                f"{api_url}/production-order-form",
+                headers=headers,
+                json=payload,
+                timeout=30.0
+            )
         
         logger.info(f"Response: {response.status_code}")
         
         if response.status_code in [200, 201, 202]:
             # Success!
             try:
-                response_data = response.json()
-                manager_order_id = response_data.get('key', 'submitted')
-            except:
+                manager_order_id = response_key(response.json(), 'submitted')
+            except ValueError:
                 manager_order_id = 'submitted'
             
             # Update production order
@@ -2232,35 +2205,20 @@ def submit_production_order_to_manager(request, order_id):
             # If full payload fails, try without ingredients
             logger.warning(f"Full payload failed ({response.status_code}), trying without ingredients...")
             
-            simple_payload = {
-                "Date": production_order.scheduled_date.strftime('%Y-%m-%dT%H:%M:%S'),
-                "FinishedInventoryItem": finished_item.manager_item_id,
-                "Qty": finished_qty,  # FIXED: Include quantity in fallback too
-                "BillOfMaterials": [],
-                "ExpenseItems": [{}],
-                "CustomFields": {},
-                "CustomFields2": {
-                    "Strings": {},
-                    "Decimals": {},
-                    "Dates": {},
-                    "Booleans": {},
-                    "StringArrays": {},
-                    "Images": {}
-                }
-            }
+            simple_payload = production_order_payload(production_order, finished_item, [])
             
-            simple_response = requests.post(
-                f"{api_url}/production-order-form",
-                headers=headers,
-                json=simple_payload,
-                timeout=30.0
-            )
+            with track_manager_call():
+                simple_response = requests.post(
+                    f"{api_url}/production-order-form",
+                    headers=headers,
+                    json=simple_payload,
+                    timeout=30.0
+                )
             
             if simple_response.status_code in [200, 201, 202]:
                 try:
-                    simple_data = simple_response.json()
-                    manager_order_id = simple_data.get('key', 'submitted')
-                except:
+                    manager_order_id = response_key(simple_response.json(), 'submitted')
+                except ValueError:
                     manager_order_id = 'submitted'
                 
                 production_order.manager_order_id = manager_order_id
@@ -2309,9 +2267,7 @@ def debug_production_ingredients(request, order_id):
         
         # Check finished good
         if production_order.item_code:
-            finished_item = ManagerInventoryItem.objects.filter(
-                code=production_order.item_code
-            ).first()
+            finished_item = inventory_repository.get_by_code(production_order.item_code)
             if finished_item:
                 debug_info['finished_good'] = {
                     'name': finished_item.name,
@@ -2336,9 +2292,7 @@ def debug_production_ingredients(request, order_id):
                 
                 if ingredient.inventory_item:
                     # Get the ManagerInventoryItem details
-                    manager_item = ManagerInventoryItem.objects.filter(
-                        id=ingredient.inventory_item.id
-                    ).first()
+                    manager_item = inventory_repository.get_by_id(ingredient.inventory_item.id)
                     
                     ingredient_info['inventory_item'] = {
                         'id': ingredient.inventory_item.id,
@@ -2350,9 +2304,9 @@ def debug_production_ingredients(request, order_id):
                     
                     # Also check if this UUID exists in our recent inventory sync
                     if ingredient.inventory_item.manager_item_id:
-                        uuid_exists = ManagerInventoryItem.objects.filter(
-                            manager_item_id=ingredient.inventory_item.manager_item_id
-                        ).exists()
+                        uuid_exists = inventory_repository.get_by_uuid(
+                            ingredient.inventory_item.manager_item_id
+                        ) is not None
                         ingredient_info['inventory_item']['uuid_exists_in_db'] = uuid_exists
                 
                 debug_info['ingredients'].append(ingredient_info)
@@ -2373,6 +2327,39 @@ def debug_production_ingredients(request, order_id):
             'error': str(e)
         }, status=500)
 
+def _connection_test_payload(result, circuit_state):
+    """Body of the test-manager-connection response"""
+    # Get current settings (mask the API key)
+    api_key = getattr(settings, 'MANAGER_API_KEY', '')
+    api_url = getattr(settings, 'MANAGER_API_URL', '')
+    return {
+        'connection_test': result,
+        'circuit_breaker': circuit_state,
+        'configuration': {
+            'api_url': api_url,
+            'api_key_configured': bool(api_key),
+            'api_key_length': len(api_key),
+            'api_key_preview': f"{api_key[:10]}...{api_key[-10:]}" if len(api_key) > 20 else 'TOO_SHORT',
+            'expected_url_format': 'https://{subdomain}.manager.io/api2'
+        },
+        'troubleshooting': {
+            'check_1': 'Ensure API key is correct in settings.py',
+            'check_2': 'Ensure API URL ends with /api2',
+            'check_3': 'API key should be from Manager.io Settings > API',
+            'check_4': 'Make sure the API key has inventory read permissions'
+        }
+    }
+
+
+def _circuit_open_result(service):
+    """Connection test result for an open circuit breaker, or None if requests may be sent"""
+    try:
+        service.circuit_breaker.before_call()
+    except CircuitOpenError as e:
+        return {'success': False, 'circuit': 'open', 'message': str(e), 'api_url': service.api_url}
+    return None
+
+
 @api_view(['GET'])
 def test_manager_connection(request):
     """Test Manager.io API connection and authentication"""
@@ -2382,29 +2369,10 @@ def test_manager_connection(request):
         
         api_service = ManagerApiService()
         
-        # Get current settings (mask the API key)
-        api_key = getattr(settings, 'MANAGER_API_KEY', '')
-        api_url = getattr(settings, 'MANAGER_API_URL', '')
+        # While the circuit is open nothing is sent; an old successful result would hide the outage
+        result = _circuit_open_result(api_service) or api_service.test_connection()
         
-        # Test the connection
-        result = api_service.test_connection()
-        
-        return JsonResponse({
-            'connection_test': result,
-            'configuration': {
-                'api_url': api_url,
-                'api_key_configured': bool(api_key),
-                'api_key_length': len(api_key),
-                'api_key_preview': f"{api_key[:10]}...{api_key[-10:]}" if len(api_key) > 20 else 'TOO_SHORT',
-                'expected_url_format': 'https://{subdomain}.manager.io/api2'
-            },
-            'troubleshooting': {
-                'check_1': 'Ensure API key is correct in settings.py',
-                'check_2': 'Ensure API URL ends with /api2',
-                'check_3': 'API key should be from Manager.io Settings > API',
-                'check_4': 'Make sure the API key has inventory read permissions'
-            }
-        })
+        return JsonResponse(_connection_test_payload(result, api_service.circuit_breaker.state()))
         
     except Exception as e:
         logger.error(f"Connection test error: {str(e)}")
@@ -2453,7 +2421,7 @@ def get_materials_required(request):
                         continue
                         
                     material_key = inventory_item.id
-                    required_qty = ingredient.quantity * production_quantity
+                    required_qty = float(ingredient.quantity) * production_quantity
                     
                     if material_key in requirements:
                         requirements[material_key]['total_required'] += required_qty
@@ -2538,3 +2506,17 @@ def save_materials_requisition(request):
         }, status=500)
     
 
+
+@require_GET
+def metrics(request):
+    """Prometheus metrics for this process (internal); plain Django view so scrapers skip DRF negotiation"""
+    remote_addr = request.META.get('REMOTE_ADDR')
+    allowed = (
+        settings.DEBUG
+        or remote_addr in getattr(settings, 'METRICS_ALLOWED_IPS', [])
+        or (request.user.is_authenticated and request.user.is_staff)
+    )
+    if not allowed:
+        return JsonResponse({'success': False, 'error': 'Forbidden'}, status=403)
+    
+    return HttpResponse(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
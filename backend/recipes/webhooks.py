@@ -0,0 +1,249 @@
+# backend/recipes/webhooks.py - Incremental updates from Manager.io change events
+#
+# manager_webhook (views_compat.py) checks each delivery against
+# MANAGER_WEBHOOK_SECRET and queues one ManagerWebhookEvent per changed record.
+# Repeated events for a record that is still pending collapse into one row.
+# process_webhook_events() then runs in the same request (the default), or, with
+# MANAGER_WEBHOOK_PROCESS_INLINE off, in `manage.py process_webhook_events --loop`
+# run as its own process; the view logs an error if events sit unprocessed. It
+# fetches only the affected records from Manager.io and writes them through the same
+# code as the full syncs, so price history, the search index and the caches stay
+# consistent. With a secret configured the full syncs run nightly as a
+# reconciliation (see celery.py), otherwise hourly.
+#
+# A delivery is one event object, a list of them, or {"events": [...]}, e.g.
+#   {"event": "updated", "type": "InventoryItem", "key": "<uuid>"}
+# It is authenticated by an X-Manager-Signature header holding the hex HMAC-SHA256
+# of the raw body (optionally prefixed "sha256="), or by the secret itself in an
+# X-Webhook-Token header for senders that cannot sign. A ?token= query parameter is
+# accepted only with MANAGER_WEBHOOK_ALLOW_QUERY_TOKEN, since it puts the secret in
+# access logs.
+
+import hashlib
+import hmac
+import logging
+import re
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import ManagerWebhookEvent, Order
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'HTTP_X_MANAGER_SIGNATURE'
+TOKEN_HEADER = 'HTTP_X_WEBHOOK_TOKEN'
+TOKEN_PARAM = 'token'
+
+# Normalized record type names (lowercase, letters only) -> ManagerWebhookEvent.entity_type
+ENTITY_TYPES = {
+    'inventoryitem': 'inventory_item',
+    'inventoryitems': 'inventory_item',
+    'item': 'inventory_item',
+    'customer': 'customer',
+    'customers': 'customer',
+    'salesorder': 'sales_order',
+    'salesorders': 'sales_order',
+}
+
+DELETE_ACTIONS = ('deleted', 'delete', 'removed')
+
+
+def verify_request(request):
+    """True if the request is signed with, or carries, MANAGER_WEBHOOK_SECRET"""
+    secret = getattr(settings, 'MANAGER_WEBHOOK_SECRET', '')
+    if not secret:
+        logger.warning("Manager.io webhook rejected: MANAGER_WEBHOOK_SECRET is not configured")
+        return False
+
+    signature = request.META.get(SIGNATURE_HEADER, '')
+    if signature:
+        expected = hmac.new(secret.encode(), request.body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(signature.strip().lower().removeprefix('sha256='), expected)
+
+    token = request.META.get(TOKEN_HEADER, '')
+    if not token and TOKEN_PARAM in request.GET:
+        if not getattr(settings, 'MANAGER_WEBHOOK_ALLOW_QUERY_TOKEN', False):
+            logger.warning("Manager.io webhook rejected: ?token= is disabled, send the X-Webhook-Token header")
+            return False
+        token = request.GET[TOKEN_PARAM]
+    return bool(token) and hmac.compare_digest(token.encode(), secret.encode())
+
+
+def _first(event, names):
+    for name in names:
+        value = event.get(name)
+        if value not in (None, ''):
+            return str(value).strip()
+    return ''
+
+
+def parse_events(payload):
+    """Return (events, ignored) where events are dicts of entity_type, entity_key, action and payload"""
+    if isinstance(payload, dict) and isinstance(payload.get('events'), list):
+        payload = payload['events']
+    raw_events = payload if isinstance(payload, list) else [payload]
+
+    events = []
+    ignored = 0
+    for raw in raw_events:
+        if not isinstance(raw, dict):
+            ignored += 1
+            continue
+        entity_type = ENTITY_TYPES.get(
+            re.sub(r'[^a-z]', '', _first(raw, ['type', 'Type', 'entity', 'Entity', 'objectType', 'resource']).lower())
+        )
+        entity_key = _first(raw, ['key', 'Key', 'id', 'ID', 'objectKey'])
+        if entity_type is None or not entity_key:
+            ignored += 1
+            continue
+        action = _first(raw, ['event', 'Event', 'action', 'Action']).lower() or 'updated'
+        events.append({
+            'entity_type': entity_type,
+            'entity_key': entity_key[:255],
+            'action': 'deleted' if action in DELETE_ACTIONS else action[:20],
+            'payload': raw,
+        })
+    return events, ignored
+
+
+def enqueue_events(events):
+    """Queue parsed events; returns the number of new queue rows"""
+    queued = 0
+    now = timezone.now()
+    for event in events:
+        # A pending event for the same record already triggers a fresh fetch
+        coalesced = ManagerWebhookEvent.objects.filter(
+            entity_type=event['entity_type'], entity_key=event['entity_key'], status='pending'
+        ).update(action=event['action'], payload=event['payload'], received_at=now)
+        if not coalesced:
+            ManagerWebhookEvent.objects.create(**event)
+            queued += 1
+    return queued
+
+
+def check_worker_draining():
+    """Log an error when no worker has touched the oldest pending event within the claim timeout"""
+    stale_before = timezone.now() - timedelta(seconds=getattr(settings, 'MANAGER_WEBHOOK_CLAIM_TIMEOUT', 600))
+    stale = ManagerWebhookEvent.objects.filter(status='pending', attempts=0, received_at__lt=stale_before)
+    oldest = stale.order_by('received_at').values_list('received_at', flat=True).first()
+    if oldest is not None:
+        logger.error(
+            f"Manager.io webhook events have waited since {oldest.isoformat()} with "
+            f"MANAGER_WEBHOOK_PROCESS_INLINE off; is `manage.py process_webhook_events --loop` running?"
+        )
+        return False
+    return True
+
+
+def _claim_events(limit):
+    """Mark up to ``limit`` pending events as processing and return them"""
+    stale_before = timezone.now() - timedelta(seconds=getattr(settings, 'MANAGER_WEBHOOK_CLAIM_TIMEOUT', 600))
+    ManagerWebhookEvent.objects.filter(status='processing', claimed_at__lt=stale_before).update(status='pending')
+
+    ids = list(
+        ManagerWebhookEvent.objects.filter(status='pending').order_by('received_at').values_list('id', flat=True)[:limit]
+    )
+    if not ids:
+        return []
+    # The claim time doubles as a token: a concurrent worker's update finds nothing pending
+    claimed_at = timezone.now()
+    ManagerWebhookEvent.objects.filter(id__in=ids, status='pending').update(status='processing', claimed_at=claimed_at)
+    return list(ManagerWebhookEvent.objects.filter(id__in=ids, status='processing', claimed_at=claimed_at))
+
+
+def _finish(events, error=None):
+    if not events:
+        return
+    now = timezone.now()
+    if error is None:
+        ManagerWebhookEvent.objects.filter(id__in=[event.id for event in events]).update(
+            status='done', processed_at=now, error=''
+        )
+        return
+
+    max_attempts = getattr(settings, 'MANAGER_WEBHOOK_MAX_ATTEMPTS', 5)
+    for event in events:
+        event.attempts += 1
+        event.status = 'failed' if event.attempts >= max_attempts else 'pending'
+        event.error = error[:1000]
+        event.processed_at = now
+    ManagerWebhookEvent.objects.bulk_update(events, ['attempts', 'status', 'error', 'processed_at'])
+
+
+def _apply_results(events, result):
+    failed = result['failed']
+    _finish([event for event in events if event.entity_key not in failed])
+    for key, error in failed.items():
+        _finish([event for event in events if event.entity_key == key], error)
+
+
+def _process_inventory(api_service, events):
+    keys = [event.entity_key for event in events if event.action != 'deleted']
+    result = api_service.sync_inventory_items_by_key(keys)
+    # Items deleted in Manager.io stay until the nightly full sync; recipes may still use them
+    _apply_results(events, result)
+    return result['details']
+
+
+def _process_customers(api_service, events):
+    keys = [event.entity_key for event in events if event.action != 'deleted']
+    deleted = [event.entity_key for event in events if event.action == 'deleted']
+    result = api_service.sync_customers_by_key(keys, deleted_keys=deleted)
+    _apply_results(events, result)
+    return result['details']
+
+
+def _process_sales_orders(events):
+    """Reflect sales orders created or deleted in Manager.io on the local Order sync status"""
+    deleted = [event.entity_key for event in events if event.action == 'deleted']
+    present = [event.entity_key for event in events if event.action != 'deleted']
+    with transaction.atomic():
+        unlinked = Order.objects.filter(manager_order_id__in=deleted).update(
+            manager_order_id=None, sync_status='not_synced'
+        ) if deleted else 0
+        confirmed = Order.objects.filter(manager_order_id__in=present).exclude(sync_status='synced').update(
+            sync_status='synced'
+        ) if present else 0
+    _finish(events)
+    return {'unlinked_orders': unlinked, 'confirmed_orders': confirmed}
+
+
+def process_webhook_events(limit=None):
+    """Fetch and apply the records named by pending webhook events; returns a summary"""
+    from .manager_api import ManagerApiService
+
+    limit = limit or getattr(settings, 'MANAGER_WEBHOOK_BATCH_SIZE', 200)
+    events = _claim_events(limit)
+    summary = {'events': len(events)}
+    if not events:
+        return summary
+
+    by_type = {}
+    for event in events:
+        by_type.setdefault(event.entity_type, []).append(event)
+
+    api_service = ManagerApiService()
+    handlers = {
+        'inventory_item': lambda batch: _process_inventory(api_service, batch),
+        'customer': lambda batch: _process_customers(api_service, batch),
+        'sales_order': _process_sales_orders,
+    }
+    for entity_type, batch in by_type.items():
+        try:
+            summary[entity_type] = handlers[entity_type](batch)
+        except Exception as e:
+            logger.error(f"Error processing {entity_type} webhook events: {str(e)}")
+            _finish(batch, str(e))
+            summary[entity_type] = {'error': str(e)}
+
+    summary['api'] = api_service.client_stats.summary()
+    logger.info("Processed %d Manager.io webhook events", len(events))
+    return summary
+
+
+def prune_webhook_events(older_than_days):
+    """Delete processed events older than ``older_than_days``; failed events are kept for inspection"""
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = ManagerWebhookEvent.objects.filter(status='done', processed_at__lt=cutoff).delete()
+    return deleted